@@ -3,7 +3,16 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from apps.bau_mental.models import Box, Note, BoxShare, BoxShareInvite, Thread, ThreadMessage
+from apps.bau_mental.models import (
+    Box,
+    BoxClassifierState,
+    Note,
+    BoxShare,
+    BoxShareInvite,
+    Thread,
+    ThreadMessage,
+    TranscriptionSettings,
+)
 
 
 @admin.register(Box)
@@ -106,6 +115,32 @@ class BoxShareInviteAdmin(admin.ModelAdmin):
     date_hierarchy = "created_at"
 
 
+@admin.register(TranscriptionSettings)
+class TranscriptionSettingsAdmin(admin.ModelAdmin):
+    """Admin para modelo TranscriptionSettings."""
+
+    list_display = ["workspace", "backend", "updated_at"]
+    list_filter = ["backend"]
+    search_fields = ["workspace__name"]
+    readonly_fields = ["created_at", "updated_at"]
+
+
+@admin.register(BoxClassifierState)
+class BoxClassifierStateAdmin(admin.ModelAdmin):
+    """Admin para modelo BoxClassifierState."""
+
+    list_display = [
+        "workspace",
+        "trained_notes",
+        "temperature",
+        "local_predictions",
+        "llm_predictions",
+        "trained_at",
+    ]
+    search_fields = ["workspace__name"]
+    readonly_fields = ["box_stats", "created_at", "updated_at", "trained_at"]
+
+
 @admin.register(Thread)
 class ThreadAdmin(admin.ModelAdmin):
     """Admin para modelo Thread."""
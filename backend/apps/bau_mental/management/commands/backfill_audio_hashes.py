@@ -0,0 +1,74 @@
+"""Management command para calcular o SHA-256 dos áudios de notas existentes.
+
+Uso:
+    python manage.py backfill_audio_hashes
+    python manage.py backfill_audio_hashes --workspace <uuid> --limit 500
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.bau_mental.models import Note
+from apps.bau_mental.utils import sha256_file
+
+
+class Command(BaseCommand):
+    """Preenche Note.audio_sha256 lendo os áudios do storage em blocos."""
+
+    help = "Calcula o hash dos áudios de notas antigas (cache de transcrições)"
+
+    def add_arguments(self, parser):
+        """Adiciona argumentos do comando."""
+        parser.add_argument(
+            "--workspace",
+            help="ID do workspace (padrão: todos)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Notas gravadas por UPDATE em lote (padrão: 100)",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Máximo de notas processadas nesta execução",
+        )
+
+    def handle(self, *args, **options):
+        """Executa o backfill."""
+        notes = (
+            Note.objects.filter(audio_sha256__isnull=True)
+            .exclude(audio_file="")
+            .exclude(audio_file__isnull=True)
+            .only("id", "audio_file")
+            .order_by("created_at")
+        )
+        if options["workspace"]:
+            notes = notes.filter(workspace_id=options["workspace"])
+        if options["limit"]:
+            notes = notes[: options["limit"]]
+
+        batch_size = options["batch_size"]
+        batch = []
+        hashed = missing = 0
+        for note in notes.iterator(chunk_size=batch_size):
+            try:
+                with note.audio_file.open("rb") as audio_file:
+                    note.audio_sha256 = sha256_file(audio_file)
+            except (OSError, ValueError) as e:
+                # Áudio expirado/removido do storage
+                missing += 1
+                self.stderr.write(f"Nota {note.id}: áudio indisponível ({e})")
+                continue
+
+            batch.append(note)
+            if len(batch) >= batch_size:
+                hashed += Note.objects.bulk_update(batch, ["audio_sha256"])
+                batch = []
+        if batch:
+            hashed += Note.objects.bulk_update(batch, ["audio_sha256"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{hashed} notas com hash calculado ({missing} sem áudio disponível)."
+        ))
@@ -0,0 +1,183 @@
+"""Management command para comparar a montagem de contexto do QueryService.
+
+Gera um workspace sintético (em memória) e compara a estratégia antiga
+(todas as notas até 80k tokens estimados; acima disso as 10 mais antigas +
+30 mais recentes) com o empacotamento por orçamento de tokens.
+
+Uso:
+    python manage.py benchmark_query_context
+    python manage.py benchmark_query_context --notes 5000 --budget 12000
+    python manage.py benchmark_query_context --live   # chama a OpenAI (latência real)
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bau_mental.services.context_packer import count_tokens
+from apps.bau_mental.services.query import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE, QueryService
+
+VOCABULARY = (
+    "reunião projeto cliente mercado ligar amanhã semana comprar pagar conta banco "
+    "ideia aplicativo viagem família médico consulta exame carro oficina escola "
+    "filhos jantar receita academia treino livro curso inglês trabalho prazo "
+    "relatório apresentação equipe contrato fornecedor entrega orçamento planilha "
+    "investimento ações dividendos aluguel condomínio jardim cachorro veterinário "
+    "presente aniversário festa música filme série podcast estudo certificado"
+).split()
+
+NEEDLE_SENTENCES = [
+    "O pedreiro passou o orçamento da reforma do telhado: doze mil reais com as telhas.",
+    "Decidi adiar a reforma do telhado para depois da época de chuvas.",
+    "A reforma do telhado vai precisar de calha nova, segundo o pedreiro.",
+    "Paguei a primeira parcela da reforma do telhado hoje.",
+]
+
+DEFAULT_QUESTION = "O que já foi dito sobre a reforma do telhado?"
+
+
+class Command(BaseCommand):
+    """Benchmark de tokens de prompt e latência: contexto antigo vs empacotado."""
+
+    help = "Compara tokens de prompt e latência da montagem de contexto (antiga vs empacotada)"
+
+    def add_arguments(self, parser):
+        """Adiciona argumentos do comando."""
+        parser.add_argument("--notes", type=int, default=5000, help="Quantidade de notas sintéticas")
+        parser.add_argument("--needles", type=int, default=20, help="Notas que respondem à pergunta")
+        parser.add_argument("--question", default=DEFAULT_QUESTION, help="Pergunta do benchmark")
+        parser.add_argument("--budget", type=int, default=None, help="Orçamento de tokens do prompt")
+        parser.add_argument("--seed", type=int, default=42, help="Semente do gerador")
+        parser.add_argument(
+            "--live",
+            action="store_true",
+            help="Envia os dois prompts à OpenAI e mede latência ponta a ponta",
+        )
+
+    def handle(self, *args, **options):
+        """Executa o benchmark."""
+        rng = random.Random(options["seed"])
+        notes, needle_ids = self._synthetic_notes(rng, options["notes"], options["needles"])
+        question = options["question"]
+        query_service = QueryService()
+
+        # Estratégia antiga recebia as notas em ordem cronológica; a nova recebe
+        # as mais recentes primeiro (mesmo conjunto de notas, como no viewset)
+        started = time.perf_counter()
+        legacy_messages, legacy_ids = self._legacy_messages(question, notes)
+        legacy_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        prompt = query_service.build_messages(question, list(reversed(notes)), options["budget"])
+        packed_ms = (time.perf_counter() - started) * 1000
+        packed_ids = {source["note_id"] for source in prompt["sources"]}
+
+        results = {
+            "antigo": {
+                "messages": legacy_messages,
+                "notes": len(legacy_ids),
+                "needles": len(needle_ids & legacy_ids),
+                "build_ms": legacy_ms,
+            },
+            "empacotado": {
+                "messages": prompt["messages"],
+                "notes": len(packed_ids),
+                "needles": len(needle_ids & packed_ids),
+                "build_ms": packed_ms,
+            },
+        }
+
+        if options["live"]:
+            if not query_service.is_available():
+                raise CommandError("OpenAI não disponível (verifique OPENAI_API_KEY)")
+            for result in results.values():
+                result.update(self._live_call(query_service, result["messages"]))
+
+        self.stdout.write(
+            f"Workspace sintético: {len(notes)} notas, {len(needle_ids)} relevantes para "
+            f"\"{question}\""
+        )
+        for name, result in results.items():
+            prompt_tokens = sum(count_tokens(m["content"]) for m in result["messages"])
+            line = (
+                f"{name:>10}: {prompt_tokens:>9} tokens de prompt | "
+                f"{result['notes']:>5} notas | "
+                f"{result['needles']:>3}/{len(needle_ids)} relevantes | "
+                f"montagem {result['build_ms']:.0f} ms"
+            )
+            if "latency_ms" in result:
+                line += (
+                    f" | ponta a ponta {result['latency_ms']:.0f} ms"
+                    f" ({result['api_prompt_tokens']} tokens cobrados)"
+                )
+            self.stdout.write(line)
+
+    def _synthetic_notes(self, rng: random.Random, total: int, needles: int):
+        """Gera notas sintéticas (dicts no formato do QueryService)."""
+        start = datetime(2024, 1, 1)
+        needle_positions = set(rng.sample(range(total), min(needles, total)))
+        notes = []
+        needle_ids = set()
+        for i in range(total):
+            words = rng.choices(VOCABULARY, k=rng.randint(40, 400))
+            sentences = [
+                " ".join(words[j:j + 12]).capitalize() + "."
+                for j in range(0, len(words), 12)
+            ]
+            note_id = f"note-{i:05d}"
+            if i in needle_positions:
+                sentences.insert(rng.randint(0, len(sentences)), rng.choice(NEEDLE_SENTENCES))
+                needle_ids.add(note_id)
+            created_at = start + timedelta(minutes=i * (2 * 365 * 24 * 60) // total)
+            notes.append(
+                {
+                    "id": note_id,
+                    "transcript": " ".join(sentences),
+                    "created_at": created_at.strftime("%d/%m/%Y"),
+                    "box_name": "Casa",
+                }
+            )
+        return notes, needle_ids
+
+    def _legacy_messages(self, question: str, notes: list):
+        """Reproduz a montagem de contexto anterior ao empacotamento."""
+        total_tokens = sum(len(note["transcript"]) // 4 for note in notes)
+        notes_sorted = sorted(notes, key=lambda n: n.get("created_at", ""))
+        if total_tokens < 80000:
+            notes_to_use = notes_sorted
+        else:
+            seen_ids = set()
+            notes_to_use = []
+            for note in notes_sorted[:10] + notes_sorted[-30:]:
+                if note["id"] not in seen_ids:
+                    seen_ids.add(note["id"])
+                    notes_to_use.append(note)
+
+        notes_text = "\n\n".join(
+            f"📅 {note['created_at']} - {note.get('box_name', 'Inbox')}\n{note['transcript']}"
+            for note in notes_to_use
+        )
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": USER_PROMPT_TEMPLATE.format(notes_text=notes_text, question=question),
+            },
+        ]
+        return messages, {note["id"] for note in notes_to_use}
+
+    def _live_call(self, query_service: QueryService, messages: list) -> dict:
+        """Envia o prompt à OpenAI e mede a latência ponta a ponta."""
+        started = time.perf_counter()
+        response = query_service.client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=messages,
+            temperature=0.5,
+            max_tokens=1000,
+        )
+        return {
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "api_prompt_tokens": response.usage.prompt_tokens if response.usage else None,
+        }
@@ -0,0 +1,135 @@
+"""Management command para comparar a vazão dos backends de transcrição.
+
+Corta o áudio em trechos (como a transcrição de áudios longos) e transcreve
+todos em paralelo: o backend local em um pool de processos (modelo carregado
+uma vez por processo, fora da medição) e a Whisper API em threads. Reporta
+segundos de áudio por segundo de relógio e, no local, por núcleo de CPU.
+
+Uso:
+    python manage.py benchmark_transcription --file memo.ogg
+    python manage.py benchmark_transcription --file reuniao.m4a --backend local --workers 4
+    python manage.py benchmark_transcription --file memo.ogg --backend openai,local --repeat 3
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bau_mental.services.audio_segmenter import AudioSegmenter, plan_segments
+from apps.bau_mental.services.transcription_backends import (
+    BACKENDS,
+    LOCAL_WHISPER_CPU_THREADS,
+    LOCAL_WHISPER_MODEL,
+    get_backend,
+    local_transcribe,
+    local_worker_pool,
+)
+
+
+class Command(BaseCommand):
+    """Benchmark de vazão: Whisper local em CPU vs Whisper API."""
+
+    help = "Mede segundos de áudio transcritos por segundo (e por núcleo) em cada backend"
+
+    def add_arguments(self, parser):
+        """Adiciona argumentos do comando."""
+        parser.add_argument("--file", required=True, help="Arquivo de áudio do benchmark")
+        parser.add_argument(
+            "--backend",
+            default="openai,local",
+            help="Backends separados por vírgula (padrão: openai,local)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Processos (local) ou requisições simultâneas (openai)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=1,
+            help="Quantas vezes o áudio é enviado em cada rodada",
+        )
+        parser.add_argument(
+            "--segment-seconds",
+            type=float,
+            default=60.0,
+            help="Duração máxima de cada trecho (padrão: 60s)",
+        )
+
+    def handle(self, *args, **options):
+        """Executa o benchmark."""
+        names = [name.strip() for name in options["backend"].split(",") if name.strip()]
+        unknown = [name for name in names if name not in BACKENDS]
+        if unknown:
+            raise CommandError(f"Backend desconhecido: {', '.join(unknown)}")
+
+        segmenter = AudioSegmenter()
+        if not segmenter.is_available():
+            raise CommandError("ffmpeg/ffprobe não encontrados no PATH")
+
+        path = options["file"]
+        duration = segmenter.duration(path)
+        segments = plan_segments(
+            duration,
+            segmenter.detect_silences(path),
+            max_seconds=options["segment_seconds"],
+            min_seconds=options["segment_seconds"] / 2,
+        )
+        chunks = [
+            (f"trecho_{index:03d}.mp3", segmenter.export(path, start, end))
+            for index, (start, end) in enumerate(segments)
+        ] * options["repeat"]
+        audio_seconds = duration * options["repeat"]
+        workers = options["workers"]
+
+        self.stdout.write(
+            f"Áudio: {duration:.1f}s em {len(segments)} trechos x {options['repeat']} "
+            f"({audio_seconds:.1f}s no total), {workers} workers"
+        )
+        for name in names:
+            backend = get_backend(name)
+            if backend.name != name:
+                self.stderr.write(f"{name}: indisponível, ignorado")
+                continue
+
+            if name == "local":
+                elapsed, load_seconds = self._run_local(chunks, workers)
+                cores = workers * LOCAL_WHISPER_CPU_THREADS
+                self.stdout.write(
+                    f"{name:>7} ({LOCAL_WHISPER_MODEL}): {elapsed:.1f}s | "
+                    f"{audio_seconds / elapsed:.2f} s de áudio/s | "
+                    f"{audio_seconds / elapsed / cores:.2f} s de áudio/s por núcleo ({cores} núcleos) | "
+                    f"carga do modelo {load_seconds:.1f}s"
+                )
+            else:
+                elapsed = self._run_threads(backend, chunks, workers)
+                self.stdout.write(
+                    f"{name:>7}: {elapsed:.1f}s | {audio_seconds / elapsed:.2f} s de áudio/s"
+                )
+
+    def _run_local(self, chunks: list, workers: int):
+        """Transcreve os trechos no pool de processos; retorna (tempo, carga do modelo)."""
+        with local_worker_pool(workers) as pool:
+            # Sobe todos os processos (e carrega o modelo) antes de medir
+            started = time.perf_counter()
+            list(pool.map(time.sleep, [0.5] * workers))
+            load_seconds = time.perf_counter() - started - 0.5
+
+            started = time.perf_counter()
+            futures = [
+                pool.submit(local_transcribe, filename, content, "pt", None)
+                for filename, content in chunks
+            ]
+            for future in futures:
+                future.result()
+            return time.perf_counter() - started, max(load_seconds, 0.0)
+
+    def _run_threads(self, backend, chunks: list, workers: int) -> float:
+        """Transcreve os trechos em threads (requisições simultâneas à API)."""
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda chunk: backend.transcribe_bytes(chunk[0], chunk[1], "pt"), chunks))
+        return time.perf_counter() - started
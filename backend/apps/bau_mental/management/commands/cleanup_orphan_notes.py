@@ -59,7 +59,7 @@ class Command(BaseCommand):
         else:
             # Executar soft delete
             now = timezone.now()
-            updated = orphan_notes.update(deleted_at=now)
+            updated = orphan_notes.update(deleted_at=now, updated_at=now)
             self.stdout.write(self.style.SUCCESS(
                 f"Soft delete realizado em {updated} notas órfãs."
             ))
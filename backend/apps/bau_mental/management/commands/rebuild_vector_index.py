@@ -0,0 +1,70 @@
+"""Management command para (re)construir o índice vetorial de notas.
+
+Uso:
+    python manage.py rebuild_vector_index
+    python manage.py rebuild_vector_index --workspace <uuid>
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.bau_mental.models import Note
+from apps.bau_mental.services.embeddings import EmbeddingService
+from apps.bau_mental.services.vector_index import NoteVectorIndex
+
+
+class Command(BaseCommand):
+    """Reconstrói o índice vetorial (embeddings) das notas concluídas."""
+
+    help = "Reconstrói o índice vetorial de notas (backfill e compactação de removidas)"
+
+    def add_arguments(self, parser):
+        """Adiciona argumentos do comando."""
+        parser.add_argument(
+            "--workspace",
+            help="ID do workspace (padrão: todos os workspaces com notas)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Quantidade de textos por chamada de embeddings (padrão: 100)",
+        )
+
+    def handle(self, *args, **options):
+        """Executa a reconstrução."""
+        embedding_service = EmbeddingService()
+        if not embedding_service.is_available():
+            raise CommandError("Serviço de embeddings não disponível (verifique OPENAI_API_KEY)")
+
+        notes = Note.objects.filter(
+            processing_status="completed",
+            transcript__isnull=False,
+        ).exclude(transcript="")
+
+        if options["workspace"]:
+            workspace_ids = [options["workspace"]]
+        else:
+            workspace_ids = list(notes.values_list("workspace_id", flat=True).distinct())
+
+        batch_size = options["batch_size"]
+        for workspace_id in workspace_ids:
+            items = []
+            batch = []
+            queryset = notes.filter(workspace_id=workspace_id).only("id", "transcript")
+            for note in queryset.iterator(chunk_size=batch_size):
+                batch.append(note)
+                if len(batch) >= batch_size:
+                    items.extend(self._embed_batch(embedding_service, batch))
+                    batch = []
+            if batch:
+                items.extend(self._embed_batch(embedding_service, batch))
+
+            count = NoteVectorIndex(str(workspace_id)).rebuild(items, model=embedding_service.model)
+            self.stdout.write(self.style.SUCCESS(
+                f"Workspace {workspace_id}: {count} notas indexadas."
+            ))
+
+    def _embed_batch(self, embedding_service: EmbeddingService, batch: list) -> list:
+        """Gera embeddings de um lote de notas."""
+        vectors = embedding_service.embed([note.transcript for note in batch])
+        return [(str(note.id), vector) for note, vector in zip(batch, vectors)]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:43
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_add_updated_at_to_password_reset_token'),
+        ('bau_mental', '0015_add_box_cache_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteDigest',
+            fields=[
+                ('deleted_at', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Excluído em')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('digest', models.TextField(verbose_name='Digest')),
+                ('source_hash', models.CharField(help_text='SHA-256 da transcrição usada para gerar o digest', max_length=64, verbose_name='Hash da transcrição')),
+                ('note', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='digest', to='bau_mental.note', verbose_name='Anotação')),
+                ('workspace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='accounts.workspace', verbose_name='Workspace')),
+            ],
+            options={
+                'verbose_name': 'Digest de Anotação',
+                'verbose_name_plural': 'Digests de Anotações',
+            },
+        ),
+        migrations.CreateModel(
+            name='BoxSummaryNode',
+            fields=[
+                ('deleted_at', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Excluído em')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('level', models.CharField(choices=[('month', 'Mês'), ('year', 'Ano'), ('root', 'Raiz')], max_length=10, verbose_name='Nível')),
+                ('period', models.CharField(blank=True, default='', help_text='YYYY-MM (mês), YYYY (ano) ou vazio (raiz)', max_length=7, verbose_name='Período')),
+                ('summary', models.TextField(verbose_name='Resumo')),
+                ('source_hash', models.CharField(help_text='Hash dos nós filhos usados no resumo (detecta ramos desatualizados)', max_length=64, verbose_name='Hash dos filhos')),
+                ('note_count', models.IntegerField(default=0, verbose_name='Quantidade de notas')),
+                ('box', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summary_nodes', to='bau_mental.box', verbose_name='Caixinha')),
+                ('workspace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='accounts.workspace', verbose_name='Workspace')),
+            ],
+            options={
+                'verbose_name': 'Nó de Resumo de Caixinha',
+                'verbose_name_plural': 'Nós de Resumo de Caixinhas',
+                'ordering': ['box', 'level', 'period'],
+                'unique_together': {('box', 'level', 'period')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:57
+
+import importlib
+
+from django.db import migrations, models, connection
+
+
+def drop_update_box_note_count_trigger(apps, schema_editor):
+    """Remove trigger de note_count (contadores passam a ser mantidos no Note.save)."""
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TRIGGER IF EXISTS trigger_update_box_note_count ON bau_mental_note;")
+        cursor.execute("DROP FUNCTION IF EXISTS update_box_note_count();")
+
+
+def recreate_update_box_note_count_trigger(apps, schema_editor):
+    """Recria o trigger da migração 0015."""
+    migration_0015 = importlib.import_module(
+        'apps.bau_mental.migrations.0015_add_box_cache_fields'
+    )
+    migration_0015.create_update_box_note_count_trigger(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bau_mental', '0016_add_box_summary_tree'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='box',
+            name='last_note_at',
+            field=models.DateTimeField(blank=True, help_text='Data da nota mais recente (mantida no save da nota e reconciliada periodicamente)', null=True, verbose_name='Última nota em'),
+        ),
+        migrations.AlterField(
+            model_name='box',
+            name='note_count',
+            field=models.IntegerField(default=0, help_text='Contagem em cache (mantida no save da nota e reconciliada periodicamente)', verbose_name='Contagem de notas'),
+        ),
+        migrations.RunPython(
+            drop_update_box_note_count_trigger,
+            recreate_update_box_note_count_trigger,
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:06
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bau_mental', '0017_replace_box_note_count_trigger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='audio_sha256',
+            field=models.CharField(blank=True, db_index=True, help_text='Hash do conteúdo do áudio (reaproveita transcrições de áudios repetidos)', max_length=64, null=True, verbose_name='SHA-256 do áudio'),
+        ),
+        migrations.CreateModel(
+            name='TranscriptCache',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('audio_sha256', models.CharField(max_length=64, verbose_name='SHA-256 do áudio')),
+                ('language', models.CharField(max_length=10, verbose_name='Idioma')),
+                ('prompt_hash', models.CharField(blank=True, default='', help_text='SHA-256 do prompt enviado ao Whisper (vazio se sem prompt)', max_length=64, verbose_name='Hash do prompt')),
+                ('transcript', models.TextField(verbose_name='Transcrição')),
+                ('duration_seconds', models.FloatField(blank=True, null=True, verbose_name='Duração (segundos)')),
+                ('hit_count', models.PositiveIntegerField(default=0, verbose_name='Reaproveitamentos')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Cache de Transcrição',
+                'verbose_name_plural': 'Cache de Transcrições',
+                'unique_together': {('audio_sha256', 'language', 'prompt_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:12
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_add_updated_at_to_password_reset_token'),
+        ('bau_mental', '0018_add_transcript_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptionSettings',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('backend', models.CharField(choices=[('openai', 'Whisper API (OpenAI)'), ('local', 'Whisper local (CPU)')], default='openai', help_text='Local: processado nos workers da fila transcription_local', max_length=20, verbose_name='Backend')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('workspace', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='bau_mental_transcription_settings', to='accounts.workspace', verbose_name='Workspace')),
+            ],
+            options={
+                'verbose_name': 'Configuração de Transcrição',
+                'verbose_name_plural': 'Configurações de Transcrição',
+            },
+        ),
+    ]
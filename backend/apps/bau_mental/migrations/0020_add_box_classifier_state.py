@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:21
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_add_updated_at_to_password_reset_token'),
+        ('bau_mental', '0019_add_transcription_settings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoxClassifierState',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('box_stats', models.JSONField(blank=True, default=dict, help_text='{box_id: {"docs": n, "tokens": n, "terms": {termo: contagem}}}', verbose_name='Estatísticas por caixinha')),
+                ('temperature', models.FloatField(default=1.0, help_text='Calibração da confiança (ajustada no retreino)', verbose_name='Temperatura')),
+                ('trained_notes', models.PositiveIntegerField(default=0, verbose_name='Notas treinadas')),
+                ('trained_at', models.DateTimeField(blank=True, null=True, verbose_name='Retreinado em')),
+                ('heuristic_predictions', models.PositiveIntegerField(default=0, verbose_name='Classificações por heurística')),
+                ('local_predictions', models.PositiveIntegerField(default=0, verbose_name='Classificações pelo modelo local')),
+                ('llm_predictions', models.PositiveIntegerField(default=0, verbose_name='Classificações pela IA')),
+                ('llm_ms_total', models.PositiveBigIntegerField(default=0, verbose_name='Tempo total da IA (ms)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('workspace', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='bau_mental_box_classifier', to='accounts.workspace', verbose_name='Workspace')),
+            ],
+            options={
+                'verbose_name': 'Classificador de Caixinhas',
+                'verbose_name_plural': 'Classificadores de Caixinhas',
+            },
+        ),
+    ]
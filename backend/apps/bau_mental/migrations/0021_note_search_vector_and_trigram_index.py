@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:32
+
+import django.contrib.postgres.search
+from django.db import connection, migrations, models
+
+
+def create_trigram_index(apps, schema_editor):
+    """Cria índice trigram da transcrição (busca tolerante a erros de digitação).
+
+    Só se pg_trgm estiver instalada; sem ela a busca usa apenas full-text.
+    """
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if not cursor.fetchone():
+            return
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS note_transcript_trgm_idx
+            ON bau_mental_note USING GIN (transcript gin_trgm_ops);
+        """)
+
+
+def drop_trigram_index(apps, schema_editor):
+    """Remove índice trigram da transcrição."""
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS note_transcript_trgm_idx;")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bau_mental', '0020_add_box_classifier_state'),
+    ]
+
+    operations = [
+        # A coluna já existe (criada via SQL na 0013); só o estado do Django muda
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='note',
+                    name='search_vector',
+                    field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('transcript', config='portuguese'), output_field=django.contrib.postgres.search.SearchVectorField(), verbose_name='Vetor de busca'),
+                ),
+            ],
+            database_operations=[],
+        ),
+        migrations.RunPython(
+            create_trigram_index,
+            drop_trigram_index,
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_add_updated_at_to_password_reset_token'),
+        ('bau_mental', '0021_note_search_vector_and_trigram_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['workspace', 'created_at', 'id'], name='bau_mental__workspa_5a4f89_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bau_mental', '0022_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='memory_summarized_until',
+            field=models.DateTimeField(blank=True, help_text='Data da última mensagem incorporada ao resumo da conversa', null=True, verbose_name='Resumo até'),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='memory_summary',
+            field=models.TextField(blank=True, default='', help_text='Resumo acumulado das mensagens antigas (memória da thread)', verbose_name='Resumo da conversa'),
+        ),
+    ]
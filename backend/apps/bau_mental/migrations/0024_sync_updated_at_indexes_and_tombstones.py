@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:47
+
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_add_updated_at_to_password_reset_token'),
+        ('bau_mental', '0023_thread_memory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('workspace_id', models.UUIDField(verbose_name='Workspace')),
+                ('object_type', models.CharField(max_length=20, verbose_name='Tipo')),
+                ('object_id', models.UUIDField(verbose_name='Objeto')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='Excluído em')),
+            ],
+            options={
+                'verbose_name': 'Exclusão sincronizada',
+                'verbose_name_plural': 'Exclusões sincronizadas',
+            },
+        ),
+        migrations.AddField(
+            model_name='boxshare',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Atualizado em'),
+        ),
+        migrations.AddIndex(
+            model_name='box',
+            index=models.Index(fields=['workspace', 'updated_at', 'id'], name='bau_mental__workspa_6a0d55_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='boxshare',
+            index=models.Index(fields=['updated_at', 'id'], name='bau_mental__updated_380944_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['workspace', 'updated_at', 'id'], name='bau_mental__workspa_2efb87_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['workspace', 'updated_at', 'id'], name='bau_mental__workspa_cd6fc8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='synctombstone',
+            index=models.Index(fields=['workspace_id', 'deleted_at', 'id'], name='bau_mental__workspa_6f01dc_idx'),
+        ),
+    ]
@@ -1,13 +1,18 @@
 """Models for bau_mental app."""
 
+import copy
 import os
 import uuid
 from datetime import timedelta
+from django.core.exceptions import ValidationError
 from django.db import models
-from django.contrib.postgres.search import SearchVectorField
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce, Greatest, Now
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 
+from apps.core.managers import SoftDeleteManager
 from apps.core.models import WorkspaceModel, UUIDPrimaryKeyMixin
 
 
@@ -61,13 +66,13 @@ class Box(UUIDPrimaryKeyMixin, WorkspaceModel):
     note_count = models.IntegerField(
         default=0,
         verbose_name=_("Contagem de notas"),
-        help_text=_("Contagem em cache (atualizada via trigger)"),
+        help_text=_("Contagem em cache (mantida no save da nota e reconciliada periodicamente)"),
     )
     last_note_at = models.DateTimeField(
         null=True,
         blank=True,
         verbose_name=_("Última nota em"),
-        help_text=_("Data da última nota adicionada (atualizada via trigger)"),
+        help_text=_("Data da nota mais recente (mantida no save da nota e reconciliada periodicamente)"),
     )
     summary = models.TextField(
         null=True,
@@ -92,6 +97,7 @@ class Box(UUIDPrimaryKeyMixin, WorkspaceModel):
         ordering = ["name"]
         indexes = [
             models.Index(fields=["workspace", "name"]),
+            models.Index(fields=["workspace", "updated_at", "id"]),  # Sincronização
         ]
 
     def __str__(self) -> str:
@@ -99,6 +105,18 @@ class Box(UUIDPrimaryKeyMixin, WorkspaceModel):
         return f"{self.name} ({self.workspace.name})"
 
 
+class NoteManager(SoftDeleteManager):
+    """Manager de anotações: sem as deletadas e sem carregar ``search_vector``.
+
+    O tsvector só é usado em filtros/ranking da busca; carregá-lo em toda
+    consulta dobraria o tamanho das linhas lidas.
+    """
+
+    def get_queryset(self):
+        """Retorna queryset excluindo deletadas e adiando search_vector."""
+        return super().get_queryset().defer("search_vector")
+
+
 class Note(UUIDPrimaryKeyMixin, WorkspaceModel):
     """Anotação criada a partir de áudio."""
 
@@ -138,8 +156,13 @@ class Note(UUIDPrimaryKeyMixin, WorkspaceModel):
         null=True,
         verbose_name=_("Transcrição"),
     )
-    # search_vector é uma coluna gerada automaticamente no PostgreSQL
-    # Não precisa ser definida como campo Django, é criada via migration SQL
+    # Coluna gerada pelo PostgreSQL (busca full-text, índice GIN da migration 0013)
+    search_vector = models.GeneratedField(
+        expression=SearchVector("transcript", config="portuguese"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+        verbose_name=_("Vetor de busca"),
+    )
 
     # Metadados
     source_type = models.CharField(
@@ -172,6 +195,14 @@ class Note(UUIDPrimaryKeyMixin, WorkspaceModel):
         blank=True,
         verbose_name=_("Tamanho do arquivo (bytes)"),
     )
+    audio_sha256 = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name=_("SHA-256 do áudio"),
+        help_text=_("Hash do conteúdo do áudio (reaproveita transcrições de áudios repetidos)"),
+    )
 
     # Metadados extras (JSON)
     metadata = models.JSONField(
@@ -203,12 +234,16 @@ class Note(UUIDPrimaryKeyMixin, WorkspaceModel):
         verbose_name=_("Última edição em"),
     )
 
+    objects = NoteManager()
+
     class Meta:
         verbose_name = _("Anotação")
         verbose_name_plural = _("Anotações")
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["workspace", "box", "created_at"]),
+            models.Index(fields=["workspace", "created_at", "id"]),  # Paginação keyset
+            models.Index(fields=["workspace", "updated_at", "id"]),  # Sincronização
             models.Index(fields=["workspace", "processing_status"]),
             models.Index(fields=["workspace", "box", "processing_status"]),
             models.Index(fields=["created_by"]),
@@ -223,7 +258,7 @@ class Note(UUIDPrimaryKeyMixin, WorkspaceModel):
     @property
     def is_in_inbox(self) -> bool:
         """Verifica se anotação está na inbox (sem caixinha)."""
-        return self.box is None
+        return self.box_id is None
 
     @property
     def is_audio_expired(self) -> bool:
@@ -242,6 +277,42 @@ class Note(UUIDPrimaryKeyMixin, WorkspaceModel):
         delta = expiration_date - timezone.now()
         return max(0, delta.days)
 
+    # Campos em que mudanças afetam as caixinhas (attname -> campo aceito em
+    # update_fields). O save() os compara com o snapshot em vez de reler a linha
+    TRACKED_FIELDS = {
+        "box_id": "box",
+        "deleted_at": "deleted_at",
+        "transcript": "transcript",
+        "processing_status": "processing_status",
+    }
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Carrega instância guardando os valores originais dos campos carregados.
+
+        O snapshot (por attname) serve à detecção de mudanças do save() e à
+        auditoria (``apps.core.signals``), que assim não relê a linha.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+            for name, value in zip(field_names, values)
+        }
+        return instance
+
+    def get_changed_fields(self) -> set:
+        """Campos rastreados alterados desde o carregamento (attnames).
+
+        Campos não carregados (``.only()``/``.defer()``) não são considerados.
+        """
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return set()
+        return {
+            name for name in self.TRACKED_FIELDS
+            if name in loaded and getattr(self, name) != loaded[name]
+        }
+
     def save(self, *args, **kwargs) -> None:
         """Salva anotação e atualiza metadados do arquivo."""
         # Atualizar rastreabilidade se transcript foi modificado
@@ -253,36 +324,352 @@ class Note(UUIDPrimaryKeyMixin, WorkspaceModel):
                 self.last_edited_at = timezone.now()
                 # last_edited_by será definido no viewset
 
-        if self.audio_file and not self.file_size_bytes:
-            # Atualizar tamanho do arquivo
+        # Atualizar tamanho do arquivo só quando ele será gravado (no R2, .size
+        # é uma requisição HEAD)
+        if self.audio_file and not self.file_size_bytes and (
+            update_fields is None or "audio_file" in update_fields
+        ):
             try:
                 self.file_size_bytes = self.audio_file.size
+                if update_fields is not None:
+                    kwargs["update_fields"] = update_fields = [*update_fields, "file_size_bytes"]
             except (OSError, ValueError):
                 pass
-        
-        # Marcar resumo como desatualizado quando nota é criada/editada/deletada
-        old_box_id = None
-        old_deleted_at = None
-        if self.pk:
-            try:
-                old_note = Note.objects.get(pk=self.pk)
-                old_box_id = old_note.box_id if old_note.box else None
-                old_deleted_at = old_note.deleted_at
-            except Note.DoesNotExist:
-                pass
-        
+
+        # Hash do conteúdo ao receber o arquivo (antes de enviá-lo ao storage)
+        if self.audio_file and not self.audio_file._committed and (
+            update_fields is None or "audio_file" in update_fields
+        ):
+            from apps.bau_mental.utils import sha256_file
+
+            self.audio_sha256 = sha256_file(self.audio_file)
+            if update_fields is not None:
+                kwargs["update_fields"] = update_fields = [*update_fields, "audio_sha256"]
+
+        adding = self._state.adding
+        loaded = getattr(self, "_loaded_values", None)
+        if update_fields is not None:
+            saved = {
+                attname for attname, name in self.TRACKED_FIELDS.items()
+                if name in update_fields or attname in update_fields
+            }
+        else:
+            saved = set(self.TRACKED_FIELDS)
+        changed = self.get_changed_fields() & saved
+        old_box_id = loaded.get("box_id", self.box_id) if loaded is not None else self.box_id
+        old_deleted_at = (
+            loaded.get("deleted_at", self.deleted_at) if loaded is not None else self.deleted_at
+        )
+        if not adding and loaded is None and saved:
+            # Instância não veio do banco (ex: Note(pk=...)): sem estado anterior
+            # em memória, buscar uma vez para não perder a caixinha antiga
+            old_box_id, old_deleted_at = (
+                Note.all_objects.filter(pk=self.pk)
+                .values_list("box_id", "deleted_at")
+                .first()
+            ) or (None, timezone.now())
+
         super().save(*args, **kwargs)
-        
-        # Marcar resumo como desatualizado se box mudou, foi criada, ou foi deletada/restaurada
-        # Usar import local para evitar circular
-        from apps.bau_mental.models import Box
-        if self.box_id:
-            Box.objects.filter(id=self.box_id).update(summary_stale=True)
-        if old_box_id and old_box_id != self.box_id:
-            Box.objects.filter(id=old_box_id).update(summary_stale=True)
-        # Se deleted_at mudou (soft delete ou restore), invalidar cache
-        if old_deleted_at != self.deleted_at and self.box_id:
-            Box.objects.filter(id=self.box_id).update(summary_stale=True)
+
+        # Caixinha em que a nota conta (note_count) antes e depois do save
+        if adding:
+            counted_before = None
+        else:
+            counted_before = old_box_id if old_deleted_at is None else None
+        new_box_id = self.box_id if "box_id" in saved else old_box_id
+        new_deleted_at = self.deleted_at if "deleted_at" in saved else old_deleted_at
+        counted_after = new_box_id if new_deleted_at is None else None
+
+        # Marcar resumos desatualizados (criação, troca de caixinha, edição,
+        # soft delete/restore ou mudança de status) e ajustar contadores em um
+        # único UPDATE
+        stale_box_ids = set()
+        if adding:
+            stale_box_ids.add(self.box_id)
+        elif loaded is None and saved:
+            stale_box_ids.update([old_box_id, self.box_id])
+        elif changed:
+            stale_box_ids.add(self.box_id)
+            if "box_id" in changed:
+                stale_box_ids.add(old_box_id)
+        updates = {"summary_stale": True, "updated_at": Now()}
+        if counted_before != counted_after:
+            stale_box_ids.update([counted_before, counted_after])
+            updates.update(self._box_counter_updates(counted_before, counted_after))
+        stale_box_ids.discard(None)
+        if stale_box_ids:
+            Box.objects.filter(id__in=stale_box_ids).update(**updates)
+
+        if update_fields is None:
+            self._snapshot_loaded_fields({field.attname for field in self._meta.concrete_fields})
+        else:
+            self._snapshot_loaded_fields(self._attnames(update_fields))
+
+    def _box_counter_updates(self, decrement_box_id, increment_box_id) -> dict:
+        """Expressões F() de note_count/last_note_at para tirar a nota de uma
+        caixinha e colocá-la em outra (atômicas, sem ler a caixinha).
+
+        last_note_at só avança (GREATEST); ao sair nota da caixinha ele fica
+        como está e a reconciliação periódica corrige.
+        """
+        count_whens, last_note_whens = [], []
+        if decrement_box_id is not None:
+            count_whens.append(
+                When(id=decrement_box_id, then=Greatest(F("note_count") - 1, Value(0)))
+            )
+        if increment_box_id is not None:
+            count_whens.append(When(id=increment_box_id, then=F("note_count") + 1))
+            created_at = Value(self.created_at)
+            last_note_whens.append(
+                When(
+                    id=increment_box_id,
+                    then=Greatest(Coalesce(F("last_note_at"), created_at), created_at),
+                )
+            )
+
+        updates = {"note_count": Case(*count_whens, default=F("note_count"))}
+        if last_note_whens:
+            updates["last_note_at"] = Case(*last_note_whens, default=F("last_note_at"))
+        return updates
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None) -> None:
+        """Recarrega do banco e atualiza o snapshot dos campos recarregados."""
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None:
+            self._snapshot_loaded_fields({field.attname for field in self._meta.concrete_fields})
+        else:
+            self._snapshot_loaded_fields(self._attnames(fields))
+
+    def _attnames(self, names) -> set:
+        """Attnames dos campos concretos citados (por nome ou attname)."""
+        return {
+            field.attname for field in self._meta.concrete_fields
+            if field.name in names or field.attname in names
+        }
+
+    def _snapshot_loaded_fields(self, attnames: set) -> None:
+        """Guarda os valores atuais (persistidos) dos campos."""
+        if getattr(self, "_loaded_values", None) is None:
+            self._loaded_values = {}
+        for attname in attnames:
+            # Campos adiados (não carregados) ficam fora do snapshot
+            if attname in self.__dict__:
+                value = self.__dict__[attname]
+                if isinstance(value, (dict, list)):
+                    value = copy.deepcopy(value)
+                self._loaded_values[attname] = value
+
+
+class NoteDigest(UUIDPrimaryKeyMixin, WorkspaceModel):
+    """Resumo curto (digest) de uma anotação, folha da árvore de resumos da caixinha."""
+
+    note = models.OneToOneField(
+        Note,
+        on_delete=models.CASCADE,
+        related_name="digest",
+        verbose_name=_("Anotação"),
+    )
+    digest = models.TextField(
+        verbose_name=_("Digest"),
+    )
+    source_hash = models.CharField(
+        max_length=64,
+        verbose_name=_("Hash da transcrição"),
+        help_text=_("SHA-256 da transcrição usada para gerar o digest"),
+    )
+
+    class Meta:
+        verbose_name = _("Digest de Anotação")
+        verbose_name_plural = _("Digests de Anotações")
+
+    def __str__(self) -> str:
+        """Representação string do digest."""
+        return f"Digest {self.note_id}"
+
+
+class BoxSummaryNode(UUIDPrimaryKeyMixin, WorkspaceModel):
+    """Nó da árvore de resumos de uma caixinha (mês → ano → raiz)."""
+
+    LEVEL_CHOICES = [
+        ("month", _("Mês")),
+        ("year", _("Ano")),
+        ("root", _("Raiz")),
+    ]
+
+    box = models.ForeignKey(
+        Box,
+        on_delete=models.CASCADE,
+        related_name="summary_nodes",
+        verbose_name=_("Caixinha"),
+    )
+    level = models.CharField(
+        max_length=10,
+        choices=LEVEL_CHOICES,
+        verbose_name=_("Nível"),
+    )
+    period = models.CharField(
+        max_length=7,
+        blank=True,
+        default="",
+        verbose_name=_("Período"),
+        help_text=_("YYYY-MM (mês), YYYY (ano) ou vazio (raiz)"),
+    )
+    summary = models.TextField(
+        verbose_name=_("Resumo"),
+    )
+    source_hash = models.CharField(
+        max_length=64,
+        verbose_name=_("Hash dos filhos"),
+        help_text=_("Hash dos nós filhos usados no resumo (detecta ramos desatualizados)"),
+    )
+    note_count = models.IntegerField(
+        default=0,
+        verbose_name=_("Quantidade de notas"),
+    )
+
+    class Meta:
+        verbose_name = _("Nó de Resumo de Caixinha")
+        verbose_name_plural = _("Nós de Resumo de Caixinhas")
+        ordering = ["box", "level", "period"]
+        unique_together = [["box", "level", "period"]]
+
+    def __str__(self) -> str:
+        """Representação string do nó."""
+        return f"{self.box.name} - {self.get_level_display()} {self.period}".strip()
+
+
+class TranscriptCache(UUIDPrimaryKeyMixin, models.Model):
+    """Transcrição reaproveitável de um áudio (por hash do conteúdo).
+
+    Áudios encaminhados/de grupo costumam ser enviados várias vezes (por vários
+    usuários); a transcrição é feita uma vez por conteúdo + idioma + prompt.
+    Não pertence a um workspace: só quem tem os mesmos bytes chega ao registro.
+    """
+
+    audio_sha256 = models.CharField(max_length=64, verbose_name=_("SHA-256 do áudio"))
+    language = models.CharField(max_length=10, verbose_name=_("Idioma"))
+    prompt_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        verbose_name=_("Hash do prompt"),
+        help_text=_("SHA-256 do prompt enviado ao Whisper (vazio se sem prompt)"),
+    )
+    transcript = models.TextField(verbose_name=_("Transcrição"))
+    duration_seconds = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name=_("Duração (segundos)"),
+    )
+    hit_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Reaproveitamentos"),
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Criado em"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Atualizado em"))
+
+    class Meta:
+        verbose_name = _("Cache de Transcrição")
+        verbose_name_plural = _("Cache de Transcrições")
+        unique_together = [["audio_sha256", "language", "prompt_hash"]]
+
+    def __str__(self) -> str:
+        """Representação string do cache."""
+        return f"{self.audio_sha256[:12]} ({self.language})"
+
+
+class TranscriptionSettings(UUIDPrimaryKeyMixin, models.Model):
+    """Motor de transcrição escolhido pelo workspace.
+
+    Sem registro, vale o padrão do servidor (BAU_MENTAL_TRANSCRIPTION_BACKEND).
+    """
+
+    BACKEND_CHOICES = [
+        ("openai", _("Whisper API (OpenAI)")),
+        ("local", _("Whisper local (CPU)")),
+    ]
+
+    workspace = models.OneToOneField(
+        "accounts.Workspace",
+        on_delete=models.CASCADE,
+        related_name="bau_mental_transcription_settings",
+        verbose_name=_("Workspace"),
+    )
+    backend = models.CharField(
+        max_length=20,
+        choices=BACKEND_CHOICES,
+        default="openai",
+        verbose_name=_("Backend"),
+        help_text=_("Local: processado nos workers da fila transcription_local"),
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Criado em"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Atualizado em"))
+
+    class Meta:
+        verbose_name = _("Configuração de Transcrição")
+        verbose_name_plural = _("Configurações de Transcrição")
+
+    def __str__(self) -> str:
+        """Representação string da configuração."""
+        return f"{self.workspace.name} ({self.get_backend_display()})"
+
+    def clean(self) -> None:
+        """Valida que o backend local só é escolhido com workers locais implantados."""
+        from apps.bau_mental.services.transcription_backends import LOCAL_TRANSCRIPTION_ENABLED
+
+        if self.backend == "local" and not LOCAL_TRANSCRIPTION_ENABLED:
+            raise ValidationError(
+                {"backend": _("Transcrição local indisponível: não há workers da fila transcription_local.")}
+            )
+
+
+class BoxClassifierState(UUIDPrimaryKeyMixin, models.Model):
+    """Classificador local (Naive Bayes) das notas de um workspace.
+
+    Treinado com notas cuja caixinha foi escolhida pelo usuário; responde
+    antes da IA na classificação. Guarda também os contadores de onde cada
+    classificação foi resolvida (heurística, modelo local ou IA).
+    """
+
+    workspace = models.OneToOneField(
+        "accounts.Workspace",
+        on_delete=models.CASCADE,
+        related_name="bau_mental_box_classifier",
+        verbose_name=_("Workspace"),
+    )
+    box_stats = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_("Estatísticas por caixinha"),
+        help_text=_('{box_id: {"docs": n, "tokens": n, "terms": {termo: contagem}}}'),
+    )
+    temperature = models.FloatField(
+        default=1.0,
+        verbose_name=_("Temperatura"),
+        help_text=_("Calibração da confiança (ajustada no retreino)"),
+    )
+    trained_notes = models.PositiveIntegerField(default=0, verbose_name=_("Notas treinadas"))
+    trained_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Retreinado em"))
+    heuristic_predictions = models.PositiveIntegerField(
+        default=0, verbose_name=_("Classificações por heurística")
+    )
+    local_predictions = models.PositiveIntegerField(
+        default=0, verbose_name=_("Classificações pelo modelo local")
+    )
+    llm_predictions = models.PositiveIntegerField(default=0, verbose_name=_("Classificações pela IA"))
+    llm_ms_total = models.PositiveBigIntegerField(
+        default=0, verbose_name=_("Tempo total da IA (ms)")
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Criado em"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Atualizado em"))
+
+    class Meta:
+        verbose_name = _("Classificador de Caixinhas")
+        verbose_name_plural = _("Classificadores de Caixinhas")
+
+    def __str__(self) -> str:
+        """Representação string do classificador."""
+        return f"{self.workspace.name} ({self.trained_notes} notas)"
 
 
 class BoxShare(UUIDPrimaryKeyMixin, models.Model):
@@ -331,6 +718,7 @@ class BoxShare(UUIDPrimaryKeyMixin, models.Model):
         verbose_name=_("Status"),
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Criado em"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Atualizado em"))
     accepted_at = models.DateTimeField(null=True, blank=True, verbose_name=_("Aceito em"))
 
     class Meta:
@@ -340,6 +728,7 @@ class BoxShare(UUIDPrimaryKeyMixin, models.Model):
         indexes = [
             models.Index(fields=["box", "shared_with", "status"]),
             models.Index(fields=["shared_with", "status"]),
+            models.Index(fields=["updated_at", "id"]),  # Sincronização
         ]
 
     def __str__(self) -> str:
@@ -350,7 +739,33 @@ class BoxShare(UUIDPrimaryKeyMixin, models.Model):
         """Aceita o compartilhamento."""
         self.status = "accepted"
         self.accepted_at = timezone.now()
-        self.save(update_fields=["status", "accepted_at"])
+        self.save(update_fields=["status", "accepted_at", "updated_at"])
+
+
+class SyncTombstone(UUIDPrimaryKeyMixin, models.Model):
+    """Registro de exclusão física para a sincronização incremental.
+
+    Soft deletes aparecem na sincronização pela própria linha (``deleted_at``);
+    linhas apagadas de verdade (ex: compartilhamento removido) deixam este
+    registro para o cliente saber o que remover.
+    """
+
+    # Sem FK: o registro sobrevive à exclusão do workspace/objeto
+    workspace_id = models.UUIDField(verbose_name=_("Workspace"))
+    object_type = models.CharField(max_length=20, verbose_name=_("Tipo"))
+    object_id = models.UUIDField(verbose_name=_("Objeto"))
+    deleted_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Excluído em"))
+
+    class Meta:
+        verbose_name = _("Exclusão sincronizada")
+        verbose_name_plural = _("Exclusões sincronizadas")
+        indexes = [
+            models.Index(fields=["workspace_id", "deleted_at", "id"]),
+        ]
+
+    def __str__(self) -> str:
+        """Representação string do registro."""
+        return f"{self.object_type} {self.object_id}"
 
 
 class BoxShareInvite(UUIDPrimaryKeyMixin, models.Model):
@@ -445,6 +860,18 @@ class Thread(UUIDPrimaryKeyMixin, WorkspaceModel):
         verbose_name=_("Síntese fixada"),
         help_text=_("Resposta fixada como síntese"),
     )
+    memory_summary = models.TextField(
+        blank=True,
+        default="",
+        verbose_name=_("Resumo da conversa"),
+        help_text=_("Resumo acumulado das mensagens antigas (memória da thread)"),
+    )
+    memory_summarized_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name=_("Resumo até"),
+        help_text=_("Data da última mensagem incorporada ao resumo da conversa"),
+    )
     created_by = models.ForeignKey(
         "accounts.User",
         on_delete=models.SET_NULL,
@@ -466,6 +893,7 @@ class Thread(UUIDPrimaryKeyMixin, WorkspaceModel):
         indexes = [
             models.Index(fields=["workspace", "box", "last_message_at"]),
             models.Index(fields=["workspace", "is_global", "last_message_at"]),
+            models.Index(fields=["workspace", "updated_at", "id"]),  # Sincronização
             models.Index(fields=["created_by"]),
         ]
 
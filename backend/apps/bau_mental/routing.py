@@ -0,0 +1,74 @@
+"""Roteamento de tasks Celery do Baú Mental.
+
+Cada etapa do pipeline tem fila própria (ver CELERY_TASK_ROUTES), para que
+uma limpeza grande ou uma rajada de classificações não atrase transcrições:
+
+    celery -A config worker -Q transcription --concurrency=4 -n transcription@%h
+    celery -A config worker -Q classification --concurrency=4 -n classification@%h
+    celery -A config worker -Q celery,maintenance --concurrency=2 -n default@%h
+
+Notas de workspaces com transcrição local vão para a fila
+``transcription_local``, consumida só pelos workers com faster-whisper e o
+modelo carregado (um por processo do pool):
+
+    celery -A config worker -Q transcription_local --concurrency=<núcleos>
+
+Esses workers só existem com BAU_MENTAL_LOCAL_TRANSCRIPTION_ENABLED=true;
+sem a flag, nada é enviado para a fila (ficaria sem consumidor).
+
+Dentro da fila de transcrição, áudios curtos têm prioridade (no Redis,
+prioridade 0 é a mais alta): uma nota de voz de segundos não espera atrás de
+uma reunião de uma hora.
+"""
+
+TRANSCRIPTION_TASK = "apps.bau_mental.tasks.transcribe_audio"
+TRANSCRIPTION_QUEUE = "transcription"
+LOCAL_TRANSCRIPTION_QUEUE = "transcription_local"
+
+# (tamanho máximo do áudio em bytes, prioridade); acima do último: prioridade mais baixa
+TRANSCRIPTION_PRIORITIES = [
+    (1 * 1024 * 1024, 0),  # ~1 min de nota de voz
+    (5 * 1024 * 1024, 3),
+    (25 * 1024 * 1024, 6),
+]
+LOWEST_PRIORITY = 9
+
+
+def transcription_priority(file_size_bytes: int | None) -> int:
+    """Prioridade da transcrição pelo tamanho do áudio (0 = mais urgente)."""
+    if not file_size_bytes:
+        return TRANSCRIPTION_PRIORITIES[0][1]
+    for max_bytes, priority in TRANSCRIPTION_PRIORITIES:
+        if file_size_bytes <= max_bytes:
+            return priority
+    return LOWEST_PRIORITY
+
+
+def route_transcription(name, args, kwargs, options, task=None, **kw):
+    """Router Celery: fila (API ou local) e prioridade de cada transcrição.
+
+    Returns:
+        {"queue": ..., "priority": ...} para transcrições; None para as
+        demais tasks (seguem o mapa estático de CELERY_TASK_ROUTES)
+    """
+    if name != TRANSCRIPTION_TASK:
+        return None
+
+    note_id = (args[0] if args else None) or (kwargs or {}).get("note_id")
+    if not note_id:
+        return {"queue": TRANSCRIPTION_QUEUE}
+
+    from apps.bau_mental.models import Note
+    from apps.bau_mental.services.transcription_backends import (
+        LOCAL_TRANSCRIPTION_ENABLED,
+        backend_for_workspace,
+    )
+
+    note = Note.objects.filter(id=note_id).values("workspace_id", "file_size_bytes").first()
+    if note is None:
+        return {"queue": TRANSCRIPTION_QUEUE}
+
+    queue = TRANSCRIPTION_QUEUE
+    if LOCAL_TRANSCRIPTION_ENABLED and backend_for_workspace(note["workspace_id"]) == "local":
+        queue = LOCAL_TRANSCRIPTION_QUEUE
+    return {"queue": queue, "priority": transcription_priority(note["file_size_bytes"])}
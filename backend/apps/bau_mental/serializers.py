@@ -4,6 +4,7 @@ from rest_framework import serializers
 
 from apps.core.serializers import WorkspaceSerializer
 from apps.bau_mental.models import Box, Note, BoxShare, BoxShareInvite, Thread, ThreadMessage
+from apps.bau_mental.services.note_bulk import BULK_MAX_NOTES, BULK_OPERATIONS
 
 
 class BoxSerializer(WorkspaceSerializer):
@@ -170,6 +171,49 @@ class NoteListSerializer(serializers.ModelSerializer):
         return ""
 
 
+class NoteSearchResultSerializer(serializers.Serializer):
+    """Resultado da busca: trecho destacado (ts_headline) em vez da transcrição inteira."""
+
+    id = serializers.UUIDField(read_only=True)
+    box = serializers.UUIDField(source="box_id", read_only=True, allow_null=True)
+    box_name = serializers.CharField(read_only=True, allow_null=True)
+    headline = serializers.CharField(read_only=True)
+    rank = serializers.FloatField(read_only=True)
+    source_type = serializers.CharField(read_only=True)
+    processing_status = serializers.CharField(read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
+
+
+# Tipos permitidos (whitelist)
+# Inclui formatos suportados pelo Whisper API e WhatsApp
+ALLOWED_AUDIO_EXTENSIONS = [".m4a", ".mp3", ".wav", ".ogg", ".opus", ".webm", ".aac", ".amr", ".flac", ".mpeg", ".mpga"]
+# Tamanho máximo (50MB)
+MAX_AUDIO_SIZE = 50 * 1024 * 1024
+# Tamanho mínimo (1KB - evitar arquivos vazios ou corrompidos)
+MIN_AUDIO_SIZE = 1024
+
+
+def validate_audio_filename(name: str) -> None:
+    """Valida extensão do arquivo de áudio."""
+    ext = name.lower().split(".")[-1] if "." in name else ""
+    if f".{ext}" not in ALLOWED_AUDIO_EXTENSIONS:
+        raise serializers.ValidationError(
+            f"Tipo de arquivo não permitido. Tipos permitidos: {', '.join(ALLOWED_AUDIO_EXTENSIONS)}"
+        )
+
+
+def validate_audio_size(size: int) -> None:
+    """Valida tamanho do arquivo de áudio."""
+    if size > MAX_AUDIO_SIZE:
+        raise serializers.ValidationError(
+            f"Arquivo muito grande. Tamanho máximo: 50MB (atual: {size / 1024 / 1024:.2f}MB)"
+        )
+    if size < MIN_AUDIO_SIZE:
+        raise serializers.ValidationError(
+            "Arquivo muito pequeno. O arquivo pode estar corrompido."
+        )
+
+
 class NoteUploadSerializer(serializers.Serializer):
     """Serializer para upload de áudio."""
 
@@ -181,35 +225,59 @@ class NoteUploadSerializer(serializers.Serializer):
 
     def validate_audio_file(self, value) -> object:
         """Valida arquivo de áudio."""
-        # Tipos permitidos (whitelist)
-        # Inclui formatos suportados pelo Whisper API e WhatsApp
-        allowed_types = [".m4a", ".mp3", ".wav", ".ogg", ".opus", ".webm", ".aac", ".amr", ".flac", ".mpeg", ".mpga"]
-        ext = value.name.lower().split(".")[-1] if "." in value.name else ""
-        if f".{ext}" not in allowed_types:
-            raise serializers.ValidationError(
-                f"Tipo de arquivo não permitido. Tipos permitidos: {', '.join(allowed_types)}"
-            )
+        validate_audio_filename(value.name)
 
         # Validar extensão real do arquivo (não apenas nome)
         # Por enquanto, confiamos no nome. Em produção, validar MIME type também.
 
-        # Tamanho máximo (50MB)
-        max_size = 50 * 1024 * 1024  # 50MB
-        if value.size > max_size:
-            raise serializers.ValidationError(
-                f"Arquivo muito grande. Tamanho máximo: 50MB (atual: {value.size / 1024 / 1024:.2f}MB)"
-            )
+        validate_audio_size(value.size)
+        return value
 
-        # Tamanho mínimo (1KB - evitar arquivos vazios ou corrompidos)
-        min_size = 1024  # 1KB
-        if value.size < min_size:
-            raise serializers.ValidationError(
-                "Arquivo muito pequeno. O arquivo pode estar corrompido."
-            )
 
+class NoteUploadInitiateSerializer(serializers.Serializer):
+    """Serializer para iniciar upload direto (multipart) de áudio ao storage."""
+
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+    content_type = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+    def validate_filename(self, value: str) -> str:
+        """Valida extensão do arquivo."""
+        validate_audio_filename(value)
+        return value
+
+    def validate_size(self, value: int) -> int:
+        """Valida tamanho declarado do arquivo."""
+        validate_audio_size(value)
         return value
 
 
+class NoteUploadPartSerializer(serializers.Serializer):
+    """Parte enviada de um upload multipart."""
+
+    part_number = serializers.IntegerField(min_value=1, max_value=10000)
+    etag = serializers.CharField(max_length=255)
+
+
+class NoteUploadCompleteSerializer(serializers.Serializer):
+    """Serializer para concluir upload direto e criar a anotação."""
+
+    key = serializers.CharField(max_length=500)
+    upload_id = serializers.CharField(max_length=1024)
+    parts = NoteUploadPartSerializer(many=True, allow_empty=False)
+    box_id = serializers.UUIDField(required=False, allow_null=True)
+    source_type = serializers.ChoiceField(
+        choices=Note.SOURCE_CHOICES, default="memo", required=False
+    )
+
+
+class NoteUploadAbortSerializer(serializers.Serializer):
+    """Serializer para cancelar upload direto."""
+
+    key = serializers.CharField(max_length=500)
+    upload_id = serializers.CharField(max_length=1024)
+
+
 class NoteMoveSerializer(serializers.Serializer):
     """Serializer para mover anotação para outra caixinha."""
 
@@ -235,6 +303,19 @@ class NoteMoveSerializer(serializers.Serializer):
             raise serializers.ValidationError("Caixinha não encontrada ou não pertence ao workspace")
 
 
+class NoteBulkSerializer(NoteMoveSerializer):
+    """Serializer para operação em lote sobre anotações."""
+
+    operation = serializers.ChoiceField(choices=BULK_OPERATIONS)
+    note_ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=BULK_MAX_NOTES
+    )
+
+    def validate_note_ids(self, value: list) -> list:
+        """Remove IDs repetidos mantendo a ordem."""
+        return list(dict.fromkeys(value))
+
+
 class QuerySerializer(serializers.Serializer):
     """Serializer para consulta com IA."""
 
@@ -247,6 +328,11 @@ class QuerySerializer(serializers.Serializer):
     )
     box_id = serializers.UUIDField(required=False, allow_null=True)
     limit = serializers.IntegerField(default=10, min_value=1, max_value=50, required=False)
+    stream = serializers.BooleanField(
+        default=False,
+        required=False,
+        help_text="Retorna a resposta em streaming (Server-Sent Events)",
+    )
 
     def validate_question(self, value: str) -> str:
         """Sanitiza e valida a pergunta."""
@@ -400,11 +486,15 @@ class ThreadSerializer(WorkspaceSerializer):
 
 
 class ThreadListSerializer(serializers.ModelSerializer):
-    """Serializer simplificado para listagem de threads."""
+    """Serializer simplificado para listagem de threads.
+
+    Lê projeções anotadas pelo ViewSet (``ThreadViewSet.get_queryset``):
+    ``last_message_content`` e ``messages_count``, com ``box`` via select_related.
+    """
 
     last_message_preview = serializers.SerializerMethodField()
-    messages_count = serializers.SerializerMethodField()
-    box_name = serializers.SerializerMethodField()
+    messages_count = serializers.IntegerField(read_only=True)
+    box_name = serializers.CharField(source="box.name", read_only=True, default=None)
 
     class Meta:
         model = Thread
@@ -421,20 +511,11 @@ class ThreadListSerializer(serializers.ModelSerializer):
         ]
 
     def get_last_message_preview(self, obj: Thread) -> str | None:
-        """Retorna preview da última mensagem."""
-        last_message = obj.messages.order_by("-created_at").first()
-        if last_message:
-            preview = last_message.content[:100]
-            return preview + "..." if len(last_message.content) > 100 else preview
-        return None
-
-    def get_messages_count(self, obj: Thread) -> int:
-        """Retorna quantidade de mensagens."""
-        return obj.messages.count()
-
-    def get_box_name(self, obj: Thread) -> str | None:
-        """Retorna nome da caixinha ou None."""
-        return obj.box.name if obj.box else None
+        """Retorna preview da última mensagem (até 100 caracteres)."""
+        content = obj.last_message_content
+        if content is None:
+            return None
+        return content[:100] + "..." if len(content) > 100 else content
 
 
 class ThreadCreateSerializer(serializers.Serializer):
@@ -510,4 +591,9 @@ class ThreadMessageCreateSerializer(serializers.Serializer):
     note_ids = serializers.ListField(
         child=serializers.UUIDField(), required=False, allow_empty=True
     )
+    stream = serializers.BooleanField(
+        default=False,
+        required=False,
+        help_text="Retorna a resposta em streaming (Server-Sent Events)",
+    )
 
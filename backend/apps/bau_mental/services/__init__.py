@@ -2,9 +2,10 @@
 
 from apps.bau_mental.services.transcription import TranscriptionService
 from apps.bau_mental.services.classification import ClassificationService
+from apps.bau_mental.services.embeddings import EmbeddingService
 from apps.bau_mental.services.query import QueryService
 
-__all__ = ["TranscriptionService", "ClassificationService", "QueryService"]
+__all__ = ["TranscriptionService", "ClassificationService", "EmbeddingService", "QueryService"]
 
 
 
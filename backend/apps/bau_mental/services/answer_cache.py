@@ -0,0 +1,163 @@
+"""Cache de respostas do QueryService (Redis).
+
+A chave combina a pergunta normalizada, o escopo (workspace + caixinha) e um
+fingerprint das notas passadas como contexto (IDs + updated_at). Como qualquer
+edição muda o updated_at, uma resposta nunca é servida para notas alteradas;
+além disso, cada nota guarda um índice reverso das respostas em que entrou,
+para que elas sejam removidas do cache quando a nota muda.
+
+Contadores por workspace (hits, misses e tempo de LLM economizado) ficam no
+mesmo cache e são expostos em ``/query/cache-stats/``.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import unicodedata
+from typing import Any, Dict, List
+
+from django.core.cache import cache
+
+from apps.core.cache import cache_incr, get_cache_key
+
+logger = logging.getLogger("apps")
+
+ANSWER_CACHE_ENABLED = os.getenv("BAU_MENTAL_ANSWER_CACHE_ENABLED", "true").lower() == "true"
+# Validade das respostas em cache (padrão: 7 dias)
+ANSWER_CACHE_TIMEOUT = int(os.getenv("BAU_MENTAL_ANSWER_CACHE_TIMEOUT", str(7 * 24 * 3600)))
+# Máximo de respostas rastreadas por nota no índice reverso
+MAX_KEYS_PER_NOTE = 200
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Normaliza pergunta (minúsculas, sem acentos, pontuação e espaços extras)."""
+    text = unicodedata.normalize("NFKD", question.lower()).encode("ascii", "ignore").decode()
+    text = _PUNCTUATION.sub(" ", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def notes_fingerprint(notes: List[Dict[str, Any]]) -> str:
+    """Fingerprint do conjunto de notas (IDs + updated_at, independente da ordem)."""
+    parts = []
+    for note in notes:
+        version = note.get("updated_at")
+        if not version:
+            # Sem updated_at: usar o próprio conteúdo como versão
+            version = hashlib.sha256((note.get("transcript") or "").encode("utf-8")).hexdigest()
+        parts.append(f"{note.get('id')}:{version}")
+    return hashlib.sha256("\n".join(sorted(parts)).encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """Cache de respostas da IA por pergunta + escopo + versão das notas."""
+
+    PREFIX = "bau_mental_answer"
+    NOTE_INDEX_PREFIX = "bau_mental_answer_note"
+    STATS_PREFIX = "bau_mental_answer_stats"
+
+    def __init__(self, workspace_id: str, box_id: str | None = None) -> None:
+        """Inicializa o cache do escopo.
+
+        Args:
+            workspace_id: ID do workspace
+            box_id: ID da caixinha (None = escopo do workspace/thread)
+        """
+        self.workspace_id = str(workspace_id)
+        self.box_id = str(box_id) if box_id else "all"
+
+    def key(self, question: str, notes: List[Dict[str, Any]]) -> str:
+        """Chave do cache para a pergunta e o conjunto de notas."""
+        question_hash = hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+        return get_cache_key(
+            self.PREFIX,
+            self.box_id,
+            question_hash[:32],
+            notes_fingerprint(notes)[:32],
+            workspace_id=self.workspace_id,
+        )
+
+    def _stat_key(self, name: str) -> str:
+        """Chave de um contador do workspace."""
+        return get_cache_key(self.STATS_PREFIX, name, workspace_id=self.workspace_id)
+
+    def get(self, question: str, notes: List[Dict[str, Any]]) -> Dict[str, Any] | None:
+        """Retorna a resposta em cache (e conta hit/miss).
+
+        Returns:
+            {"answer": ..., "sources": [...]} ou None
+        """
+        if not ANSWER_CACHE_ENABLED:
+            return None
+
+        entry = cache.get(self.key(question, notes))
+        if entry is None:
+            cache_incr(self._stat_key("misses"))
+            return None
+
+        cache_incr(self._stat_key("hits"))
+        cache_incr(self._stat_key("saved_ms"), int(entry.get("elapsed_ms", 0)))
+        return entry["result"]
+
+    def set(
+        self, question: str, notes: List[Dict[str, Any]], result: Dict[str, Any], elapsed_ms: float
+    ) -> None:
+        """Armazena resposta e registra a chave no índice reverso de cada nota.
+
+        Args:
+            question: Pergunta do usuário
+            notes: Notas passadas como contexto
+            result: {"answer": ..., "sources": [...]}
+            elapsed_ms: Tempo gasto na chamada ao LLM (base do "tempo economizado")
+        """
+        if not ANSWER_CACHE_ENABLED:
+            return
+
+        key = self.key(question, notes)
+        cache.set(key, {"result": result, "elapsed_ms": elapsed_ms}, ANSWER_CACHE_TIMEOUT)
+
+        for note in notes:
+            index_key = note_index_key(self.workspace_id, note.get("id"))
+            keys = cache.get(index_key) or []
+            if key not in keys:
+                keys = (keys + [key])[-MAX_KEYS_PER_NOTE:]
+                cache.set(index_key, keys, ANSWER_CACHE_TIMEOUT)
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do workspace (hits, misses, taxa de acerto, tempo economizado)."""
+        values = cache.get_many(
+            [self._stat_key(name) for name in ("hits", "misses", "saved_ms")]
+        )
+        hits = values.get(self._stat_key("hits"), 0)
+        misses = values.get(self._stat_key("misses"), 0)
+        total = hits + misses
+        return {
+            "enabled": ANSWER_CACHE_ENABLED,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "saved_llm_calls": hits,
+            "saved_ms": values.get(self._stat_key("saved_ms"), 0),
+        }
+
+
+def note_index_key(workspace_id: str, note_id: Any) -> str:
+    """Chave do índice reverso (respostas em cache que usaram a nota)."""
+    return get_cache_key(AnswerCache.NOTE_INDEX_PREFIX, note_id, workspace_id=workspace_id)
+
+
+def invalidate_note_answers(workspace_id: str, note_id: Any) -> int:
+    """Remove do cache todas as respostas que usaram a nota.
+
+    Returns:
+        Quantidade de respostas removidas
+    """
+    index_key = note_index_key(str(workspace_id), note_id)
+    keys = cache.get(index_key)
+    if not keys:
+        return 0
+    cache.delete_many(keys + [index_key])
+    return len(keys)
@@ -0,0 +1,129 @@
+"""Remoção em lote dos áudios expirados.
+
+Os candidatos (áudio ainda presente e criado antes do prazo) são lidos por
+paginação keyset na chave primária, em páginas de DELETE_OBJECTS_MAX_KEYS
+notas. Cada página vira uma requisição DeleteObjects no R2 e um único UPDATE
+que limpa ``audio_file`` das notas cujo objeto foi removido. Páginas são
+processadas em paralelo (AUDIO_PURGE_WORKERS requisições simultâneas).
+
+A execução é retomável: o cursor fica no cache e, ao estourar o tempo
+máximo, a próxima execução continua de onde parou. Notas cujo arquivo não
+pôde ser removido mantêm o áudio e são tentadas de novo na próxima rodada
+completa.
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Dict, List, Tuple
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.bau_mental.models import Note
+from apps.bau_mental.storage import DELETE_OBJECTS_MAX_KEYS
+from apps.core.cache import get_cache_key
+
+logger = logging.getLogger("apps")
+
+# Dias até o áudio expirar
+AUDIO_RETENTION_DAYS = 7
+# Requisições DeleteObjects simultâneas
+AUDIO_PURGE_WORKERS = int(os.getenv("BAU_MENTAL_AUDIO_PURGE_WORKERS", "4"))
+# Tempo máximo de uma execução antes de parar e continuar na próxima
+AUDIO_PURGE_MAX_SECONDS = float(os.getenv("BAU_MENTAL_AUDIO_PURGE_MAX_SECONDS", "1800"))
+# Validade do cursor salvo (uma execução interrompida retoma dentro deste prazo)
+CURSOR_TIMEOUT = 24 * 60 * 60
+MAX_REPORTED_ERRORS = 100
+
+CURSOR_KEY = get_cache_key("bau_mental_audio_purge", "cursor")
+
+
+def expired_audio_notes(cutoff=None):
+    """Notas (inclusive apagadas) com áudio ainda presente e criadas antes do prazo."""
+    if cutoff is None:
+        cutoff = timezone.now() - timedelta(days=AUDIO_RETENTION_DAYS)
+    return (
+        Note.all_objects.filter(created_at__lt=cutoff, audio_file__isnull=False)
+        .exclude(audio_file="")
+        .order_by("id")
+    )
+
+
+def _clear_deleted(page: List[Tuple[Any, str]], failed: List[str]) -> int:
+    """Limpa ``audio_file`` das notas da página cujo objeto foi removido (um UPDATE)."""
+    failed_names = set(failed)
+    deleted_ids = [note_id for note_id, name in page if name not in failed_names]
+    if deleted_ids:
+        Note.all_objects.filter(id__in=deleted_ids).update(audio_file="", updated_at=timezone.now())
+    return len(deleted_ids)
+
+
+def _result(deleted_count: int, failed_count: int, errors: List[str], finished: bool) -> Dict[str, Any]:
+    """Resumo da execução."""
+    return {
+        "deleted_count": deleted_count,
+        "failed_count": failed_count,
+        "errors": errors,
+        "finished": finished,
+    }
+
+
+def purge_expired_audios(
+    batch_size: int = DELETE_OBJECTS_MAX_KEYS,
+    workers: int = AUDIO_PURGE_WORKERS,
+    max_seconds: float = AUDIO_PURGE_MAX_SECONDS,
+    storage=None,
+) -> Dict[str, Any]:
+    """Remove os áudios expirados em lotes paralelos, retomando do último cursor.
+
+    Args:
+        batch_size: Notas por página (uma requisição DeleteObjects cada)
+        workers: Páginas processadas em paralelo
+        max_seconds: Tempo máximo antes de salvar o cursor e parar
+        storage: Storage dos áudios (padrão: o do campo Note.audio_file)
+
+    Returns:
+        {
+            "deleted_count": 1500,
+            "failed_count": 2,
+            "errors": ["..."],  # primeiras MAX_REPORTED_ERRORS falhas
+            "finished": True,  # False: parou pelo tempo, cursor salvo
+        }
+    """
+    storage = storage or Note._meta.get_field("audio_file").storage
+    batch_size = min(batch_size, DELETE_OBJECTS_MAX_KEYS)
+    candidates = expired_audio_notes()
+    cursor = cache.get(CURSOR_KEY)
+    started = time.monotonic()
+
+    deleted_count = failed_count = 0
+    errors: List[str] = []
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        while True:
+            page_query = candidates if cursor is None else candidates.filter(id__gt=cursor)
+            rows = list(page_query.values_list("id", "audio_file")[: batch_size * max(workers, 1)])
+            if not rows:
+                cache.delete(CURSOR_KEY)
+                return _result(deleted_count, failed_count, errors, finished=True)
+
+            pages = [rows[start:start + batch_size] for start in range(0, len(rows), batch_size)]
+            # Só as requisições ao storage rodam nas threads; o banco fica nesta
+            failed_by_page = pool.map(
+                lambda page: storage.delete_many([name for _, name in page]), pages
+            )
+            for page, failed in zip(pages, failed_by_page):
+                deleted_count += _clear_deleted(page, failed)
+                failed_count += len(failed)
+                errors.extend(
+                    f"Erro ao deletar áudio {name}" for name in failed[: MAX_REPORTED_ERRORS - len(errors)]
+                )
+
+            cursor = rows[-1][0]
+            cache.set(CURSOR_KEY, cursor, CURSOR_TIMEOUT)
+            logger.info(f"[AudioPurge] {deleted_count} áudios expirados removidos até {cursor}")
+
+            if time.monotonic() - started >= max_seconds:
+                return _result(deleted_count, failed_count, errors, finished=False)
@@ -0,0 +1,138 @@
+"""Divisão de áudios longos em trechos nos silêncios (ffmpeg).
+
+Usado pela transcrição para enviar áudios grandes ao Whisper em paralelo:
+os cortes caem em pausas da fala (silencedetect), cada trecho tem duração
+limitada e é recodificado em mono/16 kHz (bem abaixo do limite de 25 MB da
+API). A entrada pode ser um caminho local ou uma URL (HTTP range). Sem
+ffmpeg/ffprobe no PATH, ``is_available()`` retorna False e a
+transcrição segue com uma única requisição.
+"""
+
+import logging
+import os
+import re
+import shutil
+import subprocess
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("apps")
+
+# Duração máxima de cada trecho (padrão: 10 min)
+SEGMENT_MAX_SECONDS = float(os.getenv("BAU_MENTAL_SEGMENT_MAX_SECONDS", "600"))
+# Trechos não terminam antes disso (evita trechos curtos demais em áudios com muitas pausas)
+SEGMENT_MIN_SECONDS = float(os.getenv("BAU_MENTAL_SEGMENT_MIN_SECONDS", "60"))
+# Parâmetros do silencedetect
+SILENCE_NOISE_DB = int(os.getenv("BAU_MENTAL_SILENCE_NOISE_DB", "-35"))
+SILENCE_MIN_SECONDS = float(os.getenv("BAU_MENTAL_SILENCE_MIN_SECONDS", "0.5"))
+# Timeout de cada chamada ao ffmpeg
+FFMPEG_TIMEOUT = 300
+
+_SILENCE_START = re.compile(r"silence_start:\s*(-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end:\s*(-?[\d.]+)")
+
+
+def plan_segments(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    max_seconds: float = SEGMENT_MAX_SECONDS,
+    min_seconds: float = SEGMENT_MIN_SECONDS,
+) -> List[Tuple[float, float]]:
+    """Define os trechos (início, fim) cortando no meio dos silêncios.
+
+    Cada trecho termina no último silêncio entre ``min_seconds`` e
+    ``max_seconds`` após o seu início; sem silêncio nessa janela, o corte é
+    feito em ``max_seconds``.
+
+    Args:
+        duration: Duração total do áudio (segundos)
+        silences: Silêncios detectados [(início, fim), ...]
+        max_seconds: Duração máxima de um trecho
+        min_seconds: Duração mínima de um trecho (exceto o último)
+
+    Returns:
+        Lista de (início, fim) cobrindo o áudio inteiro, sem sobreposição
+    """
+    cut_points = sorted((start + end) / 2 for start, end in silences)
+    segments: List[Tuple[float, float]] = []
+    start = 0.0
+    while duration - start > max_seconds:
+        window = [
+            point for point in cut_points
+            if start + min_seconds < point <= start + max_seconds
+        ]
+        end = window[-1] if window else start + max_seconds
+        segments.append((start, end))
+        start = end
+    segments.append((start, duration))
+    return segments
+
+
+class AudioSegmenter:
+    """Divide áudio em trechos limitados usando ffmpeg."""
+
+    def __init__(self) -> None:
+        """Inicializa o segmentador (localiza ffmpeg/ffprobe)."""
+        self.ffmpeg = shutil.which("ffmpeg")
+        self.ffprobe = shutil.which("ffprobe")
+
+    def is_available(self) -> bool:
+        """Verifica se ffmpeg e ffprobe estão instalados."""
+        return bool(self.ffmpeg and self.ffprobe)
+
+    def duration(self, path: str) -> float:
+        """Duração do áudio em segundos (ffprobe)."""
+        result = subprocess.run(
+            [
+                self.ffprobe, "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "default=noprint_wrappers=1:nokey=1",
+                path,
+            ],
+            capture_output=True, text=True, timeout=FFMPEG_TIMEOUT, check=True,
+        )
+        return float(result.stdout.strip())
+
+    def detect_silences(self, path: str) -> List[Tuple[float, float]]:
+        """Silêncios do áudio [(início, fim), ...] (ffmpeg silencedetect)."""
+        result = subprocess.run(
+            [
+                self.ffmpeg, "-hide_banner", "-nostats", "-i", path,
+                "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={SILENCE_MIN_SECONDS}",
+                "-f", "null", "-",
+            ],
+            capture_output=True, text=True, timeout=FFMPEG_TIMEOUT, check=True,
+        )
+        starts = [float(value) for value in _SILENCE_START.findall(result.stderr)]
+        ends = [float(value) for value in _SILENCE_END.findall(result.stderr)]
+        return list(zip(starts, ends))
+
+    def plan(self, path: str, name: str | None = None) -> List[Tuple[float, float]]:
+        """Trechos (início, fim) do áudio, cortados nos silêncios.
+
+        Args:
+            path: Caminho local ou URL (pré-assinada) do áudio
+            name: Nome do arquivo para o log (a URL pré-assinada nunca é logada)
+        """
+        duration = self.duration(path)
+        if duration <= SEGMENT_MAX_SECONDS:
+            # Cabe em um trecho: sem silencedetect (que decodifica/baixa o áudio inteiro)
+            return [(0.0, duration)]
+        segments = plan_segments(duration, self.detect_silences(path))
+        # Sem o query string: a URL pré-assinada leva credencial e assinatura
+        label = name or os.path.basename(urlsplit(path).path)
+        logger.info(f"[AudioSegmenter] {label}: {duration:.0f}s em {len(segments)} trechos")
+        return segments
+
+    def export(self, path: str, start: float, end: float) -> bytes:
+        """Trecho [start, end) recodificado em mono/16 kHz (mp3), via pipe (sem arquivo)."""
+        result = subprocess.run(
+            [
+                self.ffmpeg, "-hide_banner", "-loglevel", "error",
+                "-ss", f"{start:.3f}", "-t", f"{end - start:.3f}", "-i", path,
+                "-vn", "-ac", "1", "-ar", "16000", "-b:a", "48k",
+                "-f", "mp3", "pipe:1",
+            ],
+            capture_output=True, timeout=FFMPEG_TIMEOUT, check=True,
+        )
+        return result.stdout
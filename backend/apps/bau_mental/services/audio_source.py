@@ -0,0 +1,105 @@
+"""Fonte de áudio para transcrição, lida direto do storage (sem arquivo temporário).
+
+No storage local o áudio é lido pelo caminho no disco. No R2 o objeto é lido
+como stream (GetObject) e o ffmpeg recebe uma URL pré-assinada, buscando só
+os trechos de que precisa (HTTP range). Áudios que cabem em uma requisição ao
+Whisper são mantidos em memória, lidos uma única vez para hash e transcrição.
+"""
+
+import hashlib
+import os
+from typing import BinaryIO
+
+from django.db.models.fields.files import FieldFile
+
+from apps.bau_mental.utils import sha256_file
+
+# Áudios até este tamanho são mantidos em memória (limite de uma requisição ao Whisper)
+MAX_BUFFERED_BYTES = 24 * 1024 * 1024
+# Validade da URL pré-assinada entregue ao ffmpeg
+FFMPEG_URL_EXPIRES = 3600
+
+
+class AudioSource:
+    """Áudio de uma nota (storage) ou de um caminho local."""
+
+    def __init__(self, field_file: FieldFile | None = None, path: str | None = None) -> None:
+        """Inicializa a fonte.
+
+        Args:
+            field_file: Arquivo do Note.audio_file
+            path: Caminho local (alternativa a field_file)
+        """
+        self.field_file = field_file
+        self._path = path
+        self._size: int | None = None
+        self._content: bytes | None = None
+
+    @classmethod
+    def from_path(cls, path: str) -> "AudioSource":
+        """Fonte a partir de um arquivo local."""
+        return cls(path=path)
+
+    @property
+    def name(self) -> str:
+        """Nome do arquivo (a extensão indica o formato à API)."""
+        return os.path.basename(self._path or self.field_file.name)
+
+    @property
+    def local_path(self) -> str | None:
+        """Caminho no disco, se o storage for local (None no R2)."""
+        if self._path:
+            return self._path
+        try:
+            path = self.field_file.storage.path(self.field_file.name)
+        except (NotImplementedError, AttributeError):
+            return None
+        return path if os.path.exists(path) else None
+
+    @property
+    def size(self) -> int:
+        """Tamanho do áudio em bytes."""
+        if self._size is None:
+            if self._content is not None:
+                self._size = len(self._content)
+            elif self.local_path:
+                self._size = os.path.getsize(self.local_path)
+            else:
+                self._size = self.field_file.size
+        return self._size
+
+    def open(self) -> BinaryIO:
+        """Stream de leitura do áudio (usar com ``with``)."""
+        if self.local_path:
+            return open(self.local_path, "rb")
+        storage = self.field_file.storage
+        if hasattr(storage, "open_stream"):
+            return storage.open_stream(self.field_file.name)
+        return self.field_file.open("rb")
+
+    def read_bytes(self) -> bytes:
+        """Conteúdo completo do áudio (lido uma vez e mantido em memória)."""
+        if self._content is None:
+            with self.open() as stream:
+                self._content = stream.read()
+        return self._content
+
+    def sha256(self) -> str:
+        """SHA-256 do conteúdo.
+
+        Áudios pequenos ficam em memória (a transcrição reaproveita os bytes);
+        os demais são lidos em blocos.
+        """
+        if self._content is not None or self.size <= MAX_BUFFERED_BYTES:
+            return hashlib.sha256(self.read_bytes()).hexdigest()
+        with self.open() as stream:
+            return sha256_file(stream)
+
+    def ffmpeg_input(self) -> str:
+        """Entrada para ffmpeg/ffprobe: caminho local ou URL pré-assinada."""
+        if self.local_path:
+            return self.local_path
+        storage = self.field_file.storage
+        if hasattr(storage, "download_url"):
+            return storage.download_url(self.field_file.name, FFMPEG_URL_EXPIRES)
+        return self.field_file.url
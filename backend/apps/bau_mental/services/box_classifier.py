@@ -0,0 +1,311 @@
+"""Classificador local de notas em caixinhas (Naive Bayes multinomial).
+
+Aprende com as notas cuja caixinha foi escolhida pelo usuário (criadas já
+na caixinha ou movidas manualmente) e responde na hora, antes da IA: a
+classificação só chama o LLM quando a confiança local fica abaixo de
+BAU_MENTAL_LOCAL_CLASSIFIER_THRESHOLD.
+
+- Treino incremental: cada confirmação soma (e uma mudança de caixinha
+  desconta) as contagens de termos da nota.
+- Retreino periódico (``rebuild_box_classifiers``) recalcula as contagens
+  do zero (edições e exclusões) e calibra a confiança: a temperatura do
+  softmax é a que minimiza a log-loss em notas separadas do treino.
+"""
+
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
+from django.utils import timezone
+
+from apps.bau_mental.models import BoxClassifierState, Note
+
+# Confiança mínima para dispensar a IA
+LOCAL_CONFIDENCE_THRESHOLD = float(os.getenv("BAU_MENTAL_LOCAL_CLASSIFIER_THRESHOLD", "0.8"))
+# Notas confirmadas necessárias antes de o modelo responder
+MIN_TRAINED_NOTES = int(os.getenv("BAU_MENTAL_LOCAL_CLASSIFIER_MIN_NOTES", "20"))
+# Notas confirmadas mínimas para uma caixinha ser candidata
+MIN_BOX_DOCS = 3
+# Suavização de Laplace
+SMOOTHING = 1.0
+# Uma a cada N notas fica fora do treino na calibração
+HOLDOUT_EVERY = 5
+MIN_HOLDOUT = 5
+TEMPERATURES = [0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0, 6.0, 8.0, 12.0, 16.0, 24.0, 32.0]
+
+STOPWORDS = frozenset(
+    """
+    que nao com uma para por mais mas como dos das nos nas foi ser tem ter esta
+    este essa esse isso isto ele ela eles elas voce voces meu minha seu sua seus
+    suas pra pro entao tambem quando onde muito muita ate sobre depois antes
+    aqui ali sim vou vai vamos fazer acho agora ainda tudo todo toda aos num
+    numa pelo pela pelos pelas era sao estou estava tenho tinha porque qual
+    """.split()
+)
+_WORD = re.compile(r"\w+")
+
+SOURCE_FIELDS = {
+    "heuristic": "heuristic_predictions",
+    "local": "local_predictions",
+    "llm": "llm_predictions",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Termos da nota (minúsculas, sem acentos, sem stopwords e números)."""
+    text = unicodedata.normalize("NFKD", (text or "").lower()).encode("ascii", "ignore").decode()
+    return [
+        word for word in _WORD.findall(text)
+        if len(word) > 2 and word not in STOPWORDS and not word.isdigit()
+    ]
+
+
+def _add_document(box_stats: Dict[str, Any], box_id: str, tokens: List[str], sign: int = 1) -> None:
+    """Soma (sign=1) ou desconta (sign=-1) uma nota das contagens da caixinha."""
+    stats = box_stats.setdefault(box_id, {"docs": 0, "tokens": 0, "terms": {}})
+    stats["docs"] = max(stats["docs"] + sign, 0)
+    stats["tokens"] = max(stats["tokens"] + sign * len(tokens), 0)
+    terms = stats["terms"]
+    for term, count in Counter(tokens).items():
+        value = terms.get(term, 0) + sign * count
+        if value > 0:
+            terms[term] = value
+        else:
+            terms.pop(term, None)
+    if stats["docs"] == 0:
+        box_stats.pop(box_id)
+
+
+def _train(examples: Iterable[Tuple[List[str], str]]) -> Dict[str, Any]:
+    """Contagens por caixinha a partir de (termos, box_id)."""
+    box_stats: Dict[str, Any] = {}
+    for tokens, box_id in examples:
+        _add_document(box_stats, box_id, tokens)
+    return box_stats
+
+
+class NaiveBayesModel:
+    """Naive Bayes multinomial sobre as contagens de BoxClassifierState."""
+
+    def __init__(self, box_stats: Dict[str, Any], temperature: float = 1.0) -> None:
+        """Prepara o modelo (vocabulário e total de notas)."""
+        self.box_stats = box_stats
+        self.temperature = temperature
+        vocabulary = set()
+        for stats in box_stats.values():
+            vocabulary.update(stats["terms"])
+        self.vocabulary = vocabulary
+        self.total_docs = sum(stats["docs"] for stats in box_stats.values())
+
+    def log_scores(self, tokens: List[str], box_ids: Iterable[str] | None = None) -> Dict[str, float]:
+        """Log-probabilidade conjunta (não normalizada) de cada caixinha candidata."""
+        counts = Counter(token for token in tokens if token in self.vocabulary)
+        if not counts:
+            return {}
+
+        allowed = set(box_ids) if box_ids is not None else None
+        vocabulary_size = len(self.vocabulary)
+        scores = {}
+        for box_id, stats in self.box_stats.items():
+            if stats["docs"] < MIN_BOX_DOCS or (allowed is not None and box_id not in allowed):
+                continue
+            denominator = stats["tokens"] + SMOOTHING * vocabulary_size
+            score = math.log(stats["docs"] / self.total_docs)
+            terms = stats["terms"]
+            for term, count in counts.items():
+                score += count * math.log((terms.get(term, 0) + SMOOTHING) / denominator)
+            scores[box_id] = score
+        return scores
+
+    @staticmethod
+    def posterior(scores: Dict[str, float], temperature: float) -> Dict[str, float]:
+        """Softmax dos scores com temperatura (confiança calibrada)."""
+        if not scores:
+            return {}
+        top = max(scores.values())
+        weights = {box_id: math.exp((score - top) / temperature) for box_id, score in scores.items()}
+        total = sum(weights.values())
+        return {box_id: weight / total for box_id, weight in weights.items()}
+
+    def predict(self, tokens: List[str], box_ids: Iterable[str] | None = None) -> Tuple[str, float] | None:
+        """(box_id, confiança) da caixinha mais provável, ou None sem evidência."""
+        scores = self.log_scores(tokens, box_ids)
+        if len(scores) < 2:
+            return None
+        probabilities = self.posterior(scores, self.temperature)
+        box_id = max(probabilities, key=probabilities.get)
+        return box_id, probabilities[box_id]
+
+
+def _fit_temperature(examples: List[Tuple[List[str], str]], default: float = 1.0) -> float:
+    """Temperatura que minimiza a log-loss nas notas separadas do treino."""
+    holdout = examples[::HOLDOUT_EVERY]
+    train = [example for position, example in enumerate(examples) if position % HOLDOUT_EVERY]
+    model = NaiveBayesModel(_train(train))
+
+    evaluated = []
+    for tokens, box_id in holdout:
+        scores = model.log_scores(tokens)
+        if len(scores) >= 2 and box_id in scores:
+            evaluated.append((scores, box_id))
+    if len(evaluated) < MIN_HOLDOUT:
+        return default
+
+    def log_loss(temperature: float) -> float:
+        return -sum(
+            math.log(max(NaiveBayesModel.posterior(scores, temperature)[box_id], 1e-12))
+            for scores, box_id in evaluated
+        )
+
+    return min(TEMPERATURES, key=log_loss)
+
+
+def confirmed_notes(workspace_id: Any) -> QuerySet:
+    """Notas com caixinha escolhida pelo usuário (base de treino)."""
+    return (
+        Note.objects.filter(
+            workspace_id=workspace_id,
+            box__isnull=False,
+            box__deleted_at__isnull=True,
+            deleted_at__isnull=True,
+            transcript__isnull=False,
+        )
+        .exclude(transcript="")
+        .filter(Q(ai_confidence__isnull=True) | Q(metadata__box_confirmed=True))
+    )
+
+
+def is_confirmed(note: Note) -> bool:
+    """Indica se a caixinha atual da nota conta como escolha do usuário."""
+    return bool(
+        note.box_id
+        and note.transcript
+        and (note.ai_confidence is None or (note.metadata or {}).get("box_confirmed"))
+    )
+
+
+def update_classifier(
+    workspace_id: Any,
+    transcript: str,
+    add_box_id: Any = None,
+    remove_box_id: Any = None,
+) -> None:
+    """Treino incremental: soma a nota em ``add_box_id`` e desconta de ``remove_box_id``."""
+    update_classifier_many(workspace_id, [(transcript, add_box_id, remove_box_id)])
+
+
+def update_classifier_many(
+    workspace_id: Any, changes: Iterable[Tuple[str, Any, Any]]
+) -> None:
+    """Treino incremental de várias notas com um único lock/save do estado.
+
+    Args:
+        workspace_id: ID do workspace
+        changes: (transcrição, add_box_id, remove_box_id) de cada nota
+    """
+    changes = [
+        (transcript, add_box_id, remove_box_id)
+        for transcript, add_box_id, remove_box_id in changes
+        if transcript and add_box_id != remove_box_id and (add_box_id or remove_box_id)
+    ]
+    if not changes:
+        return
+
+    with transaction.atomic():
+        state, _ = BoxClassifierState.objects.select_for_update().get_or_create(
+            workspace_id=workspace_id
+        )
+        for transcript, add_box_id, remove_box_id in changes:
+            tokens = tokenize(transcript)
+            if remove_box_id and str(remove_box_id) in state.box_stats:
+                _add_document(state.box_stats, str(remove_box_id), tokens, sign=-1)
+                state.trained_notes = max(state.trained_notes - 1, 0)
+            if add_box_id:
+                _add_document(state.box_stats, str(add_box_id), tokens)
+                state.trained_notes += 1
+        state.save(update_fields=["box_stats", "trained_notes", "updated_at"])
+
+
+def rebuild_classifier(workspace_id: Any) -> Dict[str, Any]:
+    """Retreina do zero com as notas confirmadas e recalibra a confiança."""
+    examples = [
+        (tokenize(transcript), str(box_id))
+        for transcript, box_id in confirmed_notes(workspace_id)
+        .order_by("created_at")
+        .values_list("transcript", "box_id")
+        .iterator(chunk_size=1000)
+    ]
+    state, _ = BoxClassifierState.objects.get_or_create(workspace_id=workspace_id)
+    state.box_stats = _train(examples)
+    state.trained_notes = len(examples)
+    state.temperature = _fit_temperature(examples, default=state.temperature)
+    state.trained_at = timezone.now()
+    state.save(update_fields=["box_stats", "trained_notes", "temperature", "trained_at", "updated_at"])
+    return {"trained_notes": state.trained_notes, "temperature": state.temperature}
+
+
+def predict_box(
+    workspace_id: Any, transcript: str, box_ids: Iterable[str]
+) -> Dict[str, Any] | None:
+    """Classificação local (None se o modelo não tem notas/evidência suficientes).
+
+    Returns:
+        {"box_id", "confidence", "reason", "source": "local"} ou None
+    """
+    state = BoxClassifierState.objects.filter(workspace_id=workspace_id).first()
+    if state is None or state.trained_notes < MIN_TRAINED_NOTES:
+        return None
+
+    prediction = NaiveBayesModel(state.box_stats, state.temperature).predict(tokenize(transcript), box_ids)
+    if prediction is None:
+        return None
+    box_id, confidence = prediction
+    return {
+        "box_id": box_id,
+        "confidence": round(confidence, 4),
+        "reason": f"Modelo local ({state.trained_notes} notas confirmadas)",
+        "source": "local",
+    }
+
+
+def record_classification(workspace_id: Any, source: str, elapsed_ms: float = 0, count: int = 1) -> None:
+    """Contabiliza onde a classificação foi resolvida (heurística, local ou IA).
+
+    ``count`` > 1 registra um lote de notas classificadas em ``elapsed_ms``.
+    """
+    field = SOURCE_FIELDS.get(source)
+    if field is None or count < 1:
+        return
+    updates = {field: F(field) + count}
+    if source == "llm":
+        updates["llm_ms_total"] = F("llm_ms_total") + int(elapsed_ms)
+    if not BoxClassifierState.objects.filter(workspace_id=workspace_id).update(**updates):
+        BoxClassifierState.objects.get_or_create(workspace_id=workspace_id)
+        BoxClassifierState.objects.filter(workspace_id=workspace_id).update(**updates)
+
+
+def get_classification_stats(workspace_id: Any) -> Dict[str, Any]:
+    """Fração das classificações resolvidas sem IA e tempo de IA economizado."""
+    state = BoxClassifierState.objects.filter(workspace_id=workspace_id).first()
+    if state is None:
+        state = BoxClassifierState(workspace_id=workspace_id)
+
+    total = state.heuristic_predictions + state.local_predictions + state.llm_predictions
+    avg_llm_ms = state.llm_ms_total / state.llm_predictions if state.llm_predictions else 0.0
+    return {
+        "total": total,
+        "heuristic": state.heuristic_predictions,
+        "local": state.local_predictions,
+        "llm": state.llm_predictions,
+        "local_rate": round(state.local_predictions / total, 4) if total else 0.0,
+        "without_llm_rate": round((total - state.llm_predictions) / total, 4) if total else 0.0,
+        "avg_llm_ms": round(avg_llm_ms),
+        "saved_ms": round(state.local_predictions * avg_llm_ms),
+        "trained_notes": state.trained_notes,
+        "trained_at": state.trained_at,
+    }
@@ -0,0 +1,259 @@
+"""Matcher compilado de nomes e keywords de caixinhas (heurísticas da classificação).
+
+Em vez de percorrer cada caixinha para cada nota (e cada palavra da
+transcrição contra cada caixinha), as caixinhas de um workspace são
+compiladas uma vez:
+
+- Autômato Aho-Corasick com nomes e keywords: uma única passada pela
+  transcrição encontra todas as menções exatas (mesma semântica de
+  substring da busca anterior).
+- Índice de trigramas dos nomes: a similaridade (SequenceMatcher) só é
+  calculada para caixinhas que compartilham trigramas com a palavra.
+
+O matcher fica em memória no processo, por workspace, e é invalidado quando
+uma caixinha é salva ou apagada (versão no cache compartilhado, para que
+todos os workers recompilem).
+"""
+
+import re
+from collections import OrderedDict, deque
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from django.core.cache import cache
+
+from apps.core.cache import cache_incr, get_cache_key
+
+# Similaridade mínima para considerar menção aproximada de uma caixinha
+SIMILARITY_THRESHOLD = 0.75
+# Workspaces com matcher em memória por processo
+MATCHER_CACHE_SIZE = 256
+VERSION_PREFIX = "bau_mental_box_matcher"
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+_matchers: "OrderedDict[str, Tuple[int, BoxMatcher]]" = OrderedDict()
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza texto para comparação (minúsculas, sem pontuação)."""
+    return _PUNCTUATION.sub("", text.lower().strip())
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Trigramas de caracteres (com bordas, para palavras curtas)."""
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AhoCorasick:
+    """Autômato Aho-Corasick: encontra todos os padrões em uma passada pelo texto."""
+
+    def __init__(self, patterns: Iterable[Tuple[str, Any]]) -> None:
+        """Compila o autômato.
+
+        Args:
+            patterns: Pares (padrão, valor); o valor é retornado em ``find``
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Any]] = [[]]
+        for pattern, value in patterns:
+            if pattern:
+                self._add(pattern, value)
+        self._build()
+
+    def _add(self, pattern: str, value: Any) -> None:
+        """Insere um padrão na trie."""
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append(value)
+
+    def _build(self) -> None:
+        """Calcula os links de falha (BFS) e propaga as saídas."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> Set[Any]:
+        """Valores de todos os padrões presentes no texto."""
+        found: Set[Any] = set()
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class BoxMatcher:
+    """Nomes e keywords das caixinhas de um workspace, compilados para busca."""
+
+    def __init__(self, boxes: List[Dict[str, Any]]) -> None:
+        """Compila o matcher.
+
+        Args:
+            boxes: Caixinhas [{"id", "name", "keywords"}, ...] (a ordem desempata)
+        """
+        self.box_ids = tuple(box["id"] for box in boxes)
+        self._names = [box["name"] for box in boxes]
+        self._normalized_names = [normalize_text(box["name"]) for box in boxes]
+        self._keywords = [
+            [k.strip().lower() for k in (box.get("keywords") or "").split(",") if k.strip()]
+            for box in boxes
+        ]
+
+        self._lower_automaton = AhoCorasick(
+            [(name.lower(), ("name", index)) for index, name in enumerate(self._names)]
+            + [
+                (keyword, ("keyword", index, position))
+                for index, keywords in enumerate(self._keywords)
+                for position, keyword in enumerate(keywords)
+            ]
+        )
+        self._normalized_automaton = AhoCorasick(
+            (name, ("name", index)) for index, name in enumerate(self._normalized_names)
+        )
+
+        self._trigram_index: Dict[str, Set[int]] = {}
+        for index, name in enumerate(self._normalized_names):
+            for trigram in _trigrams(name):
+                self._trigram_index.setdefault(trigram, set()).add(index)
+
+    def detect_box_mention(self, transcript: str) -> Dict[str, Any] | None:
+        """Caixinha mencionada na transcrição (nome exato ou aproximado).
+
+        Returns:
+            {"box_id", "confidence", "reason"} ou None
+        """
+        if not transcript or not self.box_ids:
+            return None
+
+        transcript_normalized = normalize_text(transcript)
+        mentioned = {
+            value[1] for value in self._lower_automaton.find(transcript.lower()) if value[0] == "name"
+        }
+        mentioned |= {value[1] for value in self._normalized_automaton.find(transcript_normalized)}
+        if mentioned:
+            index = min(mentioned)
+            return {
+                "box_id": self.box_ids[index],
+                "confidence": 0.95,
+                "reason": f"Nome da caixinha '{self._names[index]}' mencionado diretamente na transcrição",
+            }
+
+        return self._fuzzy_mention(transcript_normalized)
+
+    def _fuzzy_mention(self, transcript_normalized: str) -> Dict[str, Any] | None:
+        """Palavra da transcrição parecida com o nome de uma caixinha."""
+        best = None
+        best_key = (0.0, 0, 0)
+        for word_position, word in enumerate(dict.fromkeys(transcript_normalized.split())):
+            candidates = set()
+            for trigram in _trigrams(word):
+                candidates |= self._trigram_index.get(trigram, set())
+            for index in candidates:
+                name = self._normalized_names[index]
+                # Limite superior da razão do SequenceMatcher pelo tamanho
+                if 2 * min(len(word), len(name)) < SIMILARITY_THRESHOLD * (len(word) + len(name)):
+                    continue
+                similarity = SequenceMatcher(None, word, name).ratio()
+                # Empate: primeira caixinha, depois primeira palavra (como a busca anterior)
+                key = (similarity, -index, -word_position)
+                if similarity >= SIMILARITY_THRESHOLD and (best is None or key > best_key):
+                    best_key = key
+                    best = index
+
+        if best is None:
+            return None
+        similarity = best_key[0]
+        return {
+            "box_id": self.box_ids[best],
+            "confidence": min(0.85, 0.5 + (similarity - SIMILARITY_THRESHOLD) * 0.7),
+            "reason": (
+                f"Possível menção da caixinha '{self._names[best]}' na transcrição "
+                f"(similaridade: {similarity:.2f})"
+            ),
+        }
+
+    def check_keywords_match(self, transcript: str) -> Dict[str, Any] | None:
+        """Primeira caixinha com keywords presentes na transcrição.
+
+        Returns:
+            {"box_id", "confidence", "reason"} ou None
+        """
+        if not transcript or not self.box_ids:
+            return None
+
+        matched = [
+            value[1:] for value in self._lower_automaton.find(transcript.lower()) if value[0] == "keyword"
+        ]
+        if not matched:
+            return None
+
+        index = min(box_index for box_index, _ in matched)
+        keywords = self._keywords[index]
+        matches = [keywords[position] for box_index, position in sorted(matched) if box_index == index]
+        confidence = min(0.85, 0.6 + (len(matches) / len(keywords)) * 0.25)
+        return {
+            "box_id": self.box_ids[index],
+            "confidence": confidence,
+            "reason": f"Keywords encontradas: {', '.join(matches)}",
+        }
+
+
+def _version_key(workspace_id: Any) -> str:
+    """Chave da versão das caixinhas do workspace no cache compartilhado."""
+    return get_cache_key(VERSION_PREFIX, "version", workspace_id=str(workspace_id))
+
+
+def get_box_matcher(workspace_id: Any, boxes: List[Dict[str, Any]]) -> BoxMatcher:
+    """Matcher das caixinhas do workspace (compilado uma vez por versão).
+
+    Args:
+        workspace_id: ID do workspace (None: compila sem cache)
+        boxes: Caixinhas atuais do workspace
+    """
+    if workspace_id is None:
+        return BoxMatcher(boxes)
+
+    workspace_key = str(workspace_id)
+    version = cache.get(_version_key(workspace_key), 0)
+    box_ids = tuple(box["id"] for box in boxes)
+    cached = _matchers.get(workspace_key)
+    if cached is not None and cached[0] == version and cached[1].box_ids == box_ids:
+        _matchers.move_to_end(workspace_key)
+        return cached[1]
+
+    matcher = BoxMatcher(boxes)
+    _matchers[workspace_key] = (version, matcher)
+    _matchers.move_to_end(workspace_key)
+    while len(_matchers) > MATCHER_CACHE_SIZE:
+        _matchers.popitem(last=False)
+    return matcher
+
+
+def invalidate_box_matcher(workspace_id: Any) -> None:
+    """Descarta o matcher do workspace (todos os processos recompilam)."""
+    _matchers.pop(str(workspace_id), None)
+    cache_incr(_version_key(workspace_id))
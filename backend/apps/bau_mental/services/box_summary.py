@@ -0,0 +1,291 @@
+"""Resumo hierárquico e incremental de caixinhas.
+
+A árvore de resumos de uma caixinha é: nota → digest → mês → ano → raiz.
+Cada nó guarda o hash dos filhos usados para gerá-lo; ao resumir a caixinha,
+só os digests de notas novas/editadas e os nós cujo hash mudou são
+recalculados. Uma edição custa ~4 chamadas ao LLM (digest, mês, ano, raiz),
+independente do tamanho da caixinha, e o resumo cobre todas as notas.
+"""
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from django.utils import timezone
+
+from apps.bau_mental.models import Box, BoxSummaryNode, Note, NoteDigest
+from apps.bau_mental.services.context_packer import count_tokens
+from apps.core.services.openai_client import OPENAI_AVAILABLE, get_openai_client
+
+logger = logging.getLogger("apps")
+
+SUMMARY_MODEL = os.getenv("BAU_MENTAL_SUMMARY_MODEL", "gpt-4o-mini")
+# Chamadas de digest em paralelo (primeira geração de caixinhas grandes)
+SUMMARY_WORKERS = int(os.getenv("BAU_MENTAL_SUMMARY_WORKERS", "4"))
+# Transcrições até este tamanho são usadas como digest sem chamar o LLM
+DIGEST_MIN_TOKENS = 120
+# Tamanho máximo de entrada de uma chamada de merge (acima disso, merge em lotes)
+MERGE_INPUT_TOKENS = 12000
+
+DIGEST_PROMPT = """Resuma a anotação abaixo em no máximo 3 frases curtas.
+Preserve fatos, nomes, valores, datas, decisões e pendências. Não invente nada.
+
+Anotação:
+{transcript}"""
+
+MERGE_PROMPT = """Abaixo estão resumos parciais (em ordem cronológica) de anotações da caixinha "{box_name}" ({label}).
+Combine-os em um único resumo completo e organizado. Inclua pontos principais, decisões, ideias e contexto temporal quando relevante.
+Use APENAS as informações dos resumos parciais.
+
+{parts}"""
+
+
+def _sha256(text: str) -> str:
+    """Hash hexadecimal SHA-256 de um texto."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BoxSummaryService:
+    """Serviço de resumo incremental (map-reduce) de caixinhas."""
+
+    def __init__(self) -> None:
+        """Inicializa o serviço de resumo."""
+        # Aceita tanto OPENAI_API_KEY quanto OPENAI_KEY (compatibilidade)
+        self.api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_KEY")
+        if OPENAI_AVAILABLE and self.api_key:
+            self.client = get_openai_client("bau_mental.box_summary", self.api_key)
+        else:
+            self.client = None
+        self.llm_calls = 0
+        self.recomputed = 0
+
+    def is_available(self) -> bool:
+        """Verifica se o serviço está disponível."""
+        return OPENAI_AVAILABLE and self.client is not None
+
+    def _complete(self, prompt: str, max_tokens: int) -> str:
+        """Executa uma chamada de chat ao LLM e retorna o texto."""
+        self.llm_calls += 1
+        response = self.client.chat.completions.create(
+            model=SUMMARY_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,
+            max_tokens=max_tokens,
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    def digest_note(self, transcript: str) -> str:
+        """Gera o digest de uma transcrição (curtas são usadas como estão)."""
+        transcript = transcript.strip()
+        if count_tokens(transcript) <= DIGEST_MIN_TOKENS:
+            return transcript
+        return self._complete(DIGEST_PROMPT.format(transcript=transcript), max_tokens=200)
+
+    def merge(self, box_name: str, label: str, parts: List[str], max_tokens: int = 800) -> str:
+        """Combina resumos parciais em um só (em lotes se a entrada for grande)."""
+        if not parts:
+            return ""
+        if len(parts) == 1:
+            return parts[0]
+
+        batches: List[List[str]] = [[]]
+        batch_tokens = 0
+        for part in parts:
+            part_tokens = count_tokens(part)
+            if batches[-1] and batch_tokens + part_tokens > MERGE_INPUT_TOKENS:
+                batches.append([])
+                batch_tokens = 0
+            batches[-1].append(part)
+            batch_tokens += part_tokens
+
+        if len(batches) > 1:
+            merged = [self.merge(box_name, label, batch, max_tokens) for batch in batches]
+            return self.merge(box_name, label, merged, max_tokens)
+
+        prompt = MERGE_PROMPT.format(
+            box_name=box_name, label=label, parts="\n\n---\n\n".join(parts)
+        )
+        return self._complete(prompt, max_tokens=max_tokens)
+
+    def _refresh_digests(self, box: Box) -> List[Tuple[Note, NoteDigest]]:
+        """Garante digest atualizado para cada nota da caixinha.
+
+        Returns:
+            Lista de (nota, digest) em ordem cronológica
+        """
+        notes = list(
+            Note.objects.filter(
+                workspace_id=box.workspace_id,
+                box=box,
+                processing_status="completed",
+                transcript__isnull=False,
+            )
+            .exclude(transcript="")
+            .only("id", "transcript", "created_at")
+            .order_by("created_at", "id")
+        )
+        digests = {
+            digest.note_id: digest
+            for digest in NoteDigest.objects.filter(note__box=box)
+        }
+
+        stale = []
+        for note in notes:
+            source_hash = _sha256(note.transcript)
+            digest = digests.get(note.id)
+            if digest is None or digest.source_hash != source_hash:
+                stale.append((note, source_hash))
+
+        self.recomputed += len(stale)
+        if stale:
+            with ThreadPoolExecutor(max_workers=max(1, SUMMARY_WORKERS)) as executor:
+                texts = list(executor.map(lambda item: self.digest_note(item[0].transcript), stale))
+
+            to_create, to_update = [], []
+            for (note, source_hash), text in zip(stale, texts):
+                digest = digests.get(note.id)
+                if digest is None:
+                    digest = NoteDigest(
+                        workspace_id=box.workspace_id, note=note, digest=text, source_hash=source_hash
+                    )
+                    digests[note.id] = digest
+                    to_create.append(digest)
+                else:
+                    digest.digest = text
+                    digest.source_hash = source_hash
+                    digest.updated_at = timezone.now()
+                    to_update.append(digest)
+            NoteDigest.objects.bulk_create(to_create)
+            NoteDigest.objects.bulk_update(to_update, ["digest", "source_hash", "updated_at"])
+
+        return [(note, digests[note.id]) for note in notes]
+
+    def _sync_level(
+        self,
+        box: Box,
+        level: str,
+        groups: Dict[str, List[Tuple[str, str, int]]],
+        existing: Dict[Tuple[str, str], BoxSummaryNode],
+        max_tokens: int = 800,
+    ) -> Dict[str, BoxSummaryNode]:
+        """Recalcula os nós de um nível cujos filhos mudaram.
+
+        Args:
+            box: Caixinha
+            level: Nível ("month", "year" ou "root")
+            groups: period -> [(chave do filho, texto do filho, qtd. de notas), ...]
+            existing: Nós já persistidos da caixinha, por (level, period)
+            max_tokens: Tamanho máximo do resumo gerado
+
+        Returns:
+            Nós atualizados do nível, por período
+        """
+        labels = {"month": "mês {}", "year": "ano {}", "root": "todas as anotações"}
+        nodes: Dict[str, BoxSummaryNode] = {}
+        for period, children in sorted(groups.items()):
+            source_hash = _sha256("\n".join(key for key, _, _ in children))
+            note_count = sum(count for _, _, count in children)
+            node = existing.pop((level, period), None)
+            if node is not None and node.source_hash == source_hash:
+                nodes[period] = node
+                continue
+
+            summary = self.merge(
+                box.name,
+                labels[level].format(period),
+                [text for _, text, _ in children],
+                max_tokens=max_tokens,
+            )
+            if node is None:
+                node = BoxSummaryNode(workspace_id=box.workspace_id, box=box, level=level, period=period)
+            node.summary = summary
+            node.source_hash = source_hash
+            node.note_count = note_count
+            node.save()
+            nodes[period] = node
+            self.recomputed += 1
+
+        # Períodos sem notas (todas movidas/apagadas) saem da árvore
+        stale_ids = [node.id for (node_level, _), node in existing.items() if node_level == level]
+        if stale_ids:
+            BoxSummaryNode.objects.filter(id__in=stale_ids).delete()
+            self.recomputed += len(stale_ids)
+        return nodes
+
+    def summarize_box(self, box: Box, force: bool = False) -> Dict[str, Any]:
+        """Atualiza a árvore de resumos da caixinha e retorna o resumo raiz.
+
+        Args:
+            box: Caixinha a resumir
+            force: Ignora cache e refaz todos os nós (digests continuam reaproveitados)
+
+        Returns:
+            {
+                "summary": str | None (None se a caixinha não tem notas),
+                "cached": bool (True se nenhum digest/nó precisou ser recalculado),
+                "note_count": int,
+                "llm_calls": int,
+            }
+
+        Raises:
+            ValueError: Se serviço não está disponível
+        """
+        if not self.is_available():
+            raise ValueError("OpenAI não está disponível. Verifique OPENAI_API_KEY no .env")
+
+        self.llm_calls = 0
+        self.recomputed = 0
+        pairs = self._refresh_digests(box)
+        existing = {
+            (node.level, node.period): node
+            for node in BoxSummaryNode.objects.filter(box=box)
+        }
+        if force:
+            for node in existing.values():
+                node.source_hash = ""
+
+        months: Dict[str, List[Tuple[str, str, int]]] = {}
+        for note, digest in pairs:
+            created_at = timezone.localtime(note.created_at)
+            months.setdefault(created_at.strftime("%Y-%m"), []).append(
+                (
+                    f"{note.id}:{digest.source_hash}",
+                    f"📅 {created_at.strftime('%d/%m/%Y')}: {digest.digest}",
+                    1,
+                )
+            )
+        month_nodes = self._sync_level(box, "month", months, existing)
+
+        years: Dict[str, List[Tuple[str, str, int]]] = {}
+        for period, node in month_nodes.items():
+            years.setdefault(period[:4], []).append(
+                (f"{period}:{node.source_hash}", f"Mês {period}:\n{node.summary}", node.note_count)
+            )
+        year_nodes = self._sync_level(box, "year", years, existing)
+
+        root_children = [
+            (f"{period}:{node.source_hash}", f"Ano {period}:\n{node.summary}", node.note_count)
+            for period, node in year_nodes.items()
+        ]
+        root_nodes = self._sync_level(
+            box, "root", {"": root_children} if root_children else {}, existing, max_tokens=1000
+        )
+        root = root_nodes.get("")
+
+        summary = root.summary if root else None
+        box.summary = summary
+        box.summary_generated_at = timezone.now()
+        box.summary_stale = False
+        box.save(update_fields=["summary", "summary_generated_at", "summary_stale"])
+
+        logger.info(
+            f"[BoxSummary] Caixinha {box.id}: {len(pairs)} notas, {self.llm_calls} chamadas ao LLM"
+        )
+        return {
+            "summary": summary,
+            "cached": self.recomputed == 0,
+            "note_count": len(pairs),
+            "llm_calls": self.llm_calls,
+        }
@@ -4,14 +4,40 @@ import json
 import os
 import re
 from typing import Any, Dict, List
-from difflib import SequenceMatcher
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    OpenAI = None
+from apps.bau_mental.services.box_classifier import LOCAL_CONFIDENCE_THRESHOLD, predict_box
+from apps.bau_mental.services.box_matcher import get_box_matcher
+from apps.core.services.openai_client import OPENAI_AVAILABLE, get_openai_client
+
+# Caracteres de cada transcrição enviados na classificação em lote
+BATCH_TRANSCRIPT_CHARS = 2000
+
+# Resposta estruturada da classificação em lote (números de nota e caixinha)
+BATCH_RESPONSE_SCHEMA = {
+    "name": "note_classifications",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "classifications": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "note": {"type": "integer"},
+                        "box": {"type": ["integer", "null"]},
+                        "confidence": {"type": "number"},
+                        "reason": {"type": "string"},
+                    },
+                    "required": ["note", "box", "confidence", "reason"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["classifications"],
+        "additionalProperties": False,
+    },
+}
 
 
 class ClassificationService:
@@ -22,7 +48,7 @@ class ClassificationService:
         # Aceita tanto OPENAI_API_KEY quanto OPENAI_KEY (compatibilidade)
         self.api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_KEY") or os.getenv("ANTHROPIC_API_KEY")
         if OPENAI_AVAILABLE and self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = get_openai_client("bau_mental.classification", self.api_key)
             self.provider = "openai"
         else:
             self.client = None
@@ -32,28 +58,15 @@ class ClassificationService:
         """Verifica se o serviço está disponível."""
         return OPENAI_AVAILABLE and self.client is not None
 
-    def _normalize_text(self, text: str) -> str:
-        """Normaliza texto para comparação (remove acentos, lowercase, etc)."""
-        # Remove acentos básicos (pode ser expandido)
-        text = text.lower().strip()
-        # Remove pontuação
-        text = re.sub(r'[^\w\s]', '', text)
-        return text
-
-    def _calculate_similarity(self, text1: str, text2: str) -> float:
-        """Calcula similaridade entre dois textos (0-1)."""
-        norm1 = self._normalize_text(text1)
-        norm2 = self._normalize_text(text2)
-        return SequenceMatcher(None, norm1, norm2).ratio()
-
     def _detect_box_mention(
-        self, transcript: str, available_boxes: List[Dict[str, Any]]
+        self, transcript: str, available_boxes: List[Dict[str, Any]], workspace_id: str | None = None
     ) -> Dict[str, Any] | None:
         """Detecta se alguma caixinha é mencionada diretamente na transcrição.
 
         Args:
             transcript: Texto transcrito
             available_boxes: Lista de caixinhas disponíveis
+            workspace_id: ID do workspace (reaproveita o matcher compilado)
 
         Returns:
             {
@@ -64,86 +77,49 @@ class ClassificationService:
         """
         if not transcript or not available_boxes:
             return None
-
-        transcript_lower = transcript.lower()
-        transcript_normalized = self._normalize_text(transcript)
-
-        # Primeiro, busca exata (case-insensitive)
-        for box in available_boxes:
-            box_name = box["name"]
-            box_name_lower = box_name.lower()
-            box_name_normalized = self._normalize_text(box_name)
-
-            # Busca exata
-            if box_name_lower in transcript_lower or box_name_normalized in transcript_normalized:
-                return {
-                    "box_id": box["id"],
-                    "confidence": 0.95,
-                    "reason": f"Nome da caixinha '{box_name}' mencionado diretamente na transcrição",
-                }
-
-        # Se não encontrou exato, tenta similaridade fonética
-        best_match = None
-        best_similarity = 0.0
-        SIMILARITY_THRESHOLD = 0.75  # 75% de similaridade
-
-        for box in available_boxes:
-            box_name = box["name"]
-            box_name_normalized = self._normalize_text(box_name)
-
-            # Busca palavras similares na transcrição
-            transcript_words = transcript_normalized.split()
-            for word in transcript_words:
-                similarity = self._calculate_similarity(word, box_name_normalized)
-                if similarity > best_similarity:
-                    best_similarity = similarity
-                    if similarity >= SIMILARITY_THRESHOLD:
-                        best_match = {
-                            "box_id": box["id"],
-                            "confidence": min(0.85, 0.5 + (similarity - SIMILARITY_THRESHOLD) * 0.7),
-                            "reason": f"Possível menção da caixinha '{box_name}' na transcrição (similaridade: {similarity:.2f})",
-                        }
-
-        return best_match
+        return get_box_matcher(workspace_id, available_boxes).detect_box_mention(transcript)
 
     def _check_keywords_match(
-        self, transcript: str, available_boxes: List[Dict[str, Any]]
+        self, transcript: str, available_boxes: List[Dict[str, Any]], workspace_id: str | None = None
     ) -> Dict[str, Any] | None:
         """Verifica se transcript contém keywords de alguma caixinha.
 
         Args:
             transcript: Texto transcrito
             available_boxes: Lista de caixinhas com campo 'keywords'
+            workspace_id: ID do workspace (reaproveita o matcher compilado)
 
         Returns:
             {"box_id": "uuid", "confidence": 0.8, "reason": "..."} ou None
         """
         if not transcript or not available_boxes:
             return None
+        return get_box_matcher(workspace_id, available_boxes).check_keywords_match(transcript)
 
-        transcript_lower = transcript.lower()
-        transcript_words = set(transcript_lower.split())
+    def classify_without_llm(
+        self, transcript: str, available_boxes: List[Dict[str, Any]], workspace_id: str
+    ) -> Dict[str, Any] | None:
+        """Etapas da classificação que não chamam a IA (heurísticas 1 e 2 e modelo local).
 
-        for box in available_boxes:
-            keywords_str = box.get("keywords", "")
-            if not keywords_str:
-                continue
+        Returns:
+            Resultado como em ``classify`` ou None se a nota precisa da IA
+        """
+        # HEURÍSTICA 1: Match exato de nome
+        direct_mention = self._detect_box_mention(transcript, available_boxes, workspace_id)
+        if direct_mention and direct_mention.get("confidence", 0) >= 0.75:
+            return {**direct_mention, "source": "heuristic"}
 
-            # Separar keywords por vírgula e normalizar
-            keywords = [k.strip().lower() for k in keywords_str.split(",") if k.strip()]
-            if not keywords:
-                continue
+        # HEURÍSTICA 2: Match de keywords
+        keywords_match = self._check_keywords_match(transcript, available_boxes, workspace_id)
+        if keywords_match and keywords_match.get("confidence", 0) >= 0.5:
+            return {**keywords_match, "source": "heuristic"}
 
-            # Verificar se alguma keyword aparece na transcrição
-            matches = [kw for kw in keywords if kw in transcript_lower]
-            if matches:
-                # Calcular confiança baseado em quantas keywords foram encontradas
-                confidence = min(0.85, 0.6 + (len(matches) / len(keywords)) * 0.25)
-                return {
-                    "box_id": box["id"],
-                    "confidence": confidence,
-                    "reason": f"Keywords encontradas: {', '.join(matches)}",
-                }
+        # HEURÍSTICA 3: Padrão recente (implementado na task, não aqui)
+
+        # Modelo local treinado com as escolhas do usuário (sem chamada à IA)
+        local_match = predict_box(workspace_id, transcript, [box["id"] for box in available_boxes])
+        if local_match and local_match["confidence"] >= LOCAL_CONFIDENCE_THRESHOLD:
+            return local_match
 
         return None
 
@@ -156,7 +132,8 @@ class ClassificationService:
         1. Match exato de nome
         2. Match de keywords
         3. Padrão recente (implementado na task, não aqui)
-        4. IA (só se 1, 2 e 3 falharem)
+        4. Modelo local do workspace (se confiança >= limiar)
+        5. IA (só se as anteriores falharem)
 
         Args:
             transcript: Texto transcrito
@@ -169,6 +146,7 @@ class ClassificationService:
                 "box_id": "uuid-da-caixinha" ou None,
                 "confidence": 0.85,
                 "reason": "Motivo da classificação",
+                "source": "heuristic" | "local" | "llm" | "none",
             }
             Se confiança < 0.5, box_id será None (vai para inbox)
 
@@ -182,19 +160,13 @@ class ClassificationService:
                 "box_id": None,
                 "confidence": 0.0,
                 "reason": "Nenhuma caixinha disponível",
+                "source": "none",
             }
 
-        # HEURÍSTICA 1: Match exato de nome
-        direct_mention = self._detect_box_mention(transcript, available_boxes)
-        if direct_mention and direct_mention.get("confidence", 0) >= 0.75:
-            return direct_mention
-
-        # HEURÍSTICA 2: Match de keywords
-        keywords_match = self._check_keywords_match(transcript, available_boxes)
-        if keywords_match and keywords_match.get("confidence", 0) >= 0.5:
-            return keywords_match
+        local_result = self.classify_without_llm(transcript, available_boxes, workspace_id)
+        if local_result:
+            return local_result
 
-        # HEURÍSTICA 3: Padrão recente (implementado na task, não aqui)
         # Se chegou aqui, heurísticas falharam, precisa chamar IA
 
         if not self.is_available():
@@ -203,6 +175,7 @@ class ClassificationService:
                 "box_id": None,
                 "confidence": 0.0,
                 "reason": "Heurísticas falharam e IA não disponível",
+                "source": "none",
             }
 
         try:
@@ -276,6 +249,7 @@ Responda APENAS com JSON no formato especificado."""
                     "box_id": box_id,
                     "confidence": float(confidence),
                     "reason": result.get("reason", "Classificação automática"),
+                    "source": "llm",
                 }
             else:
                 # Resposta vazia, vai para inbox
@@ -283,6 +257,7 @@ Responda APENAS com JSON no formato especificado."""
                     "box_id": None,
                     "confidence": 0.0,
                     "reason": "Resposta vazia da IA",
+                    "source": "llm",
                 }
 
         except json.JSONDecodeError as e:
@@ -291,8 +266,107 @@ Responda APENAS com JSON no formato especificado."""
                 "box_id": None,
                 "confidence": 0.0,
                 "reason": f"Erro ao parsear resposta: {str(e)}",
+                "source": "llm",
             }
         except Exception as e:
             raise Exception(f"Erro ao classificar anotação: {str(e)}") from e
 
+    def classify_batch(
+        self, transcripts: Dict[str, str], available_boxes: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Classifica várias anotações em uma única chamada à IA.
+
+        A lista de caixinhas vai uma vez no prompt (em vez de uma vez por nota)
+        e a resposta é estruturada (JSON Schema): uma classificação por nota.
+        Caixinhas e notas são referenciadas por número, não por UUID, para
+        economizar tokens.
+
+        Args:
+            transcripts: {note_id: transcrição}
+            available_boxes: Lista de caixinhas disponíveis (como em ``classify``)
+
+        Returns:
+            {note_id: {"box_id", "confidence", "reason", "source": "llm"}}; notas
+            ausentes da resposta ficam de fora
+
+        Raises:
+            ValueError: Se serviço não está disponível
+            Exception: Se erro ao classificar
+        """
+        if not self.is_available():
+            raise ValueError("Serviço de classificação não disponível")
+        if not transcripts or not available_boxes:
+            return {}
+
+        note_ids = list(transcripts)
+        boxes_text = "\n".join(
+            f"{number}. {box['name']}: {box.get('description') or 'Sem descrição'}"
+            for number, box in enumerate(available_boxes, start=1)
+        )
+        notes_text = "\n\n".join(
+            f"[{number}] \"{transcripts[note_id][:BATCH_TRANSCRIPT_CHARS]}\""
+            for number, note_id in enumerate(note_ids, start=1)
+        )
+
+        system_prompt = """Você é um assistente que organiza anotações em caixinhas (categorias).
+
+Sua tarefa é analisar várias transcrições de áudio e decidir, para cada uma, em qual caixinha ela deve ficar.
+
+Regras IMPORTANTES:
+1. Se o nome de uma caixinha for mencionado na transcrição (mesmo com variações de pronúncia/grafia),
+   essa é a caixinha escolhida com alta confiança (>= 0.8)
+2. Analise o conteúdo de cada transcrição de forma independente
+3. Escolha a caixinha mais apropriada baseado no assunto
+4. Se não tiver certeza (confiança < 0.5), retorne box = null (INBOX)
+5. Responda com uma classificação para cada anotação, usando os números da lista"""
+
+        user_prompt = f"""Caixinhas disponíveis:
+{boxes_text}
 
+Anotações:
+{notes_text}
+
+Em qual caixinha cada anotação deve ficar?"""
+
+        try:
+            response = self.client.chat.completions.create(
+                model="gpt-4o-mini",  # Modelo econômico
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                temperature=0.3,  # Mais determinístico
+                response_format={"type": "json_schema", "json_schema": BATCH_RESPONSE_SCHEMA},
+                max_tokens=100 + 80 * len(note_ids),
+            )
+            content = response.choices[0].message.content
+            items = json.loads(content).get("classifications", []) if content else []
+        except json.JSONDecodeError:
+            return {}
+        except Exception as e:
+            raise Exception(f"Erro ao classificar anotações: {str(e)}") from e
+
+        results = {}
+        for item in items:
+            note_number = item.get("note")
+            if not isinstance(note_number, int) or not 1 <= note_number <= len(note_ids):
+                continue
+            box_number = item.get("box")
+            confidence = float(item.get("confidence") or 0.0)
+
+            # Se confiança < 0.5, vai para inbox
+            box_id = None
+            if confidence >= 0.5:
+                if isinstance(box_number, int) and 1 <= box_number <= len(available_boxes):
+                    box_id = available_boxes[box_number - 1]["id"]
+                else:
+                    # Caixinha fora da lista, vai para inbox
+                    confidence = 0.0
+
+            results[note_ids[note_number - 1]] = {
+                "box_id": box_id,
+                "confidence": confidence,
+                "reason": item.get("reason") or "Classificação automática",
+                "source": "llm",
+            }
+        return results
@@ -0,0 +1,165 @@
+"""Classificação em lote das notas que precisam da IA.
+
+Em rajadas de upload, cada ``classify_note`` faria uma chamada à IA repetindo
+a lista de caixinhas no prompt. Em vez disso, a nota que passa pelas
+heurísticas e pelo modelo local sem resultado fica marcada como pendente
+(``metadata.classification_pending``) e a primeira nota da janela agenda
+``classify_pending_notes`` do workspace para daqui a
+BAU_MENTAL_CLASSIFICATION_BATCH_WINDOW segundos. A task classifica as
+pendentes em lotes (uma chamada por lote) e grava caixinha e confiança com um
+único ``bulk_update``.
+
+Com BAU_MENTAL_CLASSIFICATION_BATCH_WINDOW=0 cada nota chama a IA na hora.
+
+Se o lote falha (erro da IA, serviço indisponível, task perdida), as notas
+continuam pendentes; ``requeue_pending_classifications`` (beat) reagenda o
+lote dos workspaces com notas pendentes há mais de
+BAU_MENTAL_CLASSIFICATION_RETRY_AFTER segundos.
+"""
+
+import os
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest, Now
+from django.utils import timezone
+
+from apps.bau_mental.models import Box, Note
+from apps.core.cache import get_cache_key
+
+# Janela de espera para juntar notas do workspace (0 desativa o lote)
+BATCH_WINDOW_SECONDS = float(os.getenv("BAU_MENTAL_CLASSIFICATION_BATCH_WINDOW", "5"))
+# Notas por chamada à IA
+BATCH_MAX_NOTES = int(os.getenv("BAU_MENTAL_CLASSIFICATION_BATCH_SIZE", "20"))
+# Notas pendentes há mais que isso têm o lote reagendado pela varredura
+RETRY_AFTER_SECONDS = float(os.getenv("BAU_MENTAL_CLASSIFICATION_RETRY_AFTER", "300"))
+PENDING_FLAG = "classification_pending"
+SCHEDULE_PREFIX = "bau_mental_classification_batch"
+
+
+def batching_enabled() -> bool:
+    """Indica se a classificação por IA é feita em lote."""
+    return BATCH_WINDOW_SECONDS > 0
+
+
+def mark_pending(note: Note) -> None:
+    """Marca a nota para o próximo lote do workspace."""
+    note.metadata = {**(note.metadata or {}), PENDING_FLAG: True}
+    note.save(update_fields=["metadata"])
+
+
+def claim_batch_schedule(workspace_id: Any) -> bool:
+    """Reserva o agendamento do lote do workspace (só a primeira nota da janela agenda).
+
+    A reserva expira sozinha se a task se perder, para que a próxima nota
+    agende outro lote.
+    """
+    timeout = max(int(BATCH_WINDOW_SECONDS * 10), 60)
+    return cache.add(_schedule_key(workspace_id), 1, timeout)
+
+
+def release_batch_schedule(workspace_id: Any) -> None:
+    """Libera o agendamento: notas marcadas daqui em diante agendam um novo lote."""
+    cache.delete(_schedule_key(workspace_id))
+
+
+def _schedule_key(workspace_id: Any) -> str:
+    """Chave da reserva de agendamento do lote."""
+    return get_cache_key(SCHEDULE_PREFIX, "scheduled", workspace_id=str(workspace_id))
+
+
+def pending_notes(workspace_id: Any):
+    """Notas do workspace aguardando a classificação em lote."""
+    return (
+        Note.objects.filter(
+            workspace_id=workspace_id,
+            box__isnull=True,
+            deleted_at__isnull=True,
+            transcript__isnull=False,
+            **{f"metadata__{PENDING_FLAG}": True},
+        )
+        .exclude(transcript="")
+        .order_by("created_at")
+    )
+
+
+def stale_pending_workspace_ids() -> List[Any]:
+    """Workspaces com notas pendentes há mais de RETRY_AFTER_SECONDS.
+
+    ``mark_pending`` atualiza ``updated_at``; um lote que falha não toca as
+    notas, então elas ficam com a data de quando entraram no lote.
+    """
+    threshold = timezone.now() - timedelta(seconds=max(RETRY_AFTER_SECONDS, BATCH_WINDOW_SECONDS))
+    return list(
+        Note.objects.filter(
+            box__isnull=True,
+            deleted_at__isnull=True,
+            updated_at__lt=threshold,
+            **{f"metadata__{PENDING_FLAG}": True},
+        )
+        .order_by()
+        .values_list("workspace_id", flat=True)
+        .distinct()
+    )
+
+
+def apply_batch_results(
+    workspace_id: Any, note_ids: Iterable[Any], results: Dict[str, Dict[str, Any]]
+) -> int:
+    """Grava o resultado do lote nas notas que continuam pendentes.
+
+    Notas sem resultado vão para a inbox (confiança 0). Notas que o usuário
+    moveu enquanto o lote rodava ficam como estão. ``bulk_update`` não passa
+    por ``Note.save``: os contadores das caixinhas são ajustados aqui, um
+    UPDATE por caixinha.
+
+    Returns:
+        Quantidade de notas atualizadas
+    """
+    from apps.bau_mental.services.answer_cache import invalidate_note_answers
+
+    with transaction.atomic():
+        notes = list(
+            pending_notes(workspace_id).filter(id__in=list(note_ids)).select_for_update()
+        )
+        result_box_ids = {result["box_id"] for result in results.values() if result.get("box_id")}
+        valid_box_ids = {
+            str(box_id)
+            for box_id in Box.objects.filter(
+                workspace_id=workspace_id, id__in=result_box_ids, deleted_at__isnull=True
+            ).values_list("id", flat=True)
+        }
+
+        added: Counter = Counter()
+        latest = {}
+        for note in notes:
+            result = results.get(str(note.id), {})
+            box_id = result.get("box_id")
+            note.box_id = box_id if box_id in valid_box_ids else None
+            note.ai_confidence = float(result.get("confidence", 0.0)) if note.box_id else 0.0
+            note.metadata = {k: v for k, v in (note.metadata or {}).items() if k != PENDING_FLAG}
+            if note.box_id:
+                added[note.box_id] += 1
+                latest[note.box_id] = max(latest.get(note.box_id, note.created_at), note.created_at)
+
+        now = timezone.now()
+        for note in notes:
+            note.updated_at = now
+        Note.objects.bulk_update(notes, ["box", "ai_confidence", "metadata", "updated_at"])
+        for box_id, count in added.items():
+            Box.objects.filter(id=box_id).update(
+                note_count=F("note_count") + count,
+                last_note_at=Greatest(Coalesce(F("last_note_at"), Value(latest[box_id])), Value(latest[box_id])),
+                summary_stale=True,
+                updated_at=Now(),
+            )
+
+        for note in notes:
+            transaction.on_commit(
+                lambda note_id=note.id: invalidate_note_answers(workspace_id, note_id)
+            )
+    return len(notes)
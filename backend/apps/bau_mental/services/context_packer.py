@@ -0,0 +1,271 @@
+"""Empacotamento de contexto (notas) para prompts do LLM com orçamento de tokens.
+
+Fluxo:
+1. Cada transcrição é quebrada em chunks (por frases, até ``chunk_tokens``)
+2. Cada chunk recebe um score: relevância da nota (score da busca normalizado
+   ou posição no ranking, entre 0 e 1) somada à fração dos termos da pergunta
+   presentes no chunk
+3. Chunks são adicionados gulosamente (maior score primeiro) até esgotar o
+   orçamento de tokens
+4. As notas selecionadas são devolvidas em ordem cronológica, com seus chunks
+   na ordem original do texto
+
+A contagem de tokens usa o tokenizer BPE do modelo (tiktoken). Sem tiktoken
+(ou sem o arquivo de encoding disponível) cai na estimativa de 4 caracteres
+por token.
+"""
+
+import logging
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    tiktoken = None
+
+logger = logging.getLogger("apps")
+
+# Encoding do modelo de chat (gpt-4o / gpt-4o-mini usam o200k_base)
+TOKENIZER_ENCODING = os.getenv("BAU_MENTAL_TOKENIZER_ENCODING", "o200k_base")
+# Orçamento total de tokens do prompt (instruções + pergunta + notas)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("BAU_MENTAL_CONTEXT_TOKEN_BUDGET", "12000"))
+# Tamanho máximo de cada chunk de transcrição
+CONTEXT_CHUNK_TOKENS = int(os.getenv("BAU_MENTAL_CONTEXT_CHUNK_TOKENS", "300"))
+
+# Peso da sobreposição lexical com a pergunta no score do chunk
+LEXICAL_WEIGHT = 1.0
+# Decaimento por posição quando as notas não trazem score (lista já ranqueada)
+RANK_DECAY = 0.05
+
+_SENTENCE = re.compile(r"[^.!?…\n]+[.!?…]*")
+_WORD = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = {
+    "que", "para", "com", "uma", "um", "por", "dos", "das", "nos", "nas", "não",
+    "nao", "foi", "ser", "tem", "mas", "como", "mais", "sobre", "isso", "esse",
+    "essa", "este", "esta", "ele", "ela", "eles", "elas", "meu", "minha", "seu",
+    "sua", "ja", "já", "quando", "onde", "qual", "quais", "quem", "the", "and",
+    "sao", "são", "pelo", "pela", "entre", "ate", "até", "tudo", "nada", "dito",
+}
+
+
+_encoding_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _load_encoding() -> Any:
+    """Carrega o encoding BPE uma vez por processo (None se indisponível)."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        logger.warning(
+            f"[ContextPacker] Encoding {TOKENIZER_ENCODING} indisponível, "
+            f"usando estimativa por caracteres: {e}"
+        )
+        return None
+
+
+def _get_encoding() -> Any:
+    """Encoding BPE do processo (carga única, segura entre threads)."""
+    with _encoding_lock:
+        return _load_encoding()
+
+
+def count_tokens(text: str) -> int:
+    """Conta tokens do texto com o tokenizer do modelo (ou estimativa)."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _split_by_tokens(text: str, max_tokens: int) -> List[str]:
+    """Quebra um texto (sem pontuação útil) em pedaços de até max_tokens."""
+    encoding = _get_encoding()
+    if encoding is None:
+        size = max_tokens * 4
+        return [text[i:i + size] for i in range(0, len(text), size)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [
+        encoding.decode(tokens[i:i + max_tokens])
+        for i in range(0, len(tokens), max_tokens)
+    ]
+
+
+def _fold(text: str) -> str:
+    """Minúsculas e sem acentos (comparação lexical barata)."""
+    return unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode()
+
+
+def _terms(text: str) -> set:
+    """Termos normalizados da pergunta (sem stopwords e palavras curtas)."""
+    return {
+        word for word in _WORD.findall(_fold(text))
+        if len(word) > 2 and word not in _STOPWORDS
+    }
+
+
+def _date_key(note: Dict[str, Any]) -> Any:
+    """Chave de ordenação cronológica (created_at vem como dd/mm/YYYY)."""
+    created_at = note.get("created_at", "")
+    try:
+        return datetime.strptime(created_at, "%d/%m/%Y")
+    except (TypeError, ValueError):
+        return datetime.min
+
+
+class ContextPacker:
+    """Seleciona trechos de notas que cabem num orçamento de tokens."""
+
+    def __init__(
+        self, budget_tokens: int | None = None, chunk_tokens: int | None = None
+    ) -> None:
+        """Inicializa o empacotador.
+
+        Args:
+            budget_tokens: Orçamento total do prompt (padrão: BAU_MENTAL_CONTEXT_TOKEN_BUDGET)
+            chunk_tokens: Tamanho máximo de cada chunk (padrão: BAU_MENTAL_CONTEXT_CHUNK_TOKENS)
+        """
+        self.budget_tokens = budget_tokens or CONTEXT_TOKEN_BUDGET
+        self.chunk_tokens = chunk_tokens or CONTEXT_CHUNK_TOKENS
+
+    def chunk(self, text: str) -> List[Dict[str, Any]]:
+        """Quebra uma transcrição em chunks de até ``chunk_tokens``.
+
+        Returns:
+            Lista de {"text": str, "tokens": int} na ordem do texto
+        """
+        chunks: List[Dict[str, Any]] = []
+        current: List[str] = []
+        current_tokens = 0
+
+        for sentence in _SENTENCE.findall(text):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            sentence_tokens = count_tokens(sentence)
+            if sentence_tokens > self.chunk_tokens:
+                pieces = _split_by_tokens(sentence, self.chunk_tokens)
+            else:
+                pieces = [sentence]
+
+            for piece in pieces:
+                piece_tokens = sentence_tokens if len(pieces) == 1 else count_tokens(piece)
+                # O espaço que junta o trecho ao anterior só conta se há um anterior
+                if current and current_tokens + 1 + piece_tokens > self.chunk_tokens:
+                    chunks.append({"text": " ".join(current), "tokens": current_tokens})
+                    current, current_tokens = [], 0
+                current_tokens += piece_tokens + (1 if current else 0)
+                current.append(piece)
+
+        if current:
+            chunks.append({"text": " ".join(current), "tokens": current_tokens})
+        return chunks
+
+    def _header(self, note: Dict[str, Any]) -> str:
+        """Cabeçalho de uma nota no prompt."""
+        return f"📅 {note.get('created_at', '')} - {note.get('box_name', 'Inbox')}\n"
+
+    def pack(
+        self, question: str, notes: List[Dict[str, Any]], reserved_tokens: int = 0
+    ) -> Dict[str, Any]:
+        """Seleciona os trechos mais relevantes das notas dentro do orçamento.
+
+        Args:
+            question: Pergunta do usuário (usada no score lexical)
+            notes: Notas em ordem de relevância. Se tiverem a chave ``score``
+                (busca semântica / full-text), ela é usada como relevância da nota;
+                senão a posição na lista define a relevância.
+            reserved_tokens: Tokens já ocupados no prompt (descontados do orçamento)
+
+        Returns:
+            {
+                "notes": [{"id", "created_at", "box_name", "text", "truncated"}, ...],
+                "tokens": tokens usados pelas notas,
+                "budget": orçamento disponível,
+            }
+        """
+        budget = max(0, self.budget_tokens - reserved_tokens)
+        question_terms = _terms(question)
+
+        scores = [note.get("score") for note in notes]
+        max_score = max((s for s in scores if s is not None and s > 0), default=None)
+
+        candidates = []
+        note_chunks: Dict[int, List[Dict[str, Any]]] = {}
+        for position, note in enumerate(notes):
+            transcript = note.get("transcript") or ""
+            if not transcript.strip():
+                continue
+
+            score = scores[position]
+            if max_score is not None and score is not None:
+                note_weight = max(score, 0) / max_score
+            else:
+                note_weight = 1.0 / (1.0 + position * RANK_DECAY)
+
+            chunks = self.chunk(transcript)
+            note_chunks[position] = chunks
+            for chunk_index, chunk in enumerate(chunks):
+                overlap = 0.0
+                if question_terms:
+                    folded = _fold(chunk["text"])
+                    overlap = sum(term in folded for term in question_terms) / len(question_terms)
+                chunk_score = note_weight + LEXICAL_WEIGHT * overlap
+                # Desempate: notas mais bem ranqueadas e início do texto primeiro
+                candidates.append((-chunk_score, position, chunk_index))
+
+        candidates.sort()
+
+        selected: Dict[int, List[int]] = {}
+        used = 0
+        for _, position, chunk_index in candidates:
+            cost = note_chunks[position][chunk_index]["tokens"]
+            if position not in selected:
+                cost += count_tokens(self._header(notes[position])) + 2
+            else:
+                # Separador do trecho anterior da nota (espaço ou "[...]")
+                cost += count_tokens(" [...] ")
+            if used + cost > budget:
+                continue
+            selected.setdefault(position, []).append(chunk_index)
+            used += cost
+
+        packed_notes = []
+        for position in sorted(selected, key=lambda p: (_date_key(notes[p]), p)):
+            note = notes[position]
+            chunks = note_chunks[position]
+            indexes = sorted(selected[position])
+            parts = []
+            for i, chunk_index in enumerate(indexes):
+                if i > 0 and chunk_index != indexes[i - 1] + 1:
+                    parts.append("[...]")
+                parts.append(chunks[chunk_index]["text"])
+            packed_notes.append(
+                {
+                    "id": note.get("id"),
+                    "created_at": note.get("created_at", ""),
+                    "box_name": note.get("box_name", "Inbox"),
+                    "text": " ".join(parts),
+                    "truncated": len(indexes) < len(chunks),
+                }
+            )
+
+        return {"notes": packed_notes, "tokens": used, "budget": budget}
+
+    def render(self, packed: Dict[str, Any]) -> str:
+        """Monta o texto das notas empacotadas para o prompt."""
+        return "\n\n".join(
+            f"{self._header(note)}{note['text']}" for note in packed["notes"]
+        )
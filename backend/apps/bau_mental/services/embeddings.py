@@ -0,0 +1,68 @@
+"""Serviço para gerar embeddings de texto (OpenAI)."""
+
+import os
+from typing import List
+
+from apps.core.services.openai_client import OPENAI_AVAILABLE, get_openai_client
+
+# Modelo e dimensão dos embeddings (text-embedding-3 aceita dimensões reduzidas)
+EMBEDDING_MODEL = os.getenv("BAU_MENTAL_EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_DIMENSIONS = int(os.getenv("BAU_MENTAL_EMBEDDING_DIMENSIONS", "512"))
+# Limite de caracteres enviados por texto (evita estourar contexto do modelo)
+MAX_EMBEDDING_CHARS = 24000
+
+
+class EmbeddingService:
+    """Serviço para gerar embeddings usando a API da OpenAI."""
+
+    def __init__(self) -> None:
+        """Inicializa o serviço de embeddings."""
+        # Aceita tanto OPENAI_API_KEY quanto OPENAI_KEY (compatibilidade)
+        self.api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_KEY")
+        if OPENAI_AVAILABLE and self.api_key:
+            self.client = get_openai_client("bau_mental.embeddings", self.api_key)
+        else:
+            self.client = None
+        self.model = EMBEDDING_MODEL
+        self.dimensions = EMBEDDING_DIMENSIONS
+
+    def is_available(self) -> bool:
+        """Verifica se o serviço está disponível."""
+        return OPENAI_AVAILABLE and self.client is not None
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Gera embeddings para uma lista de textos.
+
+        Args:
+            texts: Textos a vetorizar (ordem preservada no retorno)
+
+        Returns:
+            Lista de vetores (um por texto), com `self.dimensions` posições
+
+        Raises:
+            ValueError: Se serviço não está disponível
+            Exception: Se erro ao gerar embeddings
+        """
+        if not self.is_available():
+            raise ValueError(
+                "OpenAI não está disponível. Verifique OPENAI_API_KEY no .env"
+            )
+
+        if not texts:
+            return []
+
+        try:
+            response = self.client.embeddings.create(
+                model=self.model,
+                input=[(text or " ")[:MAX_EMBEDDING_CHARS] for text in texts],
+                dimensions=self.dimensions,
+            )
+            # A API retorna os itens com índice; ordenar garante correspondência
+            data = sorted(response.data, key=lambda item: item.index)
+            return [item.embedding for item in data]
+        except Exception as e:
+            raise Exception(f"Erro ao gerar embeddings: {str(e)}") from e
+
+    def embed_one(self, text: str) -> List[float]:
+        """Gera embedding para um único texto."""
+        return self.embed([text])[0]
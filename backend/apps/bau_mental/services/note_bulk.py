@@ -0,0 +1,173 @@
+"""Operações em lote sobre notas (mover, excluir, restaurar, reclassificar).
+
+Em vez de um ``Note.save`` por nota (cada um com seu UPDATE de contadores da
+caixinha), o lote lê as notas uma vez, grava todas com UPDATEs por conjunto
+dentro de uma transação e ajusta as caixinhas afetadas em um único UPDATE
+(``note_count``, ``last_note_at``, ``summary_stale``).
+
+``QuerySet.update``/``bulk_update`` não passam por ``Note.save`` nem pelos
+signals: contadores, ``updated_at`` (sincronização) e a invalidação das
+respostas em cache são feitos aqui.
+"""
+
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Coalesce, Greatest, Now
+from django.utils import timezone
+
+from apps.bau_mental.models import Box, Note
+from apps.bau_mental.services.box_classifier import is_confirmed, update_classifier_many
+from apps.bau_mental.services.classification_batch import PENDING_FLAG
+
+# Máximo de notas por requisição
+BULK_MAX_NOTES = int(os.getenv("BAU_MENTAL_BULK_MAX_NOTES", "500"))
+
+BULK_OPERATIONS = ("move", "delete", "restore", "reclassify")
+
+# Resultado de cada nota
+OUTCOME_OK = "ok"
+OUTCOME_UNCHANGED = "unchanged"
+OUTCOME_NOT_FOUND = "not_found"
+OUTCOME_NO_TRANSCRIPT = "no_transcript"
+
+
+def _box_counter_updates(deltas: Counter, latest: Dict[Any, Any]) -> Dict[str, Any]:
+    """Expressões de note_count/last_note_at para várias caixinhas em um UPDATE.
+
+    last_note_at só avança (GREATEST), como em ``Note._box_counter_updates``.
+    """
+    updates = {"summary_stale": True, "updated_at": Now()}
+    count_whens = [
+        When(id=box_id, then=Greatest(F("note_count") + delta, Value(0)))
+        for box_id, delta in deltas.items()
+        if delta
+    ]
+    if count_whens:
+        updates["note_count"] = Case(*count_whens, default=F("note_count"))
+    last_note_whens = [
+        When(id=box_id, then=Greatest(Coalesce(F("last_note_at"), Value(created_at)), Value(created_at)))
+        for box_id, created_at in latest.items()
+    ]
+    if last_note_whens:
+        updates["last_note_at"] = Case(*last_note_whens, default=F("last_note_at"))
+    return updates
+
+
+def apply_bulk_operation(
+    workspace_id: Any, note_ids: Iterable[Any], operation: str, box_id: Any = None
+) -> Dict[str, Any]:
+    """Aplica a operação às notas do workspace.
+
+    Args:
+        workspace_id: ID do workspace
+        note_ids: IDs das notas (fora do workspace contam como não encontradas)
+        operation: "move", "delete", "restore" ou "reclassify"
+        box_id: Caixinha de destino do "move" (None: inbox), já validada
+
+    Returns:
+        {
+            "results": {note_id (str): "ok" | "unchanged" | "not_found" | "no_transcript"},
+            "updated": quantidade de notas alteradas,
+        }
+    """
+    from apps.bau_mental.services.answer_cache import invalidate_note_answers
+    from apps.bau_mental.tasks import classify_note
+
+    note_ids = [str(note_id) for note_id in note_ids]
+    results = dict.fromkeys(note_ids, OUTCOME_NOT_FOUND)
+    target_box_id = str(box_id) if box_id else None
+
+    with transaction.atomic():
+        notes = list(
+            Note.all_objects.filter(workspace_id=workspace_id, id__in=note_ids)
+            .only("id", "box_id", "deleted_at", "transcript", "metadata", "ai_confidence", "created_at")
+            .select_for_update()
+        )
+
+        changed: List[Note] = []
+        # Caixinha de cada nota antes da operação
+        previous_box_ids: Dict[Any, str | None] = {}
+        training = []
+        for note in notes:
+            note_id = str(note.id)
+            note_box_id = str(note.box_id) if note.box_id else None
+            # Restaurar só enxerga notas excluídas; as demais operações, só as ativas
+            if (operation == "restore") != (note.deleted_at is not None):
+                results[note_id] = OUTCOME_UNCHANGED if operation == "restore" else OUTCOME_NOT_FOUND
+                continue
+            if operation == "move" and note_box_id == target_box_id:
+                results[note_id] = OUTCOME_UNCHANGED
+                continue
+            if operation == "reclassify" and not note.transcript:
+                results[note_id] = OUTCOME_NO_TRANSCRIPT
+                continue
+
+            results[note_id] = OUTCOME_OK
+            changed.append(note)
+            previous_box_ids[note.id] = note_box_id
+
+            if operation in ("move", "reclassify"):
+                # Caixinha anterior, se já contava como escolha do usuário no classificador local
+                previous_box_id = note.box_id if is_confirmed(note) else None
+                metadata = dict(note.metadata or {})
+                metadata.pop(PENDING_FLAG, None)
+                if operation == "move" and target_box_id:
+                    metadata["box_confirmed"] = True
+                else:
+                    metadata.pop("box_confirmed", None)
+                note.metadata = metadata
+                note.box_id = target_box_id if operation == "move" else None
+                # Reclassificar: a nota volta para a inbox até a nova classificação
+                training.append((note.transcript, note.box_id, previous_box_id))
+
+        if not changed:
+            return {"results": results, "updated": 0}
+
+        # Saldo de note_count por caixinha (a nota conta na caixinha se não está excluída)
+        deltas: Counter = Counter()
+        latest: Dict[str, Any] = {}
+        for note in changed:
+            previous_box_id = previous_box_ids[note.id]
+            if operation == "delete":
+                removed_from, added_to = previous_box_id, None
+            elif operation == "restore":
+                removed_from, added_to = None, previous_box_id
+            else:
+                removed_from, added_to = previous_box_id, note.box_id
+            if removed_from:
+                deltas[removed_from] -= 1
+            if added_to:
+                deltas[added_to] += 1
+                latest[added_to] = max(latest.get(added_to, note.created_at), note.created_at)
+        stale_box_ids = set(deltas) | {box_id for box_id in previous_box_ids.values() if box_id}
+
+        changed_ids = [note.id for note in changed]
+        if operation == "delete":
+            Note.all_objects.filter(id__in=changed_ids).update(deleted_at=timezone.now(), updated_at=Now())
+        elif operation == "restore":
+            Note.all_objects.filter(id__in=changed_ids).update(deleted_at=None, updated_at=Now())
+        else:
+            now = timezone.now()
+            for note in changed:
+                note.updated_at = now
+            Note.all_objects.bulk_update(changed, ["box", "metadata", "updated_at"])
+
+        if stale_box_ids:
+            Box.objects.filter(id__in=stale_box_ids).update(**_box_counter_updates(deltas, latest))
+
+        update_classifier_many(workspace_id, training)
+
+        def after_commit() -> None:
+            for note_id in changed_ids:
+                invalidate_note_answers(workspace_id, note_id)
+            if operation == "reclassify":
+                for note_id in changed_ids:
+                    classify_note.delay(str(note_id))
+
+        transaction.on_commit(after_commit)
+
+    return {"results": results, "updated": len(changed)}
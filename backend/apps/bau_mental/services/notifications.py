@@ -0,0 +1,159 @@
+"""Notificações de notas em caixinhas compartilhadas, agrupadas por janela.
+
+O signal de Note não grava notificações: registra o evento (nota criada ou
+editada) numa fila da caixinha no cache, depois do commit, e o primeiro
+evento da janela agenda ``fan_out_box_notifications``. A task lê os eventos
+acumulados, monta uma notificação por destinatário (um resumo quando houve
+mais de um evento) e grava tudo com um ``bulk_create``.
+
+    Eventos:  caixinha:seq            contador (último evento registrado)
+              caixinha:event:<n>      {"event", "note_id"}
+              caixinha:done           último evento já notificado
+              caixinha:gap            evento contado que faltava na última leitura
+"""
+
+import os
+from typing import Any, Dict, List
+
+from django.core.cache import cache
+
+from apps.core.cache import cache_incr, get_cache_key
+
+# Janela para agrupar eventos da mesma caixinha (0: notifica sem esperar)
+NOTIFICATION_WINDOW_SECONDS = float(os.getenv("BAU_MENTAL_NOTIFICATION_WINDOW", "60"))
+# Eventos não notificados expiram após este tempo (task perdida, cache reiniciado)
+EVENT_TIMEOUT = 24 * 60 * 60
+EVENT_PREFIX = "bau_mental_box_events"
+
+
+def _key(box_id: Any, *parts: Any) -> str:
+    """Chave da fila de eventos da caixinha."""
+    return get_cache_key(EVENT_PREFIX, str(box_id), *parts)
+
+
+def record_note_event(box_id: Any, note_id: Any, event: str) -> bool:
+    """Registra evento de nota na caixinha.
+
+    Returns:
+        True se este é o primeiro evento da janela (quem chamou agenda a task)
+    """
+    seq = cache_incr(_key(box_id, "seq"), timeout=EVENT_TIMEOUT)
+    cache.set(_key(box_id, "event", seq), {"event": event, "note_id": str(note_id)}, EVENT_TIMEOUT)
+    timeout = max(int(NOTIFICATION_WINDOW_SECONDS * 10), 60)
+    return cache.add(_key(box_id, "scheduled"), 1, timeout)
+
+
+def pop_note_events(box_id: Any) -> List[Dict[str, str]]:
+    """Eventos ainda não notificados da caixinha (em ordem), marcando-os como lidos.
+
+    Libera o agendamento antes da leitura: eventos registrados daqui em
+    diante agendam uma nova task.
+
+    ``record_note_event`` incrementa ``seq`` antes de gravar o evento, então
+    um número já contado pode ainda não ter evento. ``done`` só avança até o
+    último evento lido sem lacunas; a partir da lacuna os eventos ficam para
+    a próxima task (agendada por quem registrou o evento que faltava). Uma
+    lacuna que continua na task seguinte é de um evento perdido e é pulada.
+    """
+    cache.delete(_key(box_id, "scheduled"))
+    last = cache.get(_key(box_id, "seq"), 0)
+    done = cache.get(_key(box_id, "done"), 0)
+    if last <= done:
+        return []
+
+    keys = [_key(box_id, "event", seq) for seq in range(done + 1, last + 1)]
+    events = cache.get_many(keys)
+    known_gap = cache.get(_key(box_id, "gap"))
+    read = done
+    for seq, key in enumerate(keys, start=done + 1):
+        if key not in events and seq != known_gap:
+            cache.set(_key(box_id, "gap"), seq, EVENT_TIMEOUT)
+            break
+        read = seq
+
+    if read == done:
+        return []
+    read_keys = keys[: read - done]
+    cache.set(_key(box_id, "done"), read, EVENT_TIMEOUT)
+    cache.delete_many(read_keys)
+    return [events[key] for key in read_keys if key in events]
+
+
+def build_notifications(box, notes: List[Any], events: List[Dict[str, str]], shares: List[Any]) -> List[Any]:
+    """Notificações (não salvas) dos eventos para cada usuário com acesso à caixinha.
+
+    Cada destinatário recebe uma notificação: a mesma de antes quando há um
+    único evento para ele, ou um resumo da janela. Quem criou a nota não é
+    notificado sobre ela.
+
+    Args:
+        box: Caixinha dos eventos
+        notes: Notas dos eventos (com created_by e last_edited_by carregados)
+        events: Eventos em ordem [{"event": "created" | "edited", "note_id"}]
+        shares: Compartilhamentos aceitos (com shared_with carregado)
+    """
+    notes_by_id = {str(note.id): note for note in notes}
+    # Nota criada e editada na mesma janela conta só como criada
+    note_events: Dict[str, str] = {}
+    for event in events:
+        if event["note_id"] in notes_by_id:
+            note_events[event["note_id"]] = note_events.get(event["note_id"]) or event["event"]
+
+    notifications = []
+    for share in shares:
+        recipient_events = [
+            (notes_by_id[note_id], event)
+            for note_id, event in note_events.items()
+            if notes_by_id[note_id].created_by_id != share.shared_with_id
+        ]
+        if len(recipient_events) == 1:
+            notifications.append(_single_notification(box, *recipient_events[0], share.shared_with))
+        elif recipient_events:
+            notifications.append(_digest_notification(box, recipient_events, share.shared_with))
+    return notifications
+
+
+def _single_notification(box, note, event: str, user) -> Any:
+    """Notificação de um único evento (nova nota ou nota editada)."""
+    from apps.core.models import Notification
+
+    if event == "created":
+        author = note.created_by.email if note.created_by else "Alguém"
+        return Notification(
+            user=user,
+            type="note_created",
+            title=f"Nova nota em {box.name}",
+            message=f"{author} criou uma nova nota na caixinha '{box.name}'.",
+            related_box=box,
+            related_note=note,
+        )
+
+    editor = note.last_edited_by.email if note.last_edited_by else "Alguém"
+    return Notification(
+        user=user,
+        type="note_edited",
+        title=f"Nota editada em {box.name}",
+        message=f"{editor} editou uma nota na caixinha '{box.name}'.",
+        related_box=box,
+        related_note=note,
+    )
+
+
+def _digest_notification(box, recipient_events: List[tuple], user) -> Any:
+    """Resumo dos eventos da janela em uma notificação."""
+    from apps.core.models import Notification
+
+    created = sum(1 for _, event in recipient_events if event == "created")
+    edited = len(recipient_events) - created
+    parts = []
+    if created:
+        parts.append(f"{created} nova{'s' if created > 1 else ''} nota{'s' if created > 1 else ''}")
+    if edited:
+        parts.append(f"{edited} nota{'s' if edited > 1 else ''} editada{'s' if edited > 1 else ''}")
+    return Notification(
+        user=user,
+        type="note_created" if created else "note_edited",
+        title=f"{len(recipient_events)} atualizações em {box.name}",
+        message=f"{' e '.join(parts)} na caixinha '{box.name}'.",
+        related_box=box,
+    )
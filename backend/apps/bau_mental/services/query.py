@@ -1,15 +1,51 @@
 """Serviço para consultas inteligentes com IA."""
 
-import json
 import os
-from typing import Any, Dict, List
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    OpenAI = None
+from apps.bau_mental.services.answer_cache import AnswerCache
+from apps.bau_mental.services.context_packer import ContextPacker, count_tokens
+from apps.core.services.openai_client import (
+    OPENAI_AVAILABLE,
+    get_async_openai_client,
+    get_openai_client,
+)
+
+CHAT_MODEL = "gpt-4o-mini"
+NO_NOTES_ANSWER = "Não encontrei anotações relevantes para sua pergunta."
+
+SYSTEM_PROMPT = """Você é um assistente que responde perguntas baseado APENAS nas anotações transcritas fornecidas.
+
+REGRAS CRÍTICAS:
+1. Você SÓ pode responder com informações que estejam EXPLICITAMENTE nas anotações fornecidas
+2. Se a informação não estiver nas anotações, você DEVE dizer claramente "Não encontrei essa informação nas minhas anotações" ou "Não tenho essa informação disponível"
+3. NUNCA invente, suponha ou presuma informações que não estejam nas anotações
+4. Se as anotações não contêm informação suficiente para responder, seja honesto sobre isso
+
+Sua tarefa:
+1. Analisar as anotações fornecidas
+2. Responder APENAS com base no que está explicitamente nas anotações
+3. Se não houver informação relevante, diga claramente que não encontrou
+4. Incluir referências às anotações usadas (data e caixinha) quando houver informação
+
+Formato da resposta:
+- Resposta direta e objetiva
+- Se não houver informação: "Não encontrei essa informação nas minhas anotações"
+- Se houver informação: inclua datas e contextos quando relevante
+- Use emojis para clareza visual (📅 para datas, 📦 para caixinhas)
+- Seja conciso mas completo"""
+
+USER_PROMPT_TEMPLATE = """Anotações disponíveis:
+
+{notes_text}
+
+---
+
+Pergunta do usuário:
+{question}
+
+IMPORTANTE: Responda APENAS com base nas anotações fornecidas acima. Se a informação não estiver nas anotações, diga claramente "Não encontrei essa informação nas minhas anotações". NÃO invente ou presuma informações. Seja objetivo e inclua referências (data e caixinha) quando houver informação relevante."""
 
 
 class QueryService:
@@ -20,38 +56,112 @@ class QueryService:
         # Aceita tanto OPENAI_API_KEY quanto OPENAI_KEY (compatibilidade)
         self.api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_KEY") or os.getenv("ANTHROPIC_API_KEY")
         if OPENAI_AVAILABLE and self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = get_openai_client("bau_mental.query", self.api_key)
         else:
             self.client = None
+        # Cliente assíncrono criado sob demanda (streaming via ASGI)
+        self.async_client = None
 
     def is_available(self) -> bool:
         """Verifica se o serviço está disponível."""
         return OPENAI_AVAILABLE and self.client is not None
 
     def _estimar_tokens(self, texto: str) -> int:
-        """Estima quantidade de tokens (1 token ≈ 4 caracteres em português)."""
-        return len(texto) // 4
+        """Conta tokens com o tokenizer do modelo (fallback: 1 token ≈ 4 caracteres)."""
+        return count_tokens(texto)
+
+    def _completion_kwargs(self) -> Dict[str, Any]:
+        """Parâmetros do modelo de chat (iguais para resposta completa e streaming)."""
+        return {"model": CHAT_MODEL, "temperature": 0.5, "max_tokens": 1000}
+
+    def build_messages(
+        self,
+        question: str,
+        notes: List[Dict[str, Any]],
+        budget_tokens: int | None = None,
+        history: List[Dict[str, str]] | None = None,
+    ) -> Dict[str, Any]:
+        """Monta as mensagens do prompt empacotando as notas no orçamento de tokens.
+
+        Args:
+            question: Pergunta do usuário
+            notes: Anotações em ordem de relevância (ver ``query``)
+            budget_tokens: Orçamento total do prompt (padrão: BAU_MENTAL_CONTEXT_TOKEN_BUDGET)
+            history: Conversa anterior da thread (ver ``thread_memory.build_history``),
+                entre o prompt de sistema e a pergunta; desconta do orçamento das notas
+
+        Returns:
+            {
+                "messages": [...],
+                "sources": [...],  # apenas notas que entraram no contexto
+                "context_tokens": tokens usados pelas notas,
+            }
+        """
+        history = history or []
+        packer = ContextPacker(budget_tokens=budget_tokens)
+        reserved_tokens = self._estimar_tokens(SYSTEM_PROMPT) + self._estimar_tokens(
+            USER_PROMPT_TEMPLATE.format(notes_text="", question=question)
+        )
+        reserved_tokens += sum(self._estimar_tokens(message["content"]) for message in history)
+        packed = packer.pack(question, notes, reserved_tokens=reserved_tokens)
+        notes_text = packer.render(packed)
+
+        transcripts = {note.get("id"): note.get("transcript") or "" for note in notes}
+        sources = []
+        for packed_note in packed["notes"]:
+            transcript = transcripts.get(packed_note["id"], "")
+            sources.append(
+                {
+                    "note_id": packed_note["id"],
+                    "excerpt": transcript[:200] + "..." if len(transcript) > 200 else transcript,
+                    "date": packed_note["created_at"],
+                    "box_name": packed_note["box_name"],
+                }
+            )
+
+        return {
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                *history,
+                {
+                    "role": "user",
+                    "content": USER_PROMPT_TEMPLATE.format(notes_text=notes_text, question=question),
+                },
+            ],
+            "sources": sources,
+            "context_tokens": packed["tokens"],
+        }
 
     def query(
-        self, question: str, notes: List[Dict[str, Any]], workspace_id: str, box_id: str | None = None
+        self,
+        question: str,
+        notes: List[Dict[str, Any]],
+        workspace_id: str,
+        box_id: str | None = None,
+        history: List[Dict[str, str]] | None = None,
     ) -> Dict[str, Any]:
         """Responde pergunta com base nas anotações.
 
-        Implementa lógica de contexto completo vs reduzido conforme PRD:
-        - Se total_tokens < 80000: manda todas as notas (ordem cronológica)
-        - Se total_tokens >= 80000: contexto reduzido (resumo + recentes + full-text match)
+        As notas são quebradas em chunks e os trechos mais relevantes (score da
+        nota + sobreposição com a pergunta) preenchem o orçamento de tokens
+        (BAU_MENTAL_CONTEXT_TOKEN_BUDGET). No prompt, as notas selecionadas
+        aparecem em ordem cronológica.
 
         Args:
             question: Pergunta do usuário
-            notes: Lista de anotações relevantes
+            notes: Lista de anotações relevantes, da mais para a menos relevante
                 [{
                     "id": "uuid",
                     "transcript": "texto",
-                    "created_at": "2025-01-27",
+                    "created_at": "27/01/2025",
                     "box_name": "Casa",
+                    "updated_at": "2025-01-27T10:00:00+00:00",  # versão (cache de respostas)
+                    "score": 0.83,  # opcional (busca semântica / full-text)
                 }, ...]
-            workspace_id: ID do workspace
-            box_id: ID da caixinha (opcional, para contexto reduzido)
+            workspace_id: ID do workspace (escopo do cache de respostas)
+            box_id: ID da caixinha (opcional, escopo do cache de respostas)
+            history: Conversa anterior da thread (opcional). Com histórico a
+                resposta depende da conversa, então o cache de respostas não é usado
 
         Returns:
             {
@@ -60,10 +170,11 @@ class QueryService:
                     {
                         "note_id": "uuid",
                         "excerpt": "trecho relevante",
-                        "date": "2025-01-27",
+                        "date": "27/01/2025",
                         "box_name": "Casa",
                     }
                 ],
+                "cached": True,  # apenas quando veio do cache de respostas
             }
 
         Raises:
@@ -77,113 +188,73 @@ class QueryService:
 
         if not notes:
             return {
-                "answer": "Não encontrei anotações relevantes para sua pergunta.",
+                "answer": NO_NOTES_ANSWER,
                 "sources": [],
             }
 
-        try:
-            # Estimar tokens totais
-            total_tokens = sum(self._estimar_tokens(note.get('transcript', '')) for note in notes)
-            LIMITE_SEGURO = 80000  # tokens
-
-            # Ordenar notas por created_at (mais antiga primeiro) - ordem cronológica
-            notes_sorted = sorted(notes, key=lambda n: n.get('created_at', ''))
-
-            # Decidir contexto: completo ou reduzido
-            if total_tokens < LIMITE_SEGURO:
-                # CONTEXTO COMPLETO: manda todas as notas
-                notes_to_use = notes_sorted
-            else:
-                # CONTEXTO REDUZIDO: resumo + recentes + top 10 por full-text match
-                # Por enquanto, vamos usar apenas recentes + top 10
-                # (resumo será implementado quando tiver cache de resumo)
-                recentes = notes_sorted[-30:]  # Últimas 30 notas
-                # Top 10 por full-text match já vem ordenado do viewset
-                top_matches = notes_sorted[:10]
-                
-                # Combinar e remover duplicatas mantendo ordem
-                seen_ids = set()
-                notes_to_use = []
-                for note in top_matches + recentes:
-                    note_id = note.get('id')
-                    if note_id and note_id not in seen_ids:
-                        seen_ids.add(note_id)
-                        notes_to_use.append(note)
-
-            # Construir contexto com anotações (ordem cronológica)
-            notes_text = "\n\n".join(
-                [
-                    f"📅 {note['created_at']} - {note.get('box_name', 'Inbox')}\n"
-                    f"{note['transcript']}"
-                    for note in notes_to_use
-                ]
-            )
-
-            system_prompt = """Você é um assistente que responde perguntas baseado APENAS nas anotações transcritas fornecidas.
+        # Mesma pergunta sobre as mesmas notas (mesmas versões): resposta em cache
+        answer_cache = None if history else AnswerCache(workspace_id, box_id)
+        cached = answer_cache.get(question, notes) if answer_cache else None
+        if cached is not None:
+            return {**cached, "cached": True}
 
-REGRAS CRÍTICAS:
-1. Você SÓ pode responder com informações que estejam EXPLICITAMENTE nas anotações fornecidas
-2. Se a informação não estiver nas anotações, você DEVE dizer claramente "Não encontrei essa informação nas minhas anotações" ou "Não tenho essa informação disponível"
-3. NUNCA invente, suponha ou presuma informações que não estejam nas anotações
-4. Se as anotações não contêm informação suficiente para responder, seja honesto sobre isso
-
-Sua tarefa:
-1. Analisar as anotações fornecidas
-2. Responder APENAS com base no que está explicitamente nas anotações
-3. Se não houver informação relevante, diga claramente que não encontrou
-4. Incluir referências às anotações usadas (data e caixinha) quando houver informação
-
-Formato da resposta:
-- Resposta direta e objetiva
-- Se não houver informação: "Não encontrei essa informação nas minhas anotações"
-- Se houver informação: inclua datas e contextos quando relevante
-- Use emojis para clareza visual (📅 para datas, 📦 para caixinhas)
-- Seja conciso mas completo"""
-
-            user_prompt = f"""Anotações disponíveis:
-
-{notes_text}
-
----
-
-Pergunta do usuário:
-{question}
-
-IMPORTANTE: Responda APENAS com base nas anotações fornecidas acima. Se a informação não estiver nas anotações, diga claramente "Não encontrei essa informação nas minhas anotações". NÃO invente ou presuma informações. Seja objetivo e inclua referências (data e caixinha) quando houver informação relevante."""
+        try:
+            prompt = self.build_messages(question, notes, history=history)
 
+            started = time.perf_counter()
             response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.5,
-                max_tokens=1000,
+                messages=prompt["messages"], **self._completion_kwargs()
             )
 
             answer = response.choices[0].message.content or "Não foi possível gerar resposta."
 
-            # Extrair fontes (anotações usadas)
-            # Por enquanto, retornamos todas as anotações fornecidas como fontes
-            # Futuramente, podemos melhorar para identificar quais foram realmente usadas
-            sources = [
-                {
-                    "note_id": note["id"],
-                    "excerpt": note["transcript"][:200] + "..."
-                    if len(note["transcript"]) > 200
-                    else note["transcript"],
-                    "date": note["created_at"],
-                    "box_name": note.get("box_name", "Inbox"),
-                }
-                for note in notes
-            ]
-
-            return {
+            result = {
                 "answer": answer,
-                "sources": sources,
+                "sources": prompt["sources"],
             }
+            if answer_cache:
+                answer_cache.set(question, notes, result, (time.perf_counter() - started) * 1000)
+            return result
 
         except Exception as e:
             raise Exception(f"Erro ao consultar IA: {str(e)}") from e
 
+    def stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Gera a resposta em streaming (trechos de texto conforme o modelo produz).
+
+        Args:
+            messages: Mensagens montadas por ``build_messages``
+
+        Yields:
+            Trechos (deltas) da resposta
+
+        Raises:
+            ValueError: Se serviço não está disponível
+        """
+        if not self.is_available():
+            raise ValueError(
+                "OpenAI não está disponível. Verifique OPENAI_API_KEY no .env"
+            )
+
+        response = self.client.chat.completions.create(
+            messages=messages, stream=True, **self._completion_kwargs()
+        )
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def astream(self, messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+        """Versão assíncrona de ``stream`` (não ocupa thread durante a geração)."""
+        if not self.is_available():
+            raise ValueError(
+                "OpenAI não está disponível. Verifique OPENAI_API_KEY no .env"
+            )
 
+        if self.async_client is None:
+            self.async_client = get_async_openai_client("bau_mental.query", self.api_key)
+        response = await self.async_client.chat.completions.create(
+            messages=messages, stream=True, **self._completion_kwargs()
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
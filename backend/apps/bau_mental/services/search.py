@@ -0,0 +1,127 @@
+"""Busca de anotações: full-text + trigram, com trechos destacados e paginação keyset.
+
+- Full-text (``search_vector`` @@ websearch_to_tsquery), pelo índice GIN do tsvector.
+- Trigram (``transcript %> termo``, pg_trgm): encontra palavras com erro de
+  digitação/transcrição que o full-text não acha. Usado só quando a extensão
+  está instalada (índice GIN trigram da migration 0021).
+- Ranking: ts_rank + similaridade trigram; páginas por cursor em
+  (rank, id), sem OFFSET nem COUNT.
+- Resultados trazem ``ts_headline`` (trecho com os termos destacados) em vez
+  da transcrição inteira; o headline é calculado só para as linhas da página.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import F, FloatField, Q, QuerySet
+from django.db.models.functions import Cast
+
+from apps.bau_mental.models import Note
+from apps.core.pagination import decode_cursor, encode_cursor, keyset_filter
+
+SEARCH_CONFIG = "portuguese"
+# Termos menores que isso não usam trigram (poucos trigramas, muitos falsos positivos)
+TRIGRAM_MIN_LENGTH = 3
+# Peso da similaridade trigram no ranking (ts_rank costuma ficar entre 0 e 1)
+TRIGRAM_WEIGHT = 0.5
+HEADLINE_OPTIONS = {
+    "start_sel": "<mark>",
+    "stop_sel": "</mark>",
+    "max_words": 35,
+    "min_words": 15,
+    "max_fragments": 2,
+}
+RESULT_ORDERING = [("search_rank", True), ("id", True)]
+
+_trigram_available: bool | None = None
+
+
+def trigram_available() -> bool:
+    """Indica se pg_trgm está instalada (verificado uma vez por processo)."""
+    global _trigram_available
+    if _trigram_available is None:
+        if connection.vendor != "postgresql":
+            _trigram_available = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                _trigram_available = cursor.fetchone() is not None
+    return _trigram_available
+
+
+def search_filter(queryset: QuerySet, query: str) -> QuerySet:
+    """Filtra notas que casam com a busca e anota ``search_rank``."""
+    query = query.strip()
+    tsquery = SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch")
+    rank = SearchRank(F("search_vector"), tsquery)
+    condition = Q(search_vector=tsquery)
+
+    if trigram_available() and len(query) >= TRIGRAM_MIN_LENGTH:
+        rank = rank + TrigramWordSimilarity(query, "transcript") * TRIGRAM_WEIGHT
+        condition |= Q(transcript__trigram_word_similar=query)
+
+    # ts_rank é real (float4): o cast garante a mesma precisão no cursor
+    return queryset.annotate(search_rank=Cast(rank, FloatField())).filter(condition)
+
+
+def search_notes(
+    queryset: QuerySet, query: str, cursor: str | None = None, limit: int = 25
+) -> Tuple[List[Dict[str, Any]], str | None]:
+    """Página de resultados da busca, ordenada por relevância.
+
+    Args:
+        queryset: Notas visíveis (workspace e filtros já aplicados)
+        query: Termos da busca (sintaxe websearch: "frase", -excluir, OR)
+        cursor: Cursor da página anterior (None: primeira página)
+        limit: Resultados por página
+
+    Returns:
+        (resultados, cursor da próxima página ou None). Cada resultado:
+        {"id", "box_id", "box_name", "headline", "rank", "source_type",
+        "processing_status", "created_at"}
+    """
+    matches = search_filter(queryset, query).order_by("-search_rank", "-id")
+    position = decode_cursor(cursor, len(RESULT_ORDERING))
+    if position is not None:
+        matches = matches.filter(keyset_filter(RESULT_ORDERING, position))
+
+    # 1ª consulta: só ids e rank (sem ler transcrições)
+    page = list(matches.values_list("search_rank", "id")[: limit + 1])
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    page = page[:limit]
+    if not page:
+        return [], None
+
+    # 2ª consulta: headline só das notas da página
+    tsquery = SearchQuery(query.strip(), config=SEARCH_CONFIG, search_type="websearch")
+    notes = (
+        Note.objects.filter(id__in=[note_id for _, note_id in page])
+        .annotate(headline=SearchHeadline("transcript", tsquery, config=SEARCH_CONFIG, **HEADLINE_OPTIONS))
+        .values("id", "box_id", "box__name", "headline", "source_type", "processing_status", "created_at")
+    )
+    notes_by_id = {note["id"]: note for note in notes}
+
+    results = []
+    for rank, note_id in page:
+        note = notes_by_id.get(note_id)
+        if note is None:
+            continue
+        results.append(
+            {
+                "id": note_id,
+                "box_id": note["box_id"],
+                "box_name": note["box__name"],
+                "headline": note["headline"] or "",
+                "rank": rank,
+                "source_type": note["source_type"],
+                "processing_status": note["processing_status"],
+                "created_at": note["created_at"],
+            }
+        )
+    return results, next_cursor
@@ -0,0 +1,149 @@
+"""Sincronização incremental (delta) para os clientes.
+
+O cliente guarda um cursor e pede só o que mudou desde ele. O cursor é a
+posição ``(updated_at, id)`` da última alteração entregue; as fontes (Note,
+Box, Thread, BoxShare e SyncTombstone) são lidas em ordem ``(updated_at, id)``
+a partir do cursor e intercaladas, então uma resposta parcial (``has_more``)
+continua exatamente de onde parou.
+
+Linhas com soft delete vêm como exclusões (a própria linha, com
+``deleted_at``); exclusões físicas vêm dos registros de ``SyncTombstone``.
+
+``updated_at`` é definido antes do commit: uma transação ainda aberta pode
+gravar um valor menor que um cursor já entregue. Por isso o cursor nunca passa
+do início da transação aberta mais antiga do banco (``pg_stat_activity``),
+menos ``SYNC_SETTLE_SECONDS``: linhas de transações longas (lotes com
+``select_for_update``, operações em lote, purge) ficam para uma chamada
+seguinte em vez de se perderem. A folga cobre a diferença entre o relógio
+da aplicação (``auto_now``) e o do banco; as datas precisam ser geradas dentro
+da transação que grava a linha. Transações muito longas (ou ociosas em
+transação) atrasam a sincronização de todos até terminarem.
+"""
+
+import os
+from datetime import timedelta
+from typing import Any, Dict, Tuple
+from uuid import UUID
+
+from django.db import connection
+from django.db.models import Model, QuerySet
+from django.utils import timezone
+
+from apps.bau_mental.models import Box, BoxShare, Note, SyncTombstone, Thread
+from apps.core.pagination import decode_cursor, encode_cursor, keyset_filter
+
+# Máximo de alterações por resposta (o cliente segue chamando enquanto has_more)
+SYNC_PAGE_SIZE = int(os.getenv("BAU_MENTAL_SYNC_PAGE_SIZE", "500"))
+# Folga antes do início da transação aberta mais antiga (e de agora):
+# diferença tolerada entre o relógio da aplicação e o do banco
+SYNC_SETTLE_SECONDS = float(os.getenv("BAU_MENTAL_SYNC_SETTLE_SECONDS", "2"))
+
+# Tipo de cada model nas exclusões enviadas ao cliente
+SYNC_TYPES = {Note: "note", Box: "box", Thread: "thread", BoxShare: "box_share"}
+
+
+def record_tombstone(instance: Model) -> None:
+    """Registra a exclusão física de uma linha sincronizada."""
+    object_type = SYNC_TYPES.get(type(instance))
+    if object_type is None:
+        return
+
+    if isinstance(instance, BoxShare):
+        workspace_id = (
+            Box.all_objects.filter(id=instance.box_id).values_list("workspace_id", flat=True).first()
+        )
+    else:
+        workspace_id = instance.workspace_id
+    if workspace_id is None:
+        return
+
+    SyncTombstone.objects.create(
+        workspace_id=workspace_id, object_type=object_type, object_id=instance.pk
+    )
+
+
+def workspace_sources(workspace_id: UUID | str) -> Dict[str, Tuple[QuerySet, str]]:
+    """Fontes sincronizadas do workspace: {nome: (queryset, campo de data)}.
+
+    Inclui linhas com soft delete (``all_objects``) para gerar as exclusões.
+    """
+    return {
+        "notes": (Note.all_objects.filter(workspace_id=workspace_id).select_related("box"), "updated_at"),
+        "boxes": (Box.all_objects.filter(workspace_id=workspace_id), "updated_at"),
+        "threads": (Thread.all_objects.filter(workspace_id=workspace_id).select_related("box"), "updated_at"),
+        "box_shares": (
+            BoxShare.objects.filter(box__workspace_id=workspace_id).select_related(
+                "box", "shared_with", "invited_by"
+            ),
+            "updated_at",
+        ),
+        "tombstones": (SyncTombstone.objects.filter(workspace_id=workspace_id), "deleted_at"),
+    }
+
+
+def sync_horizon():
+    """Data até a qual as alterações já estão todas commitadas.
+
+    No PostgreSQL é o menor entre agora e o início da transação aberta mais
+    antiga de outra conexão, menos ``SYNC_SETTLE_SECONDS``. Conexões de
+    outros usuários do banco só aparecem com ``pg_read_all_stats``: API e
+    workers devem usar o mesmo usuário (ou ter essa permissão).
+    """
+    horizon = timezone.now()
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT min(xact_start) FROM pg_stat_activity "
+                "WHERE datname = current_database() AND backend_type = 'client backend' "
+                "AND xact_start IS NOT NULL AND pid <> pg_backend_pid()"
+            )
+            oldest = cursor.fetchone()[0]
+        if oldest is not None:
+            horizon = min(horizon, oldest)
+    return horizon - timedelta(seconds=SYNC_SETTLE_SECONDS)
+
+
+def collect_changes(
+    sources: Dict[str, Tuple[QuerySet, str]], cursor: str | None = None, limit: int = SYNC_PAGE_SIZE
+) -> Dict[str, Any]:
+    """Alterações posteriores ao cursor, intercaladas em ordem (data, id).
+
+    Args:
+        sources: Fontes (ver ``workspace_sources``)
+        cursor: Cursor da sincronização anterior (None: tudo)
+        limit: Máximo de linhas na resposta
+
+    Returns:
+        {
+            "changes": {nome da fonte: [instâncias], ...},
+            "cursor": cursor para a próxima chamada,
+            "has_more": True se ainda há alterações depois do cursor,
+        }
+
+    Raises:
+        ValidationError: Se o cursor é inválido
+    """
+    position = decode_cursor(cursor, 2)
+    until = sync_horizon()
+
+    rows = []
+    for name, (queryset, time_field) in sources.items():
+        queryset = queryset.filter(**{f"{time_field}__lte": until}).order_by(time_field, "id")
+        if position is not None:
+            queryset = queryset.filter(keyset_filter([(time_field, False), ("id", False)], position))
+        # Cada fonte contribui com no máximo limit + 1 linhas (a intercalação corta o resto)
+        rows.extend((getattr(obj, time_field), obj.id, name, obj) for obj in queryset[: limit + 1])
+
+    rows.sort(key=lambda row: (row[0], row[1]))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    changes = {name: [] for name in sources}
+    for _, _, name, obj in rows:
+        changes[name].append(obj)
+
+    return {
+        "changes": changes,
+        "cursor": encode_cursor(rows[-1][:2]) if rows else cursor,
+        "has_more": has_more,
+    }
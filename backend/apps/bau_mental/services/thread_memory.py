@@ -0,0 +1,161 @@
+"""Memória de conversa das threads: resumo acumulado + últimas mensagens.
+
+O prompt de uma thread leva o resumo das mensagens antigas
+(``Thread.memory_summary``) e as últimas ``MEMORY_RECENT_TURNS`` trocas
+(pergunta + resposta) na íntegra. Depois de cada resposta da IA, as mensagens
+que saíram da janela são incorporadas ao resumo com uma chamada ao LLM
+(resumo anterior + mensagens novas), então o tamanho do prompt fica limitado
+independente do tamanho da conversa.
+"""
+
+import os
+from typing import Any, Dict, List
+
+from django.db.models import QuerySet
+
+from apps.bau_mental.models import Thread, ThreadMessage
+from apps.core.services.openai_client import OPENAI_AVAILABLE, get_openai_client
+
+MEMORY_MODEL = os.getenv("BAU_MENTAL_THREAD_MEMORY_MODEL", "gpt-4o-mini")
+# Trocas (pergunta + resposta) enviadas na íntegra; as anteriores vão para o resumo
+MEMORY_RECENT_TURNS = int(os.getenv("BAU_MENTAL_THREAD_MEMORY_TURNS", "3"))
+# Tamanho máximo de cada mensagem no prompt (respostas longas são cortadas)
+MEMORY_MESSAGE_MAX_CHARS = 2000
+# Tamanho máximo do resumo da conversa
+MEMORY_SUMMARY_MAX_TOKENS = 400
+
+SUMMARY_HEADER = "Resumo da conversa até aqui (mensagens anteriores):"
+
+SUMMARY_PROMPT = """Atualize o resumo de uma conversa entre um usuário e um assistente que responde com base nas anotações dele.
+
+Resumo atual:
+{summary}
+
+Novas mensagens (em ordem):
+{messages}
+
+Escreva o novo resumo em no máximo {max_words} palavras, incorporando as novas mensagens.
+Preserve perguntas feitas, fatos, nomes, valores, datas e conclusões. Não invente nada."""
+
+ROLE_LABELS = {"user": "Usuário", "assistant": "Assistente"}
+
+
+def _clip(content: str) -> str:
+    """Corta a mensagem em ``MEMORY_MESSAGE_MAX_CHARS``."""
+    if len(content) <= MEMORY_MESSAGE_MAX_CHARS:
+        return content
+    return content[:MEMORY_MESSAGE_MAX_CHARS] + "..."
+
+
+def _unsummarized_messages(thread: Thread) -> QuerySet:
+    """Mensagens da thread ainda não incorporadas ao resumo."""
+    messages = ThreadMessage.objects.filter(thread=thread)
+    if thread.memory_summarized_until is not None:
+        messages = messages.filter(created_at__gt=thread.memory_summarized_until)
+    return messages
+
+
+def build_history(thread: Thread, exclude_message_id: Any = None) -> List[Dict[str, str]]:
+    """Histórico da thread para o prompt: resumo + últimas mensagens.
+
+    Args:
+        thread: Thread da conversa
+        exclude_message_id: Mensagem a ignorar (a pergunta atual, já salva)
+
+    Returns:
+        Mensagens no formato do chat ([{"role", "content"}, ...]), com o
+        resumo (se houver) como mensagem de sistema
+    """
+    messages = _unsummarized_messages(thread)
+    if exclude_message_id is not None:
+        messages = messages.exclude(id=exclude_message_id)
+    recent = list(
+        messages.order_by("-created_at", "-id").values("role", "content")[: MEMORY_RECENT_TURNS * 2]
+    )
+
+    history = []
+    if thread.memory_summary:
+        history.append({"role": "system", "content": f"{SUMMARY_HEADER}\n{thread.memory_summary}"})
+    history.extend(
+        {"role": message["role"], "content": _clip(message["content"])} for message in reversed(recent)
+    )
+    return history
+
+
+class ThreadMemoryService:
+    """Mantém o resumo acumulado da conversa de uma thread."""
+
+    def __init__(self) -> None:
+        """Inicializa o serviço de memória."""
+        # Aceita tanto OPENAI_API_KEY quanto OPENAI_KEY (compatibilidade)
+        self.api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_KEY")
+        if OPENAI_AVAILABLE and self.api_key:
+            self.client = get_openai_client("bau_mental.thread_memory", self.api_key)
+        else:
+            self.client = None
+
+    def is_available(self) -> bool:
+        """Verifica se o serviço está disponível."""
+        return OPENAI_AVAILABLE and self.client is not None
+
+    def _complete(self, prompt: str) -> str:
+        """Executa a chamada de resumo ao LLM e retorna o texto."""
+        response = self.client.chat.completions.create(
+            model=MEMORY_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,
+            max_tokens=MEMORY_SUMMARY_MAX_TOKENS,
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    def _fallback_summary(self, summary: str, messages: List[Dict[str, Any]]) -> str:
+        """Resumo sem LLM: primeiras linhas de cada mensagem, mantendo só o final."""
+        lines = [summary] if summary else []
+        lines.extend(
+            f"{ROLE_LABELS.get(message['role'], message['role'])}: {message['content'][:200]}"
+            for message in messages
+        )
+        # ~4 caracteres por token
+        return "\n".join(lines)[-MEMORY_SUMMARY_MAX_TOKENS * 4:]
+
+    def update(self, thread: Thread) -> Dict[str, Any]:
+        """Incorpora ao resumo as mensagens que saíram da janela recente.
+
+        Returns:
+            {"status": "completed" ou "skipped", "summarized": mensagens incorporadas}
+        """
+        pending = list(
+            _unsummarized_messages(thread)
+            .order_by("created_at", "id")
+            .values("role", "content", "created_at")
+        )
+        to_fold = pending[: max(len(pending) - MEMORY_RECENT_TURNS * 2, 0)]
+        if not to_fold:
+            return {"status": "skipped", "summarized": 0}
+
+        if self.is_available():
+            messages_text = "\n\n".join(
+                f"{ROLE_LABELS.get(message['role'], message['role'])}: {_clip(message['content'])}"
+                for message in to_fold
+            )
+            summary = self._complete(
+                SUMMARY_PROMPT.format(
+                    summary=thread.memory_summary or "(vazio)",
+                    messages=messages_text,
+                    max_words=MEMORY_SUMMARY_MAX_TOKENS // 2,
+                )
+            )
+        else:
+            summary = self._fallback_summary(thread.memory_summary, to_fold)
+
+        # update() não mexe em last_message_at (auto_now); o filtro evita
+        # sobrescrever o resumo se outra atualização terminou antes
+        updated = Thread.objects.filter(
+            id=thread.id, memory_summarized_until=thread.memory_summarized_until
+        ).update(memory_summary=summary, memory_summarized_until=to_fold[-1]["created_at"])
+        if not updated:
+            return {"status": "skipped", "summarized": 0}
+
+        thread.memory_summary = summary
+        thread.memory_summarized_until = to_fold[-1]["created_at"]
+        return {"status": "completed", "summarized": len(to_fold)}
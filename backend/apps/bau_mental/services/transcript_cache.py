@@ -0,0 +1,68 @@
+"""Cache de transcrições por conteúdo do áudio (SHA-256).
+
+O mesmo áudio do WhatsApp (encaminhado ou de grupo) costuma chegar várias
+vezes; a transcrição é reaproveitada quando o hash do conteúdo, o idioma e o
+prompt enviado ao Whisper coincidem, sem nova chamada à API.
+"""
+
+import hashlib
+import logging
+from typing import Any, Dict
+
+from django.db.models import F
+
+from apps.bau_mental.models import TranscriptCache
+
+logger = logging.getLogger("apps")
+
+
+def prompt_hash(prompt: str | None) -> str:
+    """Hash do prompt do Whisper (vazio se sem prompt)."""
+    if not prompt:
+        return ""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def get_cached_transcript(
+    audio_sha256: str, language: str, prompt: str | None = None
+) -> Dict[str, Any] | None:
+    """Busca transcrição já feita para o mesmo áudio/idioma/prompt.
+
+    Returns:
+        Resultado no formato do TranscriptionService (com "cached": True) ou None
+    """
+    filters = {
+        "audio_sha256": audio_sha256,
+        "language": language,
+        "prompt_hash": prompt_hash(prompt),
+    }
+    entry = TranscriptCache.objects.filter(**filters).first()
+    if entry is None:
+        return None
+
+    TranscriptCache.objects.filter(id=entry.id).update(hit_count=F("hit_count") + 1)
+    logger.info(f"[TranscriptCache] Reaproveitando transcrição do áudio {audio_sha256[:12]}")
+    return {
+        "text": entry.transcript,
+        "language": entry.language,
+        "duration": entry.duration_seconds,
+        "cached": True,
+    }
+
+
+def store_transcript(
+    audio_sha256: str, language: str, prompt: str | None, result: Dict[str, Any]
+) -> None:
+    """Guarda a transcrição do áudio (ignora se outro worker já guardou)."""
+    TranscriptCache.objects.bulk_create(
+        [
+            TranscriptCache(
+                audio_sha256=audio_sha256,
+                language=language,
+                prompt_hash=prompt_hash(prompt),
+                transcript=result["text"],
+                duration_seconds=result.get("duration"),
+            )
+        ],
+        ignore_conflicts=True,
+    )
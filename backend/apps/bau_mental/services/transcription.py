@@ -1,39 +1,89 @@
-"""Serviço para transcrição de áudio usando Whisper (OpenAI)."""
+"""Serviço para transcrição de áudio usando Whisper (API da OpenAI ou local).
 
-import os
-from typing import Any, Dict
+Áudios longos (ou acima do limite de tamanho da API) são divididos nos
+silêncios pelo AudioSegmenter e os trechos são transcritos em paralelo; o
+texto e os timestamps são recompostos com o deslocamento de cada trecho.
+O áudio chega como AudioSource (lido direto do storage, sem cópia em disco).
+"""
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    OpenAI = None
+import logging
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from apps.bau_mental.services.audio_segmenter import AudioSegmenter
+from apps.bau_mental.services.audio_source import MAX_BUFFERED_BYTES, AudioSource
+from apps.bau_mental.services.transcription_backends import get_backend
+
+logger = logging.getLogger("apps")
+
+# Trechos transcritos em paralelo
+TRANSCRIPTION_WORKERS = int(os.getenv("BAU_MENTAL_TRANSCRIPTION_WORKERS", "4"))
+
+
+def stitch_transcripts(
+    segments: List[Tuple[float, float]], results: List[Dict[str, Any]], language: str
+) -> Dict[str, Any]:
+    """Junta as transcrições dos trechos, deslocando os timestamps de cada um.
+
+    Args:
+        segments: Trechos (início, fim) em segundos, na ordem do áudio
+        results: Resultado de cada trecho (mesma ordem de ``segments``)
+        language: Idioma do áudio
+
+    Returns:
+        {"text": ..., "language": ..., "duration": ..., "segments": [{start, end, text}, ...]}
+    """
+    texts = []
+    stitched = []
+    for (offset, _), result in zip(segments, results):
+        text = (result.get("text") or "").strip()
+        if text:
+            texts.append(text)
+        for segment in result.get("segments") or []:
+            stitched.append(
+                {
+                    "start": round(offset + segment["start"], 3),
+                    "end": round(offset + segment["end"], 3),
+                    "text": segment["text"],
+                }
+            )
+    return {
+        "text": " ".join(texts),
+        "language": language,
+        "duration": segments[-1][1] if segments else None,
+        "segments": stitched,
+    }
 
 
 class TranscriptionService:
-    """Serviço para transcrição de áudio usando Whisper API (OpenAI)."""
+    """Serviço para transcrição de áudio (Whisper API ou Whisper local)."""
+
+    def __init__(self, backend: str | None = None) -> None:
+        """Inicializa o serviço de transcrição.
 
-    def __init__(self) -> None:
-        """Inicializa o serviço de transcrição."""
-        # Aceita tanto OPENAI_API_KEY quanto OPENAI_KEY (compatibilidade)
-        self.api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_KEY")
-        if OPENAI_AVAILABLE and self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
-        else:
-            self.client = None
+        Args:
+            backend: "openai" ou "local" (padrão: BAU_MENTAL_TRANSCRIPTION_BACKEND)
+        """
+        self.backend = get_backend(backend)
 
     def is_available(self) -> bool:
         """Verifica se o serviço está disponível."""
-        return OPENAI_AVAILABLE and self.client is not None
+        return self.backend.is_available()
 
     def transcribe(
-        self, audio_file_path: str, language: str = "pt", prompt: str | None = None
+        self, audio: "str | AudioSource", language: str = "pt", prompt: str | None = None
     ) -> Dict[str, Any]:
         """Transcreve áudio usando Whisper API.
 
+        Áudios com mais de um trecho (ver AudioSegmenter) ou acima do limite de
+        tamanho da API são divididos e transcritos em paralelo. Sem ffmpeg, o
+        arquivo vai inteiro em uma requisição. Nada é gravado em disco: o
+        áudio é lido do storage e os trechos saem do ffmpeg por pipe.
+
         Args:
-            audio_file_path: Caminho do arquivo de áudio
+            audio: Caminho local ou AudioSource (ex: áudio da nota no storage)
             language: Idioma do áudio (padrão: pt)
             prompt: Texto opcional com palavras-chave para melhorar transcrição
                     (especialmente útil para nomes próprios, termos técnicos, etc.)
@@ -44,6 +94,7 @@ class TranscriptionService:
                 "text": "transcrição completa",
                 "language": "pt",
                 "duration": 45.2,
+                "segments": [{"start": 0.0, "end": 4.1, "text": "..."}, ...],
             }
 
         Raises:
@@ -52,121 +103,71 @@ class TranscriptionService:
         """
         if not self.is_available():
             raise ValueError(
-                "OpenAI não está disponível. Verifique OPENAI_API_KEY no .env"
+                "Transcrição não disponível. Verifique OPENAI_API_KEY no .env "
+                "ou instale faster-whisper para o backend local"
             )
 
+        source = audio if isinstance(audio, AudioSource) else AudioSource.from_path(audio)
+        too_large = source.size > MAX_BUFFERED_BYTES
+        segmenter = AudioSegmenter()
+        if not segmenter.is_available():
+            if too_large:
+                logger.warning(
+                    f"[Transcription] ffmpeg indisponível: enviando {source.name} "
+                    f"inteiro (acima de {MAX_BUFFERED_BYTES} bytes)"
+                )
+            return self._transcribe_bytes(source.name, source.read_bytes(), language, prompt)
+
         try:
-            # #region agent log
-            import json
-            debug_log_path = "/home/uaimax/projects/uaitools/.cursor/debug.log"
-            if os.path.exists(os.path.dirname(debug_log_path)):
-                try:
-                    log_entry = {
-                        "id": f"log_transcribe_{os.getpid()}",
-                        "timestamp": int(os.times().elapsed * 1000) if hasattr(os.times(), 'elapsed') else 0,
-                        "location": "transcription.py:57",
-                        "message": "Abrindo arquivo de áudio para transcrição",
-                        "data": {
-                            "audio_file_path": audio_file_path,
-                            "file_exists": os.path.exists(audio_file_path),
-                            "file_size": os.path.getsize(audio_file_path) if os.path.exists(audio_file_path) else 0,
-                        },
-                        "sessionId": "debug-session",
-                        "runId": "run1",
-                        "hypothesisId": "F",
-                    }
-                    with open(debug_log_path, "a") as f:
-                        f.write(json.dumps(log_entry) + "\n")
-                except (OSError, IOError):
-                    pass
-            # #endregion
-
-            with open(audio_file_path, "rb") as audio_file:
-                # #region agent log
-                if os.path.exists(os.path.dirname(debug_log_path)):
-                    try:
-                        log_entry = {
-                            "id": f"log_transcribe_api_{os.getpid()}",
-                            "timestamp": int(os.times().elapsed * 1000) if hasattr(os.times(), 'elapsed') else 0,
-                            "location": "transcription.py:75",
-                            "message": "Chamando API Whisper",
-                            "data": {"model": "whisper-1", "language": language},
-                            "sessionId": "debug-session",
-                            "runId": "run1",
-                            "hypothesisId": "F",
-                        }
-                        with open(debug_log_path, "a") as f:
-                            f.write(json.dumps(log_entry) + "\n")
-                    except (OSError, IOError):
-                        pass
-                # #endregion
-                # Preparar parâmetros da API
-                api_params = {
-                    "model": "whisper-1",
-                    "file": audio_file,
-                    "language": language,
-                }
+            ffmpeg_input = source.ffmpeg_input()
+            segments = segmenter.plan(ffmpeg_input, name=source.name)
+        except (subprocess.SubprocessError, OSError, ValueError) as e:
+            # Só o tipo do erro: a mensagem do subprocess traz o comando, com a URL pré-assinada
+            logger.warning(
+                f"[Transcription] Falha ao segmentar {source.name} ({type(e).__name__}); "
+                "usando arquivo inteiro"
+            )
+            return self._transcribe_bytes(source.name, source.read_bytes(), language, prompt)
+
+        if len(segments) == 1 and not too_large:
+            return self._transcribe_bytes(source.name, source.read_bytes(), language, prompt)
+        return self._transcribe_segments(ffmpeg_input, segments, segmenter, language, prompt)
+
+    def _transcribe_segments(
+        self,
+        ffmpeg_input: str,
+        segments: List[Tuple[float, float]],
+        segmenter: AudioSegmenter,
+        language: str,
+        prompt: str | None,
+    ) -> Dict[str, Any]:
+        """Exporta e transcreve os trechos em paralelo e junta o resultado."""
 
-                # Adicionar prompt se fornecido (ajuda Whisper a transcrever palavras específicas)
-                if prompt:
-                    api_params["prompt"] = prompt
-
-                transcript = self.client.audio.transcriptions.create(**api_params)
-
-            # #region agent log
-            if os.path.exists(os.path.dirname(debug_log_path)):
-                try:
-                    log_entry = {
-                        "id": f"log_transcribe_result_{os.getpid()}",
-                        "timestamp": int(os.times().elapsed * 1000) if hasattr(os.times(), 'elapsed') else 0,
-                        "location": "transcription.py:88",
-                        "message": "Resposta da API Whisper recebida",
-                        "data": {
-                            "transcript_text": transcript.text if hasattr(transcript, 'text') else "N/A",
-                            "transcript_length": len(transcript.text) if hasattr(transcript, 'text') else 0,
-                            "transcript_type": type(transcript).__name__,
-                            "has_text_attr": hasattr(transcript, 'text'),
-                        },
-                        "sessionId": "debug-session",
-                        "runId": "run1",
-                        "hypothesisId": "F",
-                    }
-                    with open(debug_log_path, "a") as f:
-                        f.write(json.dumps(log_entry) + "\n")
-                except (OSError, IOError):
-                    pass
-            # #endregion
-
-            # Extrair duração (se disponível) ou estimar
-            # Nota: Whisper não retorna duração diretamente, precisamos calcular
-            # Por enquanto, retornamos None e calculamos depois
-            return {
-                "text": transcript.text,
-                "language": language,
-                "duration": None,  # Será calculado depois
-            }
-        except Exception as e:
-            # #region agent log
-            if os.path.exists(os.path.dirname(debug_log_path)):
-                try:
-                    log_entry = {
-                        "id": f"log_transcribe_error_{os.getpid()}",
-                        "timestamp": int(os.times().elapsed * 1000) if hasattr(os.times(), 'elapsed') else 0,
-                        "location": "transcription.py:105",
-                        "message": "Erro ao transcrever",
-                        "data": {
-                            "error_type": type(e).__name__,
-                            "error_message": str(e),
-                        },
-                        "sessionId": "debug-session",
-                        "runId": "run1",
-                        "hypothesisId": "F",
-                    }
-                    with open(debug_log_path, "a") as f:
-                        f.write(json.dumps(log_entry) + "\n")
-                except (OSError, IOError):
-                    pass
-            # #endregion
-            raise Exception(f"Erro ao transcrever áudio: {str(e)}") from e
+        def transcribe_segment(item: Tuple[int, Tuple[float, float]]) -> Dict[str, Any]:
+            index, (start, end) = item
+            try:
+                content = segmenter.export(ffmpeg_input, start, end)
+            except subprocess.SubprocessError as e:
+                # Sem encadear: o comando do ffmpeg traz a URL pré-assinada
+                raise Exception(f"Erro ao exportar trecho {index} ({type(e).__name__})") from None
+            return self._transcribe_bytes(f"chunk_{index:04d}.mp3", content, language, prompt)
 
+        workers = max(1, min(TRANSCRIPTION_WORKERS, len(segments)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(transcribe_segment, enumerate(segments)))
+
+        return stitch_transcripts(segments, results, language)
+
+    def _transcribe_bytes(
+        self, filename: str, content: bytes, language: str = "pt", prompt: str | None = None
+    ) -> Dict[str, Any]:
+        """Transcreve um áudio em memória com o backend configurado.
 
+        Args:
+            filename: Nome do arquivo (a extensão indica o formato)
+            content: Bytes do áudio
+        """
+        try:
+            return self.backend.transcribe_bytes(filename, content, language, prompt)
+        except Exception as e:
+            raise Exception(f"Erro ao transcrever áudio: {str(e)}") from e
@@ -0,0 +1,203 @@
+"""Backends de transcrição (motor que converte um trecho de áudio em texto).
+
+- ``openai``: Whisper API (padrão). Paga por minuto e depende de rede/chave.
+- ``local``: Whisper quantizado em CPU (faster-whisper/CTranslate2), no próprio
+  processo. O modelo é carregado uma vez por processo e reaproveitado.
+
+Em produção, o backend local roda em workers Celery dedicados à fila
+``transcription_local`` (cada processo do pool carrega o modelo uma vez);
+``local_worker_pool()`` oferece o mesmo arranjo fora do Celery (benchmark).
+O backend de cada workspace vem de TranscriptionSettings (padrão:
+BAU_MENTAL_TRANSCRIPTION_BACKEND); o local só vale com
+BAU_MENTAL_LOCAL_TRANSCRIPTION_ENABLED=true (workers da fila implantados).
+"""
+
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict
+
+from apps.core.services.openai_client import OPENAI_AVAILABLE, get_openai_client
+
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+    WhisperModel = None
+
+logger = logging.getLogger("apps")
+
+DEFAULT_BACKEND = os.getenv("BAU_MENTAL_TRANSCRIPTION_BACKEND", "openai")
+# Há workers consumindo a fila transcription_local (com faster-whisper). Sem
+# eles, o backend local não pode ser escolhido e a transcrição vai para a
+# fila da API, onde get_backend() cai para o backend disponível
+LOCAL_TRANSCRIPTION_ENABLED = (
+    os.getenv("BAU_MENTAL_LOCAL_TRANSCRIPTION_ENABLED", "false").lower() == "true"
+)
+# Modelo local: tamanho (tiny/base/small/medium...), quantização e threads por processo
+LOCAL_WHISPER_MODEL = os.getenv("BAU_MENTAL_LOCAL_WHISPER_MODEL", "small")
+LOCAL_WHISPER_COMPUTE_TYPE = os.getenv("BAU_MENTAL_LOCAL_WHISPER_COMPUTE_TYPE", "int8")
+LOCAL_WHISPER_CPU_THREADS = int(os.getenv("BAU_MENTAL_LOCAL_WHISPER_CPU_THREADS", "1"))
+# Trechos do mesmo áudio transcritos em paralelo pelo modelo carregado
+LOCAL_WHISPER_NUM_WORKERS = int(os.getenv("BAU_MENTAL_TRANSCRIPTION_WORKERS", "4"))
+
+_local_model = None
+_local_model_lock = threading.Lock()
+
+
+class OpenAIWhisperBackend:
+    """Transcrição pela Whisper API (OpenAI)."""
+
+    name = "openai"
+
+    def __init__(self) -> None:
+        """Inicializa o cliente da OpenAI."""
+        # Aceita tanto OPENAI_API_KEY quanto OPENAI_KEY (compatibilidade)
+        self.api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_KEY")
+        if OPENAI_AVAILABLE and self.api_key:
+            self.client = get_openai_client("bau_mental.transcription", self.api_key)
+        else:
+            self.client = None
+
+    def is_available(self) -> bool:
+        """Verifica se o backend está disponível."""
+        return OPENAI_AVAILABLE and self.client is not None
+
+    def transcribe_bytes(
+        self, filename: str, content: bytes, language: str = "pt", prompt: str | None = None
+    ) -> Dict[str, Any]:
+        """Transcreve um áudio em memória em uma única requisição."""
+        # Bytes em memória: reenviáveis em retries
+        api_params = {
+            "model": "whisper-1",
+            "file": (filename, content),
+            "language": language,
+            # verbose_json traz duração e timestamps dos segmentos
+            "response_format": "verbose_json",
+        }
+
+        # Adicionar prompt se fornecido (ajuda Whisper a transcrever palavras específicas)
+        if prompt:
+            api_params["prompt"] = prompt
+
+        transcript = self.client.audio.transcriptions.create(**api_params)
+        return {
+            "text": transcript.text,
+            "language": language,
+            "duration": getattr(transcript, "duration", None),
+            "segments": [
+                {"start": segment.start, "end": segment.end, "text": segment.text}
+                for segment in (getattr(transcript, "segments", None) or [])
+            ],
+        }
+
+
+def _get_local_model():
+    """Modelo Whisper local do processo (carregado na primeira chamada)."""
+    global _local_model
+    if _local_model is None:
+        with _local_model_lock:
+            if _local_model is None:
+                logger.info(
+                    f"[LocalWhisper] Carregando modelo {LOCAL_WHISPER_MODEL} "
+                    f"({LOCAL_WHISPER_COMPUTE_TYPE}) no processo {os.getpid()}"
+                )
+                _local_model = WhisperModel(
+                    LOCAL_WHISPER_MODEL,
+                    device="cpu",
+                    compute_type=LOCAL_WHISPER_COMPUTE_TYPE,
+                    cpu_threads=LOCAL_WHISPER_CPU_THREADS,
+                    num_workers=LOCAL_WHISPER_NUM_WORKERS,
+                )
+    return _local_model
+
+
+class LocalWhisperBackend:
+    """Transcrição local em CPU com Whisper quantizado (faster-whisper)."""
+
+    name = "local"
+
+    def is_available(self) -> bool:
+        """Verifica se faster-whisper está instalado."""
+        return FASTER_WHISPER_AVAILABLE
+
+    def transcribe_bytes(
+        self, filename: str, content: bytes, language: str = "pt", prompt: str | None = None
+    ) -> Dict[str, Any]:
+        """Transcreve um áudio em memória com o modelo do processo."""
+        segments, info = _get_local_model().transcribe(
+            io.BytesIO(content),
+            language=language,
+            initial_prompt=prompt,
+            vad_filter=True,
+        )
+        segments = [
+            {"start": segment.start, "end": segment.end, "text": segment.text}
+            for segment in segments
+        ]
+        return {
+            "text": " ".join(segment["text"].strip() for segment in segments),
+            "language": language,
+            "duration": info.duration,
+            "segments": segments,
+        }
+
+
+BACKENDS = {
+    OpenAIWhisperBackend.name: OpenAIWhisperBackend,
+    LocalWhisperBackend.name: LocalWhisperBackend,
+}
+
+
+def get_backend(name: str | None = None):
+    """Instancia o backend pelo nome (padrão: BAU_MENTAL_TRANSCRIPTION_BACKEND).
+
+    Se o backend escolhido não estiver disponível (sem chave da OpenAI ou sem
+    faster-whisper instalado), usa o outro quando possível.
+
+    Raises:
+        ValueError: Se o nome não corresponde a um backend
+    """
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Backend de transcrição desconhecido: {name}")
+
+    backend = BACKENDS[name]()
+    if backend.is_available():
+        return backend
+    for other_name, backend_class in BACKENDS.items():
+        if other_name == name:
+            continue
+        other = backend_class()
+        if other.is_available():
+            logger.warning(f"[Transcription] Backend {name} indisponível; usando {other_name}")
+            return other
+    return backend
+
+
+def backend_for_workspace(workspace_id: Any) -> str:
+    """Nome do backend de transcrição escolhido pelo workspace."""
+    from apps.bau_mental.models import TranscriptionSettings
+
+    backend = (
+        TranscriptionSettings.objects.filter(workspace_id=workspace_id)
+        .values_list("backend", flat=True)
+        .first()
+    )
+    return backend or DEFAULT_BACKEND
+
+
+def local_transcribe(filename: str, content: bytes, language: str, prompt: str | None) -> Dict[str, Any]:
+    """Transcrição local executada em um processo do pool."""
+    return LocalWhisperBackend().transcribe_bytes(filename, content, language, prompt)
+
+
+def local_worker_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool de processos com o modelo local carregado uma vez por processo.
+
+    Use ``pool.submit(local_transcribe, filename, content, language, prompt)``.
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=_get_local_model)
@@ -0,0 +1,364 @@
+"""Índice vetorial local (por workspace) para busca semântica de notas.
+
+Cada workspace tem um diretório com:
+- ``vectors.f32``: matriz float32 (linhas normalizadas, append-only), lida via memmap
+- ``ids.txt``: uma linha por linha da matriz com o ID da nota ("" = removida)
+- ``meta.json``: dimensão e modelo usados para gerar os vetores
+
+Inserções são incrementais (append de uma linha) e atualizações sobrescrevem a
+linha existente in-place. Remoções viram "tombstones" (linha zerada) e são
+descartadas no ``rebuild``.
+"""
+
+import fcntl
+import json
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from django.conf import settings
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+
+    from apps.bau_mental.models import Note
+
+logger = logging.getLogger("apps")
+
+# O índice é gravado pelo worker Celery (index_note_embedding) e lido pela
+# API: com o Celery em outro container (CELERY_MODE=separate), este diretório
+# precisa ser um volume compartilhado pelos dois
+VECTOR_INDEX_DIR = os.getenv("BAU_MENTAL_VECTOR_INDEX_DIR") or str(
+    Path(settings.BASE_DIR) / "var" / "vector_index"
+)
+
+# Workspaces cujo índice ausente já foi avisado neste processo
+_missing_index_warned: set = set()
+
+
+class NoteVectorIndex:
+    """Índice de embeddings de notas de um workspace, persistido em disco."""
+
+    VECTORS_FILE = "vectors.f32"
+    IDS_FILE = "ids.txt"
+    META_FILE = "meta.json"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, workspace_id: str, base_dir: str | None = None) -> None:
+        """Inicializa o índice do workspace.
+
+        Args:
+            workspace_id: ID do workspace (UUID como string)
+            base_dir: Diretório raiz dos índices (padrão: BAU_MENTAL_VECTOR_INDEX_DIR)
+        """
+        self.workspace_id = str(workspace_id)
+        self.path = Path(base_dir or VECTOR_INDEX_DIR) / self.workspace_id
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def _meta(self) -> dict | None:
+        """Retorna metadados do índice ou None se ainda não existe."""
+        try:
+            with open(self.path / self.META_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_ids(self) -> List[str]:
+        """Lê a lista de IDs (posição = linha da matriz)."""
+        try:
+            with open(self.path / self.IDS_FILE) as f:
+                return f.read().splitlines()
+        except OSError:
+            return []
+
+    def _open_matrix(self, dim: int, mode: str = "r") -> np.ndarray | None:
+        """Abre a matriz de vetores via memmap (None se vazia)."""
+        vectors_path = self.path / self.VECTORS_FILE
+        try:
+            size = vectors_path.stat().st_size
+        except OSError:
+            return None
+        rows = size // (4 * dim)
+        if rows == 0:
+            return None
+        return np.memmap(vectors_path, dtype=np.float32, mode=mode, shape=(rows, dim))
+
+    def __len__(self) -> int:
+        """Quantidade de notas ativas no índice."""
+        return sum(1 for note_id in self._read_ids() if note_id)
+
+    def exists(self) -> bool:
+        """Verifica se o índice tem ao menos uma nota."""
+        return self._meta() is not None and len(self) > 0
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int = 10,
+        allowed_ids: Iterable[str] | None = None,
+    ) -> List[Tuple[str, float]]:
+        """Busca as k notas mais similares (cosseno) ao vetor da consulta.
+
+        Args:
+            query_vector: Embedding da consulta
+            k: Quantidade máxima de resultados
+            allowed_ids: Restringe a busca a estas notas (escopo de caixinha, etc.)
+
+        Returns:
+            Lista de (note_id, score) ordenada por score decrescente
+        """
+        meta = self._meta()
+        if not meta or k <= 0:
+            return []
+
+        dim = meta["dim"]
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        if query.shape != (dim,):
+            logger.warning(
+                f"[VectorIndex] Dimensão da consulta ({query.shape}) diferente do índice ({dim})"
+            )
+            return []
+
+        ids = self._read_ids()
+        matrix = self._open_matrix(dim)
+        if matrix is None or not ids:
+            return []
+
+        # Linhas escritas sem ID correspondente (escrita concorrente) são ignoradas
+        rows = min(len(ids), matrix.shape[0])
+        ids_array = np.asarray(ids[:rows])
+        scores = np.asarray(matrix[:rows] @ query)
+
+        valid = ids_array != ""
+        if allowed_ids is not None:
+            valid &= np.isin(ids_array, np.asarray([str(i) for i in allowed_ids]))
+
+        candidates = np.flatnonzero(valid)
+        if candidates.size == 0:
+            return []
+
+        k = min(k, candidates.size)
+        candidate_scores = scores[candidates]
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = top[np.argsort(-candidate_scores[top])]
+        return [(str(ids_array[candidates[i]]), float(candidate_scores[i])) for i in top]
+
+    # ------------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Lock exclusivo entre processos (workers Celery) para escrita."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / self.LOCK_FILE, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _ensure_meta(self, dim: int, model: str) -> None:
+        """Cria metadados ou valida compatibilidade com o índice existente."""
+        meta = self._meta()
+        if meta is None:
+            with open(self.path / self.META_FILE, "w") as f:
+                json.dump({"dim": dim, "model": model}, f)
+            # Índice novo: garantir arquivos vazios consistentes
+            open(self.path / self.VECTORS_FILE, "wb").close()
+            open(self.path / self.IDS_FILE, "w").close()
+        elif meta["dim"] != dim or meta.get("model") != model:
+            raise ValueError(
+                f"Índice do workspace {self.workspace_id} usa dim={meta['dim']} "
+                f"model={meta.get('model')}; reconstrua com rebuild()"
+            )
+
+    def upsert(self, note_id: str, vector: Sequence[float], model: str = "") -> None:
+        """Insere ou atualiza o vetor de uma nota.
+
+        Args:
+            note_id: ID da nota
+            vector: Embedding da nota
+            model: Nome do modelo de embedding (gravado nos metadados)
+        """
+        note_id = str(note_id)
+        row = _normalize(np.asarray(vector, dtype=np.float32))
+
+        with self._locked():
+            self._ensure_meta(row.shape[0], model)
+            ids = self._read_ids()
+            try:
+                position = ids.index(note_id)
+            except ValueError:
+                position = None
+
+            if position is not None:
+                matrix = self._open_matrix(row.shape[0], mode="r+")
+                if matrix is not None and position < matrix.shape[0]:
+                    matrix[position] = row
+                    matrix.flush()
+                    return
+
+            # Append: vetor primeiro, ID depois (leitores usam min(len(ids), linhas)).
+            # Linhas órfãs de uma escrita interrompida são descartadas antes.
+            with open(self.path / self.VECTORS_FILE, "ab") as f:
+                f.truncate(len(ids) * row.nbytes)
+                f.write(row.tobytes())
+            with open(self.path / self.IDS_FILE, "a") as f:
+                f.write(note_id + "\n")
+
+    def remove(self, note_id: str) -> bool:
+        """Remove uma nota do índice (tombstone). Retorna True se existia."""
+        note_id = str(note_id)
+        meta = self._meta()
+        if not meta:
+            return False
+
+        with self._locked():
+            ids = self._read_ids()
+            if note_id not in ids:
+                return False
+            position = ids.index(note_id)
+            matrix = self._open_matrix(meta["dim"], mode="r+")
+            if matrix is not None and position < matrix.shape[0]:
+                matrix[position] = 0.0
+                matrix.flush()
+            ids[position] = ""
+            self._write_ids(ids)
+            return True
+
+    def rebuild(self, items: Iterable[Tuple[str, Sequence[float]]], model: str = "") -> int:
+        """Reconstrói o índice do zero (compacta tombstones).
+
+        Args:
+            items: Pares (note_id, vetor)
+            model: Nome do modelo de embedding
+
+        Returns:
+            Quantidade de notas indexadas
+        """
+        ids: List[str] = []
+        rows: List[np.ndarray] = []
+        for note_id, vector in items:
+            ids.append(str(note_id))
+            rows.append(_normalize(np.asarray(vector, dtype=np.float32)))
+
+        with self._locked():
+            for name in (self.META_FILE, self.VECTORS_FILE, self.IDS_FILE):
+                try:
+                    os.unlink(self.path / name)
+                except OSError:
+                    pass
+            if not rows:
+                return 0
+
+            self._ensure_meta(rows[0].shape[0], model)
+            tmp_vectors = self.path / f"{self.VECTORS_FILE}.tmp"
+            np.vstack(rows).astype(np.float32).tofile(tmp_vectors)
+            os.replace(tmp_vectors, self.path / self.VECTORS_FILE)
+            self._write_ids(ids)
+        return len(ids)
+
+    def _write_ids(self, ids: List[str]) -> None:
+        """Regrava o arquivo de IDs de forma atômica."""
+        tmp_ids = self.path / f"{self.IDS_FILE}.tmp"
+        with open(tmp_ids, "w") as f:
+            f.write("".join(f"{note_id}\n" for note_id in ids))
+        os.replace(tmp_ids, self.path / self.IDS_FILE)
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    """Normaliza vetor (norma L2 = 1) para que produto interno = cosseno."""
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0:
+        return vector
+    return vector / norm
+
+
+def semantic_note_ids(
+    workspace_id: str,
+    question: str,
+    k: int,
+    allowed_ids: Iterable[str] | None = None,
+) -> List[Tuple[str, float]] | None:
+    """Retorna as k notas semanticamente mais próximas da pergunta.
+
+    Retorna None quando a busca semântica não está disponível (sem índice ou
+    sem serviço de embeddings), para que o chamador use o fallback (full-text).
+
+    Args:
+        workspace_id: ID do workspace
+        question: Pergunta do usuário
+        k: Quantidade máxima de notas
+        allowed_ids: Restringe a busca a estas notas
+
+    Returns:
+        Lista de (note_id, score) ou None
+    """
+    from apps.bau_mental.services.embeddings import EmbeddingService
+
+    index = NoteVectorIndex(workspace_id)
+    if not index.exists():
+        if str(workspace_id) not in _missing_index_warned:
+            _missing_index_warned.add(str(workspace_id))
+            logger.warning(
+                f"[VectorIndex] Índice do workspace {workspace_id} não encontrado em "
+                f"{VECTOR_INDEX_DIR}; usando busca full-text. Se o Celery roda em outro "
+                "container, BAU_MENTAL_VECTOR_INDEX_DIR deve apontar para um volume compartilhado"
+            )
+        return None
+
+    embedding_service = EmbeddingService()
+    if not embedding_service.is_available():
+        return None
+
+    try:
+        query_vector = embedding_service.embed_one(question)
+    except Exception as e:
+        logger.warning(f"[VectorIndex] Falha ao gerar embedding da pergunta: {e}")
+        return None
+
+    return index.search(query_vector, k=k, allowed_ids=allowed_ids)
+
+
+def semantic_notes(
+    queryset: "QuerySet[Note]", workspace_id: str, question: str, k: int
+) -> List["Note"] | None:
+    """Carrega apenas as k notas do queryset mais relevantes para a pergunta.
+
+    Args:
+        queryset: Notas do escopo (workspace, caixinha(s), status)
+        workspace_id: ID do workspace
+        question: Pergunta do usuário
+        k: Quantidade máxima de notas
+
+    Returns:
+        Notas ordenadas por relevância (com atributo ``semantic_score``) ou
+        None se a busca semântica não está disponível
+    """
+    hits = semantic_note_ids(
+        workspace_id,
+        question,
+        k=k,
+        allowed_ids=queryset.values_list("id", flat=True),
+    )
+    if not hits:
+        return None
+
+    notes_by_id = {
+        str(note_id): note
+        for note_id, note in queryset.in_bulk([note_id for note_id, _ in hits]).items()
+    }
+    notes = []
+    for note_id, score in hits:
+        note = notes_by_id.get(note_id)
+        if note is not None:
+            note.semantic_score = score
+            notes.append(note)
+    return notes
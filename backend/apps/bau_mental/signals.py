@@ -1,9 +1,9 @@
-"""Signals para criar notificações automaticamente."""
+"""Signals para criar notificações automaticamente e manter caches consistentes."""
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from apps.bau_mental.models import BoxShare, BoxShareInvite, Note
+from apps.bau_mental.models import Box, BoxShare, BoxShareInvite, Note, Thread
 
 
 @receiver(post_save, sender=BoxShare)
@@ -23,46 +23,104 @@ def create_box_shared_notification(sender, instance: BoxShare, created: bool, **
 
 @receiver(post_save, sender=Note)
 def create_note_notifications(sender, instance: Note, created: bool, **kwargs):
-    """Cria notificações quando nota é criada ou editada."""
-    from apps.core.models import Notification
-    from apps.bau_mental.models import BoxShare
+    """Registra nota criada ou editada para notificar quem tem acesso à caixinha.
 
+    Nenhuma consulta aqui: o evento entra na fila da caixinha depois do
+    commit e a task agrupa e grava as notificações (services/notifications.py).
+    """
     # Apenas para notas com caixinha
-    if not instance.box:
+    if not instance.box_id:
         return
 
-    # Buscar usuários com acesso à caixinha (compartilhados)
-    shares = BoxShare.objects.filter(
-        box=instance.box,
-        status="accepted"
-    ).exclude(
-        shared_with=instance.created_by  # Não notificar o criador
-    )
-
     if created:
-        # Notificar sobre nova nota
-        for share in shares:
-            Notification.objects.create(
-                user=share.shared_with,
-                type="note_created",
-                title=f"Nova nota em {instance.box.name}",
-                message=f"{instance.created_by.email if instance.created_by else 'Alguém'} criou uma nova nota na caixinha '{instance.box.name}'.",
-                related_box=instance.box,
-                related_note=instance,
-            )
+        event = "created"
     else:
-        # Verificar se transcript foi atualizado
         # update_fields pode ser None quando save() é chamado sem argumentos
         update_fields = kwargs.get("update_fields") or []
-        if "transcript" in update_fields:
-            # Notificar sobre edição
-            for share in shares:
-                Notification.objects.create(
-                    user=share.shared_with,
-                    type="note_edited",
-                    title=f"Nota editada em {instance.box.name}",
-                    message=f"{instance.last_edited_by.email if instance.last_edited_by else 'Alguém'} editou uma nota na caixinha '{instance.box.name}'.",
-                    related_box=instance.box,
-                    related_note=instance,
-                )
+        if "transcript" not in update_fields:
+            return
+        event = "edited"
+
+    from django.db import transaction
+
+    from apps.bau_mental.tasks import queue_note_notification
+
+    box_id, note_id = instance.box_id, instance.pk
+    transaction.on_commit(lambda: queue_note_notification(box_id, note_id, event))
+
+
+# Campos de Note que alteram respostas da IA (conteúdo, escopo ou visibilidade)
+ANSWER_RELEVANT_FIELDS = {"transcript", "box", "deleted_at", "processing_status"}
+
+
+@receiver(post_save, sender=Note)
+def invalidate_note_answers_on_save(sender, instance: Note, created: bool, **kwargs):
+    """Remove do cache respostas que usaram a nota editada."""
+    update_fields = kwargs.get("update_fields")
+    if created or (update_fields is not None and not ANSWER_RELEVANT_FIELDS & set(update_fields)):
+        return
+
+    from apps.bau_mental.services.answer_cache import invalidate_note_answers
+
+    invalidate_note_answers(instance.workspace_id, instance.pk)
+
+
+@receiver(post_delete, sender=Note)
+def invalidate_note_answers_on_delete(sender, instance: Note, **kwargs):
+    """Remove do cache respostas que usaram a nota apagada."""
+    from apps.bau_mental.services.answer_cache import invalidate_note_answers
+
+    invalidate_note_answers(instance.workspace_id, instance.pk)
+
+
+@receiver(post_delete, sender=Note)
+def decrement_box_note_count_on_delete(sender, instance: Note, **kwargs):
+    """Desconta nota apagada fisicamente do contador da caixinha."""
+    if instance.box_id is None or instance.deleted_at is not None:
+        return
+
+    from django.db.models import F, Value
+    from django.db.models.functions import Greatest, Now
+
+    from apps.bau_mental.models import Box
+
+    Box.all_objects.filter(id=instance.box_id).update(
+        note_count=Greatest(F("note_count") - 1, Value(0)),
+        summary_stale=True,
+        updated_at=Now(),
+    )
+
+
+# Campos de Box usados pelo matcher de classificação
+MATCHER_RELEVANT_FIELDS = {"name", "keywords", "deleted_at"}
+
+
+@receiver(post_save, sender=Box)
+def invalidate_box_matcher_on_save(sender, instance: Box, created: bool, **kwargs):
+    """Recompila o matcher de nomes/keywords quando uma caixinha muda."""
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not MATCHER_RELEVANT_FIELDS & set(update_fields):
+        return
+
+    from apps.bau_mental.services.box_matcher import invalidate_box_matcher
+
+    invalidate_box_matcher(instance.workspace_id)
+
+
+@receiver(post_delete, sender=Box)
+def invalidate_box_matcher_on_delete(sender, instance: Box, **kwargs):
+    """Recompila o matcher quando uma caixinha é apagada."""
+    from apps.bau_mental.services.box_matcher import invalidate_box_matcher
+
+    invalidate_box_matcher(instance.workspace_id)
+
+
+@receiver(post_delete, sender=Note)
+@receiver(post_delete, sender=Box)
+@receiver(post_delete, sender=Thread)
+@receiver(post_delete, sender=BoxShare)
+def record_sync_tombstone(sender, instance, **kwargs):
+    """Registra exclusão física para a sincronização incremental dos clientes."""
+    from apps.bau_mental.services.sync import record_tombstone
 
+    record_tombstone(instance)
@@ -1,8 +1,14 @@
 """Storage backend para Cloudflare R2 (S3-compatible)."""
 
 import os
+from typing import Dict, List
+
 from django.core.files.storage import default_storage, Storage
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+# Limite de chaves por requisição DeleteObjects (S3/R2)
+DELETE_OBJECTS_MAX_KEYS = 1000
 
 
 class R2Storage(S3Boto3Storage):
@@ -119,6 +125,46 @@ class R2Storage(S3Boto3Storage):
         except Exception:
             pass  # Ignorar erro se não estiver no storage local
 
+    def delete_many(self, names: List[str]) -> List[str]:
+        """Deleta vários arquivos com DeleteObjects (até 1000 por requisição).
+
+        Também remove eventuais cópias no storage local (fallback), como delete().
+
+        Returns:
+            Nomes que não puderam ser deletados
+        """
+        if getattr(self, '_use_local', False):
+            failed = []
+            for name in names:
+                try:
+                    self._get_local_storage().delete(name)
+                except Exception:
+                    failed.append(name)
+            return failed
+
+        failed = []
+        client = self.bucket.meta.client
+        for start in range(0, len(names), DELETE_OBJECTS_MAX_KEYS):
+            chunk = names[start:start + DELETE_OBJECTS_MAX_KEYS]
+            keys = {self._normalize_name(clean_name(name)): name for name in chunk}
+            try:
+                response = client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+                )
+            except Exception:
+                failed.extend(chunk)
+                continue
+            # Objeto inexistente não é erro no DeleteObjects (já foi removido)
+            failed.extend(keys[error["Key"]] for error in response.get("Errors", []) if error.get("Key") in keys)
+
+        for name in names:
+            try:
+                self._get_local_storage().delete(name)
+            except Exception:
+                pass  # Ignorar erro se não estiver no storage local
+        return failed
+
     def exists(self, name):
         """Verifica se arquivo existe usando storage apropriado.
 
@@ -162,6 +208,107 @@ class R2Storage(S3Boto3Storage):
             return self._get_local_storage().size(name)
         return super().size(name)
 
+    def path(self, name):
+        """Caminho local do arquivo (só no modo local; R2 não tem caminho)."""
+        if getattr(self, '_use_local', False):
+            return self._get_local_storage().path(name)
+        raise NotImplementedError("R2 não suporta caminho local")
+
+    def open_stream(self, name):
+        """Stream de leitura do objeto, sem cópia local (usar com ``with``).
+
+        Diferente de open(), que baixa o objeto inteiro para um arquivo
+        temporário, lê do corpo da resposta do GetObject sob demanda.
+        """
+        if getattr(self, '_use_local', False):
+            return self._get_local_storage().open(name, 'rb')
+
+        try:
+            return self.bucket.meta.client.get_object(
+                Bucket=self.bucket_name, Key=self._normalize_name(clean_name(name))
+            )["Body"]
+        except Exception:
+            # Pode ter sido salvo no storage local (fallback)
+            return self._get_local_storage().open(name, 'rb')
+
+    def download_url(self, name: str, expires: int = 3600) -> str:
+        """URL pré-assinada de leitura (mesmo com domínio customizado)."""
+        if getattr(self, '_use_local', False):
+            return self._get_local_storage().url(name)
+        return self.bucket.meta.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket_name, "Key": self._normalize_name(clean_name(name))},
+            ExpiresIn=expires,
+        )
+
+    # Upload direto (multipart com URLs pré-assinadas): o cliente envia os
+    # bytes ao R2 sem passar pelo servidor de aplicação
+
+    @property
+    def supports_direct_upload(self) -> bool:
+        """True se o upload direto ao R2 está disponível (não é storage local)."""
+        return not getattr(self, '_use_local', False)
+
+    def _multipart_client_and_key(self, name: str):
+        """Cliente boto3 e chave completa (com location) do arquivo."""
+        if not self.supports_direct_upload:
+            raise ValueError("Upload direto indisponível: R2 não está configurado")
+        return self.bucket.meta.client, self._normalize_name(clean_name(name))
+
+    def create_multipart_upload(self, name: str, content_type: str | None = None) -> str:
+        """Inicia upload multipart e retorna o UploadId."""
+        client, key = self._multipart_client_and_key(name)
+        params = {"Bucket": self.bucket_name, "Key": key}
+        if content_type:
+            params["ContentType"] = content_type
+        return client.create_multipart_upload(**params)["UploadId"]
+
+    def presign_upload_parts(
+        self, name: str, upload_id: str, part_count: int, expires: int = 3600
+    ) -> List[Dict]:
+        """Gera URLs pré-assinadas (PUT) para cada parte do upload.
+
+        Returns:
+            [{"part_number": int, "url": str}, ...]
+        """
+        client, key = self._multipart_client_and_key(name)
+        return [
+            {
+                "part_number": part_number,
+                "url": client.generate_presigned_url(
+                    "upload_part",
+                    Params={
+                        "Bucket": self.bucket_name,
+                        "Key": key,
+                        "UploadId": upload_id,
+                        "PartNumber": part_number,
+                    },
+                    ExpiresIn=expires,
+                ),
+            }
+            for part_number in range(1, part_count + 1)
+        ]
+
+    def complete_multipart_upload(self, name: str, upload_id: str, parts: List[Dict]) -> None:
+        """Conclui o upload a partir das partes enviadas ({part_number, etag})."""
+        client, key = self._multipart_client_and_key(name)
+        client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                    for part in sorted(parts, key=lambda part: part["part_number"])
+                ]
+            },
+        )
+
+    def abort_multipart_upload(self, name: str, upload_id: str) -> None:
+        """Cancela o upload e descarta as partes já enviadas."""
+        client, key = self._multipart_client_and_key(name)
+        client.abort_multipart_upload(Bucket=self.bucket_name, Key=key, UploadId=upload_id)
+
 
 class BauMentalAudioStorage(R2Storage):
     """Storage específico para áudios do bau_mental."""
@@ -3,18 +3,43 @@
 import json
 import logging
 import os
-import shutil
-import tempfile
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List
 
 from celery import shared_task
 
-from apps.bau_mental.models import Box, Note
+from apps.bau_mental.models import Box, Note, Thread
+from apps.bau_mental.services.audio_purge import purge_expired_audios
+from apps.bau_mental.services.audio_source import AudioSource
+from apps.bau_mental.services.box_classifier import rebuild_classifier, record_classification
 from apps.bau_mental.services.classification import ClassificationService
+from apps.bau_mental.services.classification_batch import (
+    BATCH_MAX_NOTES,
+    BATCH_WINDOW_SECONDS,
+    apply_batch_results,
+    batching_enabled,
+    claim_batch_schedule,
+    mark_pending,
+    pending_notes,
+    release_batch_schedule,
+    stale_pending_workspace_ids,
+)
+from apps.bau_mental.services.notifications import (
+    NOTIFICATION_WINDOW_SECONDS,
+    build_notifications,
+    pop_note_events,
+    record_note_event,
+)
+from apps.bau_mental.services.thread_memory import ThreadMemoryService
+from apps.bau_mental.services.transcript_cache import get_cached_transcript, store_transcript
 from apps.bau_mental.services.transcription import TranscriptionService
+from apps.bau_mental.services.transcription_backends import backend_for_workspace
 
 logger = logging.getLogger("apps")
 
+# Idioma das transcrições (também faz parte da chave do cache de transcrições)
+TRANSCRIPTION_LANGUAGE = "pt"
+
 # Debug logging
 DEBUG_LOG_PATH = "/home/uaimax/projects/uaitools/.cursor/debug.log"
 
@@ -39,6 +64,40 @@ def _debug_log(location: str, message: str, data: dict, hypothesis_id: str = "A"
         pass  # Ignorar erros de logging
 
 
+def _complete_transcription(note: Note, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Grava a transcrição na nota e dispara classificação e indexação semântica."""
+    transcript_text = result["text"].strip()
+    note.transcript = transcript_text
+    note.duration_seconds = result.get("duration")  # Pode ser None
+    note.processing_status = "completed"
+    note.save(update_fields=["transcript", "duration_seconds", "processing_status"])
+    # #region agent log
+    _debug_log(
+        "tasks.py:222",
+        "Nota atualizada com sucesso",
+        {
+            "note_id": str(note.id),
+            "status": "completed",
+            "transcript_saved": note.transcript,
+            "transcript_length_saved": len(note.transcript) if note.transcript else 0,
+            "cached": bool(result.get("cached")),
+        },
+        "E",
+    )
+    # #endregion
+
+    # Disparar classificação e indexação semântica automaticamente
+    classify_note.delay(str(note.id))
+    index_note_embedding.delay(str(note.id))
+
+    return {
+        "status": "completed",
+        "transcript": transcript_text,
+        "duration": result.get("duration"),
+        "cached": bool(result.get("cached")),
+    }
+
+
 @shared_task
 def transcribe_audio(note_id: str) -> Dict[str, Any]:
     """Transcreve áudio de uma anotação.
@@ -51,6 +110,7 @@ def transcribe_audio(note_id: str) -> Dict[str, Any]:
             "status": "completed" ou "failed",
             "transcript": "texto transcrito",
             "duration": 45.2,
+            "cached": True se reaproveitou transcrição do mesmo áudio,
             "error": "mensagem de erro" (se falhou),
         }
     """
@@ -86,248 +146,115 @@ def transcribe_audio(note_id: str) -> Dict[str, Any]:
         if not note.audio_file or not note.audio_file.name:
             raise ValueError("Arquivo de áudio não encontrado")
 
-        # #region agent log
-        _debug_log(
-            "tasks.py:62",
-            "Verificando storage do audio_file",
-            {
-                "note_id": str(note.id),
-                "audio_file_name": note.audio_file.name if note.audio_file else None,
-                "storage_type": type(note.audio_file.storage).__name__ if hasattr(note.audio_file, 'storage') else "N/A",
-                "storage_is_string": isinstance(note.audio_file.storage, str) if hasattr(note.audio_file, 'storage') else False,
-            },
-            "A",
+        # Buscar caixinhas do workspace para incluir nomes no prompt do Whisper
+        # Isso ajuda o Whisper a transcrever corretamente nomes de caixinhas mencionados
+        boxes = Box.objects.filter(
+            workspace=note.workspace, deleted_at__isnull=True
         )
-        # #endregion
-
-        # Caminho completo do arquivo
-        # Para R2/S3, não podemos usar .path diretamente, precisamos baixar o arquivo temporariamente
-        temp_file_path = None
-
-        # Verificar se o storage suporta .path antes de tentar acessar
-        # Isso evita o erro 'str' object has no attribute 'path'
-        storage = note.audio_file.storage
-        storage_supports_path = False
-
-        # Verificar se storage é uma instância válida (não string) e se tem método path
-        if hasattr(storage, 'path') and callable(getattr(storage, 'path', None)):
-            try:
-                # Tentar acessar path do storage para verificar se funciona
-                test_path = storage.path('test')
-                storage_supports_path = True
-            except (AttributeError, NotImplementedError, TypeError):
-                # Storage não suporta path (ex: S3/R2)
-                storage_supports_path = False
-
-        try:
+        box_names = [box.name for box in boxes]
+
+        # Criar prompt com nomes das caixinhas
+        # O prompt do Whisper ajuda a melhorar a transcrição de palavras específicas
+        whisper_prompt = None
+        if box_names:
+            # Formato: lista de nomes separados por vírgula
+            # Whisper usa isso como contexto para melhorar transcrição
+            whisper_prompt = f"Caixinhas disponíveis: {', '.join(box_names)}"
             # #region agent log
             _debug_log(
-                "tasks.py:105",
-                "Verificando suporte a .path",
+                "tasks.py:230",
+                "Prompt do Whisper criado com nomes de caixinhas",
                 {
                     "note_id": str(note.id),
-                    "storage_type": type(storage).__name__,
-                    "storage_supports_path": storage_supports_path,
-                    "storage_is_string": isinstance(storage, str),
+                    "box_count": len(box_names),
+                    "box_names": box_names,
+                    "prompt_preview": whisper_prompt[:100] if whisper_prompt else None,
                 },
-                "B",
+                "E",
             )
             # #endregion
 
-            # Tentar usar .path apenas se o storage suportar
-            if storage_supports_path and not isinstance(storage, str):
-                audio_path = note.audio_file.path
-                # #region agent log
-                _debug_log("tasks.py:118", "audio_file.path obtido com sucesso", {"audio_path": audio_path, "note_id": str(note.id)}, "B")
-                # #endregion
-            else:
-                # Forçar exceção para ir para o bloco de download
-                raise AttributeError("Storage não suporta .path")
-        except (AttributeError, NotImplementedError, ValueError, TypeError) as e:
-            # #region agent log
-            _debug_log(
-                "tasks.py:76",
-                "Erro ao acessar audio_file.path, tentando download",
-                {
-                    "error_type": type(e).__name__,
-                    "error_message": str(e),
-                    "note_id": str(note.id),
-                },
-                "C",
-            )
-            # #endregion
-            # Se o storage não suporta .path (como S3/R2), baixar arquivo temporariamente
-            # Isso também trata o caso onde storage é uma string (erro de configuração)
-            try:
-                # Criar arquivo temporário
-                file_ext = os.path.splitext(note.audio_file.name)[1] if note.audio_file.name else ".webm"
-                if not file_ext:
-                    file_ext = ".webm"
-                # #region agent log
-                _debug_log("tasks.py:87", "Criando arquivo temporário", {"file_ext": file_ext, "note_id": str(note.id)}, "C")
-                # #endregion
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_ext)
-                temp_file_path = temp_file.name
-                temp_file.close()
-
-                # Baixar arquivo do storage para arquivo temporário
-                # #region agent log
-                _debug_log("tasks.py:94", "Iniciando download do arquivo", {"temp_path": temp_file_path, "note_id": str(note.id)}, "C")
-                # #endregion
-                with note.audio_file.open('rb') as source:
-                    with open(temp_file_path, 'wb') as dest:
-                        shutil.copyfileobj(source, dest)
-
-                audio_path = temp_file_path
-                # #region agent log
-                _debug_log("tasks.py:100", "Download concluído", {"audio_path": audio_path, "note_id": str(note.id)}, "C")
-                # #endregion
-            except Exception as download_error:
-                # #region agent log
-                _debug_log(
-                    "tasks.py:103",
-                    "Erro ao baixar arquivo",
-                    {
-                        "error_type": type(download_error).__name__,
-                        "error_message": str(download_error),
-                        "note_id": str(note.id),
-                    },
-                    "D",
-                )
-                # #endregion
-                if temp_file_path and os.path.exists(temp_file_path):
-                    try:
-                        os.unlink(temp_file_path)
-                    except Exception:
-                        pass
-                raise ValueError(f"Erro ao baixar arquivo do storage: {str(download_error)}")
+        # Áudio já transcrito (mesmo conteúdo): concluir sem chamar a API
+        if note.audio_sha256:
+            cached = get_cached_transcript(note.audio_sha256, TRANSCRIPTION_LANGUAGE, whisper_prompt)
+            if cached:
+                return _complete_transcription(note, cached)
 
         # Transcrever
-        transcription_service = TranscriptionService()
+        transcription_service = TranscriptionService(
+            backend=backend_for_workspace(note.workspace_id)
+        )
         if not transcription_service.is_available():
-            # Limpar arquivo temporário se foi criado
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                except Exception:
-                    pass
             raise ValueError("Serviço de transcrição não disponível")
 
-        try:
-            # #region agent log
-            _debug_log(
-                "tasks.py:186",
-                "Chamando transcription_service.transcribe",
-                {
-                    "audio_path": audio_path,
-                    "audio_path_exists": os.path.exists(audio_path) if audio_path else False,
-                    "audio_path_size": os.path.getsize(audio_path) if audio_path and os.path.exists(audio_path) else 0,
-                    "note_id": str(note.id),
-                },
-                "E",
-            )
-            # #endregion
+        # Áudio lido direto do storage (stream/URL pré-assinada), sem cópia em disco
+        source = AudioSource(note.audio_file)
 
-            # Buscar caixinhas do workspace para incluir nomes no prompt do Whisper
-            # Isso ajuda o Whisper a transcrever corretamente nomes de caixinhas mencionados
-            boxes = Box.objects.filter(
-                workspace=note.workspace, deleted_at__isnull=True
-            )
-            box_names = [box.name for box in boxes]
-
-            # Criar prompt com nomes das caixinhas
-            # O prompt do Whisper ajuda a melhorar a transcrição de palavras específicas
-            whisper_prompt = None
-            if box_names:
-                # Formato: lista de nomes separados por vírgula
-                # Whisper usa isso como contexto para melhorar transcrição
-                whisper_prompt = f"Caixinhas disponíveis: {', '.join(box_names)}"
-                # #region agent log
-                _debug_log(
-                    "tasks.py:230",
-                    "Prompt do Whisper criado com nomes de caixinhas",
-                    {
-                        "note_id": str(note.id),
-                        "box_count": len(box_names),
-                        "box_names": box_names,
-                        "prompt_preview": whisper_prompt[:100] if whisper_prompt else None,
-                    },
-                    "E",
-                )
-                # #endregion
+        # #region agent log
+        _debug_log(
+            "tasks.py:186",
+            "Chamando transcription_service.transcribe",
+            {
+                "note_id": str(note.id),
+                "audio_file_name": note.audio_file.name,
+                "storage_type": type(note.audio_file.storage).__name__,
+                "local_path": source.local_path,
+            },
+            "E",
+        )
+        # #endregion
 
-            result = transcription_service.transcribe(
-                audio_path, language="pt", prompt=whisper_prompt
+        # Uploads diretos ao storage chegam sem hash: calcular a partir do stream
+        cached = None
+        if not note.audio_sha256:
+            note.audio_sha256 = source.sha256()
+            note.save(update_fields=["audio_sha256"])
+            cached = get_cached_transcript(
+                note.audio_sha256, TRANSCRIPTION_LANGUAGE, whisper_prompt
             )
 
-            # Validar se a transcrição não está vazia
-            transcript_text = result.get("text", "").strip()
-            if not transcript_text:
-                logger.warning(f"Transcrição vazia para anotação {note_id}")
-                # #region agent log
-                _debug_log(
-                    "tasks.py:201",
-                    "Transcrição vazia retornada",
-                    {
-                        "note_id": str(note.id),
-                        "result_keys": list(result.keys()),
-                        "result_full": result,
-                    },
-                    "F",
-                )
-                # #endregion
-                # Se a transcrição está vazia, marcar como falha
-                raise ValueError("Transcrição retornada está vazia")
+        result = cached or transcription_service.transcribe(
+            source, language=TRANSCRIPTION_LANGUAGE, prompt=whisper_prompt
+        )
 
+        # Validar se a transcrição não está vazia
+        transcript_text = result.get("text", "").strip()
+        if not transcript_text:
+            logger.warning(f"Transcrição vazia para anotação {note_id}")
             # #region agent log
             _debug_log(
-                "tasks.py:215",
-                "Transcrição concluída",
+                "tasks.py:201",
+                "Transcrição vazia retornada",
                 {
                     "note_id": str(note.id),
-                    "transcript_text": transcript_text[:100] + "..." if len(transcript_text) > 100 else transcript_text,
-                    "transcript_length": len(transcript_text),
-                    "has_duration": "duration" in result,
                     "result_keys": list(result.keys()),
+                    "result_full": result,
                 },
-                "E",
+                "F",
             )
             # #endregion
-        finally:
-            # Limpar arquivo temporário se foi criado
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                except Exception:
-                    pass  # Ignorar erros ao deletar arquivo temporário
+            # Se a transcrição está vazia, marcar como falha
+            raise ValueError("Transcrição retornada está vazia")
+
+        if not cached:
+            store_transcript(note.audio_sha256, TRANSCRIPTION_LANGUAGE, whisper_prompt, result)
 
-        # Atualizar anotação
-        note.transcript = transcript_text  # Usar a variável validada
-        note.duration_seconds = result.get("duration")  # Pode ser None
-        note.processing_status = "completed"
-        note.save(update_fields=["transcript", "duration_seconds", "processing_status"])
         # #region agent log
         _debug_log(
-            "tasks.py:222",
-            "Nota atualizada com sucesso",
+            "tasks.py:215",
+            "Transcrição concluída",
             {
                 "note_id": str(note.id),
-                "status": "completed",
-                "transcript_saved": note.transcript,
-                "transcript_length_saved": len(note.transcript) if note.transcript else 0,
+                "transcript_text": transcript_text[:100] + "..." if len(transcript_text) > 100 else transcript_text,
+                "transcript_length": len(transcript_text),
+                "has_duration": "duration" in result,
+                "result_keys": list(result.keys()),
             },
             "E",
         )
         # #endregion
 
-        # Disparar classificação automaticamente
-        classify_note.delay(note_id)
-
-        return {
-            "status": "completed",
-            "transcript": transcript_text,  # Usar a variável validada
-            "duration": result.get("duration"),
-        }
+        return _complete_transcription(note, result)
 
     except Note.DoesNotExist:
         logger.error(f"Anotação {note_id} não encontrada")
@@ -354,16 +281,42 @@ def transcribe_audio(note_id: str) -> Dict[str, Any]:
         }
 
 
+def _available_boxes(workspace_id: Any) -> List[Dict[str, Any]]:
+    """Caixinhas do workspace no formato usado pela classificação."""
+    boxes = Box.objects.filter(workspace_id=workspace_id, deleted_at__isnull=True)
+    return [
+        {
+            "id": str(box.id),
+            "name": box.name,
+            "description": box.description or "",
+            "keywords": box.keywords or "",  # Incluir keywords
+        }
+        for box in boxes
+    ]
+
+
+def _enqueue_classification_batch(note: Note) -> None:
+    """Marca a nota como pendente e agenda o lote do workspace (uma vez por janela)."""
+    mark_pending(note)
+    if claim_batch_schedule(note.workspace_id):
+        classify_pending_notes.apply_async(
+            args=[str(note.workspace_id)], countdown=BATCH_WINDOW_SECONDS
+        )
+
+
 @shared_task
 def classify_note(note_id: str) -> Dict[str, Any]:
     """Classifica anotação em uma caixinha.
 
+    Se só a IA resolve e a classificação em lote está ativa, a nota fica
+    pendente para ``classify_pending_notes`` (status "queued").
+
     Args:
         note_id: ID da anotação (UUID como string)
 
     Returns:
         {
-            "status": "completed",
+            "status": "completed" ou "queued",
             "box_id": "uuid-da-caixinha" ou None,
             "confidence": 0.85,
         }
@@ -383,16 +336,7 @@ def classify_note(note_id: str) -> Dict[str, Any]:
             }
 
         # Buscar caixinhas do workspace
-        boxes = Box.objects.filter(workspace=note.workspace, deleted_at__isnull=True)
-        available_boxes = [
-            {
-                "id": str(box.id),
-                "name": box.name,
-                "description": box.description or "",
-                "keywords": box.keywords or "",  # Incluir keywords
-            }
-            for box in boxes
-        ]
+        available_boxes = _available_boxes(note.workspace_id)
 
         # HEURÍSTICA 3: Padrão recente (últimas 3 notas do usuário)
         recent_pattern_match = None
@@ -414,12 +358,14 @@ def classify_note(note_id: str) -> Dict[str, Any]:
                         "box_id": str(suggested_box_id),
                         "confidence": 0.7,  # Confiança média, usuário confirma
                         "reason": "Padrão recente: últimas 3 notas foram para esta caixinha",
+                        "source": "heuristic",
                     }
 
         # Classificar usando heurísticas (que já incluem IA se necessário)
         classification_service = ClassificationService()
         
         # Se heurística 3 encontrou padrão, usar ela
+        elapsed_ms = 0.0
         if recent_pattern_match:
             result = recent_pattern_match
         else:
@@ -436,9 +382,27 @@ def classify_note(note_id: str) -> Dict[str, Any]:
                     "confidence": 0.0,
                 }
 
-            result = classification_service.classify(
-                note.transcript, available_boxes, str(note.workspace.id)
-            )
+            if batching_enabled() and available_boxes:
+                # Sem IA primeiro; se ela for necessária, a nota entra no lote do workspace
+                result = classification_service.classify_without_llm(
+                    note.transcript, available_boxes, str(note.workspace_id)
+                )
+                if result is None:
+                    _enqueue_classification_batch(note)
+                    return {
+                        "status": "queued",
+                        "box_id": None,
+                        "confidence": None,
+                    }
+            else:
+                started = time.perf_counter()
+                result = classification_service.classify(
+                    note.transcript, available_boxes, str(note.workspace.id)
+                )
+                elapsed_ms = (time.perf_counter() - started) * 1000
+
+        # Estatísticas: heurística / modelo local / IA
+        record_classification(note.workspace_id, result.get("source", ""), elapsed_ms)
 
         # Atualizar anotação
         box_id = result.get("box_id")
@@ -459,6 +423,7 @@ def classify_note(note_id: str) -> Dict[str, Any]:
             "status": "completed",
             "box_id": box_id,
             "confidence": result.get("confidence", 0.0),
+            "source": result.get("source"),
         }
 
     except Note.DoesNotExist:
@@ -476,60 +441,354 @@ def classify_note(note_id: str) -> Dict[str, Any]:
 
 
 @shared_task
-def cleanup_expired_audios() -> Dict[str, Any]:
-    """Remove arquivos de áudio expirados (após 7 dias).
+def classify_pending_notes(workspace_id: str) -> Dict[str, Any]:
+    """Classifica em lote as notas do workspace que aguardam a IA.
+
+    Uma chamada à IA a cada BAU_MENTAL_CLASSIFICATION_BATCH_SIZE notas (a
+    lista de caixinhas vai uma vez por lote) e um ``bulk_update`` por lote.
+
+    Args:
+        workspace_id: ID do workspace
 
     Returns:
         {
             "status": "completed",
-            "deleted_count": 5,
-            "errors": [],
+            "classified": 12,
+            "batches": 1,
         }
     """
-    from django.utils import timezone
-    from datetime import timedelta
+    # Notas marcadas a partir daqui agendam outro lote
+    release_batch_schedule(workspace_id)
 
-    deleted_count = 0
-    errors = []
+    classification_service = ClassificationService()
+    if not classification_service.is_available():
+        logger.warning("Serviço de classificação não disponível")
+        return {"status": "failed", "error": "Serviço de classificação não disponível"}
 
+    available_boxes = _available_boxes(workspace_id)
+    classified = batches = 0
     try:
-        # Buscar anotações com áudio criado há mais de 7 dias
-        expiration_date = timezone.now() - timedelta(days=7)
-        expired_notes = Note.objects.filter(
-            created_at__lt=expiration_date,
-            audio_file__isnull=False,
+        while True:
+            notes = list(pending_notes(workspace_id).values_list("id", "transcript")[:BATCH_MAX_NOTES])
+            if not notes:
+                break
+
+            started = time.perf_counter()
+            results = classification_service.classify_batch(
+                {str(note_id): transcript for note_id, transcript in notes}, available_boxes
+            )
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            classified += apply_batch_results(workspace_id, [note_id for note_id, _ in notes], results)
+            batches += 1
+            record_classification(workspace_id, "llm", elapsed_ms, count=len(notes))
+    except Exception as e:
+        # Notas continuam pendentes: próximo lote do workspace ou requeue_pending_classifications
+        logger.error(f"Erro ao classificar lote do workspace {workspace_id}: {str(e)}", exc_info=True)
+        return {
+            "status": "failed",
+            "error": str(e),
+            "classified": classified,
+        }
+
+    return {
+        "status": "completed",
+        "classified": classified,
+        "batches": batches,
+    }
+
+
+@shared_task
+def requeue_pending_classifications() -> Dict[str, Any]:
+    """Reagenda o lote dos workspaces com notas pendentes esquecidas.
+
+    ``classify_pending_notes`` libera o agendamento antes de chamar a IA; se
+    ela falha ou o serviço está indisponível, as notas ficam pendentes sem
+    nenhuma task agendada. A varredura (beat) agenda de novo esses lotes.
+
+    Returns:
+        {"status": "completed", "requeued": quantidade de workspaces}
+    """
+    requeued = 0
+    for workspace_id in stale_pending_workspace_ids():
+        if claim_batch_schedule(workspace_id):
+            classify_pending_notes.delay(str(workspace_id))
+            requeued += 1
+
+    if requeued:
+        logger.info(f"[Classification] Lote reagendado para {requeued} workspace(s) com notas pendentes")
+    return {"status": "completed", "requeued": requeued}
+
+
+def queue_note_notification(box_id: Any, note_id: Any, event: str) -> None:
+    """Registra evento de nota e agenda as notificações da caixinha (uma vez por janela)."""
+    if record_note_event(box_id, note_id, event):
+        fan_out_box_notifications.apply_async(
+            args=[str(box_id)], countdown=NOTIFICATION_WINDOW_SECONDS
         )
 
-        for note in expired_notes:
-            try:
-                # Deletar arquivo do storage
-                if note.audio_file:
-                    note.audio_file.delete(save=False)
 
-                # Limpar referência no model
-                note.audio_file = None
-                note.save(update_fields=["audio_file"])
+@shared_task
+def fan_out_box_notifications(box_id: str) -> Dict[str, Any]:
+    """Grava as notificações dos eventos acumulados da caixinha (um bulk_create).
+
+    Args:
+        box_id: ID da caixinha
+
+    Returns:
+        {
+            "status": "completed",
+            "events": 3,
+            "notifications": 2,
+        }
+    """
+    from apps.bau_mental.models import BoxShare
+    from apps.core.models import Notification
+
+    try:
+        events = pop_note_events(box_id)
+        if not events:
+            return {"status": "completed", "events": 0, "notifications": 0}
 
-                deleted_count += 1
-                logger.info(f"Áudio expirado deletado: {note.id}")
-            except Exception as e:
-                error_msg = f"Erro ao deletar áudio {note.id}: {str(e)}"
-                logger.error(error_msg)
-                errors.append(error_msg)
+        box = Box.objects.filter(id=box_id).first()
+        if box is None:
+            return {"status": "completed", "events": len(events), "notifications": 0}
 
+        shares = list(
+            BoxShare.objects.filter(box=box, status="accepted").select_related("shared_with")
+        )
+        notes = []
+        if shares:
+            notes = list(
+                Note.objects.filter(box=box, id__in={event["note_id"] for event in events})
+                .select_related("created_by", "last_edited_by")
+            )
+        notifications = Notification.objects.bulk_create(
+            build_notifications(box, notes, events, shares)
+        )
         return {
             "status": "completed",
-            "deleted_count": deleted_count,
-            "errors": errors,
+            "events": len(events),
+            "notifications": len(notifications),
         }
 
+    except Exception as e:
+        logger.error(f"Erro ao notificar caixinha {box_id}: {str(e)}", exc_info=True)
+        return {
+            "status": "failed",
+            "error": str(e),
+        }
+
+
+@shared_task
+def cleanup_expired_audios() -> Dict[str, Any]:
+    """Remove arquivos de áudio expirados (após 7 dias).
+
+    Lotes de até 1000 objetos por DeleteObjects, em paralelo, e um UPDATE
+    por lote (ver services/audio_purge.py). Se a execução atingir o tempo
+    máximo, agenda a continuação a partir do cursor salvo.
+
+    Returns:
+        {
+            "status": "completed" ou "partial",
+            "deleted_count": 5,
+            "failed_count": 0,
+            "errors": [],
+        }
+    """
+    try:
+        result = purge_expired_audios()
     except Exception as e:
         logger.error(f"Erro ao limpar áudios expirados: {str(e)}", exc_info=True)
         return {
             "status": "failed",
             "error": str(e),
-            "deleted_count": deleted_count,
-            "errors": errors,
         }
 
+    finished = result.pop("finished")
+    if not finished:
+        cleanup_expired_audios.delay()
+    if result["failed_count"]:
+        logger.error(f"[AudioPurge] {result['failed_count']} áudios expirados não puderam ser deletados")
+    logger.info(f"[AudioPurge] {result['deleted_count']} áudios expirados deletados")
+    return {"status": "completed" if finished else "partial", **result}
+
 
+@shared_task
+def reconcile_box_counters(batch_size: int = 1000) -> Dict[str, Any]:
+    """Corrige em massa note_count/last_note_at de caixinhas com desvio.
+
+    Os contadores são mantidos por F() no Note.save(); UPDATEs em massa
+    (ex: QuerySet.update) não passam por ele. Esta tarefa recalcula as
+    agregações por lote de caixinhas e só regrava as que divergiram.
+
+    Args:
+        batch_size: Caixinhas verificadas por consulta
+
+    Returns:
+        {"status": ..., "checked": int, "repaired": int}
+    """
+    from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+    from django.db.models.functions import Coalesce, Now
+
+    active_notes = Note.objects.filter(box=OuterRef("pk"))
+    actual_count = Coalesce(
+        Subquery(
+            active_notes.order_by().values("box").annotate(total=Count("id")).values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+    actual_last = Subquery(active_notes.order_by("-created_at").values("created_at")[:1])
+
+    checked = repaired = 0
+    last_id = None
+    try:
+        while True:
+            boxes = Box.objects.order_by("id")
+            if last_id is not None:
+                boxes = boxes.filter(id__gt=last_id)
+            batch_ids = list(boxes.values_list("id", flat=True)[:batch_size])
+            if not batch_ids:
+                break
+            last_id = batch_ids[-1]
+            checked += len(batch_ids)
+
+            drifted_ids = list(
+                Box.objects.filter(id__in=batch_ids)
+                .annotate(actual_count=actual_count, actual_last=actual_last)
+                .filter(
+                    ~Q(note_count=F("actual_count"))
+                    | Q(last_note_at__isnull=True, actual_last__isnull=False)
+                    | Q(last_note_at__isnull=False, actual_last__isnull=True)
+                    | Q(last_note_at__lt=F("actual_last"))
+                    | Q(last_note_at__gt=F("actual_last"))
+                )
+                .values_list("id", flat=True)
+            )
+            if drifted_ids:
+                repaired += Box.objects.filter(id__in=drifted_ids).update(
+                    note_count=actual_count, last_note_at=actual_last, updated_at=Now()
+                )
+
+        if repaired:
+            logger.warning(f"[BoxCounters] {repaired} de {checked} caixinhas com contador corrigido")
+        return {"status": "completed", "checked": checked, "repaired": repaired}
+
+    except Exception as e:
+        logger.error(f"Erro ao reconciliar contadores das caixinhas: {str(e)}", exc_info=True)
+        return {"status": "failed", "error": str(e), "checked": checked, "repaired": repaired}
+
+
+@shared_task
+def rebuild_box_classifiers() -> Dict[str, Any]:
+    """Retreina os classificadores locais (contagens e calibração da confiança).
+
+    O treino incremental não acompanha edições de transcrição nem exclusões;
+    esta tarefa recalcula cada workspace com notas confirmadas.
+
+    Returns:
+        {"status": ..., "rebuilt": int}
+    """
+    from django.db.models import Q
+
+    from apps.bau_mental.models import BoxClassifierState
+
+    workspace_ids = set(
+        Note.objects.filter(box__isnull=False, deleted_at__isnull=True)
+        .filter(Q(ai_confidence__isnull=True) | Q(metadata__box_confirmed=True))
+        .values_list("workspace_id", flat=True)
+        .distinct()
+    )
+    workspace_ids.update(BoxClassifierState.objects.values_list("workspace_id", flat=True))
+
+    rebuilt = 0
+    errors = []
+    for workspace_id in workspace_ids:
+        try:
+            rebuild_classifier(workspace_id)
+            rebuilt += 1
+        except Exception as e:
+            logger.error(f"Erro ao retreinar classificador do workspace {workspace_id}: {str(e)}", exc_info=True)
+            errors.append(str(workspace_id))
+
+    return {"status": "completed", "rebuilt": rebuilt, "errors": errors}
+
+
+@shared_task
+def index_note_embedding(note_id: str) -> Dict[str, Any]:
+    """Gera embedding da transcrição e atualiza o índice vetorial do workspace.
+
+    Args:
+        note_id: ID da anotação (UUID como string)
+
+    Returns:
+        {
+            "status": "completed", "skipped" ou "failed",
+            "error": "mensagem de erro" (se falhou),
+        }
+    """
+    from apps.bau_mental.services.embeddings import EmbeddingService
+    from apps.bau_mental.services.vector_index import NoteVectorIndex
+
+    try:
+        note = Note.objects.get(id=note_id)
+        index = NoteVectorIndex(str(note.workspace_id))
+
+        if not note.transcript or note.processing_status != "completed":
+            index.remove(str(note.id))
+            return {"status": "skipped"}
+
+        embedding_service = EmbeddingService()
+        if not embedding_service.is_available():
+            logger.warning("Serviço de embeddings não disponível")
+            return {"status": "skipped"}
+
+        vector = embedding_service.embed_one(note.transcript)
+        index.upsert(str(note.id), vector, model=embedding_service.model)
+        return {"status": "completed"}
+
+    except Note.DoesNotExist:
+        logger.error(f"Anotação {note_id} não encontrada")
+        return {
+            "status": "failed",
+            "error": "Anotação não encontrada",
+        }
+    except Exception as e:
+        logger.error(f"Erro ao indexar anotação {note_id}: {str(e)}", exc_info=True)
+        return {
+            "status": "failed",
+            "error": str(e),
+        }
+
+
+@shared_task
+def update_thread_memory(thread_id: str) -> Dict[str, Any]:
+    """Incorpora ao resumo da thread as mensagens que saíram da janela recente.
+
+    Args:
+        thread_id: ID da thread (UUID como string)
+
+    Returns:
+        {
+            "status": "completed", "skipped" ou "failed",
+            "summarized": mensagens incorporadas ao resumo,
+            "error": "mensagem de erro" (se falhou),
+        }
+    """
+    try:
+        thread = Thread.objects.get(id=thread_id)
+        return ThreadMemoryService().update(thread)
+
+    except Thread.DoesNotExist:
+        logger.error(f"Thread {thread_id} não encontrada")
+        return {
+            "status": "failed",
+            "error": "Thread não encontrada",
+        }
+    except Exception as e:
+        logger.error(f"Erro ao atualizar memória da thread {thread_id}: {str(e)}", exc_info=True)
+        return {
+            "status": "failed",
+            "error": str(e),
+        }
@@ -0,0 +1,61 @@
+"""Tests for bau_mental answer cache."""
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from apps.bau_mental.services.answer_cache import AnswerCache, invalidate_note_answers
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+NOTES = [
+    {"id": "n1", "transcript": "Reunião na sexta", "updated_at": "2025-01-27T10:00:00+00:00"},
+    {"id": "n2", "transcript": "Ligar para o cliente", "updated_at": "2025-01-28T10:00:00+00:00"},
+]
+RESULT = {"answer": "A reunião é na sexta.", "sources": []}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AnswerCacheTest(SimpleTestCase):
+    """Testes para AnswerCache."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        cache.clear()
+        self.answer_cache = AnswerCache("workspace-1", "box-1")
+
+    def test_hit_for_equivalent_question(self) -> None:
+        """Testa acerto para pergunta equivalente (caixa, acento, pontuação)."""
+        self.answer_cache.set("Quando é a reunião?", NOTES, RESULT, elapsed_ms=1200)
+
+        cached = self.answer_cache.get("quando e a  REUNIAO", list(reversed(NOTES)))
+
+        self.assertEqual(cached, RESULT)
+        stats = self.answer_cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["saved_ms"], 1200)
+
+    def test_miss_when_note_version_changes(self) -> None:
+        """Testa que nota editada (updated_at novo) não usa resposta antiga."""
+        self.answer_cache.set("Quando é a reunião?", NOTES, RESULT, elapsed_ms=800)
+        edited = [dict(NOTES[0], updated_at="2025-02-01T09:00:00+00:00"), NOTES[1]]
+
+        self.assertIsNone(self.answer_cache.get("Quando é a reunião?", edited))
+        self.assertEqual(self.answer_cache.stats()["misses"], 1)
+
+    def test_scope_isolation(self) -> None:
+        """Testa isolamento por caixinha e workspace."""
+        self.answer_cache.set("Quando é a reunião?", NOTES, RESULT, elapsed_ms=800)
+
+        self.assertIsNone(AnswerCache("workspace-1", "box-2").get("Quando é a reunião?", NOTES))
+        self.assertIsNone(AnswerCache("workspace-2", "box-1").get("Quando é a reunião?", NOTES))
+
+    def test_invalidate_note_evicts_answers(self) -> None:
+        """Testa remoção das respostas que usaram uma nota alterada."""
+        self.answer_cache.set("Quando é a reunião?", NOTES, RESULT, elapsed_ms=800)
+        self.answer_cache.set("Quem ligar?", NOTES[1:], RESULT, elapsed_ms=800)
+
+        removed = invalidate_note_answers("workspace-1", "n1")
+
+        self.assertEqual(removed, 1)
+        self.assertIsNone(self.answer_cache.get("Quando é a reunião?", NOTES))
+        self.assertEqual(self.answer_cache.get("Quem ligar?", NOTES[1:]), RESULT)
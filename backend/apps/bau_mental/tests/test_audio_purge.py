@@ -0,0 +1,96 @@
+"""Tests for the expired audio purge."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import Workspace
+from apps.bau_mental.models import Note
+from apps.bau_mental.services.audio_purge import CURSOR_KEY, purge_expired_audios
+from apps.bau_mental.storage import BauMentalAudioStorage
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class FakeStorage:
+    """Storage falso que registra as chamadas de delete_many."""
+
+    def __init__(self, failing=()) -> None:
+        """Configura nomes que falham ao deletar."""
+        self.failing = set(failing)
+        self.calls = []
+
+    def delete_many(self, names):
+        """Registra a chamada e retorna os nomes que falharam."""
+        self.calls.append(list(names))
+        return [name for name in names if name in self.failing]
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AudioPurgeTest(TestCase):
+    """Testes para a remoção em lote de áudios expirados."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        cache.clear()
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        expired_at = timezone.now() - timedelta(days=8)
+        self.expired = []
+        for index in range(5):
+            note = Note.objects.create(workspace=self.workspace, audio_file=f"old{index}.mp3")
+            self.expired.append(note)
+        Note.all_objects.filter(id__in=[note.id for note in self.expired]).update(created_at=expired_at)
+        self.recent = Note.objects.create(workspace=self.workspace, audio_file="new.mp3")
+        self.cleared = Note.objects.create(workspace=self.workspace, audio_file="")
+        Note.all_objects.filter(id=self.cleared.id).update(created_at=expired_at)
+
+    def test_purges_in_batches_with_bulk_update(self) -> None:
+        """Testa páginas de DeleteObjects e um UPDATE por página, ignorando áudios já limpos."""
+        storage = FakeStorage(failing={"old3.mp3"})
+
+        result = purge_expired_audios(batch_size=2, workers=2, storage=storage)
+
+        self.assertTrue(result["finished"])
+        self.assertEqual(result["deleted_count"], 4)
+        self.assertEqual(result["failed_count"], 1)
+        self.assertEqual(sorted(len(call) for call in storage.calls), [1, 2, 2])
+        self.assertNotIn("new.mp3", sum(storage.calls, []))
+        remaining = set(Note.all_objects.exclude(audio_file="").values_list("audio_file", flat=True))
+        self.assertEqual(remaining, {"old3.mp3", "new.mp3"})
+        self.assertIsNone(cache.get(CURSOR_KEY))
+
+    def test_resumes_from_cursor(self) -> None:
+        """Testa que uma execução interrompida pelo tempo continua do cursor salvo."""
+        storage = FakeStorage()
+
+        first = purge_expired_audios(batch_size=2, workers=1, max_seconds=0, storage=storage)
+        second = purge_expired_audios(batch_size=2, workers=1, storage=storage)
+
+        self.assertFalse(first["finished"])
+        self.assertEqual(first["deleted_count"], 2)
+        self.assertEqual(second["deleted_count"], 3)
+        self.assertEqual(len(sum(storage.calls, [])), 5)
+
+    def test_r2_delete_many_reports_failed_keys(self) -> None:
+        """Testa DeleteObjects no R2 (chaves com prefixo) e mapeamento das falhas."""
+        storage = BauMentalAudioStorage.__new__(BauMentalAudioStorage)
+        storage._use_local = False
+        storage._local_storage_fallback = MagicMock()
+        storage.bucket_name = "bucket"
+        storage._bucket = MagicMock()
+        client = storage._bucket.meta.client
+        client.delete_objects.return_value = {
+            "Errors": [{"Key": "bau_mental/audios/b.mp3", "Code": "InternalError"}]
+        }
+
+        failed = storage.delete_many(["a.mp3", "b.mp3"])
+
+        self.assertEqual(failed, ["b.mp3"])
+        request = client.delete_objects.call_args.kwargs["Delete"]
+        self.assertEqual(
+            [item["Key"] for item in request["Objects"]],
+            ["bau_mental/audios/a.mp3", "bau_mental/audios/b.mp3"],
+        )
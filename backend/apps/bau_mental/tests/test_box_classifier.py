@@ -0,0 +1,132 @@
+"""Tests for the local box classifier."""
+
+from django.test import TestCase
+
+from apps.accounts.models import Workspace
+from apps.bau_mental.models import Box, BoxClassifierState, Note
+from apps.bau_mental.services.box_classifier import (
+    get_classification_stats,
+    predict_box,
+    rebuild_classifier,
+    record_classification,
+    tokenize,
+    update_classifier,
+)
+from apps.bau_mental.services.classification import ClassificationService
+
+CASA_NOTES = [
+    "Orçamento do pedreiro para o muro do quintal",
+    "Trocar a lâmpada da cozinha e consertar a pia",
+    "Pintar o quarto das crianças no fim de semana",
+    "Comprar tinta e pincel para o muro",
+    "Chamar encanador para o vazamento da pia",
+    "Limpar a calha e o quintal depois da chuva",
+    "Consertar a porta da cozinha que está rangendo",
+    "Orçamento de piso novo para a sala",
+    "Jardinagem no quintal: podar as plantas",
+    "Pia entupida de novo, chamar encanador",
+    "Lâmpada queimada na garagem",
+    "Muro rachado precisa de pedreiro",
+]
+TRABALHO_NOTES = [
+    "Preparar apresentação de vendas para o cliente",
+    "Revisar contrato do fornecedor antes da assinatura",
+    "Enviar proposta comercial ao cliente novo",
+    "Planilha de metas do trimestre para o gerente",
+    "Apresentação do projeto para a diretoria",
+    "Ligar para o cliente sobre o atraso da entrega",
+    "Revisar orçamento do projeto com o gerente",
+    "Contrato de prestação de serviço vence sexta",
+    "Proposta de preço para o fornecedor",
+    "Metas de vendas da equipe comercial",
+    "Projeto atrasado, alinhar com a diretoria",
+    "Planilha de custos do projeto",
+]
+
+
+class BoxClassifierTest(TestCase):
+    """Testes para o classificador local de caixinhas."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        self.casa = Box.objects.create(workspace=self.workspace, name="Casa")
+        self.trabalho = Box.objects.create(workspace=self.workspace, name="Trabalho")
+        for box, transcripts in ((self.casa, CASA_NOTES), (self.trabalho, TRABALHO_NOTES)):
+            for transcript in transcripts:
+                Note.objects.create(workspace=self.workspace, box=box, transcript=transcript)
+        self.box_ids = [str(self.casa.id), str(self.trabalho.id)]
+
+    def test_tokenize(self) -> None:
+        """Testa remoção de acentos, stopwords, números e termos curtos."""
+        self.assertEqual(tokenize("Reunião com o cliente às 10 horas"), ["reuniao", "cliente", "horas"])
+
+    def test_predicts_after_rebuild(self) -> None:
+        """Testa que o modelo treinado com notas confirmadas classifica localmente."""
+        rebuild_classifier(self.workspace.id)
+
+        result = predict_box(self.workspace.id, "Chamar o encanador para a pia da cozinha", self.box_ids)
+
+        self.assertEqual(result["box_id"], str(self.casa.id))
+        self.assertEqual(result["source"], "local")
+        self.assertGreater(result["confidence"], 0.5)
+
+    def test_ignores_ai_classified_notes(self) -> None:
+        """Testa que notas classificadas pela IA (sem confirmação) não treinam o modelo."""
+        Note.objects.create(
+            workspace=self.workspace, box=self.casa, transcript="Palpite da IA", ai_confidence=0.7
+        )
+
+        self.assertEqual(rebuild_classifier(self.workspace.id)["trained_notes"], 24)
+
+    def test_not_enough_notes(self) -> None:
+        """Testa que o modelo não responde antes do mínimo de notas confirmadas."""
+        update_classifier(self.workspace.id, CASA_NOTES[0], add_box_id=self.casa.id)
+
+        self.assertIsNone(predict_box(self.workspace.id, CASA_NOTES[0], self.box_ids))
+
+    def test_incremental_update_moves_counts(self) -> None:
+        """Testa que mover a nota desconta da caixinha anterior e soma na nova."""
+        rebuild_classifier(self.workspace.id)
+
+        update_classifier(
+            self.workspace.id, "pintar muro", add_box_id=self.trabalho.id, remove_box_id=self.casa.id
+        )
+
+        state = BoxClassifierState.objects.get(workspace=self.workspace)
+        self.assertEqual(state.trained_notes, 24)
+        self.assertEqual(state.box_stats[str(self.casa.id)]["docs"], 11)
+        self.assertEqual(state.box_stats[str(self.trabalho.id)]["docs"], 13)
+        self.assertEqual(state.box_stats[str(self.trabalho.id)]["terms"]["muro"], 1)
+
+    def test_classify_skips_llm_when_confident(self) -> None:
+        """Testa que a classificação usa o modelo local antes da IA."""
+        rebuild_classifier(self.workspace.id)
+        service = ClassificationService()
+        service.client = None
+        boxes = [
+            {"id": str(self.casa.id), "name": "Casa", "keywords": ""},
+            {"id": str(self.trabalho.id), "name": "Trabalho", "keywords": ""},
+        ]
+
+        result = service.classify(
+            "Enviar a proposta e o contrato para o cliente", boxes, str(self.workspace.id)
+        )
+
+        self.assertEqual(result["box_id"], str(self.trabalho.id))
+        self.assertEqual(result["source"], "local")
+
+    def test_classification_stats(self) -> None:
+        """Testa a fração resolvida sem IA e o tempo de IA economizado."""
+        record_classification(self.workspace.id, "llm", 1200)
+        record_classification(self.workspace.id, "llm", 800)
+        record_classification(self.workspace.id, "local")
+        record_classification(self.workspace.id, "heuristic")
+
+        stats = get_classification_stats(self.workspace.id)
+
+        self.assertEqual(stats["total"], 4)
+        self.assertEqual(stats["local_rate"], 0.25)
+        self.assertEqual(stats["without_llm_rate"], 0.5)
+        self.assertEqual(stats["avg_llm_ms"], 1000)
+        self.assertEqual(stats["saved_ms"], 1000)
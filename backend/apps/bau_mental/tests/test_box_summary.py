@@ -0,0 +1,103 @@
+"""Tests for bau_mental incremental box summaries."""
+
+from datetime import datetime
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.accounts.models import Workspace
+from apps.bau_mental.models import Box, BoxSummaryNode, Note
+from apps.bau_mental.services.box_summary import BoxSummaryService
+
+
+def _fake_complete(self, prompt: str, max_tokens: int) -> str:
+    """Substitui a chamada ao LLM (conta chamadas e devolve texto determinístico)."""
+    self.llm_calls += 1
+    return f"resumo-{self.llm_calls}"
+
+
+@patch.object(BoxSummaryService, "_complete", _fake_complete)
+class BoxSummaryServiceTest(TestCase):
+    """Testes para BoxSummaryService."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        self.box = Box.objects.create(workspace=self.workspace, name="Casa")
+        self.service = BoxSummaryService()
+        self.service.client = object()
+
+    def _note(self, transcript: str, year: int, month: int) -> Note:
+        """Cria nota concluída com data de criação definida."""
+        note = Note.objects.create(
+            workspace=self.workspace,
+            box=self.box,
+            transcript=transcript,
+            processing_status="completed",
+        )
+        created_at = timezone.make_aware(datetime(year, month, 10, 12, 0))
+        Note.objects.filter(id=note.id).update(created_at=created_at)
+        note.refresh_from_db()
+        return note
+
+    def test_summary_covers_all_notes(self) -> None:
+        """Testa que o resumo cobre todas as notas (sem limite de 50)."""
+        for i in range(60):
+            self._note(f"Nota {i} sobre a casa", 2025, 1 + i % 3)
+
+        result = self.service.summarize_box(self.box)
+
+        self.assertEqual(result["note_count"], 60)
+        self.assertTrue(result["summary"])
+        self.assertEqual(
+            BoxSummaryNode.objects.filter(box=self.box, level="month").count(), 3
+        )
+        self.box.refresh_from_db()
+        self.assertFalse(self.box.summary_stale)
+        self.assertEqual(self.box.summary, result["summary"])
+
+    def test_unchanged_box_uses_cache(self) -> None:
+        """Testa que sem alterações nenhum nó é recalculado."""
+        self._note("Comprar tinta", 2025, 1)
+        self._note("Pintar a sala", 2025, 2)
+        self.service.summarize_box(self.box)
+
+        result = self.service.summarize_box(self.box)
+
+        self.assertTrue(result["cached"])
+        self.assertEqual(result["llm_calls"], 0)
+
+    def test_edit_recomputes_only_touched_branch(self) -> None:
+        """Testa que editar uma nota recalcula só o seu mês e os ancestrais."""
+        self._note("Comprar tinta", 2024, 12)
+        self._note("Orçamento do pintor", 2024, 12)
+        edited = self._note("Pintar a sala", 2025, 2)
+        self._note("Trocar lâmpadas", 2025, 2)
+        self.service.summarize_box(self.box)
+        untouched = BoxSummaryNode.objects.get(box=self.box, level="month", period="2024-12")
+
+        edited.transcript = "Pintar a sala e o quarto"
+        edited.save()
+        result = self.service.summarize_box(self.box)
+
+        # Merge do mês 2025-02 e da raiz (ano 2025 tem um único mês: sem chamada)
+        self.assertEqual(result["llm_calls"], 2)
+        self.assertFalse(result["cached"])
+        self.assertEqual(
+            BoxSummaryNode.objects.get(id=untouched.id).updated_at, untouched.updated_at
+        )
+
+    def test_removed_period_is_pruned(self) -> None:
+        """Testa que meses sem notas saem da árvore."""
+        note = self._note("Comprar tinta", 2024, 12)
+        self._note("Pintar a sala", 2025, 2)
+        self.service.summarize_box(self.box)
+
+        note.soft_delete()
+        self.service.summarize_box(self.box)
+
+        periods = set(
+            BoxSummaryNode.objects.filter(box=self.box, level="month").values_list("period", flat=True)
+        )
+        self.assertEqual(periods, {"2025-02"})
@@ -0,0 +1,88 @@
+"""Tests for bau_mental classification heuristics."""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import Workspace
+from apps.bau_mental.models import Box
+from apps.bau_mental.services import box_matcher
+from apps.bau_mental.services.box_matcher import AhoCorasick, BoxMatcher, get_box_matcher
+from apps.bau_mental.services.classification import ClassificationService
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+BOXES = [
+    {"id": "b1", "name": "Casa", "keywords": "reforma, telhado"},
+    {"id": "b2", "name": "Trabalho", "keywords": "reunião, cliente, relatório"},
+    {"id": "b3", "name": "Saúde", "keywords": ""},
+]
+
+
+class BoxMatcherTest(TestCase):
+    """Testes para o matcher compilado de caixinhas."""
+
+    def test_aho_corasick_finds_overlapping_patterns(self) -> None:
+        """Testa que padrões sobrepostos são encontrados em uma passada."""
+        automaton = AhoCorasick([("he", 1), ("she", 2), ("hers", 3), ("his", 4)])
+
+        self.assertEqual(automaton.find("ushers"), {1, 2, 3})
+
+    def test_exact_name_first_box_wins(self) -> None:
+        """Testa menção exata do nome (primeira caixinha na ordem desempata)."""
+        matcher = BoxMatcher(BOXES)
+
+        result = matcher.detect_box_mention("Coloca na caixinha Trabalho, é sobre a casa")
+
+        self.assertEqual(result["box_id"], "b1")
+        self.assertEqual(result["confidence"], 0.95)
+
+    def test_fuzzy_name_mention(self) -> None:
+        """Testa menção aproximada (erro de transcrição) acima do limiar."""
+        result = BoxMatcher(BOXES).detect_box_mention("anotar no trabalio amanhã")
+
+        self.assertEqual(result["box_id"], "b2")
+        self.assertIsNone(BoxMatcher(BOXES).detect_box_mention("comprar pão"))
+
+    def test_keywords_match(self) -> None:
+        """Testa keywords e confiança proporcional às encontradas."""
+        result = BoxMatcher(BOXES).check_keywords_match("A reunião com o cliente foi adiada")
+
+        self.assertEqual(result["box_id"], "b2")
+        self.assertEqual(result["reason"], "Keywords encontradas: reunião, cliente")
+        self.assertAlmostEqual(result["confidence"], 0.6 + (2 / 3) * 0.25)
+
+    def test_classify_uses_heuristics_without_llm(self) -> None:
+        """Testa que heurísticas resolvem sem chamar a IA."""
+        service = ClassificationService()
+        service.client = None
+
+        result = service.classify("Orçamento do telhado chegou", BOXES, "ws-1")
+
+        self.assertEqual(result["box_id"], "b1")
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BoxMatcherCacheTest(TestCase):
+    """Testes para o cache do matcher por workspace."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        cache.clear()
+        box_matcher._matchers.clear()
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+
+    def test_recompiled_when_box_saved(self) -> None:
+        """Testa que salvar uma caixinha invalida o matcher do workspace."""
+        box = Box.objects.create(workspace=self.workspace, name="Casa")
+        boxes = [{"id": str(box.id), "name": box.name, "keywords": ""}]
+        matcher = get_box_matcher(self.workspace.id, boxes)
+
+        self.assertIs(get_box_matcher(self.workspace.id, boxes), matcher)
+
+        box.keywords = "jardim"
+        box.save()
+        boxes = [{"id": str(box.id), "name": box.name, "keywords": box.keywords}]
+
+        recompiled = get_box_matcher(self.workspace.id, boxes)
+        self.assertIsNot(recompiled, matcher)
+        self.assertEqual(recompiled.check_keywords_match("regar o jardim")["box_id"], str(box.id))
@@ -0,0 +1,153 @@
+"""Tests for batched LLM classification."""
+
+import json
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import Workspace
+from apps.bau_mental.models import Box, Note
+from apps.bau_mental.services.classification import ClassificationService
+from apps.bau_mental.services.classification_batch import (
+    PENDING_FLAG,
+    RETRY_AFTER_SECONDS,
+    apply_batch_results,
+    pending_notes,
+)
+from apps.bau_mental.tasks import classify_note, classify_pending_notes, requeue_pending_classifications
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def _fake_client(payload: dict) -> MagicMock:
+    """Cliente OpenAI falso que responde ``payload`` como JSON."""
+    client = MagicMock()
+    message = SimpleNamespace(content=json.dumps(payload))
+    client.chat.completions.create.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=message)]
+    )
+    return client
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ClassificationBatchTest(TestCase):
+    """Testes para a classificação em lote."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        self.casa = Box.objects.create(workspace=self.workspace, name="Casa")
+        self.trabalho = Box.objects.create(workspace=self.workspace, name="Trabalho")
+        self.boxes = [
+            {"id": str(self.casa.id), "name": "Casa", "description": "", "keywords": ""},
+            {"id": str(self.trabalho.id), "name": "Trabalho", "description": "", "keywords": ""},
+        ]
+
+    def _pending_note(self, transcript: str) -> Note:
+        """Cria nota na inbox aguardando o lote."""
+        return Note.objects.create(
+            workspace=self.workspace, transcript=transcript, metadata={PENDING_FLAG: True}
+        )
+
+    def test_classify_batch_single_call(self) -> None:
+        """Testa uma chamada para várias notas, com caixinhas referenciadas por número."""
+        service = ClassificationService()
+        service.client = _fake_client(
+            {
+                "classifications": [
+                    {"note": 1, "box": 2, "confidence": 0.9, "reason": "Trabalho"},
+                    {"note": 2, "box": 1, "confidence": 0.3, "reason": "Incerto"},
+                    {"note": 3, "box": 7, "confidence": 0.8, "reason": "Inexistente"},
+                ]
+            }
+        )
+
+        results = service.classify_batch({"a": "proposta", "b": "coisa", "c": "outra"}, self.boxes)
+
+        service.client.chat.completions.create.assert_called_once()
+        self.assertEqual(results["a"]["box_id"], str(self.trabalho.id))
+        self.assertIsNone(results["b"]["box_id"])
+        self.assertIsNone(results["c"]["box_id"])
+        self.assertEqual(results["c"]["confidence"], 0.0)
+
+    def test_apply_batch_results(self) -> None:
+        """Testa gravação em massa, contadores das caixinhas e notas movidas no meio do lote."""
+        first = self._pending_note("reforma")
+        second = self._pending_note("sem ideia")
+        moved = self._pending_note("movida pelo usuário")
+        moved.box = self.trabalho
+        moved.save(update_fields=["box"])
+
+        updated = apply_batch_results(
+            self.workspace.id,
+            [first.id, second.id, moved.id],
+            {
+                str(first.id): {"box_id": str(self.casa.id), "confidence": 0.9},
+                str(moved.id): {"box_id": str(self.casa.id), "confidence": 0.9},
+            },
+        )
+
+        self.assertEqual(updated, 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.casa.refresh_from_db()
+        self.assertEqual(first.box_id, self.casa.id)
+        self.assertEqual(first.ai_confidence, 0.9)
+        self.assertIsNone(second.box_id)
+        self.assertEqual(second.ai_confidence, 0.0)
+        self.assertEqual(self.casa.note_count, 1)
+        self.assertEqual(self.casa.last_note_at, first.created_at)
+        self.assertFalse(pending_notes(self.workspace.id).exists())
+
+    @patch("apps.bau_mental.tasks.classify_pending_notes")
+    @patch.object(ClassificationService, "is_available", return_value=True)
+    def test_classify_note_queues_once_per_window(self, mock_available, mock_batch_task) -> None:
+        """Testa que notas que precisam da IA entram no lote e só a primeira agenda a task."""
+        notes = [
+            Note.objects.create(workspace=self.workspace, transcript=f"assunto qualquer {i}")
+            for i in range(3)
+        ]
+
+        results = [classify_note(str(note.id)) for note in notes]
+
+        self.assertEqual({result["status"] for result in results}, {"queued"})
+        mock_batch_task.apply_async.assert_called_once()
+        self.assertEqual(pending_notes(self.workspace.id).count(), 3)
+
+    @patch.object(ClassificationService, "classify_batch")
+    @patch.object(ClassificationService, "is_available", return_value=True)
+    def test_classify_pending_notes_task(self, mock_available, mock_classify_batch) -> None:
+        """Testa que a task classifica as pendentes e registra as chamadas à IA."""
+        notes = [self._pending_note(f"nota {i}") for i in range(3)]
+        mock_classify_batch.side_effect = lambda transcripts, boxes: {
+            note_id: {"box_id": str(self.trabalho.id), "confidence": 0.8, "source": "llm"}
+            for note_id in transcripts
+        }
+
+        result = classify_pending_notes(str(self.workspace.id))
+
+        self.assertEqual(result, {"status": "completed", "classified": 3, "batches": 1})
+        self.trabalho.refresh_from_db()
+        self.assertEqual(self.trabalho.note_count, 3)
+        self.assertEqual(self.workspace.bau_mental_box_classifier.llm_predictions, len(notes))
+
+    @patch.object(ClassificationService, "is_available", return_value=False)
+    def test_failed_batch_is_requeued_by_sweep(self, mock_available) -> None:
+        """Testa que notas de um lote que falhou voltam a ser agendadas pela varredura."""
+        note = self._pending_note("reforma")
+        self.assertEqual(classify_pending_notes(str(self.workspace.id))["status"], "failed")
+
+        with patch("apps.bau_mental.tasks.classify_pending_notes.delay") as delay:
+            self.assertEqual(requeue_pending_classifications()["requeued"], 0)
+
+            Note.objects.filter(id=note.id).update(
+                updated_at=timezone.now() - timedelta(seconds=RETRY_AFTER_SECONDS + 1)
+            )
+            self.assertEqual(requeue_pending_classifications()["requeued"], 1)
+            # Agendamento reservado: a próxima varredura não duplica o lote
+            self.assertEqual(requeue_pending_classifications()["requeued"], 0)
+
+        delay.assert_called_once_with(str(self.workspace.id))
@@ -0,0 +1,91 @@
+"""Tests for bau_mental context packer."""
+
+from django.test import SimpleTestCase
+
+from apps.bau_mental.services.context_packer import ContextPacker, count_tokens
+from apps.bau_mental.services.query import QueryService
+
+
+def _note(note_id: str, transcript: str, created_at: str = "01/01/2025", **extra) -> dict:
+    """Monta nota no formato do QueryService."""
+    return {
+        "id": note_id,
+        "transcript": transcript,
+        "created_at": created_at,
+        "box_name": "Casa",
+        **extra,
+    }
+
+
+class ContextPackerTest(SimpleTestCase):
+    """Testes para ContextPacker."""
+
+    def test_chunk_respects_chunk_size(self) -> None:
+        """Testa que transcrições longas viram vários chunks dentro do limite."""
+        packer = ContextPacker(chunk_tokens=20)
+        text = " ".join(f"Frase número {i} sobre o mercado." for i in range(30))
+
+        chunks = packer.chunk(text)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(chunk["tokens"] <= 20 for chunk in chunks))
+
+    def test_chunk_text_fits_chunk_size(self) -> None:
+        """Testa que o texto de cada chunk, com os espaços entre frases, cabe no limite."""
+        packer = ContextPacker(chunk_tokens=12)
+        text = " ".join(f"Frase {i} do mercado." for i in range(40))
+
+        chunks = packer.chunk(text)
+
+        for chunk in chunks:
+            self.assertLessEqual(count_tokens(chunk["text"]), 12)
+            self.assertLessEqual(chunk["tokens"], 12)
+        # Frases que enchem o chunk exatamente não são jogadas para o próximo
+        sentence = packer.chunk("Frase 1 do mercado.")[0]["tokens"]
+        exact = ContextPacker(chunk_tokens=2 * sentence + 1).chunk("Frase 1 do mercado. Frase 2 do mercado.")
+        self.assertEqual(len(exact), 1)
+
+    def test_pack_never_exceeds_budget(self) -> None:
+        """Testa que o contexto empacotado cabe no orçamento."""
+        packer = ContextPacker(budget_tokens=200, chunk_tokens=40)
+        notes = [_note(f"n{i}", "Comprar pão e leite no mercado. " * 20) for i in range(20)]
+
+        packed = packer.pack("mercado", notes)
+
+        self.assertLessEqual(packed["tokens"], 200)
+        self.assertLessEqual(count_tokens(packer.render(packed)), 200)
+        self.assertTrue(packed["notes"])
+
+    def test_pack_prefers_relevant_chunks(self) -> None:
+        """Testa que trechos com termos da pergunta vencem notas irrelevantes."""
+        packer = ContextPacker(budget_tokens=60, chunk_tokens=30)
+        notes = [_note(f"n{i}", "Lembrar de regar as plantas da varanda hoje.") for i in range(10)]
+        notes.append(_note("telhado", "O orçamento da reforma do telhado ficou em doze mil."))
+
+        packed = packer.pack("Quanto custa a reforma do telhado?", notes)
+
+        self.assertIn("telhado", [note["id"] for note in packed["notes"]])
+
+    def test_pack_orders_chronologically(self) -> None:
+        """Testa saída em ordem cronológica (independente do ranking)."""
+        packer = ContextPacker(budget_tokens=80, chunk_tokens=30)
+        notes = [
+            _note("recente", "Reunião com o cliente sobre o projeto.", "10/03/2025", score=0.9),
+            _note("antiga", "Primeira reunião do projeto com o cliente.", "05/01/2025", score=0.8),
+            _note("fraca", "Reunião de condomínio na quinta-feira.", "01/02/2025", score=0.1),
+        ]
+
+        packed = packer.pack("projeto", notes)
+
+        self.assertEqual([note["id"] for note in packed["notes"]], ["antiga", "fraca", "recente"])
+
+    def test_build_messages_sources_only_packed_notes(self) -> None:
+        """Testa que fontes retornadas são só as notas que entraram no prompt."""
+        notes = [_note(f"n{i}", "Texto irrelevante sobre jardinagem. " * 200) for i in range(30)]
+
+        prompt = QueryService().build_messages("jardinagem", notes, budget_tokens=3000)
+
+        self.assertLess(len(prompt["sources"]), len(notes))
+        self.assertLessEqual(
+            sum(count_tokens(m["content"]) for m in prompt["messages"]), 3000
+        )
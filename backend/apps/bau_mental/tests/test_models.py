@@ -1,10 +1,29 @@
 """Tests for bau_mental models."""
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
 
 from apps.accounts.models import Workspace, User
 from apps.bau_mental.models import Box, Note
+from apps.core.models import AuditLog
+
+
+def _box_updates(context: CaptureQueriesContext) -> int:
+    """Conta UPDATEs na tabela de caixinhas capturados."""
+    return sum(
+        1 for query in context.captured_queries
+        if query["sql"].startswith('UPDATE "bau_mental_box"')
+    )
+
+
+def _note_selects(context: CaptureQueriesContext) -> int:
+    """Conta SELECTs na tabela de notas capturados."""
+    return sum(
+        1 for query in context.captured_queries
+        if query["sql"].startswith("SELECT") and 'FROM "bau_mental_note"' in query["sql"]
+    )
 
 
 class BoxModelTest(TestCase):
@@ -50,8 +69,54 @@ class BoxModelTest(TestCase):
             processing_status="completed",
         )
         box.refresh_from_db()
-        # Trigger atualiza note_count automaticamente
+        # Note.save atualiza note_count automaticamente
         self.assertEqual(box.note_count, 1)
+        self.assertEqual(box.last_note_at, note.created_at)
+
+    def test_box_counters_follow_move_delete_restore(self) -> None:
+        """Testa contadores na troca de caixinha, soft delete e restore."""
+        casa = Box.objects.create(workspace=self.workspace, name="Casa")
+        trabalho = Box.objects.create(workspace=self.workspace, name="Trabalho")
+        note = Note.objects.create(workspace=self.workspace, box=casa, audio_file="test.mp3")
+        Note.objects.create(workspace=self.workspace, box=casa, audio_file="test2.mp3")
+
+        note.box = trabalho
+        note.save(update_fields=["box"])
+        casa.refresh_from_db()
+        trabalho.refresh_from_db()
+        self.assertEqual((casa.note_count, trabalho.note_count), (1, 1))
+
+        note.soft_delete()
+        trabalho.refresh_from_db()
+        self.assertEqual(trabalho.note_count, 0)
+
+        note.restore()
+        trabalho.refresh_from_db()
+        self.assertEqual(trabalho.note_count, 1)
+
+        note.delete()
+        trabalho.refresh_from_db()
+        self.assertEqual(trabalho.note_count, 0)
+
+    def test_reconcile_box_counters_repairs_drift(self) -> None:
+        """Testa que a reconciliação corrige só caixinhas com desvio."""
+        from apps.bau_mental.tasks import reconcile_box_counters
+
+        casa = Box.objects.create(workspace=self.workspace, name="Casa")
+        trabalho = Box.objects.create(workspace=self.workspace, name="Trabalho")
+        note = Note.objects.create(workspace=self.workspace, box=casa, audio_file="test.mp3")
+        Note.objects.create(workspace=self.workspace, box=trabalho, audio_file="test2.mp3")
+        # UPDATE em massa não passa pelo save(): contador fica desatualizado
+        Note.objects.filter(id=note.id).update(box=trabalho)
+
+        result = reconcile_box_counters(batch_size=1)
+
+        self.assertEqual(result, {"status": "completed", "checked": 2, "repaired": 2})
+        casa.refresh_from_db()
+        trabalho.refresh_from_db()
+        self.assertEqual((casa.note_count, casa.last_note_at), (0, None))
+        self.assertEqual(trabalho.note_count, 2)
+        self.assertEqual(reconcile_box_counters()["repaired"], 0)
 
 
 class NoteModelTest(TestCase):
@@ -104,3 +169,73 @@ class NoteModelTest(TestCase):
 
 
 
+
+    def test_save_irrelevant_field_skips_box_update(self) -> None:
+        """Testa que salvar campo irrelevante não toca a caixinha."""
+        note = Note.objects.create(
+            workspace=self.workspace,
+            box=self.box,
+            processing_status="completed",
+        )
+        Box.objects.filter(id=self.box.id).update(summary_stale=False)
+        note = Note.objects.get(id=note.id)
+
+        note.metadata = {"foo": "bar"}
+        with CaptureQueriesContext(connection) as context:
+            note.save(update_fields=["metadata"])
+
+        self.assertEqual(_box_updates(context), 0)
+        self.box.refresh_from_db()
+        self.assertFalse(self.box.summary_stale)
+
+    def test_move_note_marks_both_boxes_in_one_update(self) -> None:
+        """Testa troca de caixinha: um único UPDATE marca as duas caixinhas."""
+        other_box = Box.objects.create(workspace=self.workspace, name="Trabalho")
+        note = Note.objects.create(workspace=self.workspace, box=self.box)
+        Box.objects.update(summary_stale=False)
+        note = Note.objects.get(id=note.id)
+
+        note.box = other_box
+        with CaptureQueriesContext(connection) as context:
+            note.save(update_fields=["box"])
+
+        self.assertEqual(_box_updates(context), 1)
+        self.assertEqual(Box.objects.filter(summary_stale=True).count(), 2)
+
+    def test_save_does_not_reread_note_row(self) -> None:
+        """Testa que criar e salvar a nota não relê a linha (nem a auditoria)."""
+        with CaptureQueriesContext(connection) as created:
+            note = Note.objects.create(workspace=self.workspace, box=self.box, transcript="a")
+        note = Note.objects.get(id=note.id)
+        note.transcript = "b"
+        with CaptureQueriesContext(connection) as updated:
+            note.save(update_fields=["transcript"])
+
+        self.assertEqual(_note_selects(created), 0)
+        self.assertEqual(_note_selects(updated), 0)
+
+    def test_loaded_note_changes_are_audited(self) -> None:
+        """Testa que campos fora dos rastreados (e a caixinha, como "box") são auditados."""
+        other_box = Box.objects.create(workspace=self.workspace, name="Trabalho")
+        note = Note.objects.create(workspace=self.workspace, box=self.box, metadata={"a": 1})
+        note = Note.objects.get(id=note.id)
+
+        note.metadata["a"] = 2
+        note.ai_confidence = 0.9
+        note.box = other_box
+        note.save()
+
+        audited = set(
+            AuditLog.objects.filter(object_id=str(note.id), action="update")
+            .values_list("field_name", flat=True)
+        )
+        self.assertTrue({"metadata", "ai_confidence", "box"} <= audited)
+        self.assertNotIn("box_id", audited)
+
+        AuditLog.objects.all().delete()
+        note.metadata["a"] = 3
+        note.save(update_fields=["metadata"])
+        self.assertEqual(
+            list(AuditLog.objects.filter(field_name="metadata").values_list("old_value", flat=True)),
+            ["{'a': 2}"],
+        )
@@ -0,0 +1,120 @@
+"""Tests for bulk note operations (move, delete, restore, reclassify)."""
+
+import uuid
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, Workspace
+from apps.bau_mental.models import Box, BoxClassifierState, Note
+from apps.bau_mental.services.note_bulk import BULK_MAX_NOTES
+
+BULK_URL = "/api/v1/bau-mental/notes/bulk/"
+
+
+class NoteBulkTest(TestCase):
+    """Testes para as operações em lote sobre notas."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        self.user = User.objects.create_user(
+            email="test@example.com", password="testpass123", workspace=self.workspace
+        )
+        self.casa = Box.objects.create(workspace=self.workspace, name="Casa")
+        self.trabalho = Box.objects.create(workspace=self.workspace, name="Trabalho")
+        self.notes = [
+            Note.objects.create(workspace=self.workspace, box=self.casa, transcript=f"Comprar tinta {i}")
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_WORKSPACE_ID=str(self.workspace.id))
+
+    def _bulk(self, operation: str, note_ids, **extra):
+        """Executa a operação em lote."""
+        data = {"operation": operation, "note_ids": [str(note_id) for note_id in note_ids], **extra}
+        return self.client.post(BULK_URL, data, format="json")
+
+    def _counts(self) -> tuple:
+        """note_count de Casa e Trabalho."""
+        self.casa.refresh_from_db()
+        self.trabalho.refresh_from_db()
+        return self.casa.note_count, self.trabalho.note_count
+
+    def test_move_adjusts_counters_and_reports_each_id(self) -> None:
+        """Testa move com contadores, treino do classificador e resultado por ID."""
+        missing = uuid.uuid4()
+        ids = [self.notes[0].id, self.notes[1].id, missing]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._bulk("move", ids, box_id=str(self.trabalho.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], ["ok", "ok", "not_found"]
+        )
+        self.assertEqual(self._counts(), (1, 2))
+        note = Note.objects.get(id=self.notes[0].id)
+        self.assertEqual(note.box_id, self.trabalho.id)
+        self.assertTrue(note.metadata["box_confirmed"])
+        state = BoxClassifierState.objects.get(workspace=self.workspace)
+        self.assertEqual(state.trained_notes, 2)
+
+        again = self._bulk("move", ids[:1], box_id=str(self.trabalho.id))
+        self.assertEqual(again.data["results"][0]["status"], "unchanged")
+
+    def test_delete_then_restore(self) -> None:
+        """Testa exclusão e restauração em lote com os contadores das caixinhas."""
+        ids = [note.id for note in self.notes]
+        self.assertEqual(self._bulk("delete", ids).data["updated"], 3)
+        self.assertEqual(self._counts(), (0, 0))
+        self.assertEqual(Note.objects.filter(id__in=ids).count(), 0)
+        self.assertEqual(self._bulk("delete", ids[:1]).data["results"][0]["status"], "not_found")
+
+        response = self._bulk("restore", ids[:2])
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(self._counts(), (2, 0))
+        self.assertEqual(self._bulk("restore", ids[:1]).data["results"][0]["status"], "unchanged")
+
+    def test_reclassify_sends_notes_back_to_classification(self) -> None:
+        """Testa que reclassificar leva as notas para a inbox e agenda a classificação."""
+        Note.objects.filter(id=self.notes[0].id).update(transcript="")
+        ids = [note.id for note in self.notes]
+
+        with patch("apps.bau_mental.tasks.classify_note.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self._bulk("reclassify", ids)
+
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], ["no_transcript", "ok", "ok"]
+        )
+        self.assertEqual(delay.call_count, 2)
+        self.assertEqual(self._counts(), (1, 0))
+        self.assertIsNone(Note.objects.get(id=self.notes[1].id).box_id)
+
+    def test_query_count_does_not_grow_with_notes(self) -> None:
+        """Testa que o lote faz o mesmo número de queries para 1 ou 2 notas."""
+        BoxClassifierState.objects.create(workspace=self.workspace)
+        with CaptureQueriesContext(connection) as one:
+            self._bulk("move", [self.notes[0].id], box_id=str(self.trabalho.id))
+        with CaptureQueriesContext(connection) as many:
+            self._bulk("move", [note.id for note in self.notes[1:]], box_id=str(self.trabalho.id))
+
+        self.assertEqual(len(many.captured_queries), len(one.captured_queries))
+
+    def test_rejects_too_many_ids_and_foreign_box(self) -> None:
+        """Testa os limites de validação."""
+        other = Workspace.objects.create(name="Outro", slug="outro")
+        foreign_box = Box.objects.create(workspace=other, name="Alheia")
+
+        response = self._bulk("move", [self.notes[0].id], box_id=str(foreign_box.id))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        too_many = [uuid.uuid4() for _ in range(BULK_MAX_NOTES + 1)]
+        self.assertEqual(self._bulk("delete", too_many).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,118 @@
+"""Tests for coalesced note notifications on shared boxes."""
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import User, Workspace
+from apps.bau_mental.models import Box, BoxShare, Note
+from apps.bau_mental.services.notifications import _key, pop_note_events, record_note_event
+from apps.bau_mental.tasks import fan_out_box_notifications
+from apps.core.models import Notification
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class NoteNotificationTest(TestCase):
+    """Testes para notificações agrupadas de caixinhas compartilhadas."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        cache.clear()
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        self.owner = User.objects.create_user(
+            email="owner@example.com", password="testpass123", workspace=self.workspace
+        )
+        self.guest = User.objects.create_user(
+            email="guest@example.com", password="testpass123", workspace=self.workspace
+        )
+        self.box = Box.objects.create(workspace=self.workspace, name="Casa")
+        BoxShare.objects.create(
+            box=self.box, shared_with=self.guest, invited_by=self.owner, status="accepted"
+        )
+        # Notificações de compartilhamento não interessam aqui
+        Notification.objects.all().delete()
+
+    def _create_note(self, transcript: str = "nota") -> Note:
+        """Cria nota do dono na caixinha compartilhada."""
+        return Note.objects.create(
+            workspace=self.workspace, box=self.box, transcript=transcript, created_by=self.owner
+        )
+
+    @patch("apps.bau_mental.tasks.fan_out_box_notifications")
+    def test_saves_only_queue_events_after_commit(self, mock_fan_out) -> None:
+        """Testa que saves não gravam notificações e só o primeiro evento da janela agenda a task."""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            notes = [self._create_note() for _ in range(3)]
+            notes[0].processing_status = "completed"
+            notes[0].save(update_fields=["processing_status"])
+
+        self.assertEqual(len(callbacks), 3)
+        self.assertFalse(Notification.objects.exists())
+        mock_fan_out.apply_async.assert_called_once()
+
+    @patch("apps.bau_mental.tasks.fan_out_box_notifications")
+    def test_fan_out_coalesces_events(self, mock_fan_out) -> None:
+        """Testa um resumo por destinatário para vários eventos na janela."""
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self._create_note()
+            self._create_note()
+            first.transcript = "editada"
+            first.save(update_fields=["transcript"])
+            edited = Note.objects.create(workspace=self.workspace, transcript="inbox")
+        with self.captureOnCommitCallbacks(execute=True):
+            edited.box = self.box
+            edited.save(update_fields=["box"])
+            edited.transcript = "editada"
+            edited.save(update_fields=["transcript"])
+
+        with self.assertNumQueries(4):
+            result = fan_out_box_notifications(str(self.box.id))
+
+        self.assertEqual(result["notifications"], 1)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user, self.guest)
+        self.assertEqual(notification.type, "note_created")
+        self.assertEqual(notification.message, "2 novas notas e 1 nota editada na caixinha 'Casa'.")
+        self.assertIsNone(notification.related_note)
+        self.assertEqual(fan_out_box_notifications(str(self.box.id))["events"], 0)
+
+    @patch("apps.bau_mental.tasks.fan_out_box_notifications")
+    def test_single_event_keeps_note_notification(self, mock_fan_out) -> None:
+        """Testa que um único evento gera a notificação da nota, sem avisar o autor."""
+        BoxShare.objects.create(
+            box=self.box, shared_with=self.owner, invited_by=self.guest, status="accepted"
+        )
+        Notification.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            note = self._create_note()
+
+        fan_out_box_notifications(str(self.box.id))
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user, self.guest)
+        self.assertEqual(notification.related_note, note)
+        self.assertEqual(notification.title, "Nova nota em Casa")
+
+    def test_event_counted_but_not_yet_written_is_not_dropped(self) -> None:
+        """Testa que um evento com seq já contado, mas ainda não gravado, fica
+        para a próxima leitura em vez de ser marcado como lido."""
+        record_note_event(self.box.id, "a", "created")
+        # Outro processo incrementou seq e ainda não gravou o evento
+        cache.incr(_key(self.box.id, "seq"))
+
+        self.assertEqual([event["note_id"] for event in pop_note_events(self.box.id)], ["a"])
+        cache.set(_key(self.box.id, "event", 2), {"event": "edited", "note_id": "b"})
+        self.assertEqual([event["note_id"] for event in pop_note_events(self.box.id)], ["b"])
+
+    def test_lost_event_is_skipped_on_the_next_read(self) -> None:
+        """Testa que uma lacuna que persiste não trava os eventos seguintes."""
+        record_note_event(self.box.id, "a", "created")
+        cache.incr(_key(self.box.id, "seq"))
+        record_note_event(self.box.id, "c", "created")
+
+        self.assertEqual([event["note_id"] for event in pop_note_events(self.box.id)], ["a"])
+        self.assertEqual([event["note_id"] for event in pop_note_events(self.box.id)], ["c"])
+        self.assertEqual(pop_note_events(self.box.id), [])
@@ -0,0 +1,72 @@
+"""Tests for cursor (keyset) pagination of notes, threads and notifications."""
+
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, Workspace
+from apps.bau_mental.models import Note, Thread, ThreadMessage
+from apps.core.models import Notification
+
+
+class KeysetPaginationTest(TestCase):
+    """Testes para a paginação por cursor."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        self.user = User.objects.create_user(
+            email="test@example.com", password="testpass123", workspace=self.workspace
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_WORKSPACE_ID=str(self.workspace.id))
+
+    def _collect(self, url: str, params: dict) -> list:
+        """Percorre todas as páginas seguindo ``next``."""
+        pages = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            pages.append([item["id"] for item in response.data["results"]])
+            if not response.data["next"]:
+                return pages
+            response = self.client.get(response.data["next"])
+
+    def test_notes_pages_with_same_created_at(self) -> None:
+        """Testa que empates em created_at são desfeitos pelo id, sem repetir nem pular."""
+        notes = [Note.objects.create(workspace=self.workspace, transcript=f"nota {i}") for i in range(5)]
+        Note.objects.filter(id__in=[note.id for note in notes[:4]]).update(created_at=notes[0].created_at)
+
+        pages = self._collect("/api/v1/bau-mental/notes/", {"page_size": 2})
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        seen = [note_id for page in pages for note_id in page]
+        self.assertEqual(sorted(seen), sorted(str(note.id) for note in notes))
+        self.assertEqual(seen[0], str(notes[4].id))
+
+    def test_thread_messages_newest_first(self) -> None:
+        """Testa mensagens da thread paginadas da mais recente para a mais antiga."""
+        thread = Thread.objects.create(workspace=self.workspace, title="Conversa", is_global=True)
+        messages = [
+            ThreadMessage.objects.create(
+                workspace=self.workspace, thread=thread, role="user", content=f"msg {i}"
+            )
+            for i in range(3)
+        ]
+
+        pages = self._collect(f"/api/v1/bau-mental/threads/{thread.id}/messages/", {"page_size": 2})
+
+        self.assertEqual(pages, [[str(messages[2].id), str(messages[1].id)], [str(messages[0].id)]])
+
+    def test_notifications_and_invalid_cursor(self) -> None:
+        """Testa paginação das notificações e rejeição de cursor inválido."""
+        for i in range(3):
+            Notification.objects.create(user=self.user, type="note_created", title=f"n{i}", message="m")
+
+        pages = self._collect("/api/v1/notifications/", {"page_size": 2})
+
+        self.assertEqual([len(page) for page in pages], [2, 1])
+        response = self.client.get("/api/v1/bau-mental/notes/", {"cursor": "invalido"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
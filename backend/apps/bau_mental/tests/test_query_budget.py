@@ -0,0 +1,79 @@
+"""Query-count budget for list endpoints (must not grow with the number of rows)."""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, Workspace
+from apps.bau_mental.models import Box, Note, Thread, ThreadMessage
+from apps.core.models import Notification
+
+# Teto de queries por requisição de lista (auth/workspace + página)
+LIST_QUERY_BUDGET = 8
+
+
+class ListQueryBudgetTest(TestCase):
+    """Testes de orçamento de queries das listagens."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        self.user = User.objects.create_user(
+            email="test@example.com", password="testpass123", workspace=self.workspace
+        )
+        self.box = Box.objects.create(workspace=self.workspace, name="Casa")
+        self.thread = Thread.objects.create(workspace=self.workspace, title="Conversa", is_global=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_WORKSPACE_ID=str(self.workspace.id))
+
+    def _add_rows(self, count: int) -> None:
+        """Cria ``count`` linhas de cada tipo listado."""
+        for i in range(count):
+            note = Note.objects.create(workspace=self.workspace, box=self.box, transcript=f"nota {i}")
+            thread = Thread.objects.create(workspace=self.workspace, title=f"t{i}", box=self.box)
+            ThreadMessage.objects.create(workspace=self.workspace, thread=thread, role="user", content="oi")
+            message = ThreadMessage.objects.create(
+                workspace=self.workspace, thread=self.thread, role="assistant", content="ok"
+            )
+            message.notes_referenced.add(note)
+            Notification.objects.create(user=self.user, type="note_created", title="n", message="m")
+
+    def _count_queries(self, url: str) -> int:
+        """Quantidade de queries de um GET."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_list_endpoints_are_constant_in_queries(self) -> None:
+        """Testa que as listagens fazem o mesmo número de queries com 2 ou 8 linhas."""
+        urls = [
+            "/api/v1/bau-mental/notes/",
+            "/api/v1/bau-mental/threads/",
+            f"/api/v1/bau-mental/threads/{self.thread.id}/messages/",
+            "/api/v1/notifications/",
+        ]
+        self._add_rows(2)
+        few = {url: self._count_queries(url) for url in urls}
+        self._add_rows(6)
+        many = {url: self._count_queries(url) for url in urls}
+
+        self.assertEqual(many, few)
+        for url, count in many.items():
+            self.assertLessEqual(count, LIST_QUERY_BUDGET, url)
+
+    def test_thread_list_projection(self) -> None:
+        """Testa última mensagem, contagem e caixinha vindas das anotações."""
+        thread = Thread.objects.create(workspace=self.workspace, title="Obra", box=self.box)
+        ThreadMessage.objects.create(workspace=self.workspace, thread=thread, role="user", content="a" * 150)
+        ThreadMessage.objects.create(workspace=self.workspace, thread=thread, role="assistant", content="b" * 150)
+
+        response = self.client.get("/api/v1/bau-mental/threads/", {"box": str(self.box.id)})
+
+        result = response.data["results"][0]
+        self.assertEqual(result["messages_count"], 2)
+        self.assertEqual(result["last_message_preview"], "b" * 100 + "...")
+        self.assertEqual(result["box_name"], "Casa")
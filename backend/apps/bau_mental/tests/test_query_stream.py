@@ -0,0 +1,43 @@
+"""Tests for QueryService streaming with the shared OpenAI clients."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from django.test import SimpleTestCase
+
+from apps.bau_mental.services import query
+from apps.bau_mental.services.query import QueryService
+
+
+def _chunk(content):
+    """Chunk de streaming no formato do SDK."""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class QueryStreamTest(SimpleTestCase):
+    """Testes para o streaming assíncrono (caminho ASGI)."""
+
+    def test_astream_uses_shared_async_client(self) -> None:
+        """Testa que astream cria o cliente assíncrono compartilhado e repassa os trechos."""
+
+        async def response():
+            for content in ("Olá", None, " mundo"):
+                yield _chunk(content)
+
+        client = MagicMock()
+        client.chat.completions.create = AsyncMock(return_value=response())
+
+        async def collect(service):
+            return [part async for part in service.astream([{"role": "user", "content": "oi"}])]
+
+        with patch.object(query, "OPENAI_AVAILABLE", True), patch.object(
+            query, "get_async_openai_client", return_value=client
+        ) as factory:
+            service = QueryService()
+            service.client = object()
+            parts = asyncio.run(collect(service))
+
+        self.assertEqual(parts, ["Olá", " mundo"])
+        factory.assert_called_once_with("bau_mental.query", service.api_key)
+        self.assertTrue(client.chat.completions.create.call_args.kwargs["stream"])
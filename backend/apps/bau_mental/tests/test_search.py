@@ -0,0 +1,84 @@
+"""Tests for note search."""
+
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, Workspace
+from apps.bau_mental.models import Box, Note
+from apps.bau_mental.services.search import search_notes
+from apps.core.pagination import decode_cursor, encode_cursor
+
+
+class NoteSearchTest(TestCase):
+    """Testes para a busca de anotações."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        self.user = User.objects.create_user(
+            email="test@example.com", password="testpass123", workspace=self.workspace
+        )
+        self.box = Box.objects.create(workspace=self.workspace, name="Casa")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_WORKSPACE_ID=str(self.workspace.id))
+
+    def _note(self, transcript: str, **kwargs) -> Note:
+        """Cria nota com transcrição."""
+        return Note.objects.create(workspace=self.workspace, transcript=transcript, **kwargs)
+
+    def test_cursor_roundtrip(self) -> None:
+        """Testa codificação do cursor (UUID e float)."""
+        note = self._note("x")
+        cursor = encode_cursor([0.25, note.id])
+
+        self.assertEqual(decode_cursor(cursor, 2), [0.25, str(note.id)])
+
+    def test_ranked_results_with_headline(self) -> None:
+        """Testa ranking e trecho destacado no lugar da transcrição."""
+        weak = self._note("Lembrar do orçamento. " + "Texto sem relação nenhuma. " * 20)
+        strong = self._note("Orçamento da reforma: pedir orçamento do telhado", box=self.box)
+        self._note("Reunião com o cliente amanhã")
+
+        results, next_cursor = search_notes(Note.objects.filter(workspace=self.workspace), "orçamento")
+
+        self.assertEqual([result["id"] for result in results], [strong.id, weak.id])
+        self.assertIn("<mark>Orçamento</mark>", results[0]["headline"])
+        self.assertEqual(results[0]["box_name"], "Casa")
+        self.assertIsNone(next_cursor)
+
+    def test_keyset_pages_cover_all_results(self) -> None:
+        """Testa que as páginas por cursor trazem todos os resultados, sem repetir."""
+        expected = {self._note(f"Nota {i} sobre jardinagem no quintal").id for i in range(7)}
+        queryset = Note.objects.filter(workspace=self.workspace)
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            results, cursor = search_notes(queryset, "jardinagem", cursor=cursor, limit=3)
+            seen.extend(result["id"] for result in results)
+            pages += 1
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), len(expected))
+        self.assertEqual(set(seen), expected)
+
+    def test_search_endpoint(self) -> None:
+        """Testa o endpoint de busca paginado por cursor."""
+        for i in range(3):
+            self._note(f"Consulta no dentista número {i}")
+
+        response = self.client.get("/api/v1/bau-mental/notes/search/", {"q": "dentista", "page_size": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertNotIn("transcript", response.data["results"][0])
+        next_response = self.client.get(response.data["next"])
+        self.assertEqual(len(next_response.data["results"]), 1)
+        self.assertIsNone(next_response.data["next"])
+        self.assertEqual(
+            self.client.get("/api/v1/bau-mental/notes/search/").status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
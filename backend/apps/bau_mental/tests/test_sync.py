@@ -0,0 +1,134 @@
+"""Tests for the incremental (delta) sync endpoint."""
+
+import threading
+from unittest.mock import patch
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User, Workspace
+from apps.bau_mental.models import Box, BoxShare, Note, Thread
+from apps.bau_mental.services import sync
+from apps.bau_mental.services.sync import collect_changes, workspace_sources
+
+SYNC_URL = "/api/v1/bau-mental/sync/"
+
+
+@patch.object(sync, "SYNC_SETTLE_SECONDS", 0)
+class SyncTest(TestCase):
+    """Testes para a sincronização incremental."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        self.user = User.objects.create_user(
+            email="test@example.com", password="testpass123", workspace=self.workspace
+        )
+        self.box = Box.objects.create(workspace=self.workspace, name="Casa")
+        self.note = Note.objects.create(workspace=self.workspace, box=self.box, transcript="Comprar tinta")
+        self.thread = Thread.objects.create(workspace=self.workspace, title="Obra", is_global=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_WORKSPACE_ID=str(self.workspace.id))
+
+    def test_full_then_delta_with_soft_delete_tombstone(self) -> None:
+        """Testa estado completo sem cursor e, depois, só o que mudou (com exclusões)."""
+        full = self.client.get(SYNC_URL)
+        self.assertEqual(full.status_code, status.HTTP_200_OK)
+        self.assertEqual([note["id"] for note in full.data["notes"]], [str(self.note.id)])
+        self.assertEqual(len(full.data["boxes"]), 1)
+        self.assertEqual(len(full.data["threads"]), 1)
+        self.assertFalse(full.data["has_more"])
+
+        self.assertEqual(self.client.delete(f"/api/v1/bau-mental/notes/{self.note.id}/").status_code, 204)
+        delta = self.client.get(SYNC_URL, {"since": full.data["cursor"]})
+
+        self.assertEqual(delta.data["deleted"], [{"type": "note", "id": str(self.note.id)}])
+        self.assertEqual(delta.data["notes"], [])
+        # Contador da caixinha mudou: a caixinha volta no delta; a thread não
+        self.assertEqual(delta.data["boxes"][0]["note_count"], 0)
+        self.assertEqual(delta.data["threads"], [])
+
+        empty = self.client.get(SYNC_URL, {"since": delta.data["cursor"]})
+        self.assertEqual(empty.data["deleted"], [])
+        self.assertEqual(empty.data["cursor"], delta.data["cursor"])
+
+    def test_removed_share_leaves_tombstone(self) -> None:
+        """Testa que compartilhamento removido (exclusão física) aparece nas exclusões."""
+        guest = User.objects.create_user(email="guest@example.com", password="pass", workspace=self.workspace)
+        share = BoxShare.objects.create(box=self.box, shared_with=guest, invited_by=self.user)
+        cursor = self.client.get(SYNC_URL).data["cursor"]
+
+        response = self.client.delete(f"/api/v1/bau-mental/boxes/{self.box.id}/shares/{share.id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        delta = self.client.get(SYNC_URL, {"since": cursor})
+        self.assertEqual(delta.data["deleted"], [{"type": "box_share", "id": str(share.id)}])
+
+    def test_pages_interleave_sources_without_gaps(self) -> None:
+        """Testa que páginas parciais (has_more) cobrem todas as fontes sem repetir."""
+        Note.objects.create(workspace=self.workspace, transcript="Outra nota")
+        sources = workspace_sources(self.workspace.id)
+
+        seen, cursor = [], None
+        while True:
+            result = collect_changes(sources, cursor, limit=2)
+            seen.extend(obj.id for objs in result["changes"].values() for obj in objs)
+            cursor = result["cursor"]
+            if not result["has_more"]:
+                break
+
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(len(set(seen)), 4)
+
+    def test_recent_changes_wait_for_settle_window(self) -> None:
+        """Testa que alterações dentro da janela de acomodação ficam para a próxima chamada."""
+        with patch.object(sync, "SYNC_SETTLE_SECONDS", 60):
+            result = collect_changes(workspace_sources(self.workspace.id))
+
+        self.assertFalse(any(result["changes"].values()))
+        self.assertIsNone(result["cursor"])
+
+
+@patch.object(sync, "SYNC_SETTLE_SECONDS", 0)
+class SyncLongTransactionTest(TransactionTestCase):
+    """Testes da sincronização com uma transação longa em andamento."""
+
+    def test_row_committed_after_newer_change_is_not_skipped(self) -> None:
+        """Testa que a linha de uma transação longa, com data menor que alterações
+        já commitadas, chega ao cliente depois do commit (o cursor não passa dela)."""
+        workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        slow = Note.objects.create(workspace=workspace, transcript="Lote lento")
+        fast = Note.objects.create(workspace=workspace, transcript="Edição rápida")
+        cursor = collect_changes(workspace_sources(workspace.id))["cursor"]
+
+        written, release = threading.Event(), threading.Event()
+
+        def long_writer() -> None:
+            try:
+                with transaction.atomic():
+                    note = Note.objects.get(id=slow.id)
+                    note.transcript = "Lote lento (classificado)"
+                    note.save(update_fields=["transcript"])
+                    written.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        writer = threading.Thread(target=long_writer)
+        writer.start()
+        written.wait(10)
+        fast.transcript = "Edição rápida (nova)"
+        fast.save(update_fields=["transcript"])
+
+        during = collect_changes(workspace_sources(workspace.id), cursor)
+        release.set()
+        writer.join()
+        after = collect_changes(workspace_sources(workspace.id), during["cursor"])
+
+        self.assertEqual(during["changes"]["notes"], [])
+        self.assertEqual(
+            {note.id for note in after["changes"]["notes"]}, {slow.id, fast.id}
+        )
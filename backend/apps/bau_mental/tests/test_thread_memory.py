@@ -0,0 +1,76 @@
+"""Tests for rolling thread memory (summary + recent turns)."""
+
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from apps.accounts.models import Workspace
+from apps.bau_mental.models import Thread, ThreadMessage
+from apps.bau_mental.services import thread_memory
+from apps.bau_mental.services.query import QueryService
+from apps.bau_mental.services.thread_memory import ThreadMemoryService, build_history
+
+
+@patch.object(thread_memory, "MEMORY_RECENT_TURNS", 1)
+class ThreadMemoryTest(TestCase):
+    """Testes para a memória de conversa das threads."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        self.thread = Thread.objects.create(workspace=self.workspace, title="Obra", is_global=True)
+        self.service = ThreadMemoryService()
+        self.service.client = object()
+
+    def _turn(self, question: str, answer: str) -> None:
+        """Cria uma troca (pergunta + resposta)."""
+        for role, content in (("user", question), ("assistant", answer)):
+            ThreadMessage.objects.create(
+                workspace=self.workspace, thread=self.thread, role=role, content=content
+            )
+
+    def test_update_folds_messages_outside_window(self) -> None:
+        """Testa que só as mensagens fora da janela entram no resumo, sem mexer em last_message_at."""
+        self._turn("Quanto custou o piso?", "R$ 3.000")
+        self._turn("E a pintura?", "R$ 1.200")
+        last_message_at = Thread.objects.get(id=self.thread.id).last_message_at
+
+        with patch.object(ThreadMemoryService, "_complete", return_value="Piso custou R$ 3.000") as complete:
+            result = self.service.update(self.thread)
+
+        self.assertEqual(result, {"status": "completed", "summarized": 2})
+        self.assertIn("Quanto custou o piso?", complete.call_args.args[0])
+        self.assertNotIn("E a pintura?", complete.call_args.args[0])
+        thread = Thread.objects.get(id=self.thread.id)
+        self.assertEqual(thread.memory_summary, "Piso custou R$ 3.000")
+        self.assertEqual(thread.last_message_at, last_message_at)
+        self.assertEqual(self.service.update(thread)["status"], "skipped")
+
+    def test_history_is_bounded(self) -> None:
+        """Testa que o histórico tem tamanho fixo: resumo + últimas trocas, sem a pergunta atual."""
+        self._turn("Quanto custou o piso?", "R$ 3.000")
+        self._turn("E a pintura?", "x" * 5000)
+        with patch.object(ThreadMemoryService, "_complete", return_value="Piso custou R$ 3.000"):
+            self.service.update(self.thread)
+        current = ThreadMessage.objects.create(
+            workspace=self.workspace, thread=self.thread, role="user", content="E o total?"
+        )
+
+        history = build_history(self.thread, exclude_message_id=current.id)
+
+        self.assertEqual([message["role"] for message in history], ["system", "user", "assistant"])
+        self.assertIn("Piso custou R$ 3.000", history[0]["content"])
+        self.assertEqual(history[1]["content"], "E a pintura?")
+        self.assertEqual(len(history[2]["content"]), thread_memory.MEMORY_MESSAGE_MAX_CHARS + 3)
+
+    def test_history_goes_between_system_prompt_and_question(self) -> None:
+        """Testa a posição do histórico no prompt."""
+        history = [{"role": "user", "content": "E a pintura?"}, {"role": "assistant", "content": "R$ 1.200"}]
+        notes = [{"id": "1", "transcript": "Pintura R$ 1.200", "created_at": "01/01/2025", "box_name": "Casa"}]
+
+        prompt = QueryService().build_messages("E o total?", notes, history=history)
+
+        self.assertEqual(
+            [message["role"] for message in prompt["messages"]], ["system", "user", "assistant", "user"]
+        )
+        self.assertIn("E o total?", prompt["messages"][-1]["content"])
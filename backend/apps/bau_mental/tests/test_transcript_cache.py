@@ -0,0 +1,68 @@
+"""Tests for bau_mental transcript cache."""
+
+import hashlib
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from apps.accounts.models import Workspace
+from apps.bau_mental.models import Box, Note, TranscriptCache
+from apps.bau_mental.services.transcript_cache import get_cached_transcript, store_transcript
+from apps.bau_mental.tasks import transcribe_audio
+
+
+class TranscriptCacheTest(TestCase):
+    """Testes para o cache de transcrições por hash do áudio."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        Box.objects.create(workspace=self.workspace, name="Casa")
+
+    def test_upload_is_hashed_on_save(self) -> None:
+        """Testa que o SHA-256 é calculado ao gravar o arquivo enviado."""
+        content = b"audio-bytes" * 200
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            note = Note.objects.create(
+                workspace=self.workspace,
+                audio_file=SimpleUploadedFile("memo.ogg", content),
+            )
+
+        self.assertEqual(note.audio_sha256, hashlib.sha256(content).hexdigest())
+
+    def test_cache_keyed_by_language_and_prompt(self) -> None:
+        """Testa que idioma e prompt fazem parte da chave."""
+        store_transcript("a" * 64, "pt", "Caixinhas disponíveis: Casa", {"text": "Olá", "duration": 3.0})
+        store_transcript("a" * 64, "pt", "Caixinhas disponíveis: Casa", {"text": "Outro", "duration": 3.0})
+
+        cached = get_cached_transcript("a" * 64, "pt", "Caixinhas disponíveis: Casa")
+
+        self.assertEqual(cached["text"], "Olá")
+        self.assertIsNone(get_cached_transcript("a" * 64, "en", "Caixinhas disponíveis: Casa"))
+        self.assertIsNone(get_cached_transcript("a" * 64, "pt", None))
+        self.assertEqual(TranscriptCache.objects.get().hit_count, 1)
+
+    @patch("apps.bau_mental.tasks.index_note_embedding")
+    @patch("apps.bau_mental.tasks.classify_note")
+    @patch("apps.bau_mental.tasks.TranscriptionService")
+    def test_duplicate_audio_skips_whisper(self, mock_service, mock_classify, mock_index) -> None:
+        """Testa que áudio repetido é concluído sem chamar a API."""
+        store_transcript("b" * 64, "pt", "Caixinhas disponíveis: Casa", {"text": "Reunião sexta", "duration": 12.0})
+        note = Note.objects.create(
+            workspace=self.workspace,
+            audio_file="bau_mental/audios/x/memo.ogg",
+            audio_sha256="b" * 64,
+            source_type="forwarded",
+        )
+
+        result = transcribe_audio(str(note.id))
+
+        self.assertEqual(result["status"], "completed")
+        self.assertTrue(result["cached"])
+        mock_service.assert_not_called()
+        note.refresh_from_db()
+        self.assertEqual(note.transcript, "Reunião sexta")
+        self.assertEqual(note.duration_seconds, 12.0)
+        mock_classify.delay.assert_called_once_with(str(note.id))
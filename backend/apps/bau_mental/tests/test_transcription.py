@@ -0,0 +1,204 @@
+"""Tests for bau_mental chunked transcription."""
+
+import hashlib
+import io
+import tempfile
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+
+from apps.accounts.models import Workspace
+from apps.bau_mental.models import Note, TranscriptionSettings
+from apps.bau_mental.routing import route_transcription, transcription_priority
+from apps.bau_mental.services import transcription_backends
+from apps.bau_mental.services.audio_segmenter import AudioSegmenter, plan_segments
+from apps.bau_mental.services.audio_source import AudioSource
+from apps.bau_mental.services.transcription import TranscriptionService, stitch_transcripts
+
+
+class FakeBackend:
+    """Backend de transcrição em memória."""
+
+    name = "fake"
+
+    def is_available(self):
+        return True
+
+    def transcribe_bytes(self, filename, content, language="pt", prompt=None):
+        return {"text": f"trecho {content.decode()}", "segments": [{"start": 0.0, "end": 1.0, "text": "x"}]}
+
+
+class PlanSegmentsTest(SimpleTestCase):
+    """Testes para plan_segments."""
+
+    def test_short_audio_single_segment(self) -> None:
+        """Testa que áudio curto não é dividido."""
+        self.assertEqual(plan_segments(300.0, [(100.0, 101.0)], max_seconds=600), [(0.0, 300.0)])
+
+    def test_cuts_at_last_silence_in_window(self) -> None:
+        """Testa corte no meio do último silêncio dentro da janela."""
+        silences = [(200.0, 202.0), (550.0, 552.0), (900.0, 901.0)]
+
+        segments = plan_segments(1200.0, silences, max_seconds=600, min_seconds=60)
+
+        self.assertEqual(segments, [(0.0, 551.0), (551.0, 900.5), (900.5, 1200.0)])
+
+    def test_hard_cut_without_silence(self) -> None:
+        """Testa corte em max_seconds quando não há silêncio."""
+        segments = plan_segments(1300.0, [], max_seconds=600, min_seconds=60)
+
+        self.assertEqual(segments, [(0.0, 600.0), (600.0, 1200.0), (1200.0, 1300.0)])
+        self.assertTrue(all(end - start <= 600 for start, end in segments))
+
+
+class TranscriptionServiceTest(SimpleTestCase):
+    """Testes para TranscriptionService com áudio segmentado."""
+
+    def test_stitch_offsets_segments(self) -> None:
+        """Testa junção do texto e deslocamento dos timestamps."""
+        results = [
+            {"text": "Primeira parte.", "segments": [{"start": 0.0, "end": 4.0, "text": "Primeira parte."}]},
+            {"text": " Segunda parte. ", "segments": [{"start": 1.5, "end": 3.0, "text": "Segunda parte."}]},
+        ]
+
+        stitched = stitch_transcripts([(0.0, 551.0), (551.0, 900.0)], results, "pt")
+
+        self.assertEqual(stitched["text"], "Primeira parte. Segunda parte.")
+        self.assertEqual(stitched["duration"], 900.0)
+        self.assertEqual(stitched["segments"][1]["start"], 552.5)
+
+    def test_long_audio_transcribed_in_chunks(self) -> None:
+        """Testa que cada trecho é transcrito e o resultado segue a ordem do áudio."""
+        service = TranscriptionService()
+        service.backend = FakeBackend()
+        segments = [(0.0, 551.0), (551.0, 900.5), (900.5, 1200.0)]
+
+        def fake_export(self, path, start, end):
+            return f"{start}".encode()
+
+        with tempfile.NamedTemporaryFile(suffix=".m4a") as audio, patch.multiple(
+            AudioSegmenter,
+            is_available=lambda self: True,
+            plan=lambda self, path, name=None: segments,
+            export=fake_export,
+        ):
+            result = service.transcribe(audio.name)
+
+        self.assertEqual(result["text"], "trecho 0.0 trecho 551.0 trecho 900.5")
+        self.assertEqual([s["start"] for s in result["segments"]], [0.0, 551.0, 900.5])
+        self.assertEqual(result["duration"], 1200.0)
+
+
+    def test_short_audio_plan_skips_silence_detection(self) -> None:
+        """Testa que áudio que cabe em um trecho só passa pelo ffprobe."""
+        with patch.object(AudioSegmenter, "duration", return_value=45.0), patch.object(
+            AudioSegmenter, "detect_silences"
+        ) as detect_silences:
+            segments = AudioSegmenter().plan("memo.ogg")
+
+        self.assertEqual(segments, [(0.0, 45.0)])
+        detect_silences.assert_not_called()
+
+    def test_plan_never_logs_presigned_url(self) -> None:
+        """Testa que o log do plano usa o nome do arquivo, sem credencial da URL."""
+        url = "https://r2.example.com/bau_mental/audios/memo.ogg?X-Amz-Credential=abc&X-Amz-Signature=secret"
+
+        with patch.multiple(
+            AudioSegmenter, duration=lambda self, path: 1200.0, detect_silences=lambda self, path: []
+        ), self.assertLogs("apps", level="INFO") as logs:
+            AudioSegmenter().plan(url)
+            AudioSegmenter().plan(url, name="memo.ogg")
+
+        self.assertTrue(all("memo.ogg" in line and "X-Amz" not in line for line in logs.output))
+
+
+class RemoteStorage:
+    """Storage sem caminho local (como o R2), contando leituras."""
+
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+        self.reads = 0
+
+    def path(self, name):
+        raise NotImplementedError
+
+    def open_stream(self, name):
+        self.reads += 1
+        return io.BytesIO(self.content)
+
+
+class AudioSourceTest(SimpleTestCase):
+    """Testes para AudioSource."""
+
+    def test_remote_audio_read_once_for_hash_and_transcription(self) -> None:
+        """Testa que áudio pequeno é lido do storage uma vez (sem disco)."""
+        content = b"ogg" * 1000
+        storage = RemoteStorage(content)
+        source = AudioSource(SimpleNamespace(name="bau_mental/audios/x/memo.ogg", storage=storage, size=len(content)))
+
+        self.assertIsNone(source.local_path)
+        self.assertEqual(source.sha256(), hashlib.sha256(content).hexdigest())
+        self.assertEqual(source.read_bytes(), content)
+        self.assertEqual(storage.reads, 1)
+        self.assertEqual(source.name, "memo.ogg")
+
+
+class TranscriptionRoutingTest(TestCase):
+    """Testes para fila e prioridade das transcrições."""
+
+    def test_short_audio_gets_higher_priority(self) -> None:
+        """Testa que áudios menores saem antes na fila de transcrição."""
+        workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        memo = Note.objects.create(workspace=workspace, file_size_bytes=300 * 1024)
+        meeting = Note.objects.create(workspace=workspace, file_size_bytes=80 * 1024 * 1024)
+        task_name = "apps.bau_mental.tasks.transcribe_audio"
+
+        memo_route = route_transcription(task_name, (str(memo.id),), {}, {})
+        meeting_route = route_transcription(task_name, (str(meeting.id),), {}, {})
+
+        self.assertEqual(memo_route, {"queue": "transcription", "priority": 0})
+        self.assertEqual(meeting_route, {"queue": "transcription", "priority": 9})
+        self.assertLess(transcription_priority(2 * 1024 * 1024), transcription_priority(10 * 1024 * 1024))
+
+
+class TranscriptionBackendTest(TestCase):
+    """Testes para a escolha do backend de transcrição."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+
+    @patch.object(transcription_backends, "FASTER_WHISPER_AVAILABLE", False)
+    @patch.dict("os.environ", {"OPENAI_API_KEY": "sk-test"})
+    def test_unavailable_backend_falls_back(self) -> None:
+        """Testa que o backend local sem faster-whisper cai para a API."""
+        self.assertEqual(transcription_backends.get_backend("local").name, "openai")
+        with self.assertRaises(ValueError):
+            transcription_backends.get_backend("gpu")
+
+    @patch.object(transcription_backends, "LOCAL_TRANSCRIPTION_ENABLED", True)
+    def test_local_workspace_routed_to_dedicated_queue(self) -> None:
+        """Testa que notas de workspace com backend local vão para a fila local."""
+        note = Note.objects.create(workspace=self.workspace, source_type="memo")
+        task_name = "apps.bau_mental.tasks.transcribe_audio"
+
+        self.assertEqual(route_transcription(task_name, (str(note.id),), {}, {})["queue"], "transcription")
+
+        TranscriptionSettings.objects.create(workspace=self.workspace, backend="local")
+
+        self.assertEqual(transcription_backends.backend_for_workspace(self.workspace.id), "local")
+        self.assertEqual(route_transcription(task_name, (str(note.id),), {}, {})["queue"], "transcription_local")
+        self.assertIsNone(route_transcription("apps.bau_mental.tasks.classify_note", (str(note.id),), {}, {}))
+
+    @patch.object(transcription_backends, "LOCAL_TRANSCRIPTION_ENABLED", False)
+    def test_local_backend_without_local_workers(self) -> None:
+        """Testa que sem workers locais a nota vai para a fila da API e o local é rejeitado."""
+        note = Note.objects.create(workspace=self.workspace, source_type="memo")
+        settings = TranscriptionSettings.objects.create(workspace=self.workspace, backend="local")
+        task_name = "apps.bau_mental.tasks.transcribe_audio"
+
+        self.assertEqual(route_transcription(task_name, (str(note.id),), {}, {})["queue"], "transcription")
+        with self.assertRaises(ValidationError):
+            settings.full_clean()
@@ -0,0 +1,78 @@
+"""Tests for bau_mental vector index."""
+
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from apps.bau_mental.services import vector_index
+from apps.bau_mental.services.vector_index import NoteVectorIndex, semantic_note_ids
+
+
+class NoteVectorIndexTest(SimpleTestCase):
+    """Testes para NoteVectorIndex."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index = NoteVectorIndex("workspace-1", base_dir=self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        """Remove diretório temporário."""
+        self.tmp_dir.cleanup()
+
+    def test_search_empty_index(self) -> None:
+        """Testa busca em índice inexistente."""
+        self.assertFalse(self.index.exists())
+        self.assertEqual(self.index.search([1.0, 0.0], k=3), [])
+
+    def test_search_returns_top_k_by_cosine(self) -> None:
+        """Testa ordenação por similaridade de cosseno."""
+        self.index.upsert("a", [1.0, 0.0, 0.0])
+        self.index.upsert("b", [0.7, 0.7, 0.0])
+        self.index.upsert("c", [0.0, 0.0, 5.0])
+
+        results = self.index.search([1.0, 0.1, 0.0], k=2)
+        self.assertEqual([note_id for note_id, _ in results], ["a", "b"])
+        self.assertAlmostEqual(results[0][1], 0.995, places=2)
+
+    def test_upsert_replaces_existing_vector(self) -> None:
+        """Testa que upsert atualiza linha existente sem duplicar."""
+        self.index.upsert("a", [1.0, 0.0])
+        self.index.upsert("b", [0.0, 1.0])
+        self.index.upsert("a", [0.0, 1.0])
+
+        self.assertEqual(len(self.index), 2)
+        results = dict(self.index.search([0.0, 1.0], k=2))
+        self.assertAlmostEqual(results["a"], 1.0, places=5)
+
+    def test_search_respects_allowed_ids(self) -> None:
+        """Testa restrição de escopo (ex: caixinha)."""
+        self.index.upsert("a", [1.0, 0.0])
+        self.index.upsert("b", [0.9, 0.1])
+
+        results = self.index.search([1.0, 0.0], k=5, allowed_ids=["b"])
+        self.assertEqual([note_id for note_id, _ in results], ["b"])
+
+    def test_remove_and_rebuild(self) -> None:
+        """Testa remoção (tombstone) e compactação via rebuild."""
+        self.index.upsert("a", [1.0, 0.0])
+        self.index.upsert("b", [0.0, 1.0])
+        self.assertTrue(self.index.remove("a"))
+        self.assertEqual([n for n, _ in self.index.search([1.0, 0.0], k=5)], ["b"])
+
+        count = self.index.rebuild([("c", np.array([1.0, 1.0]))])
+        self.assertEqual(count, 1)
+        self.assertEqual([n for n, _ in self.index.search([1.0, 0.0], k=5)], ["c"])
+
+    def test_missing_index_warns_once_and_falls_back(self) -> None:
+        """Testa o aviso (uma vez por workspace) quando a API não enxerga o índice."""
+        with patch.object(vector_index, "VECTOR_INDEX_DIR", self.tmp_dir.name), patch.object(
+            vector_index, "_missing_index_warned", set()
+        ), self.assertLogs("apps", level="WARNING") as logs:
+            self.assertIsNone(semantic_note_ids("workspace-2", "tinta", k=3))
+            self.assertIsNone(semantic_note_ids("workspace-2", "tinta", k=3))
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("BAU_MENTAL_VECTOR_INDEX_DIR", logs.output[0])
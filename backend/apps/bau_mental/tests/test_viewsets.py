@@ -1,11 +1,19 @@
 """Tests for bau_mental viewsets."""
 
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
 
 from apps.accounts.models import Workspace, User
-from apps.bau_mental.models import Box, Note
+from apps.bau_mental.models import Box, Note, Thread, ThreadMessage
+from apps.bau_mental.services.query import QueryService
 
 
 class BoxViewSetTest(TestCase):
@@ -98,7 +106,7 @@ class NoteViewSetTest(TestCase):
         url = "/api/v1/bau-mental/notes/"
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
     def test_filter_by_box(self) -> None:
         """Testa filtro por caixinha."""
@@ -118,7 +126,7 @@ class NoteViewSetTest(TestCase):
         url = "/api/v1/bau-mental/notes/"
         response = self.client.get(url, {"box": str(self.box.id)})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_filter_inbox(self) -> None:
         """Testa filtro por inbox."""
@@ -138,5 +146,221 @@ class NoteViewSetTest(TestCase):
         url = "/api/v1/bau-mental/notes/"
         response = self.client.get(url, {"inbox": "true"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_direct_upload_unavailable_with_local_storage(self) -> None:
+        """Testa que upload direto exige R2 configurado."""
+        response = self.client.post(
+            "/api/v1/bau-mental/notes/upload/initiate/",
+            {"filename": "memo.m4a", "size": 20 * 1024 * 1024},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("apps.bau_mental.viewsets.transcribe_audio")
+    def test_direct_upload_initiate_and_complete(self, mock_transcribe) -> None:
+        """Testa fluxo de upload direto: URLs pré-assinadas e criação da nota."""
+        storage = Note._meta.get_field("audio_file").storage
+        with patch.object(type(storage), "supports_direct_upload", True), patch.multiple(
+            storage,
+            create_multipart_upload=lambda key, content_type=None: "upload-1",
+            presign_upload_parts=lambda key, upload_id, count, expires: [
+                {"part_number": n, "url": f"https://r2/{n}"} for n in range(1, count + 1)
+            ],
+            complete_multipart_upload=lambda key, upload_id, parts: None,
+            size=lambda key: 20 * 1024 * 1024,
+        ):
+            response = self.client.post(
+                "/api/v1/bau-mental/notes/upload/initiate/",
+                {"filename": "memo.m4a", "size": 20 * 1024 * 1024},
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(response.data["parts"]), 3)
+            key = response.data["key"]
+            self.assertTrue(key.startswith(f"bau_mental/audios/{self.workspace.id}/"))
+
+            payload = {
+                "key": key,
+                "upload_id": "upload-1",
+                "parts": [{"part_number": n, "etag": f"etag-{n}"} for n in (1, 2, 3)],
+                "box_id": str(self.box.id),
+            }
+            response = self.client.post(
+                "/api/v1/bau-mental/notes/upload/complete/", payload, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            note = Note.objects.get(id=response.data["id"])
+            self.assertEqual(note.audio_file.name, key)
+            self.assertEqual(note.box, self.box)
+            mock_transcribe.delay.assert_called_once_with(str(note.id))
+
+            # Repetir o complete devolve a mesma nota
+            response = self.client.post(
+                "/api/v1/bau-mental/notes/upload/complete/", payload, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            # Chave de outro workspace é rejeitada
+            payload["key"] = "bau_mental/audios/outro-workspace/2025/01/01/x.m4a"
+            response = self.client.post(
+                "/api/v1/bau-mental/notes/upload/complete/", payload, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("apps.bau_mental.viewsets.transcribe_audio")
+    def test_direct_upload_complete_after_r2_already_completed(self, mock_transcribe) -> None:
+        """Testa que NoSuchUpload com o objeto já no R2 (retry) ainda cria a nota."""
+        storage = Note._meta.get_field("audio_file").storage
+        key = f"bau_mental/audios/{self.workspace.id}/2025/01/01/memo.m4a"
+
+        def already_completed(key, upload_id, parts):
+            raise _NoSuchUpload()
+
+        with patch.object(type(storage), "supports_direct_upload", True), patch.multiple(
+            storage,
+            complete_multipart_upload=already_completed,
+            exists=lambda key: True,
+            size=lambda key: 1024,
+        ):
+            response = self.client.post(
+                "/api/v1/bau-mental/notes/upload/complete/",
+                {"key": key, "upload_id": "upload-1", "parts": [{"part_number": 1, "etag": "e"}]},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        mock_transcribe.delay.assert_called_once()
+
+        with patch.object(type(storage), "supports_direct_upload", True), patch.multiple(
+            storage, complete_multipart_upload=already_completed, exists=lambda key: False
+        ):
+            response = self.client.post(
+                "/api/v1/bau-mental/notes/upload/complete/",
+                {"key": key.replace("memo", "outro"), "upload_id": "u", "parts": [{"part_number": 1, "etag": "e"}]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class _NoSuchUpload(Exception):
+    """Erro do R2/S3 para upload multipart já concluído ou cancelado."""
+
+    response = {"Error": {"Code": "NoSuchUpload"}}
+
+
+class DirectUploadRaceTest(TransactionTestCase):
+    """Testes para conclusões concorrentes do mesmo upload direto."""
+
+    @patch("apps.bau_mental.viewsets.transcribe_audio")
+    def test_concurrent_complete_creates_one_note(self, mock_transcribe) -> None:
+        """Testa que um retry concorrente ao primeiro complete não cria outra nota."""
+        workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        user = User.objects.create_user(
+            email="test@example.com", password="testpass123", workspace=workspace
+        )
+        key = f"bau_mental/audios/{workspace.id}/2025/01/01/memo.m4a"
+        payload = {"key": key, "upload_id": "upload-1", "parts": [{"part_number": 1, "etag": "e"}]}
+        completing, release = threading.Event(), threading.Event()
+        statuses = []
+
+        def slow_complete(key, upload_id, parts):
+            completing.set()
+            release.wait(10)
+
+        def post() -> None:
+            try:
+                client = APIClient()
+                client.force_authenticate(user=user)
+                client.credentials(HTTP_X_WORKSPACE_ID=str(workspace.id))
+                response = client.post("/api/v1/bau-mental/notes/upload/complete/", payload, format="json")
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        storage = Note._meta.get_field("audio_file").storage
+        with patch.object(type(storage), "supports_direct_upload", True), patch.multiple(
+            storage, complete_multipart_upload=slow_complete, size=lambda key: 1024
+        ):
+            first = threading.Thread(target=post)
+            first.start()
+            completing.wait(10)
+            retry = threading.Thread(target=post)
+            retry.start()
+            # O retry espera o lock do workspace enquanto o primeiro conclui
+            retry.join(0.5)
+            release.set()
+            first.join()
+            retry.join()
+
+        self.assertEqual(sorted(statuses), [status.HTTP_200_OK, status.HTTP_201_CREATED])
+        self.assertEqual(Note.all_objects.filter(audio_file=key).count(), 1)
+        mock_transcribe.delay.assert_called_once()
+
+
+
+class ThreadViewSetTest(TestCase):
+    """Testes para ThreadViewSet."""
+
+    def setUp(self) -> None:
+        """Configuração inicial."""
+        self.workspace = Workspace.objects.create(name="Test Workspace", slug="test")
+        self.user = User.objects.create_user(
+            email="test@example.com",
+            password="testpass123",
+            workspace=self.workspace,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.client.credentials(HTTP_X_WORKSPACE_ID=str(self.workspace.id))
+        self.thread = Thread.objects.create(
+            workspace=self.workspace,
+            title="Nova conversa",
+            is_global=True,
+            created_by=self.user,
+        )
+        Note.objects.create(
+            workspace=self.workspace,
+            transcript="Reunião com o cliente na sexta",
+            processing_status="completed",
+        )
+
+    def test_messages_paginated_newest_first_with_cursor(self) -> None:
+        """Testa o contrato da listagem de mensagens usado pelo chat: páginas do
+        mais recente para o mais antigo e ``next`` com o cursor das anteriores."""
+        start = timezone.now()
+        for i in range(30):
+            message = ThreadMessage.objects.create(
+                workspace=self.workspace, thread=self.thread, role="user", content=f"m{i}"
+            )
+            ThreadMessage.objects.filter(id=message.id).update(created_at=start + timedelta(seconds=i))
+        url = f"/api/v1/bau-mental/threads/{self.thread.id}/messages/"
+
+        first = self.client.get(url, {"page_size": 20})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data["results"][0]["content"], "m29")
+        cursor = parse_qs(urlsplit(first.data["next"]).query)["cursor"][0]
+
+        older = self.client.get(url, {"page_size": 20, "cursor": cursor})
+        self.assertIsNone(older.data["next"])
+        contents = [m["content"] for m in first.data["results"] + older.data["results"]]
+        self.assertEqual(contents, [f"m{i}" for i in range(29, -1, -1)])
+
+    @patch.object(QueryService, "stream", return_value=iter(["A reunião ", "é na sexta."]))
+    @patch.object(QueryService, "is_available", return_value=True)
+    def test_stream_message(self, mock_available, mock_stream) -> None:
+        """Testa resposta em streaming (SSE) e persistência ao fim do stream."""
+        url = f"/api/v1/bau-mental/threads/{self.thread.id}/messages/"
+        response = self.client.post(
+            url, {"content": "Quando é a reunião?", "stream": True}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        body = b"".join(response.streaming_content).decode()
+        events = [line.split(": ", 1)[1] for line in body.splitlines() if line.startswith("event: ")]
+        self.assertEqual(events, ["sources", "token", "token", "done"])
 
+        assistant_message = ThreadMessage.objects.get(thread=self.thread, role="assistant")
+        self.assertEqual(assistant_message.content, "A reunião é na sexta.")
+        self.assertEqual(assistant_message.notes_referenced.count(), 1)
@@ -1,5 +1,6 @@
 """Utilitários para o app bau_mental."""
 
+import hashlib
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -68,3 +69,22 @@ def get_or_create_workspace_for_user(request: "Request") -> "Workspace | None":
                 logger.info(f"[get_or_create_workspace] Workspace associado ao usuário: {workspace.id}")
 
     return workspace
+
+
+def sha256_file(fileobj, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 do conteúdo de um arquivo, lido em blocos (sem carregar tudo).
+
+    Args:
+        fileobj: File do Django (usa .chunks()) ou objeto com .read()
+
+    Returns:
+        Hash hexadecimal
+    """
+    digest = hashlib.sha256()
+    if hasattr(fileobj, "chunks"):
+        for chunk in fileobj.chunks(chunk_size):
+            digest.update(chunk)
+    else:
+        for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
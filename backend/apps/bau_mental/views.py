@@ -131,7 +131,7 @@ def accept_box_invite(request) -> Response:
         share.permission = invite.permission
         share.status = "accepted"
         share.accepted_at = timezone.now()
-        share.save(update_fields=["permission", "status", "accepted_at"])
+        share.save(update_fields=["permission", "status", "accepted_at", "updated_at"])
 
     # Deletar convite (já foi usado)
     invite.delete()
@@ -1,15 +1,26 @@
 """ViewSets for bau_mental app."""
 
+import json
+import math
 import os
 import tempfile
-from typing import TYPE_CHECKING
-
-from django.db import models
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Substr
+from django.http import StreamingHttpResponse
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
+from apps.core.pagination import KeysetPagination
 from apps.core.permissions import WorkspaceObjectPermission
 from apps.core.viewsets import WorkspaceViewSet
 from apps.bau_mental.models import Box, Note, BoxShare, BoxShareInvite, Thread, ThreadMessage
@@ -19,20 +30,41 @@ from apps.bau_mental.serializers import (
     BoxShareSerializer,
     BoxShareInviteSerializer,
     BoxShareCreateSerializer,
+    NoteBulkSerializer,
     NoteListSerializer,
     NoteMoveSerializer,
+    NoteSearchResultSerializer,
     NoteSerializer,
+    NoteUploadAbortSerializer,
+    NoteUploadCompleteSerializer,
+    NoteUploadInitiateSerializer,
     NoteUploadSerializer,
     QuerySerializer,
+    validate_audio_filename,
+    validate_audio_size,
     ThreadSerializer,
     ThreadListSerializer,
     ThreadCreateSerializer,
     ThreadMessageSerializer,
     ThreadMessageCreateSerializer,
 )
-from apps.bau_mental.services.query import QueryService
+from apps.bau_mental.services.answer_cache import AnswerCache
+from apps.bau_mental.services.box_classifier import get_classification_stats, is_confirmed, update_classifier
+from apps.bau_mental.services.box_summary import BoxSummaryService
+from apps.bau_mental.services.classification_batch import PENDING_FLAG
+from apps.bau_mental.services.note_bulk import apply_bulk_operation
+from apps.bau_mental.services.query import NO_NOTES_ANSWER, QueryService
+from apps.bau_mental.services.search import search_filter, search_notes
+from apps.bau_mental.services.sync import collect_changes, workspace_sources
+from apps.bau_mental.services.thread_memory import build_history
 from apps.bau_mental.services.transcription import TranscriptionService
-from apps.bau_mental.tasks import classify_note, transcribe_audio
+from apps.bau_mental.services.vector_index import semantic_notes
+from apps.bau_mental.tasks import (
+    classify_note,
+    index_note_embedding,
+    transcribe_audio,
+    update_thread_memory,
+)
 from apps.bau_mental.throttles import BauMentalQueryThrottle, BauMentalUploadThrottle
 
 if TYPE_CHECKING:
@@ -41,6 +73,169 @@ if TYPE_CHECKING:
 
 from apps.bau_mental.utils import get_or_create_workspace_for_user
 
+# Quantidade de notas (mais relevantes) usadas como contexto em threads
+THREAD_CONTEXT_NOTES = int(os.environ.get("BAU_MENTAL_THREAD_CONTEXT_NOTES", "30"))
+# Upload direto ao R2: tamanho de cada parte (mínimo do S3: 5MB) e validade das URLs
+DIRECT_UPLOAD_PART_SIZE = int(os.environ.get("BAU_MENTAL_UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+DIRECT_UPLOAD_URL_EXPIRES = int(os.environ.get("BAU_MENTAL_UPLOAD_URL_EXPIRES", "3600"))
+# Resultados por página da busca de notas
+SEARCH_PAGE_SIZE = 20
+# Colunas das notas enviadas como contexto à IA (caixinha via select_related)
+CONTEXT_NOTE_FIELDS = ["id", "transcript", "created_at", "updated_at", "box__name"]
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Formata um evento Server-Sent Events."""
+    payload = json.dumps(data, ensure_ascii=False, cls=DjangoJSONEncoder)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def _wants_stream(request: "Request", validated_data: Dict[str, Any]) -> bool:
+    """Verifica se o cliente pediu resposta em streaming (body ou ?stream=true)."""
+    if validated_data.get("stream"):
+        return True
+    return request.query_params.get("stream", "false").lower() == "true"
+
+
+def _stream_answer_response(
+    request: "Request",
+    query_service: QueryService,
+    question: str,
+    notes_data: List[Dict[str, Any]],
+    workspace_id: str,
+    box_id: str | None = None,
+    on_complete: Callable[[str, List[Dict[str, Any]]], Dict[str, Any]] | None = None,
+    history: List[Dict[str, str]] | None = None,
+) -> StreamingHttpResponse:
+    """Resposta da IA em streaming (SSE), token a token.
+
+    Eventos enviados:
+    - ``sources``: notas que entraram no contexto
+    - ``token``: {"delta": "trecho"} conforme o modelo gera
+    - ``done``: {"answer": "resposta completa", ...retorno de on_complete}
+    - ``error``: {"error": "mensagem"}
+
+    Sob ASGI usa o cliente assíncrono (a geração não ocupa uma thread/worker);
+    sob WSGI usa um gerador síncrono.
+
+    Args:
+        request: Requisição DRF
+        query_service: Serviço de consulta
+        question: Pergunta do usuário
+        notes_data: Notas no formato de ``QueryService.query``
+        workspace_id: ID do workspace (escopo do cache de respostas)
+        box_id: ID da caixinha (escopo do cache de respostas)
+        on_complete: Chamado (síncrono) com (resposta, fontes) ao fim do stream,
+            para persistir o resultado; o dict retornado vai no evento ``done``
+        history: Conversa anterior da thread (com histórico, sem cache de respostas)
+    """
+    answer_cache = None if history else AnswerCache(workspace_id, box_id)
+    cached = answer_cache.get(question, notes_data) if answer_cache and notes_data else None
+    prompt = None
+    if cached is not None:
+        sources = cached["sources"]
+    elif notes_data:
+        prompt = query_service.build_messages(question, notes_data, history=history)
+        sources = prompt["sources"]
+    else:
+        sources = []
+    # Sem chamada ao LLM (cache ou sem notas): resposta enviada como um único token
+    fixed_answer = cached["answer"] if cached is not None else NO_NOTES_ANSWER
+    started = time.perf_counter()
+
+    def finish(parts: List[str]) -> str:
+        answer = "".join(parts) or "Não foi possível gerar resposta."
+        if prompt is not None and answer_cache:
+            answer_cache.set(
+                question,
+                notes_data,
+                {"answer": answer, "sources": sources},
+                (time.perf_counter() - started) * 1000,
+            )
+        extra = on_complete(answer, sources) if on_complete else {}
+        return _sse_event("done", {"answer": answer, "cached": cached is not None, **extra})
+
+    if isinstance(request._request, ASGIRequest):
+        async def events():
+            yield _sse_event("sources", {"sources": sources})
+            parts: List[str] = []
+            try:
+                if prompt is None:
+                    parts.append(fixed_answer)
+                    yield _sse_event("token", {"delta": fixed_answer})
+                else:
+                    async for delta in query_service.astream(prompt["messages"]):
+                        parts.append(delta)
+                        yield _sse_event("token", {"delta": delta})
+                yield await sync_to_async(finish)(parts)
+            except Exception as e:
+                yield _sse_event("error", {"error": f"Erro ao consultar IA: {str(e)}"})
+    else:
+        def events():
+            yield _sse_event("sources", {"sources": sources})
+            parts: List[str] = []
+            try:
+                deltas = query_service.stream(prompt["messages"]) if prompt else [fixed_answer]
+                for delta in deltas:
+                    parts.append(delta)
+                    yield _sse_event("token", {"delta": delta})
+                yield finish(parts)
+            except Exception as e:
+                yield _sse_event("error", {"error": f"Erro ao consultar IA: {str(e)}"})
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _annotate_thread_list(queryset: models.QuerySet[Thread]) -> models.QuerySet[Thread]:
+    """Anota os campos do ThreadListSerializer (última mensagem e contagem)."""
+    thread_messages = ThreadMessage.objects.filter(thread=OuterRef("pk")).order_by()
+    return queryset.annotate(
+        last_message_content=Subquery(
+            thread_messages.order_by("-created_at").values(preview=Substr("content", 1, 101))[:1]
+        ),
+        messages_count=Coalesce(
+            Subquery(thread_messages.values("thread").annotate(total=Count("id")).values("total")),
+            0,
+        ),
+    )
+
+
+def _summarize_box_response(box: Box) -> Response:
+    """Atualiza a árvore de resumos da caixinha e monta a resposta da API."""
+    summary_service = BoxSummaryService()
+    if not summary_service.is_available():
+        return Response(
+            {"error": "Serviço de consulta não disponível"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    try:
+        result = summary_service.summarize_box(box)
+    except Exception as e:
+        return Response(
+            {"error": f"Erro ao gerar resumo: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+    if not result["summary"]:
+        return Response(
+            {"error": "Nenhuma nota encontrada na caixinha"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return Response(
+        {
+            "summary": result["summary"],
+            "sources": [],
+            "cached": result["cached"],
+            "note_count": result["note_count"],
+        },
+        status=status.HTTP_200_OK,
+    )
+
 
 class BoxViewSet(WorkspaceViewSet):
     """ViewSet para caixinhas."""
@@ -56,61 +251,9 @@ class BoxViewSet(WorkspaceViewSet):
 
     @action(detail=True, methods=["post"], url_path="summarize")
     def summarize_box(self, request: "Request", pk: str | None = None) -> Response:
-        """Gera resumo de caixinha."""
-        from apps.bau_mental.services.query import QueryService
-
+        """Gera resumo de caixinha (incremental: só recalcula ramos alterados)."""
         box = self.get_object()
-        workspace = box.workspace
-
-        # Buscar todas as notas da caixinha
-        notes = Note.objects.filter(
-            workspace=workspace,
-            box=box,
-            processing_status="completed",
-            transcript__isnull=False,
-        ).exclude(transcript="")
-
-        if not notes.exists():
-            return Response(
-                {"error": "Nenhuma nota encontrada na caixinha"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Preparar dados
-        notes_data = [
-            {
-                "id": str(note.id),
-                "transcript": note.transcript or "",
-                "created_at": note.created_at.strftime("%d/%m/%Y"),
-                "box_name": box.name,
-            }
-            for note in notes[:50]  # Limitar a 50 notas
-        ]
-
-        # Consultar IA para gerar resumo
-        query_service = QueryService()
-        if not query_service.is_available():
-            return Response(
-                {"error": "Serviço de consulta não disponível"},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE,
-            )
-
-        try:
-            question = f"Faça um resumo completo e organizado de tudo que foi discutido ou mencionado sobre '{box.name}'. Inclua pontos principais, decisões, ideias e contexto temporal quando relevante."
-            result = query_service.query(question, notes_data, str(workspace.id))
-
-            return Response(
-                {
-                    "summary": result["answer"],
-                    "sources": result.get("sources", []),
-                },
-                status=status.HTTP_200_OK,
-            )
-        except Exception as e:
-            return Response(
-                {"error": f"Erro ao gerar resumo: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return _summarize_box_response(box)
 
     def get_serializer_class(self) -> type[BoxSerializer | BoxListSerializer]:
         """Retorna serializer apropriado para a ação."""
@@ -134,10 +277,14 @@ class BoxViewSet(WorkspaceViewSet):
         notes_count = notes_to_delete.count()
 
         if notes_count > 0:
-            notes_to_delete.update(deleted_at=timezone.now())
+            now = timezone.now()
+            notes_to_delete.update(deleted_at=now, updated_at=now)
 
-        # Soft delete da caixinha
-        instance.soft_delete()
+        # Soft delete da caixinha (UPDATE em massa não passa pelo Note.save:
+        # zerar o contador junto)
+        instance.deleted_at = timezone.now()
+        instance.note_count = 0
+        instance.save(update_fields=["deleted_at", "note_count"])
 
     @action(detail=True, methods=["post"], url_path="share")
     def share_box(self, request: "Request", pk: str | None = None) -> Response:
@@ -172,7 +319,7 @@ class BoxViewSet(WorkspaceViewSet):
                 if not created:
                     # Atualizar permissão se já existe
                     share.permission = permission
-                    share.save(update_fields=["permission"])
+                    share.save(update_fields=["permission", "updated_at"])
 
                 response_serializer = BoxShareSerializer(share, context={"request": request})
                 return Response(response_serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
@@ -199,7 +346,7 @@ class BoxViewSet(WorkspaceViewSet):
                 )
                 if not created:
                     share.permission = permission
-                    share.save(update_fields=["permission"])
+                    share.save(update_fields=["permission", "updated_at"])
 
                 response_serializer = BoxShareSerializer(share, context={"request": request})
                 return Response(response_serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
@@ -273,7 +420,7 @@ class BoxViewSet(WorkspaceViewSet):
                     {"error": "Permissão inválida"}, status=status.HTTP_400_BAD_REQUEST
                 )
             share.permission = permission
-            share.save(update_fields=["permission"])
+            share.save(update_fields=["permission", "updated_at"])
             serializer = BoxShareSerializer(share, context={"request": request})
             return Response(serializer.data)
         except BoxShare.DoesNotExist:
@@ -289,9 +436,29 @@ class NoteViewSet(WorkspaceViewSet):
     serializer_class = NoteSerializer
     permission_classes = [IsAuthenticated, WorkspaceObjectPermission]
 
-    filter_backends = [filters.OrderingFilter]  # Removido SearchFilter, usando busca customizada
-    ordering_fields = ["created_at", "updated_at"]
-    ordering = ["-created_at"]
+    # Ordenação fixa pela paginação keyset: (created_at, id) ou relevância na busca
+    filter_backends: list = []  # Removido SearchFilter, usando busca customizada
+    pagination_class = KeysetPagination
+
+    # Colunas carregadas na listagem (NoteListSerializer)
+    list_fields = [
+        "id",
+        "box__name",
+        "transcript",
+        "source_type",
+        "processing_status",
+        "ai_confidence",
+        "duration_seconds",
+        "created_at",
+    ]
+
+    @property
+    def keyset_ordering(self) -> List[tuple[str, bool]] | None:
+        """Com ?search=, pagina por relevância (search_rank, id)."""
+        search_query = self.request.query_params.get("search", "")
+        if search_query.strip() and self.action == "list":
+            return [("search_rank", True), ("id", True)]
+        return None
 
     def get_serializer_class(self) -> type[NoteSerializer | NoteListSerializer]:
         """Retorna serializer apropriado para a ação."""
@@ -330,28 +497,14 @@ class NoteViewSet(WorkspaceViewSet):
         if status_param:
             queryset = queryset.filter(processing_status=status_param)
 
-        # Busca full-text usando websearch_to_tsquery (APLICAR DEPOIS do filtro de box)
+        # Busca full-text + trigram (APLICAR DEPOIS do filtro de box)
         search_query = self.request.query_params.get("search")
-        if search_query:
-            try:
-                from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
-                from django.db.models import F
-
-                # Usar websearch_to_tsquery para sintaxe natural
-                tsquery = SearchQuery(search_query, config='portuguese', search_type='websearch')
-                search_vector = SearchVector('search_vector', config='portuguese')
-
-                queryset = queryset.annotate(
-                    rank=SearchRank(search_vector, tsquery)
-                ).filter(
-                    search_vector=tsquery
-                ).order_by('-rank', '-created_at')
-            except Exception as e:
-                # Fallback para busca simples se PostgreSQL não suportar
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.warning(f"Full-text search não disponível, usando fallback: {e}")
-                queryset = queryset.filter(transcript__icontains=search_query)
+        if search_query and search_query.strip() and self.action == "list":
+            queryset = search_filter(queryset, search_query)
+
+        # Projeção da lista: caixinha no mesmo SELECT e só as colunas do serializer
+        if self.action == "list":
+            queryset = queryset.select_related("box").only(*self.list_fields)
 
         return queryset
 
@@ -360,11 +513,15 @@ class NoteViewSet(WorkspaceViewSet):
         from django.utils import timezone
 
         # Atualizar rastreabilidade
-        serializer.save(
+        note = serializer.save(
             last_edited_by=self.request.user,
             last_edited_at=timezone.now(),
         )
 
+        # Transcrição editada: reindexar embedding
+        if "transcript" in serializer.validated_data:
+            index_note_embedding.delay(str(note.id))
+
     @action(
         detail=False,
         methods=["post"],
@@ -458,6 +615,183 @@ class NoteViewSet(WorkspaceViewSet):
         # Frontend deve converter blob para File antes de enviar
         return self.upload_audio(request)
 
+    def _direct_upload_context(self, request: "Request"):
+        """Workspace e storage de áudio para os endpoints de upload direto.
+
+        Raises:
+            ValidationError: Sem workspace ou com storage local (sem R2)
+        """
+        from rest_framework.exceptions import ValidationError
+
+        workspace = get_or_create_workspace_for_user(request)
+        if not workspace:
+            workspace_id = request.headers.get("X-Workspace-ID", "").strip()
+            raise ValidationError(
+                {
+                    "workspace": (
+                        f"Workspace é obrigatório. Configure o header X-Workspace-ID ou associe um workspace ao usuário. "
+                        f"Header recebido: '{workspace_id}'"
+                    )
+                }
+            )
+
+        storage = Note._meta.get_field("audio_file").storage
+        if not getattr(storage, "supports_direct_upload", False):
+            raise ValidationError(
+                {"error": "Upload direto indisponível (R2 não configurado). Use /notes/upload/."}
+            )
+        return workspace, storage
+
+    def _validate_upload_key(self, key: str, workspace: "Workspace") -> None:
+        """Garante que a chave do upload pertence ao workspace (sem path traversal)."""
+        from rest_framework.exceptions import ValidationError
+
+        prefix = f"bau_mental/audios/{workspace.id}/"
+        if not key.startswith(prefix) or ".." in key.split("/") or "//" in key:
+            raise ValidationError({"key": "Chave de upload inválida para este workspace"})
+        validate_audio_filename(key)
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="upload/initiate",
+        throttle_classes=[BauMentalUploadThrottle],
+    )
+    def initiate_upload(self, request: "Request") -> Response:
+        """Inicia upload direto ao R2 (multipart com URLs pré-assinadas).
+
+        O cliente envia cada parte (PUT) na URL correspondente, guarda o ETag
+        retornado e chama /notes/upload/complete/. Os bytes do áudio não passam
+        pelo servidor de aplicação.
+
+        Rate limit: 10 uploads/hora por workspace.
+        """
+        workspace, storage = self._direct_upload_context(request)
+        serializer = NoteUploadInitiateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Mesmo nome que o FileField geraria (upload_to + limite de tamanho)
+        field = Note._meta.get_field("audio_file")
+        key = storage.get_available_name(
+            field.generate_filename(Note(workspace_id=workspace.id), serializer.validated_data["filename"]),
+            max_length=field.max_length,
+        )
+        size = serializer.validated_data["size"]
+        part_count = max(1, math.ceil(size / DIRECT_UPLOAD_PART_SIZE))
+        upload_id = storage.create_multipart_upload(
+            key, serializer.validated_data.get("content_type") or None
+        )
+        parts = storage.presign_upload_parts(key, upload_id, part_count, DIRECT_UPLOAD_URL_EXPIRES)
+
+        return Response(
+            {
+                "key": key,
+                "upload_id": upload_id,
+                "part_size": DIRECT_UPLOAD_PART_SIZE,
+                "parts": parts,
+                "expires_in": DIRECT_UPLOAD_URL_EXPIRES,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["post"], url_path="upload/complete")
+    def complete_upload(self, request: "Request") -> Response:
+        """Conclui upload direto, cria a anotação e dispara a transcrição.
+
+        Idempotente: se a anotação da chave já existe, ela é retornada. As
+        conclusões do workspace são serializadas (lock na linha do workspace),
+        então um retry concorrente não cria uma segunda nota; um retry depois
+        de o R2 já ter concluído o upload (NoSuchUpload) segue se o objeto existe.
+        """
+        import logging
+        from rest_framework.exceptions import ValidationError
+
+        from apps.accounts.models import Workspace
+
+        logger = logging.getLogger("apps.bau_mental")
+
+        workspace, storage = self._direct_upload_context(request)
+        serializer = NoteUploadCompleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        key = data["key"]
+        self._validate_upload_key(key, workspace)
+
+        with transaction.atomic():
+            # FOR NO KEY UPDATE: não bloqueia a criação de outras notas do workspace
+            Workspace.objects.select_for_update(no_key=True).filter(id=workspace.id).exists()
+
+            existing = Note.all_objects.filter(workspace=workspace, audio_file=key).first()
+            if existing:
+                return Response(
+                    NoteSerializer(existing, context={"request": request}).data,
+                    status=status.HTTP_200_OK,
+                )
+
+            try:
+                try:
+                    storage.complete_multipart_upload(key, data["upload_id"], data["parts"])
+                except Exception as e:
+                    # Upload já concluído por uma chamada anterior
+                    error_code = getattr(e, "response", {}).get("Error", {}).get("Code")
+                    if error_code != "NoSuchUpload" or not storage.exists(key):
+                        raise
+                size = storage.size(key)
+            except Exception as e:
+                logger.error(f"[UPLOAD] Erro ao concluir upload direto {key}: {str(e)}", exc_info=True)
+                raise ValidationError({"error": "Não foi possível concluir o upload"})
+
+            try:
+                validate_audio_size(size)
+            except ValidationError:
+                storage.delete(key)
+                raise
+
+            box = None
+            if data.get("box_id"):
+                box = Box.objects.filter(id=data["box_id"], workspace=workspace).first()
+
+            note, created = Note.all_objects.get_or_create(
+                workspace=workspace,
+                audio_file=key,
+                defaults={
+                    "box": box,
+                    "file_size_bytes": size,
+                    "source_type": data.get("source_type", "memo"),
+                    "processing_status": "pending",
+                    "created_by": request.user,
+                },
+            )
+
+        if not created:
+            return Response(
+                NoteSerializer(note, context={"request": request}).data,
+                status=status.HTTP_200_OK,
+            )
+        logger.info(f"[UPLOAD] Note criada via upload direto: id={note.id}, {size} bytes")
+
+        transcribe_audio.delay(str(note.id))
+
+        return Response(
+            NoteSerializer(note, context={"request": request}).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["post"], url_path="upload/abort")
+    def abort_upload(self, request: "Request") -> Response:
+        """Cancela upload direto (descarta partes já enviadas)."""
+        workspace, storage = self._direct_upload_context(request)
+        serializer = NoteUploadAbortSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        key = serializer.validated_data["key"]
+        self._validate_upload_key(key, workspace)
+
+        try:
+            storage.abort_multipart_upload(key, serializer.validated_data["upload_id"])
+        except Exception:
+            pass  # Upload já concluído/cancelado ou expirado
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=False, methods=["post"], url_path="create-text")
     def create_text_note(self, request: "Request") -> Response:
         """Cria nota a partir de texto (sem áudio).
@@ -501,6 +835,9 @@ class NoteViewSet(WorkspaceViewSet):
         # Disparar classificação se não tiver caixinha
         if not box:
             classify_note.delay(str(note.id))
+        else:
+            update_classifier(workspace.id, text, add_box_id=box.id)
+        index_note_embedding.delay(str(note.id))
 
         response_serializer = NoteSerializer(note, context={"request": request})
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
@@ -594,10 +931,11 @@ class NoteViewSet(WorkspaceViewSet):
                 )
                 notes_created.append(note)
 
-        # Disparar classificação para notas sem caixinha
+        # Disparar classificação para notas sem caixinha e indexação semântica
         for note in notes_created:
             if not note.box:
                 classify_note.delay(str(note.id))
+            index_note_embedding.delay(str(note.id))
 
         # Retornar primeira nota (ou todas se necessário)
         if len(notes_created) == 1:
@@ -612,6 +950,45 @@ class NoteViewSet(WorkspaceViewSet):
                 status=status.HTTP_201_CREATED,
             )
 
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request: "Request") -> Response:
+        """Busca notas (full-text + tolerante a erros) com trechos destacados.
+
+        Query params: q (obrigatório), cursor, page_size (máx. 100), box, inbox.
+        Resposta paginada por cursor: {"results": [...], "next": url ou null}.
+        """
+        query = (request.query_params.get("q") or "").strip()
+        if not query:
+            return Response(
+                {"error": "Parâmetro q é obrigatório"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            page_size = min(int(request.query_params.get("page_size", SEARCH_PAGE_SIZE)), 100)
+        except ValueError:
+            page_size = SEARCH_PAGE_SIZE
+
+        results, next_cursor = search_notes(
+            self.get_queryset(), query, cursor=request.query_params.get("cursor"), limit=max(page_size, 1)
+        )
+        next_url = None
+        if next_cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), "cursor", next_cursor)
+        return Response(
+            {"results": NoteSearchResultSerializer(results, many=True).data, "next": next_url},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=["get"], url_path="classification-stats")
+    def classification_stats(self, request: "Request") -> Response:
+        """Onde as classificações foram resolvidas (heurística, modelo local, IA) e tempo economizado."""
+        workspace = getattr(request, "workspace", None)
+        if not workspace:
+            return Response(
+                {"error": "Workspace não disponível"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(get_classification_stats(workspace.id), status=status.HTTP_200_OK)
+
     @action(detail=True, methods=["post"], url_path="move")
     def move_to_box(self, request: "Request", pk: str | None = None) -> Response:
         """Move anotação para outra caixinha."""
@@ -632,6 +1009,9 @@ class NoteViewSet(WorkspaceViewSet):
         serializer = NoteMoveSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
 
+        # Caixinha anterior, se já contava como escolha do usuário no classificador local
+        previous_box_id = note.box_id if is_confirmed(note) else None
+
         box_id = serializer.validated_data.get("box_id")
         if box_id:
             try:
@@ -645,11 +1025,58 @@ class NoteViewSet(WorkspaceViewSet):
             # Mover para inbox
             note.box = None
 
-        note.save(update_fields=["box"])
+        # Caixinha escolhida pelo usuário: sai do lote pendente da IA e treina o classificador local
+        metadata = dict(note.metadata or {})
+        metadata.pop(PENDING_FLAG, None)
+        if note.box_id:
+            metadata["box_confirmed"] = True
+        else:
+            metadata.pop("box_confirmed", None)
+        note.metadata = metadata
+        note.save(update_fields=["box", "metadata"])
+        if note.transcript:
+            update_classifier(
+                workspace.id, note.transcript, add_box_id=note.box_id, remove_box_id=previous_box_id
+            )
 
         response_serializer = NoteSerializer(note, context={"request": request})
         return Response(response_serializer.data)
 
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request: "Request") -> Response:
+        """Move, exclui, restaura ou reclassifica várias anotações de uma vez.
+
+        Body: {"operation": "move" | "delete" | "restore" | "reclassify",
+        "note_ids": [...], "box_id": "..." (só move; null = inbox)}.
+        Retorna o resultado de cada ID ("ok", "unchanged", "not_found" ou
+        "no_transcript").
+        """
+        workspace = get_or_create_workspace_for_user(request)
+        if not workspace:
+            return Response(
+                {"error": "Workspace não disponível"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = NoteBulkSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        operation = serializer.validated_data["operation"]
+        note_ids = serializer.validated_data["note_ids"]
+
+        outcome = apply_bulk_operation(
+            workspace.id, note_ids, operation, box_id=serializer.validated_data.get("box_id")
+        )
+        return Response(
+            {
+                "operation": operation,
+                "updated": outcome["updated"],
+                "results": [
+                    {"id": str(note_id), "status": outcome["results"][str(note_id)]}
+                    for note_id in note_ids
+                ],
+            },
+            status=status.HTTP_200_OK,
+        )
+
     @action(detail=False, methods=["post"], url_path="summarize")
     def summarize_notes(self, request: "Request") -> Response:
         """Gera resumo de múltiplas notas."""
@@ -669,12 +1096,17 @@ class NoteViewSet(WorkspaceViewSet):
             )
 
         # Buscar notas
-        notes = Note.objects.filter(
-            id__in=note_ids,
-            workspace=workspace,
-            processing_status="completed",
-            transcript__isnull=False,
-        ).exclude(transcript="")
+        notes = (
+            Note.objects.filter(
+                id__in=note_ids,
+                workspace=workspace,
+                processing_status="completed",
+                transcript__isnull=False,
+            )
+            .exclude(transcript="")
+            .select_related("box")
+            .only(*CONTEXT_NOTE_FIELDS)
+        )
 
         if not notes.exists():
             return Response(
@@ -688,6 +1120,7 @@ class NoteViewSet(WorkspaceViewSet):
                 "id": str(note.id),
                 "transcript": note.transcript or "",
                 "created_at": note.created_at.strftime("%d/%m/%Y"),
+                "updated_at": note.updated_at.isoformat(),
                 "box_name": note.box.name if note.box else "Inbox",
             }
             for note in notes
@@ -745,41 +1178,39 @@ class QueryViewSet(viewsets.ViewSet):
                 {"error": "Workspace não disponível"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        notes_queryset = Note.objects.filter(
-            workspace=workspace,
-            processing_status="completed",
-            transcript__isnull=False,
-        ).exclude(transcript="")
+        notes_queryset = (
+            Note.objects.filter(
+                workspace=workspace,
+                processing_status="completed",
+                transcript__isnull=False,
+            )
+            .exclude(transcript="")
+            .select_related("box")
+            .only(*CONTEXT_NOTE_FIELDS)
+        )
 
         # Filtrar por caixinha PRIMEIRO (conforme PRD)
         if box_id:
             notes_queryset = notes_queryset.filter(box_id=box_id)
 
-        # Busca full-text usando websearch_to_tsquery
-        try:
-            from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
-
-            # Usar websearch_to_tsquery para sintaxe natural
-            tsquery = SearchQuery(question, config='portuguese', search_type='websearch')
-            search_vector = SearchVector('search_vector', config='portuguese')
-
-            notes_queryset = notes_queryset.annotate(
-                rank=SearchRank(search_vector, tsquery)
-            ).filter(
-                search_vector=tsquery
-            ).order_by('-rank')[:limit]
+        # Busca semântica no índice vetorial (encontra paráfrases)
+        notes_list = semantic_notes(notes_queryset, str(workspace.id), question, k=limit)
 
-            notes_list = list(notes_queryset)
-        except Exception as e:
-            # Fallback para busca simples se PostgreSQL não suportar
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Full-text search não disponível, usando fallback: {e}")
-            # Fallback: busca simples
-            notes_list = list(notes_queryset.filter(transcript__icontains=question)[:limit])
-            if not notes_list:
-                # Se ainda não encontrou, retornar últimas anotações
-                notes_list = list(notes_queryset[:limit])
+        # Busca full-text usando websearch_to_tsquery (fallback sem índice vetorial)
+        if not notes_list:
+            try:
+                # Full-text (+ trigram) sobre search_vector, mais relevantes primeiro
+                notes_list = list(search_filter(notes_queryset, question).order_by("-search_rank")[:limit])
+            except Exception as e:
+                # Fallback para busca simples se PostgreSQL não suportar
+                import logging
+                logger = logging.getLogger(__name__)
+                logger.warning(f"Full-text search não disponível, usando fallback: {e}")
+                # Fallback: busca simples
+                notes_list = list(notes_queryset.filter(transcript__icontains=question)[:limit])
+                if not notes_list:
+                    # Se ainda não encontrou, retornar últimas anotações
+                    notes_list = list(notes_queryset[:limit])
 
         # Preparar dados para serviço
         notes_data = [
@@ -787,7 +1218,9 @@ class QueryViewSet(viewsets.ViewSet):
                 "id": str(note.id),
                 "transcript": note.transcript,
                 "created_at": note.created_at.strftime("%d/%m/%Y"),
+                "updated_at": note.updated_at.isoformat(),
                 "box_name": note.box.name if note.box else "Inbox",
+                "score": getattr(note, "semantic_score", None) or getattr(note, "search_rank", None),
             }
             for note in notes_list
         ]
@@ -800,8 +1233,13 @@ class QueryViewSet(viewsets.ViewSet):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
+        if _wants_stream(request, serializer.validated_data):
+            return _stream_answer_response(
+                request, query_service, question, notes_data, str(workspace.id), box_id
+            )
+
         try:
-            result = query_service.query(question, notes_data, str(workspace.id))
+            result = query_service.query(question, notes_data, str(workspace.id), box_id)
             return Response(result, status=status.HTTP_200_OK)
         except Exception as e:
             return Response(
@@ -809,6 +1247,17 @@ class QueryViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    @action(detail=False, methods=["get"], url_path="cache-stats")
+    def cache_stats(self, request: "Request") -> Response:
+        """Estatísticas do cache de respostas do workspace (hits, misses, tempo economizado)."""
+        workspace = getattr(request, "workspace", None)
+        if not workspace:
+            return Response(
+                {"error": "Workspace não disponível"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(AnswerCache(str(workspace.id)).stats(), status=status.HTTP_200_OK)
+
     @action(detail=False, methods=["post"], url_path="transcribe")
     def transcribe(self, request: "Request") -> Response:
         """Transcreve áudio sem criar nota (para perguntas).
@@ -893,10 +1342,13 @@ class ThreadViewSet(WorkspaceViewSet):
     serializer_class = ThreadSerializer
     permission_classes = [IsAuthenticated, WorkspaceObjectPermission]
 
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.SearchFilter]
     search_fields = ["title"]
-    ordering_fields = ["last_message_at", "created_at"]
-    ordering = ["-last_message_at"]
+    # Paginação keyset na ordem da lista (conversa mais recente primeiro)
+    pagination_class = KeysetPagination
+    keyset_ordering = [("last_message_at", True), ("id", True)]
+    # Colunas carregadas na listagem (ThreadListSerializer)
+    list_fields = ["id", "title", "box__name", "is_global", "last_message_at", "created_at"]
 
     def get_serializer_class(self) -> type[ThreadSerializer | ThreadListSerializer | ThreadCreateSerializer]:
         """Retorna serializer apropriado para a ação."""
@@ -920,6 +1372,10 @@ class ThreadViewSet(WorkspaceViewSet):
         if is_global == "true":
             queryset = queryset.filter(is_global=True)
 
+        # Projeção da lista: última mensagem e contagem como subqueries (sem N+1)
+        if self.action == "list":
+            queryset = _annotate_thread_list(queryset.select_related("box").only(*self.list_fields))
+
         return queryset
 
     def create(self, request: "Request", *args, **kwargs) -> Response:
@@ -932,22 +1388,57 @@ class ThreadViewSet(WorkspaceViewSet):
         output_serializer = ThreadSerializer(thread, context={"request": request})
         return Response(output_serializer.data, status=status.HTTP_201_CREATED)
 
+    def _save_assistant_message(
+        self, thread: Thread, content: str, answer: str, sources: List[Dict[str, Any]]
+    ) -> ThreadMessage:
+        """Persiste a resposta da IA na thread e atualiza título/última mensagem."""
+        from django.utils import timezone
+
+        assistant_message = ThreadMessage.objects.create(
+            workspace=thread.workspace,
+            thread=thread,
+            role="assistant",
+            content=answer,
+            created_by=None,  # IA não tem usuário
+        )
+
+        # Adicionar notas referenciadas
+        if sources:
+            source_note_ids = [source["note_id"] for source in sources]
+            notes = Note.objects.filter(id__in=source_note_ids, workspace=thread.workspace)
+            assistant_message.notes_referenced.set(notes)
+
+        # Mensagens que saíram da janela recente entram no resumo da conversa
+        transaction.on_commit(lambda: update_thread_memory.delay(str(thread.id)))
+
+        # Atualizar last_message_at da thread
+        thread.last_message_at = timezone.now()
+
+        # Se o título ainda é "Nova conversa", atualizar com a primeira mensagem
+        if thread.title == "Nova conversa" or not thread.title:
+            thread.title = content[:50] if len(content) > 50 else content
+            thread.save(update_fields=["last_message_at", "title"])
+        else:
+            thread.save(update_fields=["last_message_at"])
+
+        return assistant_message
+
     @action(detail=True, methods=["get", "post"], url_path="messages")
     def messages(self, request: "Request", pk: str | None = None) -> Response:
         """Lista mensagens (GET) ou adiciona mensagem (POST) à thread."""
         thread = self.get_object()
         
-        # Se for GET, retornar lista de mensagens
+        # Se for GET, retornar mensagens paginadas (mais recentes primeiro)
         if request.method == "GET":
-            messages = thread.messages.order_by("created_at")
+            messages = thread.messages.select_related("created_by").prefetch_related("notes_referenced")
+            paginator = KeysetPagination()
+            page = paginator.paginate_queryset(messages, request)
             serializer = ThreadMessageSerializer(
-                messages, many=True, context={"request": request}
+                page, many=True, context={"request": request}
             )
-            return Response(serializer.data)
+            return paginator.get_paginated_response(serializer.data)
         
         # Se for POST, adicionar mensagem
-        from django.utils import timezone
-
         serializer = ThreadMessageCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -969,11 +1460,16 @@ class ThreadViewSet(WorkspaceViewSet):
             user_message.notes_referenced.set(notes)
 
         # Buscar notas relevantes para contexto
-        notes_queryset = Note.objects.filter(
-            workspace=thread.workspace,
-            processing_status="completed",
-            transcript__isnull=False,
-        ).exclude(transcript="")
+        notes_queryset = (
+            Note.objects.filter(
+                workspace=thread.workspace,
+                processing_status="completed",
+                transcript__isnull=False,
+            )
+            .exclude(transcript="")
+            .select_related("box")
+            .only(*CONTEXT_NOTE_FIELDS)
+        )
 
         # Filtrar por contexto da thread (FILTRAR PRIMEIRO conforme PRD)
         box_id_for_query = None
@@ -984,9 +1480,14 @@ class ThreadViewSet(WorkspaceViewSet):
             notes_queryset = notes_queryset.filter(box__in=thread.boxes.all())
         # Se is_global, não filtrar por caixinha
 
-        # Buscar TODAS as notas (não limitar aqui, QueryService decide contexto completo vs reduzido)
-        # Ordenar por created_at (mais antiga primeiro) - ordem cronológica
-        notes_list = list(notes_queryset.order_by('created_at'))
+        # Busca semântica: carregar apenas as k notas mais relevantes do escopo
+        notes_list = semantic_notes(
+            notes_queryset, str(thread.workspace_id), content, k=THREAD_CONTEXT_NOTES
+        )
+        if not notes_list:
+            # Sem índice vetorial: todas as notas do escopo, mais recentes primeiro
+            # (QueryService seleciona os trechos que cabem no orçamento de tokens)
+            notes_list = list(notes_queryset.order_by('-created_at'))
 
         # Preparar dados para QueryService
         notes_data = [
@@ -994,12 +1495,17 @@ class ThreadViewSet(WorkspaceViewSet):
                 "id": str(note.id),
                 "transcript": note.transcript or "",
                 "created_at": note.created_at.strftime("%d/%m/%Y"),
+                "updated_at": note.updated_at.isoformat(),
                 "box_name": note.box.name if note.box else "Inbox",
+                "score": getattr(note, "semantic_score", None),
             }
             for note in notes_list
         ]
 
-        # Consultar IA (QueryService decide contexto completo vs reduzido)
+        # Memória da conversa: resumo das mensagens antigas + últimas trocas
+        history = build_history(thread, exclude_message_id=user_message.id)
+
+        # Consultar IA (QueryService empacota o contexto no orçamento de tokens)
         query_service = QueryService()
         if not query_service.is_available():
             return Response(
@@ -1007,48 +1513,39 @@ class ThreadViewSet(WorkspaceViewSet):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
-        try:
-            result = query_service.query(content, notes_data, str(thread.workspace.id), box_id_for_query)
+        def save_answer(answer: str, sources: List[Dict[str, Any]]) -> Dict[str, Any]:
+            """Persiste a resposta da IA e monta o payload com as duas mensagens."""
+            assistant_message = self._save_assistant_message(thread, content, answer, sources)
+            return {
+                "user_message": ThreadMessageSerializer(
+                    user_message, context={"request": request}
+                ).data,
+                "assistant_message": ThreadMessageSerializer(
+                    assistant_message, context={"request": request}
+                ).data,
+            }
 
-            # Criar mensagem da IA
-            assistant_message = ThreadMessage.objects.create(
-                workspace=thread.workspace,
-                thread=thread,
-                role="assistant",
-                content=result["answer"],
-                created_by=None,  # IA não tem usuário
+        # Streaming: mensagem da IA é persistida quando o stream termina
+        if _wants_stream(request, serializer.validated_data):
+            return _stream_answer_response(
+                request,
+                query_service,
+                content,
+                notes_data,
+                str(thread.workspace_id),
+                box_id_for_query,
+                on_complete=save_answer,
+                history=history,
             )
 
-            # Adicionar notas referenciadas
-            if result.get("sources"):
-                source_note_ids = [
-                    source["note_id"] for source in result["sources"]
-                ]
-                notes = Note.objects.filter(
-                    id__in=source_note_ids, workspace=thread.workspace
-                )
-                assistant_message.notes_referenced.set(notes)
-
-            # Atualizar last_message_at da thread
-            thread.last_message_at = timezone.now()
-            
-            # Se o título ainda é "Nova conversa", atualizar com a primeira mensagem
-            if thread.title == "Nova conversa" or not thread.title:
-                thread.title = content[:50] if len(content) > 50 else content
-                thread.save(update_fields=["last_message_at", "title"])
-            else:
-                thread.save(update_fields=["last_message_at"])
+        try:
+            result = query_service.query(
+                content, notes_data, str(thread.workspace.id), box_id_for_query, history=history
+            )
 
             # Retornar ambas as mensagens
             return Response(
-                {
-                    "user_message": ThreadMessageSerializer(
-                        user_message, context={"request": request}
-                    ).data,
-                    "assistant_message": ThreadMessageSerializer(
-                        assistant_message, context={"request": request}
-                    ).data,
-                },
+                save_answer(result["answer"], result.get("sources", [])),
                 status=status.HTTP_201_CREATED,
             )
         except Exception as e:
@@ -1074,6 +1571,57 @@ class ThreadViewSet(WorkspaceViewSet):
         return Response(serializer.data)
 
 
+class SyncViewSet(viewsets.ViewSet):
+    """Sincronização incremental para os clientes (só o que mudou desde o cursor)."""
+
+    permission_classes = [IsAuthenticated]
+
+    # Fonte → (serializer, tipo nas exclusões)
+    SERIALIZERS = {
+        "notes": (NoteListSerializer, "note"),
+        "boxes": (BoxListSerializer, "box"),
+        "threads": (ThreadListSerializer, "thread"),
+        "box_shares": (BoxShareSerializer, "box_share"),
+    }
+
+    def list(self, request: "Request") -> Response:
+        """Alterações desde ``?since=<cursor>`` (sem cursor: estado completo).
+
+        Resposta: linhas novas/alteradas por tipo, ``deleted`` com
+        {"type", "id"} das excluídas, ``cursor`` para a próxima chamada e
+        ``has_more`` (chamar de novo com o cursor até ser False).
+        """
+        workspace = getattr(request, "workspace", None)
+        if not workspace:
+            return Response(
+                {"error": "Workspace não disponível"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        sources = workspace_sources(workspace.id)
+        threads, time_field = sources["threads"]
+        sources["threads"] = (_annotate_thread_list(threads), time_field)
+        result = collect_changes(sources, request.query_params.get("since"))
+
+        changes = result["changes"]
+        context = {"request": request}
+        data: Dict[str, Any] = {"deleted": []}
+        for name, (serializer_class, object_type) in self.SERIALIZERS.items():
+            alive = []
+            for obj in changes[name]:
+                if getattr(obj, "deleted_at", None) is not None:
+                    data["deleted"].append({"type": object_type, "id": str(obj.id)})
+                else:
+                    alive.append(obj)
+            data[name] = serializer_class(alive, many=True, context=context).data
+        data["deleted"].extend(
+            {"type": tombstone.object_type, "id": str(tombstone.object_id)}
+            for tombstone in changes["tombstones"]
+        )
+        data["cursor"] = result["cursor"]
+        data["has_more"] = result["has_more"]
+        return Response(data, status=status.HTTP_200_OK)
+
+
 class BoxSummaryViewSet(viewsets.ViewSet):
     """ViewSet para resumos de caixinhas."""
 
@@ -1083,8 +1631,6 @@ class BoxSummaryViewSet(viewsets.ViewSet):
     def summarize_box(self, request: "Request", pk: str | None = None) -> Response:
         """Gera resumo de caixinha (com cache)."""
         from apps.bau_mental.models import Box
-        from apps.bau_mental.services.query import QueryService
-        from django.utils import timezone
 
         workspace = getattr(request, "workspace", None)
         if not workspace:
@@ -1110,60 +1656,5 @@ class BoxSummaryViewSet(viewsets.ViewSet):
                 status=status.HTTP_200_OK,
             )
 
-        # Buscar todas as notas da caixinha
-        notes = Note.objects.filter(
-            workspace=workspace,
-            box=box,
-            processing_status="completed",
-            transcript__isnull=False,
-        ).exclude(transcript="")
-
-        if not notes.exists():
-            return Response(
-                {"error": "Nenhuma nota encontrada na caixinha"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Preparar dados
-        notes_data = [
-            {
-                "id": str(note.id),
-                "transcript": note.transcript or "",
-                "created_at": note.created_at.strftime("%d/%m/%Y"),
-                "box_name": box.name,
-            }
-            for note in notes[:50]  # Limitar a 50 notas
-        ]
-
-        # Consultar IA para gerar resumo
-        query_service = QueryService()
-        if not query_service.is_available():
-            return Response(
-                {"error": "Serviço de consulta não disponível"},
-                status=status.HTTP_503_SERVICE_UNAVAILABLE,
-            )
-
-        try:
-            question = f"Faça um resumo completo e organizado de tudo que foi discutido ou mencionado sobre '{box.name}'. Inclua pontos principais, decisões, ideias e contexto temporal quando relevante."
-            result = query_service.query(question, notes_data, str(workspace.id))
-
-            # Salvar em cache
-            box.summary = result["answer"]
-            box.summary_generated_at = timezone.now()
-            box.summary_stale = False
-            box.save(update_fields=["summary", "summary_generated_at", "summary_stale"])
-
-            return Response(
-                {
-                    "summary": result["answer"],
-                    "sources": result.get("sources", []),
-                    "cached": False,
-                },
-                status=status.HTTP_200_OK,
-            )
-        except Exception as e:
-            return Response(
-                {"error": f"Erro ao gerar resumo: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        return _summarize_box_response(box)
 
@@ -85,3 +85,23 @@ def cache_invalidate_workspace(workspace_id: str, prefix: Optional[str] = None)
     return cache_invalidate_pattern(pattern)
 
 
+
+
+def cache_incr(key: str, delta: int = 1, timeout: Optional[int] = None) -> int:
+    """Incrementa contador no cache (cria com 0 se não existir).
+
+    Args:
+        key: Chave do contador
+        delta: Valor a somar
+        timeout: Expiração em segundos (None = sem expiração)
+
+    Returns:
+        Valor após o incremento (0 se o cache estiver indisponível)
+    """
+    try:
+        cache.add(key, 0, timeout)
+        return cache.incr(key, delta) or 0
+    except ValueError:
+        # Chave expirou entre add e incr (ou backend indisponível)
+        cache.set(key, delta, timeout)
+        return delta
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bau_mental', '0022_keyset_pagination_indexes'),
+        ('core', '0003_alter_notification_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='core_notifi_user_id_954cd4_idx'),
+        ),
+    ]
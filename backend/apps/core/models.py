@@ -40,6 +40,17 @@ class WorkspaceModel(SoftDeleteModel):
             models.Index(fields=["workspace", "deleted_at"]),
         ]
 
+    def save(self, *args, **kwargs) -> None:
+        """Salva; em saves parciais (update_fields) também grava updated_at.
+
+        Sem isso, auto_now não é aplicado e a alteração (ex: soft delete) fica
+        invisível para quem sincroniza por updated_at.
+        """
+        update_fields = kwargs.get("update_fields")
+        if update_fields and "updated_at" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "updated_at"]
+        super().save(*args, **kwargs)
+
 
 class BaseModel(SoftDeleteModel):
     """Base model sem workspace_id (para models globais).
@@ -256,6 +267,7 @@ class Notification(UUIDPrimaryKeyMixin, models.Model):
         indexes = [
             models.Index(fields=["user", "read", "created_at"]),
             models.Index(fields=["user", "type", "created_at"]),
+            models.Index(fields=["user", "created_at", "id"]),  # Paginação keyset
         ]
 
     def __str__(self) -> str:
@@ -0,0 +1,170 @@
+"""Paginação keyset (cursor) para listas grandes.
+
+Em vez de ``OFFSET`` (que percorre e descarta todas as linhas anteriores) e
+``COUNT(*)``, a próxima página começa depois da última linha da atual:
+``WHERE (a, b) < (última_a, última_b) ORDER BY a DESC, b DESC LIMIT n``. Com
+índice na ordenação, a página 500 custa o mesmo que a primeira.
+
+O cursor é a posição da última linha (valores das colunas de ordenação)
+codificada em base64, opaca para o cliente.
+
+``KeysetPagination`` aplica isso às listas do DRF: resposta ``{"next",
+"results"}``, sem ``count``.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Sequence, Tuple
+from uuid import UUID
+
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _json_value(value: Any) -> Any:
+    """Converte valor da posição para JSON (UUID e datas como texto)."""
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(position: Sequence[Any]) -> str:
+    """Codifica a posição (valores das colunas de ordenação) como cursor opaco."""
+    payload = json.dumps([_json_value(value) for value in position], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None, size: int) -> List[Any] | None:
+    """Decodifica o cursor recebido do cliente.
+
+    Args:
+        cursor: Cursor (None ou vazio: primeira página)
+        size: Quantidade esperada de valores na posição
+
+    Raises:
+        ValidationError: Se o cursor é inválido
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError({"cursor": "Cursor inválido"})
+    if not isinstance(position, list) or len(position) != size:
+        raise ValidationError({"cursor": "Cursor inválido"})
+    return position
+
+
+def keyset_filter(ordering: Sequence[Tuple[str, bool]], position: Sequence[Any]) -> Q:
+    """Condição "depois da posição" para a ordenação dada.
+
+    Args:
+        ordering: [(campo, descendente), ...] (o último campo deve ser único, ex: id)
+        position: Valores dos campos na última linha da página anterior
+
+    Returns:
+        Q equivalente a (a, b, ...) < (pa, pb, ...) respeitando a direção de cada campo
+    """
+    condition = Q()
+    equal = Q()
+    for (field, descending), value in zip(ordering, position):
+        lookup = "lt" if descending else "gt"
+        condition |= equal & Q(**{f"{field}__{lookup}": value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+class KeysetPagination(BasePagination):
+    """Paginação por cursor em (created_at, id), do mais recente para o mais antigo.
+
+    A ordenação pode ser trocada na view com ``keyset_ordering`` (mesmo formato
+    de ``keyset_filter``); o último campo deve ser único. A ordenação da view
+    (``ordering``/``?ordering=``) é substituída pela do cursor.
+    """
+
+    ordering: List[Tuple[str, bool]] = [("created_at", True), ("id", True)]
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+
+    def get_ordering(self, view: Any = None) -> List[Tuple[str, bool]]:
+        """Ordenação do cursor (da view, se definida)."""
+        return getattr(view, "keyset_ordering", None) or self.ordering
+
+    def get_page_size(self, request: Any) -> int:
+        """Tamanho da página (``?page_size=``, limitado a ``max_page_size``)."""
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def paginate_queryset(self, queryset: QuerySet, request: Any, view: Any = None) -> List[Any]:
+        """Retorna as linhas da página e guarda a posição da próxima."""
+        self.request = request
+        ordering = self.get_ordering(view)
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*[f"-{field}" if descending else field for field, descending in ordering])
+        position = decode_cursor(request.query_params.get(self.cursor_query_param), len(ordering))
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(ordering, position))
+
+        # Uma linha a mais indica se existe próxima página (sem COUNT)
+        rows = list(queryset[: page_size + 1])
+        self.next_position = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            self.next_position = [getattr(rows[-1], field) for field, _ in ordering]
+        return rows
+
+    def get_next_link(self) -> str | None:
+        """URL da próxima página (None na última)."""
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data: Any) -> Response:
+        """Resposta paginada: ``{"next", "results"}``."""
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Schema OpenAPI da resposta paginada."""
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view: Any) -> List[Dict[str, Any]]:
+        """Parâmetros de query da paginação (OpenAPI)."""
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Cursor da página (valor de `next` da resposta anterior)",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": f"Itens por página (máximo {self.max_page_size})",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -0,0 +1,187 @@
+"""Clientes OpenAI compartilhados pelo processo.
+
+Cada serviço (query, classificação, transcrição...) obtém seu cliente pelo
+nome, em vez de criar um ``OpenAI()`` por requisição/task: o cliente é criado
+na primeira chamada e reaproveitado, com conexões HTTP keep-alive (sem novo
+handshake TLS a cada chamada), timeouts e retries configuráveis.
+
+Os clientes são descartados no processo filho após ``fork`` (workers prefork
+do Celery/Gunicorn): conexões abertas no pai não são compartilhadas e cada
+processo cria as suas na primeira chamada.
+
+Configuração (env):
+    OPENAI_TIMEOUT               Timeout total de cada requisição (padrão: 60s)
+    OPENAI_CONNECT_TIMEOUT       Timeout de conexão (padrão: 5s)
+    OPENAI_MAX_RETRIES           Retries do SDK em erros transitórios (padrão: 2)
+    OPENAI_MAX_CONNECTIONS       Conexões simultâneas por serviço (padrão: 20)
+    OPENAI_MAX_KEEPALIVE         Conexões ociosas mantidas por serviço (padrão: 10)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict
+
+try:
+    import httpx
+    from openai import AsyncOpenAI, OpenAI
+    OPENAI_AVAILABLE = True
+except ImportError:
+    OPENAI_AVAILABLE = False
+    httpx = None
+    OpenAI = None
+    AsyncOpenAI = None
+
+logger = logging.getLogger("apps")
+
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+OPENAI_KEEPALIVE_EXPIRY = 30.0
+
+_clients: Dict[tuple, Any] = {}
+_async_clients: Dict[tuple, tuple] = {}
+_usage: Dict[str, Dict[str, float]] = defaultdict(
+    lambda: {"requests": 0, "errors": 0, "seconds": 0.0}
+)
+_lock = threading.Lock()
+
+
+def get_api_key() -> str | None:
+    """Chave da OpenAI (aceita OPENAI_API_KEY ou OPENAI_KEY)."""
+    return os.getenv("OPENAI_API_KEY") or os.getenv("OPENAI_KEY")
+
+
+def _timeout() -> "httpx.Timeout":
+    """Timeouts das requisições."""
+    return httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+
+def _limits() -> "httpx.Limits":
+    """Limites do pool de conexões."""
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    )
+
+
+def _record_request(request: "httpx.Request") -> None:
+    """Marca o início da requisição (hook do httpx)."""
+    request.extensions["started_at"] = time.perf_counter()
+
+
+def _response_recorder(service: str):
+    """Hook do httpx que contabiliza requisições, erros e tempo por serviço."""
+
+    def record(response: "httpx.Response") -> None:
+        started_at = response.request.extensions.get("started_at")
+        with _lock:
+            usage = _usage[service]
+            usage["requests"] += 1
+            if response.status_code >= 400:
+                usage["errors"] += 1
+            if started_at is not None:
+                usage["seconds"] += time.perf_counter() - started_at
+
+    return record
+
+
+def get_openai_client(service: str, api_key: str | None = None):
+    """Cliente OpenAI do serviço (criado uma vez por processo).
+
+    Args:
+        service: Nome do serviço (chave das métricas de uso)
+        api_key: Chave da API (padrão: OPENAI_API_KEY/OPENAI_KEY)
+
+    Returns:
+        Cliente OpenAI ou None se o SDK não estiver instalado ou sem chave
+    """
+    api_key = api_key or get_api_key()
+    if not OPENAI_AVAILABLE or not api_key:
+        return None
+
+    key = (service, api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                record = _response_recorder(service)
+                http_client = httpx.Client(
+                    timeout=_timeout(),
+                    limits=_limits(),
+                    event_hooks={"request": [_record_request], "response": [record]},
+                )
+                client = OpenAI(
+                    api_key=api_key,
+                    max_retries=OPENAI_MAX_RETRIES,
+                    timeout=_timeout(),
+                    http_client=http_client,
+                )
+                _clients[key] = client
+    return client
+
+
+def get_async_openai_client(service: str, api_key: str | None = None):
+    """Cliente AsyncOpenAI do serviço, reaproveitado dentro do mesmo event loop.
+
+    Conexões assíncronas ficam presas ao loop em que foram abertas; um loop
+    novo recebe um cliente novo.
+    """
+    api_key = api_key or get_api_key()
+    if not OPENAI_AVAILABLE or not api_key:
+        return None
+
+    loop = asyncio.get_running_loop()
+    key = (service, api_key)
+    cached = _async_clients.get(key)
+    if cached is not None and cached[0] is loop:
+        return cached[1]
+
+    async def record_request(request: "httpx.Request") -> None:
+        _record_request(request)
+
+    recorder = _response_recorder(service)
+
+    async def record_response(response: "httpx.Response") -> None:
+        recorder(response)
+
+    http_client = httpx.AsyncClient(
+        timeout=_timeout(),
+        limits=_limits(),
+        event_hooks={"request": [record_request], "response": [record_response]},
+    )
+    client = AsyncOpenAI(
+        api_key=api_key,
+        max_retries=OPENAI_MAX_RETRIES,
+        timeout=_timeout(),
+        http_client=http_client,
+    )
+    _async_clients[key] = (loop, client)
+    return client
+
+
+def get_usage_stats() -> Dict[str, Dict[str, float]]:
+    """Uso da OpenAI por serviço neste processo (requisições, erros, segundos)."""
+    with _lock:
+        return {service: dict(usage) for service, usage in _usage.items()}
+
+
+def reset_clients() -> None:
+    """Descarta os clientes e métricas do processo (usado após fork)."""
+    global _lock
+    # O lock pode ter sido copiado do pai enquanto adquirido
+    _lock = threading.Lock()
+    _clients.clear()
+    _async_clients.clear()
+    _usage.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_clients)
@@ -28,22 +28,51 @@ def pre_save_handler(sender, instance, **kwargs) -> None:
     if not hasattr(instance, "_meta"):
         return
 
-    # Salvar valores antigos se já existe
-    if instance.pk:
+    # Criação: não há valores antigos (UUIDPrimaryKeyMixin já define o pk
+    # antes do INSERT, então o pk não indica que a linha existe)
+    if instance._state.adding:
+        return
+
+    cache_key = f"{sender.__name__}_{instance.pk}"
+
+    # Models que guardam os valores carregados do banco (ex: Note._loaded_values)
+    # não precisam reler a linha, desde que o snapshot cubra todos os campos
+    # carregados na instância (campos adiados não são gravados pelo save)
+    fields = instance._meta.concrete_fields
+    loaded = getattr(instance, "_loaded_values", None)
+    old_instance = None
+    if loaded is not None and all(
+        field.attname in loaded for field in fields if field.attname in instance.__dict__
+    ):
+        loaded_fields = [field for field in fields if field.attname in loaded]
+        old_instance = sender.from_db(
+            instance._state.db, [field.attname for field in loaded_fields],
+            [loaded[field.attname] for field in loaded_fields],
+        )
+    elif instance.pk:
         try:
             old_instance = sender.objects.get(pk=instance.pk)
-            cache_key = f"{sender.__name__}_{instance.pk}"
-            _pre_save_cache[cache_key] = {}
-            for field in instance._meta.get_fields():
-                if hasattr(old_instance, field.name) and not field.many_to_many:
-                    try:
-                        _pre_save_cache[cache_key][field.name] = getattr(
-                            old_instance, field.name
-                        )
-                    except Exception:
-                        pass
         except (sender.DoesNotExist, Exception):
             pass
+    if old_instance is None:
+        return
+
+    # Salvar valores antigos
+    _pre_save_cache[cache_key] = {}
+    # Apenas campos concretos: relações reversas (ex: one-to-one) custariam
+    # uma query cada e não são dados do próprio registro
+    for field in fields:
+        # Campo adiado: ler custaria uma query e o save não o grava
+        if field.attname not in old_instance.__dict__:
+            continue
+        # Relação com o mesmo ID não muda; buscar o objeto antigo custaria uma query
+        if field.is_relation and getattr(old_instance, field.attname) == getattr(instance, field.attname):
+            continue
+        if hasattr(old_instance, field.name):
+            try:
+                _pre_save_cache[cache_key][field.name] = getattr(old_instance, field.name)
+            except Exception:
+                pass
 
 
 @receiver(post_save)
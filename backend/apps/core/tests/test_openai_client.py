@@ -0,0 +1,53 @@
+"""Testes para o registro de clientes OpenAI compartilhados."""
+
+from unittest.mock import patch
+
+import httpx
+from django.test import SimpleTestCase
+
+from apps.core.services import openai_client
+from apps.core.services.openai_client import get_openai_client, get_usage_stats, reset_clients
+
+
+class OpenAIClientRegistryTestCase(SimpleTestCase):
+    """Testes para get_openai_client."""
+
+    def setUp(self):
+        """Começa cada teste com o registro vazio."""
+        reset_clients()
+        self.addCleanup(reset_clients)
+
+    def test_cliente_reaproveitado_por_servico(self):
+        """Testa que o mesmo serviço recebe o mesmo cliente (pool de conexões)."""
+        client = get_openai_client("query", "sk-test")
+
+        self.assertIs(get_openai_client("query", "sk-test"), client)
+        self.assertIsNot(get_openai_client("classification", "sk-test"), client)
+        self.assertEqual(client.max_retries, openai_client.OPENAI_MAX_RETRIES)
+
+    def test_sem_chave_retorna_none(self):
+        """Testa que sem chave não há cliente."""
+        with patch.dict("os.environ", {"OPENAI_API_KEY": "", "OPENAI_KEY": ""}):
+            self.assertIsNone(get_openai_client("query"))
+
+    def test_metricas_por_servico(self):
+        """Testa contagem de requisições e erros por serviço."""
+        client = get_openai_client("embeddings", "sk-test")
+        client._client._transport = httpx.MockTransport(
+            lambda request: httpx.Response(200, json={"object": "list", "data": []})
+        )
+
+        client.models.list()
+        client.models.list()
+
+        usage = get_usage_stats()["embeddings"]
+        self.assertEqual(usage["requests"], 2)
+        self.assertEqual(usage["errors"], 0)
+
+    def test_reset_apos_fork_descarta_clientes(self):
+        """Testa que o processo filho cria clientes próprios."""
+        client = get_openai_client("query", "sk-test")
+
+        reset_clients()
+
+        self.assertIsNot(get_openai_client("query", "sk-test"), client)
@@ -8,6 +8,7 @@ from rest_framework import permissions, serializers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from apps.core.pagination import KeysetPagination
 from apps.core.permissions import WorkspaceObjectPermission
 
 if TYPE_CHECKING:
@@ -319,6 +320,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Notification.objects.all() if Notification else models.QuerySet().none()
     serializer_class = NotificationSerializer if NotificationSerializer else None
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self) -> models.QuerySet:
         """Retorna apenas notificações do usuário autenticado."""
@@ -5,12 +5,7 @@ import json
 from typing import Any, Dict, Optional
 from decimal import Decimal
 
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    OpenAI = None
+from apps.core.services.openai_client import OPENAI_AVAILABLE, get_openai_client
 
 
 class OpenAIService:
@@ -20,7 +15,7 @@ class OpenAIService:
         """Inicializa o serviço OpenAI."""
         self.api_key = os.getenv("OPENAI_KEY") or os.getenv("OPENAI_API_KEY")
         if OPENAI_AVAILABLE and self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
+            self.client = get_openai_client("investments", self.api_key)
         else:
             self.client = None
 
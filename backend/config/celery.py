@@ -28,6 +28,18 @@ app.conf.beat_schedule = {
         "task": "apps.bau_mental.tasks.cleanup_expired_audios",
         "schedule": crontab(hour=3, minute=0),  # Todo dia às 3h
     },
+    "bau-mental-reconcile-box-counters": {
+        "task": "apps.bau_mental.tasks.reconcile_box_counters",
+        "schedule": crontab(minute=15),  # A cada hora (minuto 15)
+    },
+    "bau-mental-rebuild-box-classifiers": {
+        "task": "apps.bau_mental.tasks.rebuild_box_classifiers",
+        "schedule": crontab(hour=4, minute=30),  # Todo dia às 4h30
+    },
+    "bau-mental-requeue-pending-classifications": {
+        "task": "apps.bau_mental.tasks.requeue_pending_classifications",
+        "schedule": crontab(minute="*/5"),  # A cada 5 min
+    },
     # Background jobs do módulo de investimentos
     "investments.update_market_data": {
         "task": "investments.update_market_data",
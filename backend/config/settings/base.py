@@ -519,6 +519,40 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutos
 CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutos
+# Um worker busca uma task por vez: prioridades e filas valem já no próximo item
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Prioridades no Redis (0 = mais alta); cada nível vira uma lista separada
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "queue_order_strategy": "priority",
+    "priority_steps": list(range(10)),
+    "sep": ":",
+}
+CELERY_TASK_DEFAULT_PRIORITY = 5
+# Filas do Baú Mental (workers e concorrência por fila: ver apps/bau_mental/routing.py).
+# Transcrição: fila da API ou transcription_local + prioridade por tamanho do áudio.
+CELERY_TASK_ROUTES = (
+    "apps.bau_mental.routing.route_transcription",
+    {
+        "apps.bau_mental.tasks.classify_note": {"queue": "classification"},
+        "apps.bau_mental.tasks.classify_pending_notes": {"queue": "classification"},
+        "apps.bau_mental.tasks.index_note_embedding": {"queue": "classification"},
+        "apps.bau_mental.tasks.update_thread_memory": {"queue": "classification"},
+        "apps.bau_mental.tasks.cleanup_expired_audios": {"queue": "maintenance"},
+        "apps.bau_mental.tasks.reconcile_box_counters": {"queue": "maintenance"},
+        "apps.bau_mental.tasks.rebuild_box_classifiers": {"queue": "maintenance"},
+        "apps.bau_mental.tasks.requeue_pending_classifications": {"queue": "maintenance"},
+        "apps.core.tasks.logging.cleanup_old_logs": {"queue": "maintenance"},
+    },
+)
+# Limite de chamadas à OpenAI por worker (formato Celery: "50/m"). Com N workers
+# consumindo a fila, use limite da conta / N.
+BAU_MENTAL_TRANSCRIPTION_RATE_LIMIT = os.environ.get("BAU_MENTAL_TRANSCRIPTION_RATE_LIMIT", "50/m")
+BAU_MENTAL_CLASSIFICATION_RATE_LIMIT = os.environ.get("BAU_MENTAL_CLASSIFICATION_RATE_LIMIT", "300/m")
+CELERY_TASK_ANNOTATIONS = {
+    "apps.bau_mental.tasks.transcribe_audio": {"rate_limit": BAU_MENTAL_TRANSCRIPTION_RATE_LIMIT},
+    "apps.bau_mental.tasks.classify_note": {"rate_limit": BAU_MENTAL_CLASSIFICATION_RATE_LIMIT},
+    "apps.bau_mental.tasks.index_note_embedding": {"rate_limit": BAU_MENTAL_CLASSIFICATION_RATE_LIMIT},
+}
 
 # Cache Configuration - Redis
 # Usa Redis DB 1 (DB 0 é para Celery)
@@ -32,21 +32,28 @@ export function ThreadView({ boxId }: ThreadViewProps) {
   const hasSentInitialQuery = useRef(false);
 
   const { data: thread, isLoading: threadLoading } = useThread(threadId);
-  const { data: messages, isLoading: messagesLoading } = useThreadMessages(threadId);
+  const {
+    data: messages,
+    isLoading: messagesLoading,
+    hasNextPage: hasOlderMessages,
+    fetchNextPage: fetchOlderMessages,
+    isFetchingNextPage: loadingOlderMessages,
+  } = useThreadMessages(threadId);
   const createThreadMutation = useCreateThread();
   const addMessageMutation = useAddThreadMessage();
   const pinSummaryMutation = usePinThreadSummary();
 
   const messagesArray = Array.isArray(messages) ? messages : [];
+  const lastMessageId = messagesArray[messagesArray.length - 1]?.id;
 
-  // Scroll para o final quando novas mensagens chegarem
+  // Scroll para o final quando novas mensagens chegarem (não ao carregar anteriores)
   useEffect(() => {
-    if (messagesArray.length > 0) {
+    if (lastMessageId) {
       setTimeout(() => {
         messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
       }, 100);
     }
-  }, [messagesArray.length]);
+  }, [lastMessageId]);
 
   // Refetch thread quando mensagens mudarem para atualizar título
   const queryClient = useQueryClient();
@@ -232,6 +239,21 @@ export function ThreadView({ boxId }: ThreadViewProps) {
               </div>
             ) : (
               <>
+                {hasOlderMessages && (
+                  <div className="flex justify-center">
+                    <Button
+                      variant="ghost"
+                      size="sm"
+                      onClick={() => fetchOlderMessages()}
+                      disabled={loadingOlderMessages}
+                    >
+                      {loadingOlderMessages && (
+                        <Loader2 className="w-4 h-4 mr-2 animate-spin" />
+                      )}
+                      Carregar mensagens anteriores
+                    </Button>
+                  </div>
+                )}
                 {messagesArray.map((msg) => (
                   <MessageBubble
                     key={msg.id}
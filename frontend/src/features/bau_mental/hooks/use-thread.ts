@@ -1,6 +1,11 @@
 /** Hooks para gerenciar threads. */
 
-import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
+import {
+  useInfiniteQuery,
+  useQuery,
+  useMutation,
+  useQueryClient,
+} from "@tanstack/react-query";
 import { apiClient } from "@/config/api";
 
 export interface Thread {
@@ -92,19 +97,45 @@ export function useThread(id: string | null) {
   });
 }
 
-/** Busca mensagens de uma thread. */
+interface ThreadMessagesPage {
+  next: string | null;
+  results: ThreadMessage[];
+}
+
+/** Cursor da próxima página (mensagens mais antigas) a partir do link `next`. */
+function nextCursor(next: string | null): string | undefined {
+  if (!next) return undefined;
+  return new URL(next, window.location.origin).searchParams.get("cursor") ?? undefined;
+}
+
+/**
+ * Busca mensagens de uma thread.
+ *
+ * A API pagina por cursor, mais recentes primeiro: a primeira página traz as
+ * últimas mensagens e `fetchNextPage` carrega as anteriores. `data` vem em
+ * ordem cronológica (todas as páginas carregadas).
+ */
 export function useThreadMessages(threadId: string | null) {
-  return useQuery<ThreadMessage[]>({
+  return useInfiniteQuery({
     queryKey: ["bau_mental", "threads", threadId || "null", "messages"],
-    queryFn: async () => {
+    queryFn: async ({ pageParam }): Promise<ThreadMessagesPage> => {
       if (!threadId) {
         throw new Error("threadId é obrigatório");
       }
       const response = await apiClient.get(
-        `/bau-mental/threads/${threadId}/messages/`
+        `/bau-mental/threads/${threadId}/messages/`,
+        { params: pageParam ? { cursor: pageParam } : undefined }
       );
-      return response.data || [];
+      const data = response.data?.results || response.data || [];
+      return {
+        next: response.data?.next ?? null,
+        results: Array.isArray(data) ? data : [],
+      };
     },
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => nextCursor(lastPage.next),
+    select: (data): ThreadMessage[] =>
+      data.pages.flatMap((page) => page.results).reverse(),
     enabled: !!threadId && threadId !== "undefined",
   });
 }